@@ -29,20 +29,121 @@ class Settings:
     WEAVIATE_API_KEY: str = os.getenv("WEAVIATE_API_KEY", "your_weaviate_api_key_here")
     WEAVIATE_COLLECTION: str = "PhysicsChunk"
     USE_LOCAL_WEAVIATE: bool = os.getenv("USE_LOCAL_WEAVIATE", "false").lower() == "true"
+    WEAVIATE_HTTP_PORT: int = int(os.getenv("WEAVIATE_HTTP_PORT", "8080"))  # Local only; a port in WEAVIATE_URL wins
+    WEAVIATE_GRPC_PORT: int = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))  # Local only
+    WEAVIATE_POOL_CONNECTIONS: int = 20  # Keep-alive HTTP connections per worker
+    WEAVIATE_POOL_MAXSIZE: int = 100
+    WEAVIATE_KEEPALIVE_SECONDS: float = 30.0  # gRPC keep-alive ping interval
+    WEAVIATE_HEALTH_INTERVAL: float = float(os.getenv("WEAVIATE_HEALTH_INTERVAL", "10"))  # Seconds between liveness pings (0 = off)
+    WEAVIATE_RECONNECT_MAX_BACKOFF: float = 30.0
     
     # File Paths
     BASE_DIR: Path = Path(__file__).parent.parent.parent
     DATA_DIR: Path = BASE_DIR / "data"
-    PHYSICS_TEXT_PATH: str = str(Path(__file__).parent.parent.parent.parent / "Physics" / "combined_physics.md")
+    # The book's chapter files (chapter_*.md, read in chapter order)
+    PHYSICS_BOOK_DIR: str = os.getenv("PHYSICS_BOOK_DIR", str(BASE_DIR.parent / "Physics"))
+    # Memory-mapped chunk store (tools/build_chunk_store.py); used instead of re-chunking the book when present
+    CHUNK_STORE_PATH: str = os.getenv("CHUNK_STORE_PATH", str(DATA_DIR / "chunk_store"))
+    # Index snapshot (tools/index_snapshot.py) restored by /initialize instead of re-embedding the corpus
+    INDEX_SNAPSHOT_PATH: str = os.getenv("INDEX_SNAPSHOT_PATH", "")
+    # Precomputed chunk neighbours (tools/build_knn_graph.py) answering /similar by doc_id
+    KNN_GRAPH_PATH: str = os.getenv("KNN_GRAPH_PATH", str(DATA_DIR / "knn_graph"))
+    KNN_GRAPH_K: int = 10  # Neighbours stored per chunk (SimilarityRequest.top_k is at most 10)
+    # Bengali/English concept glossary (written by tools/build_chunk_store.py) answering /explain without a search
+    GLOSSARY_PATH: str = os.getenv("GLOSSARY_PATH", str(DATA_DIR / "glossary.json"))
+    
+    # Ingestion Configuration (tools/build_chunk_store.py, and indexing without a chunk store)
+    SUBJECT_BOOKS: str = os.getenv("SUBJECT_BOOKS", "")  # More books to build stores for, e.g. "chemistry=/books/Chemistry"
+    CORPUS_CACHE_DIR: str = os.getenv("CORPUS_CACHE_DIR", str(DATA_DIR / "corpus_cache"))  # Per-chapter build results by content hash
+    MIN_CHUNK_CHARS: int = 80  # Text besides headings a chunk needs to stand alone; shorter ones are merged forward
+    DEDUP_SIMILARITY: float = 0.85  # Estimated Jaccard similarity (MinHash) at which a chunk is a near-duplicate
+    DEDUP_REPORT_PATH: str = os.getenv("DEDUP_REPORT_PATH", str(DATA_DIR / "dedup_report.json"))
     
     # Search Configuration
     DEFAULT_TOP_K: int = 5
     HYBRID_ALPHA: float = 0.5  # Balance between vector (1.0) and keyword (0.0) search
+    MAX_BATCH_QUERIES: int = 64  # Queries accepted by /search/batch
+    BATCH_SEARCH_CONCURRENCY: int = 8  # Concurrent Weaviate queries per batch
+    # search_type="auto": keyword search for short queries, glossary terms and formulas; hybrid if it looks weak
+    ROUTER_KEYWORD_MAX_WORDS: int = 3
+    ROUTER_MIN_KEYWORD_SCORE: float = float(os.getenv("ROUTER_MIN_KEYWORD_SCORE", "2.0"))  # Best BM25 score
+    ROUTER_MIN_VECTOR_SCORE: float = float(os.getenv("ROUTER_MIN_VECTOR_SCORE", "0.5"))  # Best cosine similarity
+    # Second stage: over-fetch RERANK_OVERFETCH x top_k candidates, rerank them locally and diversify with MMR
+    RERANK_ENABLED: bool = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+    RERANK_OVERFETCH: int = 4
+    RERANK_MAX_CANDIDATES: int = 50
+    RERANK_BUDGET_MS: float = float(os.getenv("RERANK_BUDGET_MS", "20"))
+    MMR_LAMBDA: float = float(os.getenv("MMR_LAMBDA", "0.8"))  # 1.0 ranks by relevance alone
     
     # Generation Configuration
     MAX_RESPONSE_TOKENS: int = 1000
     TEMPERATURE: float = 0.7
     
+    # Gemini Quota Configuration (shared by embedding and generation calls)
+    GEMINI_REQUESTS_PER_MINUTE: int = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "1500"))
+    GEMINI_TOKENS_PER_MINUTE: int = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+    GEMINI_BATCH_RESERVE: float = float(os.getenv("GEMINI_BATCH_RESERVE", "0.25"))  # Budget share kept for interactive traffic
+    EMBEDDING_BATCH_SIZE: int = 100  # Texts per embed_content call during indexing
+    
+    # Latency Budget Configuration (overridable per request via X-Request-Budget-Ms)
+    REQUEST_BUDGET_MS: int = int(os.getenv("REQUEST_BUDGET_MS", "15000"))
+    MAX_REQUEST_BUDGET_MS: int = 60000
+    EMBEDDING_STAGE_MS: int = 2000  # Longest wait for a query embedding before falling back to keyword search
+    RETRIEVAL_RESERVE_MS: int = 1000  # Budget kept for the Weaviate query after embedding
+    GENERATION_MIN_MS: int = 1500  # Below this remaining budget, answer extractively instead of generating
+    GEMINI_STAGE_WORKERS: int = int(os.getenv("GEMINI_STAGE_WORKERS", "16"))  # Threads for request-path Gemini stages
+    
+    # Resilience Configuration (timeouts are per attempt, in seconds)
+    GEMINI_EMBED_TIMEOUT: float = float(os.getenv("GEMINI_EMBED_TIMEOUT", "10"))
+    GEMINI_GENERATE_TIMEOUT: float = float(os.getenv("GEMINI_GENERATE_TIMEOUT", "30"))
+    WEAVIATE_QUERY_TIMEOUT: float = float(os.getenv("WEAVIATE_QUERY_TIMEOUT", "5"))
+    UPSTREAM_MAX_ATTEMPTS: int = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+    UPSTREAM_POOL_SIZE: int = int(os.getenv("UPSTREAM_POOL_SIZE", "32"))  # Threads running timed and hedged attempts
+    HEDGE_REQUESTS: bool = os.getenv("HEDGE_REQUESTS", "true").lower() == "true"  # Embedding and Weaviate queries only
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_SECONDS: float = 30.0
+    
+    # Cache Configuration
+    EMBEDDING_CACHE_SIZE: int = 2048
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_TTL: int = 24 * 3600  # Seconds a generated answer stays usable as a fallback
+    # SQLite file shared by all workers on the host as a second cache tier ("" keeps caches per process)
+    SHARED_CACHE_PATH: str = os.getenv("SHARED_CACHE_PATH", "")
+    SHARED_CACHE_MAX_ENTRIES: int = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "50000"))  # Per cache
+    
+    # Multi-process Serving (run_server.py --workers)
+    SERVER_WORKERS: int = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))  # Gemini quotas are split between workers
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30  # In-flight requests get this long to finish on restart
+    
+    # Subjects (ids match the frontend subject selector; one collection per subject)
+    DEFAULT_SUBJECT: str = "physics"  # Served by WEAVIATE_COLLECTION
+    SUBJECT_COLLECTIONS: str = os.getenv("SUBJECT_COLLECTIONS", "")  # e.g. "chemistry=ChemistryChunk,biology=BiologyChunk"
+    
+    # Index Versioning (WEAVIATE_COLLECTION is an alias for PhysicsChunk_v{n}; see tools/reindex.py)
+    INDEX_POINTER: str = os.getenv("INDEX_POINTER", "alias")  # "alias" (Weaviate collection alias) or "file" (Weaviate < 1.32)
+    INDEX_POINTER_PATH: str = os.getenv("INDEX_POINTER_PATH", str(DATA_DIR / "index_pointer.json"))  # Pointer file, and build lock files
+    INDEX_POINTER_REFRESH: float = 1.0  # Seconds between checks for a swap made by another process
+    INDEX_KEEP_VERSIONS: int = int(os.getenv("INDEX_KEEP_VERSIONS", "3"))  # Including the live one
+    INDEX_SMOKE_SAMPLES: int = 5  # Objects that must find themselves by vector before a swap
+    INDEX_SMOKE_QUERIES: list = [
+        "বল কাকে বলে?",
+        "নিউটনের গতির দ্বিতীয় সূত্র",
+        "কাজ, শক্তি ও ক্ষমতা",
+        "আলোর প্রতিফলন"
+    ]
+    
+    # Startup (the server accepts traffic once clients are connected and warm-up is done; see GET /ready)
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_QUERIES: int = int(os.getenv("WARMUP_QUERIES", "2"))  # INDEX_SMOKE_QUERIES sent end to end
+    WARMUP_TIMEOUT: float = 30.0  # Seconds of warm-up before reporting ready anyway
+    
+    # Traffic Capture (opt-in: anonymized request payloads for benchmarks/replay.py)
+    TRAFFIC_CAPTURE_ENABLED: bool = os.getenv("TRAFFIC_CAPTURE_ENABLED", "false").lower() == "true"
+    TRAFFIC_CAPTURE_PATH: str = os.getenv("TRAFFIC_CAPTURE_PATH", "logs/traffic.ndjson")
+    TRAFFIC_CAPTURE_MAX_BYTES: int = int(os.getenv("TRAFFIC_CAPTURE_MAX_BYTES", str(50 * 1024 * 1024)))
+    TRAFFIC_CAPTURE_BACKUPS: int = 10
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "1.0"))
+    
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -64,25 +165,13 @@ class Settings:
     HEALTH_CHECK_TIMEOUT: int = 5
     
     @classmethod
-    def validate_physics_text(cls) -> bool:
-        """Validate that physics text file exists"""
-        physics_path = Path(cls.PHYSICS_TEXT_PATH)
-        
-        if not physics_path.exists():
-            # Try alternative paths
-            alternative_paths = [
-                Path(__file__).parent.parent.parent.parent / "Physics" / "combined_physics.md",
-                Path.cwd() / "Physics" / "combined_physics.md",
-                Path("/home/risad/projects/physics_embedding/Physics/combined_physics.md")
-            ]
-            
-            for alt_path in alternative_paths:
-                if alt_path.exists():
-                    cls.PHYSICS_TEXT_PATH = str(alt_path)
-                    return True
-            
-            raise FileNotFoundError(f"Physics text file not found. Searched paths: {[str(p) for p in alternative_paths]}")
-        
+    def validate_physics_book(cls) -> bool:
+        """Validate that the physics book directory holds chapter files"""
+        if not any(Path(cls.PHYSICS_BOOK_DIR).glob("chapter_*.md")):
+            raise FileNotFoundError(
+                f"No chapter_*.md files in {cls.PHYSICS_BOOK_DIR} and no chunk store at {cls.CHUNK_STORE_PATH}: "
+                f"set PHYSICS_BOOK_DIR to the book or build the store (tools/build_chunk_store.py)"
+            )
         return True
     
     @classmethod
@@ -113,6 +202,68 @@ class Settings:
             'collection_name': cls.WEAVIATE_COLLECTION,
             'use_local': cls.USE_LOCAL_WEAVIATE
         }
+    
+    @classmethod
+    def get_weaviate_connection_config(cls) -> dict:
+        """Get Weaviate connection pool, port and keep-alive configuration as dictionary"""
+        return {
+            'http_port': cls.WEAVIATE_HTTP_PORT,
+            'grpc_port': cls.WEAVIATE_GRPC_PORT,
+            'pool_connections': cls.WEAVIATE_POOL_CONNECTIONS,
+            'pool_maxsize': cls.WEAVIATE_POOL_MAXSIZE,
+            'keepalive_seconds': cls.WEAVIATE_KEEPALIVE_SECONDS,
+            'query_timeout': max(cls.WEAVIATE_QUERY_TIMEOUT * 2, 10.0),  # The guard enforces the tighter limit
+            'health_interval': cls.WEAVIATE_HEALTH_INTERVAL,
+            'max_backoff': cls.WEAVIATE_RECONNECT_MAX_BACKOFF
+        }
+    
+    @classmethod
+    def get_breaker_config(cls) -> dict:
+        """Get circuit breaker configuration as dictionary"""
+        return {
+            'failure_threshold': cls.BREAKER_FAILURE_THRESHOLD,
+            'reset_timeout': cls.BREAKER_RESET_SECONDS
+        }
+    
+    @classmethod
+    def get_subject_collections(cls) -> dict:
+        """Collection per subject, the default subject first"""
+        collections = {cls.DEFAULT_SUBJECT: cls.WEAVIATE_COLLECTION}
+        for item in cls.SUBJECT_COLLECTIONS.split(','):
+            subject, _, collection = item.partition('=')
+            if subject.strip() and collection.strip():
+                collections[subject.strip().lower()] = collection.strip()
+        return collections
+    
+    @classmethod
+    def get_subject_books(cls) -> dict:
+        """(book directory, chunk store path) per subject, the default subject first"""
+        books = {cls.DEFAULT_SUBJECT: (cls.PHYSICS_BOOK_DIR, cls.CHUNK_STORE_PATH)}
+        for item in cls.SUBJECT_BOOKS.split(','):
+            subject, _, book_dir = item.partition('=')
+            subject = subject.strip().lower()
+            if subject and book_dir.strip() and subject not in books:
+                books[subject] = (book_dir.strip(), str(cls.DATA_DIR / f"chunk_store_{subject}"))
+        return books
+    
+    @classmethod
+    def get_traffic_capture_config(cls) -> dict:
+        """Get traffic capture configuration as dictionary"""
+        return {
+            'path': cls.TRAFFIC_CAPTURE_PATH,
+            'max_bytes': cls.TRAFFIC_CAPTURE_MAX_BYTES,
+            'backups': cls.TRAFFIC_CAPTURE_BACKUPS,
+            'sample_rate': cls.TRAFFIC_CAPTURE_SAMPLE_RATE
+        }
+    
+    @classmethod
+    def get_gemini_quota_config(cls) -> dict:
+        """Get this worker's share of the Gemini quota as dictionary"""
+        return {
+            'requests_per_minute': max(1, cls.GEMINI_REQUESTS_PER_MINUTE // cls.SERVER_WORKERS),
+            'tokens_per_minute': max(1, cls.GEMINI_TOKENS_PER_MINUTE // cls.SERVER_WORKERS),
+            'batch_reserve': cls.GEMINI_BATCH_RESERVE
+        }
 
 
 # Global settings instance
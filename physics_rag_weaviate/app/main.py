@@ -2,23 +2,30 @@
 FastAPI application for Physics RAG System with Weaviate
 """
 
+import time
+
+_import_started = time.perf_counter()
+
 import logging
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, status, Depends
+from typing import Optional
+from fastapi import FastAPI, HTTPException, status, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from .config.settings import get_settings, Settings
 from .services.rag_service import WeaviateRAGService
+from .services.deadline import Deadline, DeadlineExceeded
+from .services.traffic_recorder import TrafficRecorder, TrafficCaptureMiddleware
 from .models.requests import (
     SearchRequest, ChatRequest, ConceptRequest, 
-    SimilarityRequest, InitializeRequest
+    SimilarityRequest, InitializeRequest, BatchSearchRequest, RollbackRequest, DocumentsRequest
 )
 from .models.responses import (
-    SearchResponse, ChatResponse, ConceptResponse,
-    SimilarityResponse, ServiceStats, HealthCheckResponse,
-    InitializeResponse, ErrorResponse
+    SearchResponse, ChatResponse, ConceptResponse, BatchSearchResponse,
+    SimilarityResponse, DocumentsResponse, SuggestResponse, ServiceStats, HealthCheckResponse,
+    InitializeResponse, IndexStatusResponse, ReadinessResponse, ErrorResponse
 )
 
 # Setup logging
@@ -31,6 +38,9 @@ logger = logging.getLogger(__name__)
 # Global RAG service instance
 rag_service: WeaviateRAGService = None
 
+# Opt-in traffic capture (TRAFFIC_CAPTURE_ENABLED)
+traffic_recorder: Optional[TrafficRecorder] = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -42,6 +52,9 @@ async def lifespan(app: FastAPI):
         logger.info("Starting Physics RAG API with Weaviate...")
         settings = get_settings()
         rag_service = WeaviateRAGService(settings)
+        # Connect and warm up before uvicorn accepts traffic for this worker
+        await rag_service.start(warm_up=settings.WARMUP_ENABLED)
+        rag_service.startup['import_ms'] = IMPORT_MS
         logger.info("RAG service initialized successfully")
         
         yield
@@ -53,6 +66,8 @@ async def lifespan(app: FastAPI):
         # Shutdown
         if rag_service:
             rag_service.close()
+        if traffic_recorder:
+            traffic_recorder.close()
         logger.info("Physics RAG API shutdown complete")
 
 
@@ -73,6 +88,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record anonymized request payloads for replay with benchmarks/replay.py
+if get_settings().TRAFFIC_CAPTURE_ENABLED:
+    traffic_recorder = TrafficRecorder(**get_settings().get_traffic_capture_config())
+    app.add_middleware(TrafficCaptureMiddleware, recorder=traffic_recorder)
+
+
+class FirstRequestTimer:
+    """ASGI middleware recording the latency of the first real request after startup"""
+    
+    PROBE_PATHS = ("/", "/ready", "/health")
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        service = rag_service
+        if (scope['type'] != 'http' or service is None or scope['path'] in self.PROBE_PATHS
+                or 'first_request' in service.startup):
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            service.record_first_request(scope['path'], (time.perf_counter() - start) * 1000)
+
+
+app.add_middleware(FirstRequestTimer)
+
 
 def get_rag_service() -> WeaviateRAGService:
     """Dependency to get RAG service instance"""
@@ -84,6 +129,25 @@ def get_rag_service() -> WeaviateRAGService:
     return rag_service
 
 
+def check_subject(subject: Optional[str], service: WeaviateRAGService) -> None:
+    """Reject subjects that have no collection"""
+    if subject is not None and subject not in service.shards:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown subject '{subject}'. Available: {', '.join(service.shards)}"
+        )
+
+
+def get_deadline(
+    x_request_budget_ms: Optional[int] = Header(
+        None, description="End-to-end latency budget for this request in milliseconds"
+    ),
+    service: WeaviateRAGService = Depends(get_rag_service)
+) -> Deadline:
+    """Dependency to start the request's latency budget"""
+    return service.new_deadline(x_request_budget_ms)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
@@ -131,6 +195,20 @@ async def health_check(service: WeaviateRAGService = Depends(get_rag_service)):
         )
 
 
+@app.get("/ready", response_model=ReadinessResponse, summary="Readiness probe")
+async def readiness():
+    """Ready once clients are connected and warm-up has finished (cheap; no upstream calls)"""
+    if rag_service is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="RAG service not initialized"
+        )
+    report = ReadinessResponse(ready=rag_service.ready, **rag_service.startup)
+    if not report.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=report.dict())
+    return report
+
+
 @app.get("/stats", response_model=ServiceStats, summary="Service statistics")
 async def get_stats(service: WeaviateRAGService = Depends(get_rag_service)):
     """Get service statistics and configuration"""
@@ -179,12 +257,57 @@ async def initialize_collection(
         )
 
 
+@app.get("/subjects", summary="Searchable subjects")
+async def list_subjects(service: WeaviateRAGService = Depends(get_rag_service)):
+    """Subjects with a collection, and the collection serving each"""
+    return {
+        'default_subject': service.default_subject,
+        'subjects': {subject: shard.collection_name for subject, shard in service.shards.items()}
+    }
+
+
+@app.get("/index", response_model=IndexStatusResponse, summary="Index versions")
+async def index_status(service: WeaviateRAGService = Depends(get_rag_service)):
+    """Live index version, versions kept for rollback and reindex progress"""
+    return IndexStatusResponse(**await asyncio.to_thread(service.get_index_status))
+
+
+@app.post("/index/reindex", response_model=IndexStatusResponse, status_code=status.HTTP_202_ACCEPTED,
+          summary="Rebuild the index without downtime")
+async def reindex(service: WeaviateRAGService = Depends(get_rag_service)):
+    """Build the next index version in the background; it goes live once validated"""
+    if service.reindex_status.get('state') in ('building', 'validating'):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Reindex to version {service.reindex_status.get('version')} already running"
+        )
+    
+    service.start_reindex()
+    await asyncio.sleep(0)  # Let the build claim its version before reporting status
+    return IndexStatusResponse(**await asyncio.to_thread(service.get_index_status))
+
+
+@app.post("/index/rollback", response_model=IndexStatusResponse, summary="Serve an earlier index version")
+async def rollback_index(
+    request: RollbackRequest,
+    service: WeaviateRAGService = Depends(get_rag_service)
+):
+    """Point the alias back at an earlier index version"""
+    try:
+        await asyncio.to_thread(service.rollback_index, request.version)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return IndexStatusResponse(**await asyncio.to_thread(service.get_index_status))
+
+
 @app.post("/search", response_model=SearchResponse, summary="Search physics content")
 async def search_physics(
     request: SearchRequest,
-    service: WeaviateRAGService = Depends(get_rag_service)
+    service: WeaviateRAGService = Depends(get_rag_service),
+    deadline: Deadline = Depends(get_deadline)
 ):
     """Search for physics content using hybrid, vector, or keyword search"""
+    check_subject(request.subject, service)
     try:
         logger.info(f"Search request: {request.query[:50]}... (type: {request.search_type})")
         
@@ -192,7 +315,10 @@ async def search_physics(
             query=request.query,
             search_type=request.search_type,
             top_k=request.top_k,
-            alpha=request.alpha
+            alpha=request.alpha,
+            deadline=deadline,
+            subject=request.subject,
+            include_content=request.include_content
         )
         
         return SearchResponse(
@@ -200,9 +326,17 @@ async def search_physics(
             query=request.query,
             search_type=request.search_type,
             total_results=len(results),
-            search_time=results[0].get('search_time') if results else None
+            search_time=results[0].get('search_time') if results else None,
+            degraded=deadline.degraded,
+            degraded_reasons=deadline.degraded_reasons
         )
         
+    except DeadlineExceeded as e:
+        logger.error(f"Search exceeded its latency budget: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Search exceeded its latency budget: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Search failed: {str(e)}")
         raise HTTPException(
@@ -211,12 +345,55 @@ async def search_physics(
         )
 
 
+@app.post("/search/batch", response_model=BatchSearchResponse, summary="Run many searches in one request")
+async def search_physics_batch(
+    request: BatchSearchRequest,
+    service: WeaviateRAGService = Depends(get_rag_service),
+    deadline: Deadline = Depends(get_deadline)
+):
+    """Run up to MAX_BATCH_QUERIES searches with one embedding call and concurrent retrieval"""
+    settings = get_settings()
+    if len(request.queries) > settings.MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.MAX_BATCH_QUERIES} queries per batch"
+        )
+    for query in request.queries:
+        check_subject(query.subject, service)
+    
+    try:
+        logger.info(f"Batch search request with {len(request.queries)} queries")
+        
+        items = await service.search_batch(
+            [query.dict() for query in request.queries],
+            deadline=deadline
+        )
+        
+        return BatchSearchResponse(
+            items=items,
+            total_queries=len(items),
+            failed_queries=sum(1 for item in items if item['error']),
+            search_time=deadline.elapsed(),
+            degraded=deadline.degraded,
+            degraded_reasons=deadline.degraded_reasons
+        )
+        
+    except Exception as e:
+        logger.error(f"Batch search failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch search failed: {str(e)}"
+        )
+
+
 @app.post("/chat", response_model=ChatResponse, summary="Chat with physics assistant")
 async def chat_physics(
     request: ChatRequest,
-    service: WeaviateRAGService = Depends(get_rag_service)
+    service: WeaviateRAGService = Depends(get_rag_service),
+    deadline: Deadline = Depends(get_deadline)
 ):
     """Chat with the physics assistant using RAG"""
+    check_subject(request.subject, service)
     try:
         logger.info(f"Chat request: {request.message[:50]}...")
         
@@ -224,7 +401,9 @@ async def chat_physics(
             message=request.message,
             include_sources=request.include_sources,
             search_type=request.search_type,
-            top_k=request.top_k
+            top_k=request.top_k,
+            deadline=deadline,
+            subject=request.subject
         )
         
         return ChatResponse(**response)
@@ -240,15 +419,19 @@ async def chat_physics(
 @app.post("/explain", response_model=ConceptResponse, summary="Explain physics concept")
 async def explain_concept(
     request: ConceptRequest,
-    service: WeaviateRAGService = Depends(get_rag_service)
+    service: WeaviateRAGService = Depends(get_rag_service),
+    deadline: Deadline = Depends(get_deadline)
 ):
     """Get detailed explanation of a physics concept"""
+    check_subject(request.subject, service)
     try:
         logger.info(f"Concept explanation request: {request.concept}")
         
         response = await service.explain_concept(
             concept=request.concept,
-            top_k=request.top_k
+            top_k=request.top_k,
+            deadline=deadline,
+            subject=request.subject
         )
         
         return ConceptResponse(**response)
@@ -264,21 +447,33 @@ async def explain_concept(
 @app.post("/similar", response_model=SimilarityResponse, summary="Find similar content")
 async def find_similar(
     request: SimilarityRequest,
-    service: WeaviateRAGService = Depends(get_rag_service)
+    service: WeaviateRAGService = Depends(get_rag_service),
+    deadline: Deadline = Depends(get_deadline)
 ):
-    """Find content similar to the provided text"""
+    """Find content similar to the provided text or to a stored chunk (doc_id)"""
+    check_subject(request.subject, service)
     try:
-        logger.info(f"Similarity search request: {request.text[:50]}...")
+        if request.doc_id is not None:
+            logger.info(f"Similarity search request for doc_id {request.doc_id}")
+        else:
+            logger.info(f"Similarity search request: {request.text[:50]}...")
         
         similar_content = await service.get_similar_content(
             text=request.text,
-            top_k=request.top_k
+            top_k=request.top_k,
+            deadline=deadline,
+            subject=request.subject,
+            include_content=request.include_content,
+            doc_id=request.doc_id
         )
         
         return SimilarityResponse(
             similar_content=similar_content,
             reference_text=request.text,
-            total_results=len(similar_content)
+            reference_doc_id=request.doc_id,
+            total_results=len(similar_content),
+            degraded=deadline.degraded,
+            degraded_reasons=deadline.degraded_reasons
         )
         
     except Exception as e:
@@ -289,6 +484,43 @@ async def find_similar(
         )
 
 
+@app.post("/documents", response_model=DocumentsResponse, summary="Fetch documents by ID")
+async def get_documents(
+    request: DocumentsRequest,
+    service: WeaviateRAGService = Depends(get_rag_service),
+    deadline: Deadline = Depends(get_deadline)
+):
+    """Fetch up to 100 chunks by doc_id in one round trip, optionally with their neighbours"""
+    check_subject(request.subject, service)
+    try:
+        result = await service.get_documents(
+            request.doc_ids,
+            subject=request.subject,
+            include_neighbours=request.include_neighbours,
+            deadline=deadline
+        )
+        return DocumentsResponse(**result)
+        
+    except Exception as e:
+        logger.error(f"Document fetch failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Document fetch failed: {str(e)}"
+        )
+
+
+@app.get("/suggest", response_model=SuggestResponse, summary="Suggest terms as the user types")
+async def suggest(
+    q: str = Query(..., description="Partly typed Bengali or English term", min_length=1, max_length=100),
+    limit: int = Query(8, description="Most suggestions to return", ge=1, le=20),
+    service: WeaviateRAGService = Depends(get_rag_service)
+):
+    """Complete a prefix from chapter/section titles and glossary terms, without upstream calls"""
+    start = time.perf_counter()
+    suggestions = service.suggest(q, limit)
+    return SuggestResponse(prefix=q, suggestions=suggestions, took_ms=(time.perf_counter() - start) * 1000)
+
+
 # Development endpoints
 @app.get("/debug/config", summary="Debug: Show configuration")
 async def debug_config():
@@ -304,6 +536,10 @@ async def debug_config():
     }
 
 
+# Import time of this module and everything it pulls in (heavy SDKs are imported lazily)
+IMPORT_MS = round((time.perf_counter() - _import_started) * 1000, 1)
+
+
 if __name__ == "__main__":
     import uvicorn
     
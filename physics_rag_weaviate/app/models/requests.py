@@ -2,38 +2,83 @@
 Request models for Physics RAG API with Weaviate
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from pydantic import AfterValidator, AliasChoices, BaseModel, Field, model_validator
+from typing import Annotated, List, Optional, Literal
+
+
+def normalize_subject(subject: Optional[str]) -> Optional[str]:
+    """Match subjects like the configured ones (lowercase, no surrounding spaces); blank means all"""
+    if subject is None:
+        return None
+    return subject.strip().lower() or None
+
+
+Subject = Annotated[Optional[str], AfterValidator(normalize_subject)]
+
+# Results carry only a preview unless asked for their full text ('include_text' is accepted too)
+INCLUDE_CONTENT = AliasChoices("include_content", "include_text")
 
 
 class SearchRequest(BaseModel):
     """Request model for search endpoint"""
     query: str = Field(..., description="Search query", min_length=1, max_length=500)
-    search_type: Literal["hybrid", "vector", "keyword"] = Field("hybrid", description="Type of search to perform")
+    search_type: Literal["hybrid", "vector", "keyword", "auto"] = Field("hybrid", description="Type of search to perform ('auto' picks one per query)")
     top_k: Optional[int] = Field(5, description="Number of results to return", ge=1, le=20)
     alpha: Optional[float] = Field(0.5, description="Alpha for hybrid search (0.0=keyword, 1.0=vector)", ge=0.0, le=1.0)
+    subject: Subject = Field(None, description="Subject to search (e.g. 'physics'); all subjects if omitted", max_length=32)
+    include_content: bool = Field(False, validation_alias=INCLUDE_CONTENT,
+                                  description="Return each result's full text as 'content', not just a preview")
+
+
+class BatchSearchRequest(BaseModel):
+    """Request model for batch search endpoint"""
+    queries: List[SearchRequest] = Field(..., description="Searches to run, each with its own options (at most MAX_BATCH_QUERIES)", min_length=1)
 
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint"""
     message: str = Field(..., description="User message/question", min_length=1, max_length=500)
     include_sources: Optional[bool] = Field(True, description="Include source information in response")
-    search_type: Literal["hybrid", "vector", "keyword"] = Field("hybrid", description="Type of search to use")
+    search_type: Literal["hybrid", "vector", "keyword", "auto"] = Field("hybrid", description="Type of search to use ('auto' picks one per query)")
     top_k: Optional[int] = Field(5, description="Number of search results to consider", ge=1, le=10)
+    subject: Subject = Field(None, description="Subject to search (e.g. 'physics'); all subjects if omitted", max_length=32)
 
 
 class ConceptRequest(BaseModel):
     """Request model for concept explanation endpoint"""
     concept: str = Field(..., description="Physics concept to explain", min_length=1, max_length=100)
     top_k: Optional[int] = Field(3, description="Number of search results to consider", ge=1, le=5)
+    subject: Subject = Field(None, description="Subject to search (e.g. 'physics'); all subjects if omitted", max_length=32)
 
 
 class SimilarityRequest(BaseModel):
     """Request model for similarity search endpoint"""
-    text: str = Field(..., description="Reference text for similarity search", min_length=1, max_length=1000)
+    text: Optional[str] = Field(None, description="Reference text for similarity search", min_length=1, max_length=1000)
+    doc_id: Optional[int] = Field(None, description="Reference chunk, instead of text ('more like this')", ge=0)
     top_k: Optional[int] = Field(5, description="Number of similar contents to return", ge=1, le=10)
+    subject: Subject = Field(None, description="Subject to search (e.g. 'physics'); all subjects if omitted", max_length=32)
+    include_content: bool = Field(False, validation_alias=INCLUDE_CONTENT,
+                                  description="Return each result's full text as 'content', not just a preview")
+    
+    @model_validator(mode='after')
+    def check_reference(self) -> 'SimilarityRequest':
+        if (self.text is None) == (self.doc_id is None):
+            raise ValueError("Provide exactly one of 'text' or 'doc_id'")
+        return self
+
+
+class DocumentsRequest(BaseModel):
+    """Request model for bulk document fetch"""
+    doc_ids: List[int] = Field(..., description="Documents to fetch, in the order wanted", min_length=1, max_length=100)
+    subject: Subject = Field(None, description="Subject the documents belong to (default: 'physics')", max_length=32)
+    include_neighbours: bool = Field(False, description="Also return the previous and next chunk of each document's chapter")
 
 
 class InitializeRequest(BaseModel):
     """Request model for collection initialization"""
-    force_reset: Optional[bool] = Field(False, description="Force reset existing collection")
+    force_reset: Optional[bool] = Field(False, description="Rebuild as a new index version even if the live one has data")
+
+
+class RollbackRequest(BaseModel):
+    """Request model for index rollback"""
+    version: Optional[int] = Field(None, description="Index version to serve (default: the previously live one)", ge=0)
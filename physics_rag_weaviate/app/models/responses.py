@@ -9,12 +9,15 @@ import time
 
 class SearchResult(BaseModel):
     """Individual search result from Weaviate"""
-    content: str = Field(..., description="Document content")
+    preview: str = Field(..., description="First characters of the document")
+    content: Optional[str] = Field(None, description="Full document content (only with include_content / include_text)")
     score: float = Field(..., description="Search relevance score")
+    rerank_score: Optional[float] = Field(None, description="Second-stage relevance the result was ranked by")
     rank: int = Field(..., description="Result rank")
     doc_id: int = Field(..., description="Document ID")
     search_type: str = Field(..., description="Type of search used")
     search_time: Optional[float] = Field(None, description="Search time in seconds")
+    subject: Optional[str] = Field(None, description="Subject the document belongs to")
 
 
 class SearchResponse(BaseModel):
@@ -24,6 +27,28 @@ class SearchResponse(BaseModel):
     search_type: str = Field(..., description="Type of search performed")
     total_results: int = Field(..., description="Total number of results")
     search_time: Optional[float] = Field(None, description="Total search time in seconds")
+    degraded: bool = Field(False, description="Whether a fallback path was used to stay within the latency budget")
+    degraded_reasons: List[str] = Field(default_factory=list, description="Fallbacks taken while serving the request")
+
+
+class BatchSearchItem(BaseModel):
+    """Result of one query in a batch search"""
+    index: int = Field(..., description="Position of the query in the request")
+    query: str = Field(..., description="Original query")
+    search_type: str = Field(..., description="Requested search type")
+    results: List[SearchResult] = Field(default_factory=list, description="Search results")
+    total_results: int = Field(0, description="Number of results")
+    error: Optional[str] = Field(None, description="Error message if this query failed")
+
+
+class BatchSearchResponse(BaseModel):
+    """Response model for batch search endpoint"""
+    items: List[BatchSearchItem] = Field(..., description="Per-query results, in request order")
+    total_queries: int = Field(..., description="Number of queries in the batch")
+    failed_queries: int = Field(..., description="Number of queries that returned an error")
+    search_time: Optional[float] = Field(None, description="Total batch time in seconds")
+    degraded: bool = Field(False, description="Whether a fallback path was used to stay within the latency budget")
+    degraded_reasons: List[str] = Field(default_factory=list, description="Fallbacks taken while serving the request")
 
 
 class SourceInfo(BaseModel):
@@ -33,6 +58,7 @@ class SourceInfo(BaseModel):
     doc_id: Optional[int] = Field(None, description="Document ID")
     rank: int = Field(..., description="Source rank")
     search_type: str = Field(..., description="Type of search used")
+    subject: Optional[str] = Field(None, description="Subject the source belongs to")
 
 
 class ChatResponse(BaseModel):
@@ -44,27 +70,75 @@ class ChatResponse(BaseModel):
     search_results_count: int = Field(..., description="Number of search results used")
     search_type: str = Field(..., description="Type of search used")
     message: str = Field(..., description="Original user message")
+    degraded: bool = Field(False, description="Whether a fallback path was used to stay within the latency budget")
+    degraded_reasons: List[str] = Field(default_factory=list, description="Fallbacks taken while serving the request")
 
 
 class ConceptResponse(BaseModel):
     """Response model for concept explanation endpoint"""
     explanation: str = Field(..., description="Detailed concept explanation")
     concept: str = Field(..., description="Original concept")
+    matched_term: Optional[str] = Field(None, description="Glossary term the concept resolved to (None if it was searched for)")
     sources: List[SearchResult] = Field(default_factory=list, description="Supporting sources")
+    degraded: bool = Field(False, description="Whether a fallback path was used to stay within the latency budget")
+    degraded_reasons: List[str] = Field(default_factory=list, description="Fallbacks taken while serving the request")
 
 
 class SimilarContent(BaseModel):
     """Similar content item"""
-    content: str = Field(..., description="Similar content")
+    preview: str = Field(..., description="First characters of the similar content")
+    content: Optional[str] = Field(None, description="Full similar content (only if requested)")
     similarity_score: float = Field(..., description="Similarity score")
     doc_id: int = Field(..., description="Document ID")
+    subject: Optional[str] = Field(None, description="Subject the content belongs to")
 
 
 class SimilarityResponse(BaseModel):
     """Response model for similarity search endpoint"""
     similar_content: List[SimilarContent] = Field(..., description="Similar content results")
-    reference_text: str = Field(..., description="Original reference text")
+    reference_text: Optional[str] = Field(None, description="Original reference text")
+    reference_doc_id: Optional[int] = Field(None, description="Reference chunk, when one was given")
     total_results: int = Field(..., description="Total number of similar content found")
+    degraded: bool = Field(False, description="Whether a fallback path was used to stay within the latency budget")
+    degraded_reasons: List[str] = Field(default_factory=list, description="Fallbacks taken while serving the request")
+
+
+class DocumentChunk(BaseModel):
+    """One chunk fetched by doc_id"""
+    doc_id: int = Field(..., description="Document ID")
+    content: str = Field(..., description="Document content")
+    chapter: Optional[int] = Field(None, description="Chapter number, if known")
+    section: Optional[str] = Field(None, description="Section number (e.g. '4.3.1'), if known")
+
+
+class Document(DocumentChunk):
+    """Fetched document with its optional neighbours"""
+    subject: str = Field(..., description="Subject the document belongs to")
+    previous: Optional[DocumentChunk] = Field(None, description="Previous chunk in the chapter (if requested)")
+    next: Optional[DocumentChunk] = Field(None, description="Next chunk in the chapter (if requested)")
+
+
+class DocumentsResponse(BaseModel):
+    """Response model for bulk document fetch"""
+    documents: List[Document] = Field(..., description="Documents found, in request order")
+    missing: List[int] = Field(default_factory=list, description="Requested doc_ids that do not exist")
+    subject: str = Field(..., description="Subject the documents were fetched from")
+
+
+class Suggestion(BaseModel):
+    """One completion of a partly typed term"""
+    text: str = Field(..., description="Suggested term or title")
+    kind: Literal["concept", "section", "chapter"] = Field(..., description="Where the suggestion comes from")
+    doc_id: Optional[int] = Field(None, description="Chunk that introduces it")
+    section: Optional[str] = Field(None, description="Section number (e.g. '4.3.1') for section titles")
+    score: float = Field(..., description="Ranking weight (how often the term occurs in the book)")
+
+
+class SuggestResponse(BaseModel):
+    """Response model for suggestion endpoint"""
+    prefix: str = Field(..., description="Text the suggestions complete")
+    suggestions: List[Suggestion] = Field(..., description="Suggestions, best first")
+    took_ms: float = Field(..., description="Lookup time in milliseconds")
 
 
 class ServiceStats(BaseModel):
@@ -73,10 +147,24 @@ class ServiceStats(BaseModel):
     initialized: bool = Field(..., description="Whether the service is initialized")
     total_documents: Optional[int] = Field(None, description="Total number of documents")
     collection_name: Optional[str] = Field(None, description="Weaviate collection name")
+    index_version: Optional[int] = Field(None, description="Live index version")
     weaviate_url: Optional[str] = Field(None, description="Weaviate URL")
     use_local_weaviate: Optional[bool] = Field(None, description="Whether using local Weaviate")
     models: Optional[Dict[str, str]] = Field(None, description="Model information")
     configuration: Optional[Dict[str, Any]] = Field(None, description="Service configuration")
+    scheduler: Optional[Dict[str, Any]] = Field(None, description="Gemini scheduler budgets and queue depth")
+    resilience: Optional[Dict[str, Any]] = Field(None, description="Circuit breaker state and retry/hedge statistics")
+    weaviate_connection: Optional[Dict[str, Any]] = Field(None, description="Weaviate connection health and reconnects")
+    chunk_store: Optional[Dict[str, Any]] = Field(None, description="Chunk store statistics")
+    glossary: Optional[Dict[str, Any]] = Field(None, description="Concept glossary and /explain lookup statistics")
+    suggestions: Optional[Dict[str, Any]] = Field(None, description="Suggestion index statistics")
+    query_router: Optional[Dict[str, Any]] = Field(None, description="search_type=auto routing statistics")
+    reranker: Optional[Dict[str, Any]] = Field(None, description="Second-stage rerank statistics")
+    knn_graph: Optional[Dict[str, Any]] = Field(None, description="k-NN graph and /similar lookup statistics")
+    subjects: Optional[Dict[str, str]] = Field(None, description="Collection serving each subject")
+    caches: Optional[Dict[str, Any]] = Field(None, description="Embedding and response cache statistics")
+    worker_pid: Optional[int] = Field(None, description="Process that served this request")
+    startup: Optional[Dict[str, Any]] = Field(None, description="Startup phase timings")
 
 
 class HealthCheckService(BaseModel):
@@ -96,6 +184,18 @@ class HealthCheckResponse(BaseModel):
     timestamp: float = Field(default_factory=time.time, description="Health check timestamp")
 
 
+class ReadinessResponse(BaseModel):
+    """Response model for the readiness probe"""
+    ready: bool = Field(..., description="Whether the worker is connected and warmed up")
+    state: str = Field(..., description="created, connecting, warming, ready or failed")
+    startup_ms: Optional[float] = Field(None, description="Time from service start to ready")
+    import_ms: Optional[float] = Field(None, description="Time to import the application")
+    phases_ms: Dict[str, float] = Field(default_factory=dict, description="Duration of each startup phase")
+    warm_queries: List[Dict[str, Any]] = Field(default_factory=list, description="Warm-up query latencies")
+    first_request: Optional[Dict[str, Any]] = Field(None, description="Path and latency of the first request served")
+    error: Optional[str] = Field(None, description="Why startup failed")
+
+
 class InitializeResponse(BaseModel):
     """Response model for collection initialization"""
     success: bool = Field(..., description="Whether initialization was successful")
@@ -104,6 +204,16 @@ class InitializeResponse(BaseModel):
     collection_name: str = Field(..., description="Collection name")
 
 
+class IndexStatusResponse(BaseModel):
+    """Response model for index versions"""
+    alias: str = Field(..., description="Collection alias clients use")
+    collection: str = Field(..., description="Collection currently serving the alias")
+    version: int = Field(..., description="Live index version (0 = the unversioned alias collection)")
+    available_versions: List[int] = Field(default_factory=list, description="Versions kept for rollback")
+    history: List[Dict[str, Any]] = Field(default_factory=list, description="Previously live versions")
+    reindex: Dict[str, Any] = Field(default_factory=dict, description="State of the last or running reindex")
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     error: str = Field(..., description="Error message")
@@ -0,0 +1,146 @@
+"""
+Caches for Physics RAG System with Weaviate
+Small thread-safe in-process caches for embeddings and answers, optionally
+backed by a SharedCache tier that all worker processes on the host can read
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (Unicode NFC, case and whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from request parameters
+    
+    String parts are normalized so trivially different spellings of the
+    same question share an entry.
+    """
+    normalized = [normalize_text(p) if isinstance(p, str) else p for p in parts]
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """LRU cache with an optional time-to-live per entry"""
+    
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 backing: Optional[Any] = None):
+        """
+        Initialize the cache
+        
+        Args:
+            max_size (int): Maximum number of entries kept
+            ttl (Optional[float]): Seconds an entry stays valid (forever if None)
+            backing (Optional[SharedCache]): Second tier consulted on a miss and written through on set
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backing = backing
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+    
+    def _get_local(self, key: str) -> Optional[Any]:
+        """Look a key up in this process; a miss is only counted here without a shared tier"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            
+            if self.backing is None:
+                self.misses += 1
+            return None
+    
+    def _promote(self, key: str, entry: Optional[Tuple[Any, float]]) -> Optional[Any]:
+        """Count the shared tier's answer and keep a local copy for next time"""
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            self.hits += 1
+            self.shared_hits += 1
+            # The copy keeps the entry's age, so it expires when the shared entry does
+            self._store(key, value, time.monotonic() - max(0.0, time.time() - stored_at))
+            return value
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if missing or expired"""
+        value = self._get_local(key)
+        if value is not None or self.backing is None:
+            return value
+        # Another worker may have stored it
+        return self._promote(key, self.backing.get_entry(key))
+    
+    async def get_async(self, key: str) -> Optional[Any]:
+        """get() for the event loop: the shared tier is a SQLite file, read in a worker thread"""
+        value = self._get_local(key)
+        if value is not None or self.backing is None:
+            return value
+        return self._promote(key, await asyncio.to_thread(self.backing.get_entry, key))
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._store(key, value)
+        if self.backing is not None:
+            self.backing.set(key, value)
+    
+    async def set_async(self, key: str, value: Any) -> None:
+        """set() for the event loop: the shared tier is written in a worker thread"""
+        with self._lock:
+            self._store(key, value)
+        if self.backing is not None:
+            await asyncio.to_thread(self.backing.set, key, value)
+    
+    def _store(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        self._data[key] = (value, time.monotonic() if stored_at is None else stored_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+    
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (self.ttl is None or time.monotonic() - entry[1] <= self.ttl)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        stats = {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+        if self.backing is not None:
+            stats['shared_hits'] = self.shared_hits
+            stats['shared'] = self.backing.get_stats()
+        return stats
@@ -0,0 +1,291 @@
+"""
+Chunk Store for Physics RAG System with Weaviate
+Memory-mapped, read-only columnar storage for the textbook chunks
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+CHUNK_SEPARATOR = '*****'
+
+# Column files next to text.bin; all are little-endian .npy arrays
+COLUMNS = {
+    'offsets': np.dtype('<u8'),   # n + 1 byte offsets into text.bin
+    'doc_id': np.dtype('<i4'),
+    'chapter': np.dtype('<i2'),   # 0 when unknown
+    'section': np.dtype('S16'),   # e.g. b"4.3.1"; the section in effect where the chunk starts
+    'hash': np.dtype('<u8'),      # chunk_hash of the text
+}
+
+# "# Chapter 4" or "## অধ্যায় ৪"; \d also matches Bengali digits and int() accepts them
+CHAPTER_PATTERN = re.compile(r"^#+\s*(?:Chapter|\u0985\u09A7\u09CD\u09AF\u09BE\u09AF\u09BC)\s*(\d+)", re.M)
+SECTION_PATTERN = re.compile(r"^#{2,4}\s*(\d+(?:\.\d+)+)\s", re.M)
+
+
+def chunk_hash(text: str) -> int:
+    """64-bit content hash of a chunk (insensitive to case and whitespace)"""
+    digest = hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def split_chunks(text: str) -> List[str]:
+    """Split a chapter (or a whole book) into chunks (separator '*****', empty chunks dropped)"""
+    return [t.strip() for t in text.split(CHUNK_SEPARATOR) if t.strip()]
+
+
+def describe_chunks(chunks: Sequence[str]) -> List[Dict]:
+    """
+    Derive chapter and section metadata for chunks in reading order
+    
+    A chunk without its own chapter or numbered section heading continues
+    the previous chunk's chapter/section.
+    """
+    records = []
+    chapter, section = 0, ''
+    for text in chunks:
+        chapter_match = CHAPTER_PATTERN.search(text)
+        if chapter_match:
+            chapter = int(chapter_match.group(1))
+        section_match = SECTION_PATTERN.search(text)
+        if section_match:
+            section = section_match.group(1)
+        records.append({'chapter': chapter, 'section': section})
+    return records
+
+
+class ChunkStore:
+    """
+    Read-only view of a chunk store directory
+    
+    The text blob and every column are memory-mapped, so opening is
+    near-instant regardless of corpus size and the pages are shared by
+    all processes that open the same store. Lookups by doc_id are O(1);
+    get_bytes returns a zero-copy slice of the blob.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open a chunk store
+        
+        Args:
+            path (str): Directory written by write_chunk_store
+        """
+        self.path = Path(path)
+        with open(self.path / 'manifest.json', 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported chunk store format: {self.manifest.get('format_version')}")
+        
+        self._file = open(self.path / 'text.bin', 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._view = memoryview(self._blob)
+        
+        self.columns = {
+            name: np.load(self.path / f'{name}.npy', mmap_mode='r', allow_pickle=False)
+            for name in COLUMNS
+        }
+        self.offsets = self.columns['offsets']
+        self.doc_ids = self.columns['doc_id']
+        
+        # Dense doc_id -> row table (doc_ids are small non-negative ints)
+        count = len(self.doc_ids)
+        self._rows = np.full(int(self.doc_ids.max()) + 1 if count else 0, -1, dtype=np.int32)
+        self._rows[self.doc_ids] = np.arange(count, dtype=np.int32)
+        self._hash_rows: Optional[Dict[int, int]] = None
+        
+        logger.info(f"Opened chunk store {self.path} with {count} chunks")
+    
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """True if path holds a chunk store (an empty path disables the store)"""
+        return bool(path) and (Path(path) / 'manifest.json').exists()
+    
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+    
+    def __contains__(self, doc_id: int) -> bool:
+        return self._row(doc_id) >= 0
+    
+    def _row(self, doc_id: int) -> int:
+        if 0 <= doc_id < len(self._rows):
+            return int(self._rows[doc_id])
+        return -1
+    
+    def get_bytes(self, doc_id: int) -> Optional[memoryview]:
+        """UTF-8 bytes of a chunk as a zero-copy view into the blob"""
+        row = self._row(doc_id)
+        if row < 0:
+            return None
+        return self._view[int(self.offsets[row]):int(self.offsets[row + 1])]
+    
+    def get(self, doc_id: int) -> Optional[str]:
+        """Chunk text by doc_id"""
+        data = self.get_bytes(doc_id)
+        return None if data is None else str(data, 'utf-8')
+    
+    def get_many(self, doc_ids: Sequence[int]) -> Dict[int, str]:
+        """Texts of the doc_ids that exist"""
+        texts = {}
+        for doc_id in doc_ids:
+            text = self.get(doc_id)
+            if text is not None:
+                texts[doc_id] = text
+        return texts
+    
+    def head(self, doc_id: int, chars: int) -> Optional[str]:
+        """First `chars` characters of a chunk, decoding only the bytes they can span"""
+        data = self.get_bytes(doc_id)
+        if data is None:
+            return None
+        # A UTF-8 character takes at most 4 bytes; one cut at the end is dropped
+        return str(data[:4 * chars + 3], 'utf-8', 'ignore')[:chars]
+    
+    def metadata(self, doc_id: int) -> Optional[Dict]:
+        """Typed metadata of a chunk"""
+        row = self._row(doc_id)
+        if row < 0:
+            return None
+        return {
+            'doc_id': int(self.doc_ids[row]),
+            'chapter': int(self.columns['chapter'][row]),
+            'section': self.columns['section'][row].decode('ascii'),
+            'hash': int(self.columns['hash'][row]),
+            'length': int(self.offsets[row + 1] - self.offsets[row])
+        }
+    
+    def neighbours(self, doc_id: int) -> Tuple[Optional[int], Optional[int]]:
+        """doc_ids of the previous and next chunk in the same chapter (storage order is reading order)"""
+        row = self._row(doc_id)
+        if row < 0:
+            return None, None
+        chapters = self.columns['chapter']
+        previous = int(self.doc_ids[row - 1]) if row > 0 and chapters[row - 1] == chapters[row] else None
+        following = int(self.doc_ids[row + 1]) if row + 1 < len(self) and chapters[row + 1] == chapters[row] else None
+        return previous, following
+    
+    def find_by_hash(self, text_hash: int) -> Optional[int]:
+        """doc_id of the chunk with this chunk_hash, if any"""
+        if self._hash_rows is None:
+            self._hash_rows = {int(h): row for row, h in enumerate(self.columns['hash'])}
+        row = self._hash_rows.get(int(text_hash))
+        return None if row is None else int(self.doc_ids[row])
+    
+    def iter_chunks(self) -> Iterator[tuple]:
+        """(doc_id, text) pairs in storage order"""
+        for row in range(len(self)):
+            start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+            yield int(self.doc_ids[row]), str(self._view[start:end], 'utf-8')
+    
+    def texts(self) -> List[str]:
+        """All chunk texts in storage order"""
+        return [text for _, text in self.iter_chunks()]
+    
+    def get_stats(self) -> Dict:
+        """Store statistics"""
+        return {
+            'path': str(self.path),
+            'chunks': len(self),
+            'text_bytes': int(self.offsets[-1]) if len(self) else 0,
+            'content_hash': self.manifest.get('content_hash'),
+            'source': self.manifest.get('source')
+        }
+    
+    def close(self) -> None:
+        """Release the memory maps"""
+        self.columns = {}
+        self.offsets = self.doc_ids = None
+        self._view.release()
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+
+
+def write_chunk_store(path: str, chunks: Sequence[str], doc_ids: Optional[Sequence[int]] = None,
+                      metadata: Optional[Sequence[Dict]] = None, source: str = '',
+                      corpus: Optional[Dict] = None) -> Path:
+    """
+    Write a chunk store, atomically replacing any store at path
+    
+    Args:
+        path (str): Target directory
+        chunks (Sequence[str]): Chunk texts in reading order
+        doc_ids (Optional[Sequence[int]]): Ids per chunk (default: 0..n-1)
+        metadata (Optional[Sequence[Dict]]): chapter/section per chunk (default: derived from text)
+        source (str): Description of where the chunks came from
+        corpus (Optional[Dict]): Chapter files and content hashes the chunks were built from
+    
+    Returns:
+        Path: The store directory
+    """
+    path = Path(path)
+    doc_ids = list(range(len(chunks))) if doc_ids is None else list(doc_ids)
+    metadata = describe_chunks(chunks) if metadata is None else list(metadata)
+    if not len(chunks) == len(doc_ids) == len(metadata):
+        raise ValueError("chunks, doc_ids and metadata must have the same length")
+    if len(set(doc_ids)) != len(doc_ids) or any(d < 0 for d in doc_ids):
+        raise ValueError("doc_ids must be unique and non-negative")
+    
+    encoded = [text.encode('utf-8') for text in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=COLUMNS['offsets'])
+    offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.uint64)
+    columns = {
+        'offsets': offsets,
+        'doc_id': np.asarray(doc_ids, dtype=COLUMNS['doc_id']),
+        'chapter': np.asarray([m.get('chapter') or 0 for m in metadata], dtype=COLUMNS['chapter']),
+        'section': np.asarray([(m.get('section') or '').encode('ascii') for m in metadata],
+                              dtype=COLUMNS['section']),
+        'hash': np.asarray([chunk_hash(text) for text in chunks], dtype=COLUMNS['hash']),
+    }
+    
+    staging = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    
+    content = hashlib.sha256()
+    with open(staging / 'text.bin', 'wb') as f:
+        for data in encoded:
+            f.write(data)
+            content.update(data)
+    for name, array in columns.items():
+        np.save(staging / f'{name}.npy', array, allow_pickle=False)
+        content.update(array.tobytes())
+    
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'chunks': len(chunks),
+        'columns': {name: dtype.str for name, dtype in COLUMNS.items()},
+        'content_hash': content.hexdigest(),
+        'source': source,
+        'corpus': corpus,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    with open(staging / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    
+    # Swap directories so readers never see a half-written store
+    retired = path.with_name(f".{path.name}.old-{os.getpid()}")
+    if path.exists():
+        os.replace(path, retired)
+    os.replace(staging, path)
+    shutil.rmtree(retired, ignore_errors=True)
+    
+    logger.info(f"Wrote chunk store {path} with {len(chunks)} chunks")
+    return path
+
@@ -0,0 +1,210 @@
+"""
+Corpus Builder for Physics RAG System with Weaviate
+Incremental, parallel build of book chunks from chapter files
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .chunk_store import split_chunks
+from .dedup import MinHasher, NUM_PERM, SHINGLE_CHARS, comparable_text, drop_near_duplicates, merge_stubs
+
+logger = logging.getLogger(__name__)
+
+CHAPTER_GLOB = "chapter_*.md"
+# Bump when build_chapter's output changes, so cached chapters are rebuilt
+CACHE_FORMAT = 1
+
+
+def chapter_files(book_dir: str) -> List[Path]:
+    """A book's chapter files in chapter order (chapter_2.md before chapter_10.md)"""
+    def order(path: Path):
+        number = re.search(r"\d+", path.stem)
+        return (int(number.group()) if number else 0, path.name)
+    
+    files = sorted(Path(book_dir).glob(CHAPTER_GLOB), key=order)
+    if not files:
+        raise FileNotFoundError(f"No {CHAPTER_GLOB} files in {book_dir}")
+    return files
+
+
+def file_sha256(path: Path) -> str:
+    """Content hash of a chapter file"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def build_chapter(path: str, min_chars: int) -> Dict:
+    """
+    Chunk one chapter file: split, merge stubs and sign the chunks for near-duplicate detection
+    
+    Runs in a worker process; doc_ids are positions within the chapter
+    until the book is assembled.
+    
+    Args:
+        path (str): Chapter file
+        min_chars (int): Body characters a chunk needs to stand alone
+    
+    Returns:
+        Dict: raw_chunks, kept [text, doc_id] pairs, merged, dropped and signatures
+    """
+    chunks = split_chunks(Path(path).read_text(encoding='utf-8'))
+    kept, merged, dropped = merge_stubs(chunks, range(len(chunks)), min_chars)
+    hasher = MinHasher()
+    return {
+        'raw_chunks': len(chunks),
+        'kept': [[text, doc_id] for text, doc_id in kept],
+        'merged': merged,
+        'dropped': dropped,
+        'signatures': [hasher.signature(comparable_text(text)).tolist() for text, _ in kept]
+    }
+
+
+class CorpusBuilder:
+    """
+    Builds the chunk list of one or more books from their chapter files
+    
+    Every chapter is chunked on its own (split, stub merging, MinHash
+    signatures), so chapters are independent units of work: those whose
+    content hash has a result in the cache directory are reused, and the
+    rest run in a process pool across all books. Assembling a book only
+    offsets doc_ids and runs the LSH near-duplicate pass over the cached
+    signatures. A chunk's doc_id is its position in the book's raw split,
+    counting the chapters in order, as when the book was one file.
+    """
+    
+    def __init__(self, min_chars: int = 80, threshold: float = 0.85,
+                 cache_dir: Optional[str] = None, workers: int = 1):
+        """
+        Initialize the builder
+        
+        Args:
+            min_chars (int): Body characters a chunk needs to stand alone
+            threshold (float): Estimated Jaccard similarity of a near-duplicate
+            cache_dir (Optional[str]): Directory of per-chapter results (None: no cache)
+            workers (int): Processes chunking changed chapters (1: in this process)
+        """
+        self.min_chars = min_chars
+        self.threshold = threshold
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.workers = max(1, workers)
+        self.params = {'format': CACHE_FORMAT, 'min_chars': min_chars,
+                       'shingle_chars': SHINGLE_CHARS, 'num_perm': NUM_PERM}
+        
+        self.chapters = 0
+        self.rebuilt = 0
+        self.build_ms = 0.0
+    
+    def _cache_path(self, sha256: str) -> Optional[Path]:
+        return self.cache_dir / f"{sha256}.json" if self.cache_dir else None
+    
+    def _load_cached(self, sha256: str) -> Optional[Dict]:
+        path = self._cache_path(sha256)
+        if path is None or not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cached chapter {path}: {e}")
+            return None
+        return cached['chapter'] if cached.get('params') == self.params else None
+    
+    def _store_cached(self, sha256: str, chapter: Dict) -> None:
+        path = self._cache_path(sha256)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{os.getpid()}")
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump({'params': self.params, 'chapter': chapter}, f, ensure_ascii=False)
+        os.replace(staging, path)
+    
+    def build(self, books: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        Build every book, chunking only chapters without a cached result
+        
+        Args:
+            books (Dict[str, str]): Book directory by name (e.g. subject)
+        
+        Returns:
+            Dict[str, Dict]: Per book: chunks, doc_ids, the dedup report and 'corpus',
+                the chapter files and content hashes the chunks were built from
+        """
+        start = time.perf_counter()
+        plans = {name: [{'path': path, 'sha256': file_sha256(path)} for path in chapter_files(book_dir)]
+                 for name, book_dir in books.items()}
+        
+        # Chapter results by content hash (identical chapters in several books are chunked once)
+        results: Dict[str, Optional[Dict]] = {}
+        for plan in plans.values():
+            for chapter in plan:
+                if chapter['sha256'] not in results:
+                    results[chapter['sha256']] = self._load_cached(chapter['sha256'])
+        missing = list({chapter['sha256']: chapter for plan in plans.values() for chapter in plan
+                        if results[chapter['sha256']] is None}.values())
+        
+        if missing:
+            paths = [str(chapter['path']) for chapter in missing]
+            if self.workers > 1 and len(missing) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                    built = list(pool.map(build_chapter, paths, [self.min_chars] * len(paths)))
+            else:
+                built = [build_chapter(path, self.min_chars) for path in paths]
+            for chapter, result in zip(missing, built):
+                results[chapter['sha256']] = result
+                self._store_cached(chapter['sha256'], result)
+        
+        self.chapters += sum(len(plan) for plan in plans.values())
+        self.rebuilt += len(missing)
+        books_built = {name: self._assemble(plan, results) for name, plan in plans.items()}
+        elapsed = (time.perf_counter() - start) * 1000
+        self.build_ms += elapsed
+        logger.info(f"Built {len(books)} book(s) from {sum(len(plan) for plan in plans.values())} chapters "
+                    f"({len(missing)} rechunked) in {elapsed:.0f}ms")
+        return books_built
+    
+    def _assemble(self, plan: List[Dict], results: Dict[str, Dict]) -> Dict:
+        """Join a book's chapters into book-wide doc_ids and drop near-duplicates across chapters"""
+        kept, merged, dropped, signatures, chapters = [], [], [], [], []
+        offset = 0
+        for chapter in plan:
+            result = results[chapter['sha256']]
+            kept.extend((text, doc_id + offset) for text, doc_id in result['kept'])
+            merged.extend(dict(record, doc_id=record['doc_id'] + offset, into=record['into'] + offset)
+                          for record in result['merged'])
+            dropped.extend(dict(record, doc_id=record['doc_id'] + offset) for record in result['dropped'])
+            signatures.extend(result['signatures'])
+            chapters.append({'file': chapter['path'].name, 'sha256': chapter['sha256'],
+                             'first_doc_id': offset, 'raw_chunks': result['raw_chunks']})
+            offset += result['raw_chunks']
+        
+        chunks, doc_ids, report = drop_near_duplicates(
+            kept, merged, dropped, self.threshold, input_chunks=offset, min_chars=self.min_chars,
+            signatures=np.array(signatures, dtype=np.uint64).reshape(len(signatures), NUM_PERM)
+        )
+        corpus = {'chapters': chapters, 'min_chars': self.min_chars,
+                  'threshold': self.threshold, 'format': CACHE_FORMAT}
+        return {'chunks': chunks, 'doc_ids': doc_ids, 'report': report, 'corpus': corpus}
+    
+    def build_book(self, book_dir: str) -> Dict:
+        """Build a single book (see build)"""
+        return self.build({'book': book_dir})['book']
+    
+    def get_stats(self) -> Dict:
+        """Build statistics"""
+        return {
+            'chapters': self.chapters,
+            'rebuilt': self.rebuilt,
+            'cached': self.chapters - self.rebuilt,
+            'build_ms': round(self.build_ms, 1),
+            'workers': self.workers
+        }
@@ -0,0 +1,144 @@
+"""
+Request Deadlines for Physics RAG System with Weaviate
+End-to-end latency budgets propagated through every pipeline stage
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time at which the stage running in this context is abandoned (set by Deadline.run)
+_stage_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("stage_deadline", default=None)
+
+
+def stage_time_left() -> Optional[float]:
+    """
+    Seconds left for the stage this code runs in
+    
+    Blocking code started by Deadline.run (a worker thread whose result is
+    discarded once the stage times out) uses this to give up waiting on its
+    own instead of holding the thread until the wait ends.
+    
+    Returns:
+        Optional[float]: Seconds left (never negative), or None outside a stage
+    """
+    deadline = _stage_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage cannot finish within the request budget"""
+
+
+class Deadline:
+    """
+    Latency budget for a single request.
+    
+    Created once per request (from the X-Request-Budget-Ms header or the
+    configured default) and handed to every stage, which sizes its own
+    timeout from what is left. Stages that fall back to a cheaper path
+    record why, so the response can be flagged as degraded.
+    """
+    
+    def __init__(self, budget: float):
+        """
+        Initialize the deadline
+        
+        Args:
+            budget (float): Total budget in seconds
+        """
+        self.budget = budget
+        self.start = time.monotonic()
+        self.degraded_reasons: List[str] = []
+    
+    @classmethod
+    def from_ms(cls, budget_ms: float) -> "Deadline":
+        """Create a deadline from a budget in milliseconds"""
+        return cls(budget_ms / 1000.0)
+    
+    def elapsed(self) -> float:
+        """Seconds spent since the request started"""
+        return time.monotonic() - self.start
+    
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)"""
+        return max(0.0, self.budget - self.elapsed())
+    
+    @property
+    def expired(self) -> bool:
+        """Whether the budget is used up"""
+        return self.remaining() <= 0
+    
+    @property
+    def degraded(self) -> bool:
+        """Whether any stage fell back to a degraded path"""
+        return bool(self.degraded_reasons)
+    
+    def mark_degraded(self, reason: str) -> None:
+        """Record that a stage fell back to a cheaper path"""
+        if reason not in self.degraded_reasons:
+            self.degraded_reasons.append(reason)
+        logger.warning(f"Degraded response ({reason}) after {self.elapsed():.3f}s")
+    
+    def stage_timeout(self, limit: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Timeout for the next stage
+        
+        Args:
+            limit (Optional[float]): Upper bound for the stage in seconds
+            reserve (float): Seconds to keep for the stages that follow
+        
+        Returns:
+            float: Seconds the stage may take (0.0 if it should be skipped)
+        """
+        timeout = self.remaining() - reserve
+        if limit is not None:
+            timeout = min(timeout, limit)
+        return max(0.0, timeout)
+    
+    async def run(self, fn: Callable[..., Any], *args,
+                  timeout: Optional[float] = None, executor: Optional[Executor] = None,
+                  **kwargs) -> Any:
+        """
+        Run a blocking stage in a worker thread within the budget
+        
+        The worker thread is not interrupted on timeout; its result is
+        simply discarded. The stage's deadline is visible to the worker
+        through stage_time_left(), so waits inside it (scheduler admission)
+        end with the stage rather than holding the thread.
+        
+        Args:
+            fn (Callable): Blocking function to run
+            timeout (Optional[float]): Stage timeout (defaults to the remaining budget)
+            executor (Optional[Executor]): Pool to run in (defaults to the loop's default pool)
+        
+        Returns:
+            Any: Whatever `fn` returns
+        
+        Raises:
+            DeadlineExceeded: If the stage does not finish in time
+        """
+        if timeout is None:
+            timeout = self.remaining()
+        if timeout <= 0:
+            raise DeadlineExceeded(f"No budget left for {getattr(fn, '__name__', 'stage')}")
+        
+        context = contextvars.copy_context()
+        context.run(_stage_deadline.set, time.monotonic() + timeout)
+        call = functools.partial(context.run, fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(executor, call), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(
+                f"{getattr(fn, '__name__', 'stage')} exceeded {timeout:.3f}s stage budget"
+            ) from None
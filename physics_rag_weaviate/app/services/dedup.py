@@ -0,0 +1,264 @@
+"""
+Chunk Deduplication for Physics RAG System with Weaviate
+Ingestion stage merging stub chunks and dropping near-duplicates (MinHash LSH)
+"""
+
+import logging
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import normalize_text
+from .chunk_store import CHAPTER_PATTERN, describe_chunks
+
+logger = logging.getLogger(__name__)
+
+# Characters per shingle; Bengali words are long and inflected, so characters beat words
+SHINGLE_CHARS = 5
+# MinHash permutations, split into LSH bands of NUM_PERM // LSH_BANDS rows; with 16 bands
+# of 8 rows, pairs above ~0.7 Jaccard similarity almost always share a band
+NUM_PERM = 128
+LSH_BANDS = 16
+# Mersenne prime for the universal hashes (a * x + b) mod p; products fit in 64 bits
+MERSENNE_PRIME = (1 << 31) - 1
+PREVIEW_CHARS = 80
+
+
+def chunk_body(text: str) -> str:
+    """A chunk's text without its heading lines"""
+    return '\n'.join(line for line in text.splitlines() if not line.lstrip().startswith('#')).strip()
+
+
+def _has_heading(text: str) -> bool:
+    return any(line.lstrip().startswith('#') for line in text.splitlines())
+
+
+def _merge(stub: str, following: str) -> str:
+    """Put a stub's headings in front of the chunk it introduces (their shared chapter line once)"""
+    head, _, rest = following.partition('\n')
+    stub_head, _, stub_rest = stub.partition('\n')
+    if stub_head.strip() == head.strip():
+        stub_rest = stub_rest.strip()
+        return f"{head}\n\n{stub_rest}\n\n{rest.strip()}" if stub_rest else following
+    return f"{stub.strip()}\n\n{following}"
+
+
+def _preview(text: str) -> str:
+    text = ' '.join(text.split())
+    return text[:PREVIEW_CHARS] + "..." if len(text) > PREVIEW_CHARS else text
+
+
+class MinHasher:
+    """MinHash signatures of character shingles, with fixed seeds so builds are reproducible"""
+    
+    def __init__(self, num_perm: int = NUM_PERM, shingle_chars: int = SHINGLE_CHARS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.shingle_chars = shingle_chars
+    
+    def signature(self, text: str) -> np.ndarray:
+        """Signature of a text (normalized like cache keys, so case and spacing do not matter)"""
+        text = normalize_text(text)
+        size = self.shingle_chars
+        shingles = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64,
+                             count=len(shingles)) % np.uint64(MERSENNE_PRIME)
+        return ((np.outer(hashes, self.a) + self.b) % np.uint64(MERSENNE_PRIME)).min(axis=0)
+
+
+def lsh_duplicates(signatures: Sequence[np.ndarray], threshold: float,
+                   bands: int = LSH_BANDS) -> Dict[int, Tuple[int, float]]:
+    """
+    Find signatures that nearly repeat an earlier one
+    
+    Signatures hashing to the same bucket in any LSH band are candidates; a
+    candidate is a duplicate if the share of equal signature values (the
+    estimated Jaccard similarity) reaches the threshold. Each signature is
+    compared only with earlier ones that were kept.
+    
+    Args:
+        signatures (Sequence[np.ndarray]): MinHash signatures in reading order
+        threshold (float): Estimated Jaccard similarity of a near-duplicate
+        bands (int): LSH bands (must divide the number of permutations)
+    
+    Returns:
+        Dict[int, Tuple[int, float]]: Position of each duplicate -> (position it repeats, similarity)
+    """
+    signatures = np.asarray(signatures, dtype=np.uint64) if len(signatures) else np.zeros((0, NUM_PERM), dtype=np.uint64)
+    rows = signatures.shape[1] // bands
+    
+    buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+    duplicates: Dict[int, Tuple[int, float]] = {}
+    for position, signature in enumerate(signatures):
+        keys = [signature[band * rows:(band + 1) * rows].tobytes() for band in range(bands)]
+        candidates = {earlier for band, key in enumerate(keys) for earlier in buckets[band].get(key, ())}
+        best = max(((float(np.mean(signatures[earlier] == signature)), earlier) for earlier in candidates),
+                   default=(0.0, -1))
+        if best[0] >= threshold:
+            duplicates[position] = (best[1], best[0])
+            continue
+        for band, key in enumerate(keys):
+            buckets[band].setdefault(key, []).append(position)
+    return duplicates
+
+
+def near_duplicates(texts: Sequence[str], threshold: float,
+                    bands: int = LSH_BANDS, hasher: Optional[MinHasher] = None) -> Dict[int, Tuple[int, float]]:
+    """
+    Find texts that nearly repeat an earlier text (see lsh_duplicates)
+    
+    Args:
+        texts (Sequence[str]): Texts in reading order
+        threshold (float): Estimated Jaccard similarity of a near-duplicate
+        bands (int): LSH bands (must divide the number of permutations)
+        hasher (Optional[MinHasher]): Signature function
+    
+    Returns:
+        Dict[int, Tuple[int, float]]: Position of each duplicate -> (position it repeats, similarity)
+    """
+    hasher = hasher or MinHasher()
+    return lsh_duplicates([hasher.signature(text) for text in texts], threshold, bands)
+
+
+def comparable_text(text: str) -> str:
+    """What near-duplicate detection compares: the text without the chapter heading every chunk repeats"""
+    return '\n'.join(line for line in text.splitlines() if not CHAPTER_PATTERN.match(line))
+
+
+def merge_stubs(chunks: Sequence[str], doc_ids: Sequence[int], min_chars: int = 80,
+                chapters: Optional[Sequence[int]] = None) -> Tuple[List[Tuple[str, int]], List[Dict], List[Dict]]:
+    """
+    Merge stub chunks into the chunk they introduce
+    
+    A chunk whose body (text without headings) is shorter than min_chars
+    is a stub: if it has headings it is merged into the next chunk of its
+    chapter, which then starts with those headings; otherwise, or when it
+    ends its chapter, it is dropped.
+    
+    Args:
+        chunks (Sequence[str]): Chunk texts in reading order
+        doc_ids (Sequence[int]): Ids per chunk
+        min_chars (int): Body characters a chunk needs to stand alone
+        chapters (Optional[Sequence[int]]): Chapter per chunk (default: all one chapter)
+    
+    Returns:
+        Tuple[List[Tuple[str, int]], List[Dict], List[Dict]]: Kept (text, doc_id) pairs,
+            merged stubs and dropped chunks
+    """
+    chapters = [0] * len(chunks) if chapters is None else chapters
+    kept: List[Tuple[str, int]] = []
+    merged, dropped = [], []
+    pending: Optional[Dict] = None  # Stubs waiting for the chunk they introduce
+    
+    def drop_pending() -> None:
+        for stub_id, stub_text in pending['stubs']:
+            dropped.append({'doc_id': stub_id, 'reason': 'stub', 'preview': _preview(stub_text)})
+    
+    for original, doc_id, chapter in zip(chunks, doc_ids, chapters):
+        text = original
+        stubs = []
+        if pending is not None:
+            if pending['chapter'] == chapter:
+                text = _merge(pending['text'], text)
+                stubs = pending['stubs']
+            else:
+                drop_pending()
+            pending = None
+        
+        if len(chunk_body(text)) < min_chars:
+            if _has_heading(text):
+                pending = {'text': text, 'chapter': chapter, 'stubs': stubs + [(doc_id, original)]}
+            else:
+                dropped.append({'doc_id': doc_id, 'reason': 'too_short', 'preview': _preview(original)})
+            continue
+        
+        merged.extend({'doc_id': stub_id, 'into': doc_id, 'preview': _preview(stub_text)}
+                      for stub_id, stub_text in stubs)
+        kept.append((text, doc_id))
+    if pending is not None:
+        drop_pending()
+    return kept, merged, dropped
+
+
+def drop_near_duplicates(kept: List[Tuple[str, int]], merged: List[Dict], dropped: List[Dict],
+                         threshold: float = 0.85, input_chunks: Optional[int] = None, min_chars: int = 80,
+                         signatures: Optional[np.ndarray] = None) -> Tuple[List[str], List[int], Dict]:
+    """
+    Drop near-duplicates from merge_stubs output and write up the report
+    
+    Args:
+        kept (List[Tuple[str, int]]): (text, doc_id) pairs in reading order
+        merged (List[Dict]): Stubs merge_stubs merged
+        dropped (List[Dict]): Chunks merge_stubs dropped
+        threshold (float): Estimated Jaccard similarity of a near-duplicate
+        input_chunks (Optional[int]): Chunks before merging, for the report
+        min_chars (int): min_chars merge_stubs used, for the report
+        signatures (Optional[np.ndarray]): MinHash signatures of comparable_text() per kept
+            chunk, if already computed
+    
+    Returns:
+        Tuple[List[str], List[int], Dict]: Kept chunks, their doc_ids and the report
+    """
+    dropped = list(dropped)
+    if signatures is None:
+        hasher = MinHasher()
+        signatures = [hasher.signature(comparable_text(text)) for text, _ in kept]
+    duplicates = lsh_duplicates(signatures, threshold)
+    for position, (original, similarity) in sorted(duplicates.items()):
+        dropped.append({'doc_id': kept[position][1], 'reason': 'near_duplicate',
+                        'duplicate_of': kept[original][1], 'similarity': round(similarity, 3),
+                        'preview': _preview(kept[position][0])})
+    
+    doc_id_map: Dict[int, Optional[int]] = {record['doc_id']: record['into'] for record in merged}
+    for record in dropped:
+        doc_id_map[record['doc_id']] = record.get('duplicate_of')
+    # A stub merged into a chunk that turned out to be a duplicate lives on in the original
+    for doc_id, target in doc_id_map.items():
+        while target is not None and target in doc_id_map:
+            target = doc_id_map[target]
+        doc_id_map[doc_id] = target
+    
+    result = [(text, doc_id) for position, (text, doc_id) in enumerate(kept) if position not in duplicates]
+    input_chunks = len(kept) + len(merged) + len(dropped) - len(duplicates) if input_chunks is None else input_chunks
+    report = {
+        'input_chunks': input_chunks,
+        'output_chunks': len(result),
+        'min_chars': min_chars,
+        'threshold': threshold,
+        'merged': merged,
+        'dropped': sorted(dropped, key=lambda record: record['doc_id']),
+        'doc_id_map': {str(doc_id): target for doc_id, target in sorted(doc_id_map.items())}
+    }
+    logger.info(f"Deduplicated {input_chunks} chunks to {len(result)}: {len(merged)} stubs merged, "
+                f"{len(dropped) - len(duplicates)} too short, {len(duplicates)} near-duplicates")
+    return [text for text, _ in result], [doc_id for _, doc_id in result], report
+
+
+def dedup_chunks(chunks: Sequence[str], doc_ids: Optional[Sequence[int]] = None,
+                 min_chars: int = 80, threshold: float = 0.85) -> Tuple[List[str], List[int], Dict]:
+    """
+    Clean the chunk list before it is embedded
+    
+    Stubs are merged into the chunk they introduce (merge_stubs). The
+    merged chunks are then compared with MinHash LSH, ignoring the chapter
+    heading every chunk repeats, and near-duplicates of an earlier chunk
+    are dropped. Kept chunks keep their doc_ids (a merged chunk keeps that
+    of the chunk it was merged into).
+    
+    Args:
+        chunks (Sequence[str]): Chunk texts in reading order
+        doc_ids (Optional[Sequence[int]]): Ids per chunk (default: 0..n-1)
+        min_chars (int): Body characters a chunk needs to stand alone
+        threshold (float): Estimated Jaccard similarity of a near-duplicate
+    
+    Returns:
+        Tuple[List[str], List[int], Dict]: Kept chunks, their doc_ids and a report of
+            what was merged and dropped, with 'doc_id_map' from every removed doc_id to
+            the doc_id now holding its text (None if it was dropped)
+    """
+    doc_ids = list(range(len(chunks))) if doc_ids is None else [int(d) for d in doc_ids]
+    chapters = [record['chapter'] for record in describe_chunks(chunks)]
+    kept, merged, dropped = merge_stubs(chunks, doc_ids, min_chars, chapters)
+    return drop_near_duplicates(kept, merged, dropped, threshold, len(chunks), min_chars)
@@ -3,35 +3,101 @@ Embedding Service for Physics RAG System with Weaviate
 Handles Google Gemini embeddings generation
 """
 
-import google.generativeai as genai
 import numpy as np
-from typing import List, Union
+import threading
+from typing import Any, List, Optional, Union
 import logging
 
+from .cache import TTLCache, make_cache_key
+from .rate_limiter import GeminiScheduler, Priority
+from .resilience import UpstreamGuard
+
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
     """Service for generating embeddings using Google Gemini API"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, scheduler: Optional[GeminiScheduler] = None,
+                 cache_size: int = 2048, guard: Optional[UpstreamGuard] = None,
+                 client: Optional[Any] = None, cache_backing: Optional[Any] = None):
         """
         Initialize the embedding service
         
         Args:
             api_key (str): Google AI API key
+            scheduler (Optional[GeminiScheduler]): Shared Gemini request scheduler
+            cache_size (int): Number of query embeddings kept in memory
+            guard (Optional[UpstreamGuard]): Timeout/retry/hedging policy for Gemini calls
+            client (Optional[Any]): Object providing embed_content (defaults to google.generativeai)
+            cache_backing (Optional[SharedCache]): Query embedding tier shared with other workers
         """
         self.api_key = api_key
-        genai.configure(api_key=api_key)
+        self.scheduler = scheduler
+        self.guard = guard
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.query_cache = TTLCache(max_size=cache_size, backing=cache_backing)
         self.model_name = "models/gemini-embedding-001"
         logger.info(f"EmbeddingService initialized with model: {self.model_name}")
     
-    def get_embeddings(self, texts: Union[List[str], str]) -> np.ndarray:
+    @property
+    def client(self) -> Any:
+        """The Gemini client, imported and configured on first use"""
+        if self._client is None:
+            self.connect()
+        return self._client
+    
+    def connect(self) -> None:
+        """Import and configure google.generativeai now instead of on the first call"""
+        with self._client_lock:
+            if self._client is None:
+                import google.generativeai as genai  # Heavy import, kept off the module import path
+                genai.configure(api_key=self.api_key)
+                self._client = genai
+    
+    def _embed_content(self, content: Union[List[str], str], priority: Priority) -> dict:
+        """Call embed_content through the resilience guard, when one is configured"""
+        if self.guard is None:
+            return self._schedule_embed_content(content, priority)
+        
+        # The guard waits for the scheduler's budget itself, outside its per-attempt timeout
+        admission = None
+        if self.scheduler is not None:
+            admission = self.scheduler.admission(
+                priority,
+                requests=len(content) if isinstance(content, list) else 1,
+                tokens=GeminiScheduler.estimate_tokens(content)
+            )
+        # Hedging duplicates the request, which only pays off for small interactive calls
+        return self.guard.call(
+            self.client.embed_content, model=self.model_name, content=content,
+            hedge=None if priority == Priority.INTERACTIVE else False,
+            admission=admission
+        )
+    
+    def _schedule_embed_content(self, content: Union[List[str], str], priority: Priority) -> dict:
+        """Call embed_content, going through the scheduler when one is configured"""
+        if self.scheduler is None:
+            return self.client.embed_content(model=self.model_name, content=content)
+        
+        return self.scheduler.call(
+            self.client.embed_content,
+            model=self.model_name,
+            content=content,
+            priority=priority,
+            requests=len(content) if isinstance(content, list) else 1,
+            tokens=GeminiScheduler.estimate_tokens(content)
+        )
+    
+    def get_embeddings(self, texts: Union[List[str], str],
+                       priority: Priority = Priority.INTERACTIVE) -> np.ndarray:
         """
         Get embeddings for a list of texts or single text
         
         Args:
             texts: List of texts or single text to embed
+            priority (Priority): Scheduling priority of the call
             
         Returns:
             np.ndarray: Embeddings array with shape (n_texts, embedding_dim)
@@ -42,10 +108,7 @@ class EmbeddingService:
             
             logger.info(f"Generating embeddings for {len(texts)} texts")
             
-            result = genai.embed_content(
-                model=self.model_name,
-                content=texts
-            )
+            result = self._embed_content(texts, priority)
             
             embeddings = np.array(result['embedding'], dtype='float32')
             
@@ -60,21 +123,20 @@ class EmbeddingService:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
     
-    def get_single_embedding(self, text: str) -> List[float]:
+    def get_single_embedding(self, text: str,
+                             priority: Priority = Priority.INTERACTIVE) -> List[float]:
         """
         Get embedding for a single text as list (for Weaviate compatibility)
         
         Args:
             text (str): Text to embed
+            priority (Priority): Scheduling priority of the call
             
         Returns:
             List[float]: Embedding as list of floats
         """
         try:
-            result = genai.embed_content(
-                model=self.model_name,
-                content=text
-            )
+            result = self._embed_content(text, priority)
             
             # Return as list for Weaviate compatibility
             embedding = result['embedding']
@@ -85,24 +147,70 @@ class EmbeddingService:
             logger.error(f"Error generating single embedding: {str(e)}")
             raise
     
-    def get_query_embedding(self, query: str) -> List[float]:
+    def get_cached_query_embedding(self, query: str) -> Optional[List[float]]:
+        """
+        Get a previously computed query embedding without calling the API
+        
+        Args:
+            query (str): Search query
+            
+        Returns:
+            Optional[List[float]]: Cached embedding or None
+        """
+        return self.query_cache.get(make_cache_key(self.model_name, query))
+    
+    async def get_cached_query_embedding_async(self, query: str) -> Optional[List[float]]:
+        """get_cached_query_embedding() for the event loop (the shared cache tier is read in a thread)"""
+        return await self.query_cache.get_async(make_cache_key(self.model_name, query))
+    
+    def cache_query_embedding(self, query: str, embedding: List[float]) -> None:
+        """
+        Remember an embedding computed elsewhere (e.g. in a batch call)
+        
+        Args:
+            query (str): Search query
+            embedding (List[float]): Its embedding
+        """
+        self.query_cache.set(make_cache_key(self.model_name, query), embedding)
+    
+    async def cache_query_embedding_async(self, query: str, embedding: List[float]) -> None:
+        """cache_query_embedding() for the event loop (the shared cache tier is written in a thread)"""
+        await self.query_cache.set_async(make_cache_key(self.model_name, query), embedding)
+    
+    def get_query_embedding(self, query: str,
+                            priority: Priority = Priority.INTERACTIVE) -> List[float]:
         """
         Get embedding for a search query (Weaviate format)
         
         Args:
             query (str): Search query
+            priority (Priority): Scheduling priority of the call
             
         Returns:
             List[float]: Query embedding as list of floats
         """
-        return self.get_single_embedding(query)
+        key = make_cache_key(self.model_name, query)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = self.get_single_embedding(query, priority=priority)
+            self.query_cache.set(key, embedding)
+        return embedding
     
-    def get_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def get_batch_embeddings(self, texts: List[str],
+                             priority: Priority = Priority.BATCH,
+                             batch_size: Optional[int] = None) -> List[List[float]]:
         """
         Get embeddings for multiple texts in Weaviate-compatible format
         
+        Texts are sent in slices of `batch_size` so that a long indexing run
+        is admitted call by call and interactive requests can interleave.
+        Slices are capped at what the scheduler admits without touching the
+        interactive reserve (the per-worker RPM can be below batch_size).
+        
         Args:
             texts (List[str]): List of texts to embed
+            priority (Priority): Scheduling priority of the calls
+            batch_size (Optional[int]): Texts per embed_content call (all at once if None)
             
         Returns:
             List[List[float]]: List of embeddings as lists of floats
@@ -110,16 +218,18 @@ class EmbeddingService:
         try:
             logger.info(f"Generating batch embeddings for {len(texts)} texts")
             
-            result = genai.embed_content(
-                model=self.model_name,
-                content=texts
-            )
-            
-            embeddings = result['embedding']
-            
-            # Convert numpy array to list of lists if needed
-            if isinstance(embeddings, np.ndarray):
-                embeddings = embeddings.tolist()
+            batch_size = batch_size or len(texts) or 1
+            if self.scheduler is not None:
+                batch_size = min(batch_size, self.scheduler.max_batch(priority))
+            embeddings = []
+            for start in range(0, len(texts), batch_size):
+                result = self._embed_content(texts[start:start + batch_size], priority)
+                batch = result['embedding']
+                
+                # Convert numpy array to list of lists if needed
+                if isinstance(batch, np.ndarray):
+                    batch = batch.tolist()
+                embeddings.extend(batch)
             
             logger.info(f"Generated {len(embeddings)} batch embeddings")
             return embeddings
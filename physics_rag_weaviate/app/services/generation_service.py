@@ -3,31 +3,106 @@ Generation Service for Physics RAG System with Weaviate
 Handles response generation using Google Gemini
 """
 
-import google.generativeai as genai
-from typing import Dict, List, Optional
+import re
+import threading
+from typing import Any, Dict, List, Optional
 import logging
 
+from .rate_limiter import GeminiScheduler, Priority
+from .resilience import UpstreamError, UpstreamGuard
+from .search_service import make_preview
+
 logger = logging.getLogger(__name__)
 
 
+def source_info(result: Dict) -> Dict:
+    """Source entry of a chat response for one search result"""
+    return {
+        'content_preview': result.get('preview') or make_preview(result.get('content', '')),
+        'score': result.get('score', 0.0),
+        'doc_id': result.get('doc_id'),
+        'rank': result.get('rank', 0),
+        'search_type': result.get('search_type', 'hybrid'),
+        'subject': result.get('subject')
+    }
+
+
 class GenerationService:
     """Service for generating responses using Google Gemini API"""
     
-    def __init__(self, api_key: str, model_name: str = 'gemini-2.5-flash'):
+    def __init__(self, api_key: str, model_name: str = 'gemini-2.5-flash',
+                 scheduler: Optional[GeminiScheduler] = None,
+                 guard: Optional[UpstreamGuard] = None,
+                 model: Optional[Any] = None):
         """
         Initialize the generation service
         
+        Upstream failures that survive the guard's retries (or an open
+        circuit) are raised as UpstreamError so callers can degrade
+        gracefully; other errors still produce the fallback messages.
+        
         Args:
             api_key (str): Google AI API key
             model_name (str): Gemini model name to use
+            scheduler (Optional[GeminiScheduler]): Shared Gemini request scheduler
+            guard (Optional[UpstreamGuard]): Timeout/retry/circuit-breaker policy for Gemini calls
+            model (Optional[Any]): Object providing generate_content (defaults to a Gemini model)
         """
         self.api_key = api_key
         self.model_name = model_name
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
+        self.scheduler = scheduler
+        self.guard = guard
+        self._model = model
+        self._model_lock = threading.Lock()
         
         logger.info(f"GenerationService initialized with model: {model_name}")
     
+    @property
+    def model(self) -> Any:
+        """The Gemini model, created on first use"""
+        if self._model is None:
+            self.connect()
+        return self._model
+    
+    def connect(self) -> None:
+        """Import google.generativeai and create the model now instead of on the first call"""
+        with self._model_lock:
+            if self._model is None:
+                import google.generativeai as genai  # Heavy import, kept off the module import path
+                genai.configure(api_key=self.api_key)
+                self._model = genai.GenerativeModel(self.model_name)
+    
+    def _generate_content(self, prompt: str, priority: Priority = Priority.INTERACTIVE,
+                          generation_config: Optional[Dict] = None):
+        """Call generate_content through the resilience guard, when one is configured"""
+        if self.guard is None:
+            return self._schedule_generate_content(prompt, priority, generation_config)
+        
+        # The guard waits for the scheduler's budget itself, outside its per-attempt timeout
+        admission = None
+        if self.scheduler is not None:
+            max_output = (generation_config or {}).get('max_output_tokens', 1000)
+            admission = self.scheduler.admission(
+                priority, tokens=GeminiScheduler.estimate_tokens(prompt) + max_output
+            )
+        return self.guard.call(self.model.generate_content, prompt,
+                               generation_config=generation_config, admission=admission)
+    
+    def _schedule_generate_content(self, prompt: str, priority: Priority = Priority.INTERACTIVE,
+                                   generation_config: Optional[Dict] = None):
+        """Call generate_content, going through the scheduler when one is configured"""
+        if self.scheduler is None:
+            return self.model.generate_content(prompt, generation_config=generation_config)
+        
+        max_output = (generation_config or {}).get('max_output_tokens', 1000)
+        return self.scheduler.call(
+            self.model.generate_content,
+            prompt,
+            generation_config=generation_config,
+            priority=priority,
+            tokens=GeminiScheduler.estimate_tokens(prompt) + max_output
+        )
+    
     def create_physics_prompt(self, query: str, context: str, 
                             include_context_info: bool = True) -> str:
         """
@@ -62,7 +137,8 @@ class GenerationService:
     
     def generate_response(self, query: str, context: str, 
                          include_context_info: bool = True,
-                         max_tokens: Optional[int] = None) -> str:
+                         max_tokens: Optional[int] = None,
+                         priority: Priority = Priority.INTERACTIVE) -> str:
         """
         Generate response using context
         
@@ -71,6 +147,7 @@ class GenerationService:
             context (str): Retrieved context from search
             include_context_info (bool): Whether to include additional context info
             max_tokens (Optional[int]): Maximum tokens in response
+            priority (Priority): Scheduling priority of the call
             
         Returns:
             str: Generated response
@@ -85,8 +162,9 @@ class GenerationService:
             if max_tokens:
                 generation_config['max_output_tokens'] = max_tokens
             
-            response = self.model.generate_content(
+            response = self._generate_content(
                 prompt,
+                priority=priority,
                 generation_config=generation_config if generation_config else None
             )
             
@@ -95,6 +173,8 @@ class GenerationService:
             
             return generated_text
             
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             return f"দুঃখিত, উত্তর তৈরি করতে সমস্যা হয়েছে। অনুগ্রহ করে আবার চেষ্টা করুন।"
@@ -116,19 +196,23 @@ class GenerationService:
 সংক্ষেপে উত্তর দাও:"""
         
         try:
-            response = self.model.generate_content(simple_prompt)
+            response = self._generate_content(simple_prompt)
             return response.text
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Error in simple response generation: {str(e)}")
             return "উত্তর তৈরি করতে সমস্যা হয়েছে।"
     
-    def generate_explanation(self, concept: str, context: str) -> str:
+    def generate_explanation(self, concept: str, context: str,
+                             priority: Priority = Priority.INTERACTIVE) -> str:
         """
         Generate detailed explanation for a physics concept
         
         Args:
             concept (str): Physics concept to explain
             context (str): Related context from textbook
+            priority (Priority): Scheduling priority of the call
             
         Returns:
             str: Detailed explanation
@@ -146,19 +230,23 @@ class GenerationService:
 শিক্ষার্থীদের জন্য সহজ ভাষায় ব্যাখ্যা করো।"""
         
         try:
-            response = self.model.generate_content(explanation_prompt)
+            response = self._generate_content(explanation_prompt, priority=priority)
             return response.text
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Error generating explanation: {str(e)}")
             return f"'{concept}' সম্পর্কে ব্যাখ্যা তৈরি করতে সমস্যা হয়েছে।"
     
-    def generate_with_sources(self, query: str, search_results: List[Dict]) -> Dict:
+    def generate_with_sources(self, query: str, search_results: List[Dict],
+                              priority: Priority = Priority.INTERACTIVE) -> Dict:
         """
         Generate response with source information from Weaviate results
         
         Args:
             query (str): User's question
             search_results (List[Dict]): Search results from Weaviate
+            priority (Priority): Scheduling priority of the call
             
         Returns:
             Dict: Response with sources and metadata
@@ -174,18 +262,12 @@ class GenerationService:
         primary_context = search_results[0]['content']
         
         try:
-            response_text = self.generate_response(query, primary_context)
+            response_text = self.generate_response(query, primary_context, priority=priority)
             
             # Prepare source information
             sources = []
             for result in search_results[:3]:  # Top 3 sources
-                sources.append({
-                    'content_preview': result['content'][:200] + "..." if len(result['content']) > 200 else result['content'],
-                    'score': result.get('score', 0.0),
-                    'doc_id': result.get('doc_id'),
-                    'rank': result.get('rank', 0),
-                    'search_type': result.get('search_type', 'hybrid')
-                })
+                sources.append(source_info(result))
             
             # Estimate confidence based on top result score
             confidence = min(search_results[0].get('score', 0.0), 1.0)
@@ -199,6 +281,8 @@ class GenerationService:
                 'total_sources': len(search_results)
             }
             
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Error generating response with sources: {str(e)}")
             return {
@@ -207,13 +291,63 @@ class GenerationService:
                 'confidence': 0.0
             }
     
-    def generate_multi_context_response(self, query: str, contexts: List[str]) -> str:
+    def generate_extractive_response(self, search_results: List[Dict],
+                                     max_chars: int = 600) -> Dict:
+        """
+        Build an answer from the retrieved text alone, without calling Gemini
+        
+        Used when generation would exceed the request's latency budget.
+        
+        Args:
+            search_results (List[Dict]): Search results from Weaviate
+            max_chars (int): Maximum length of the extracted answer
+            
+        Returns:
+            Dict: Response with sources and metadata
+        """
+        if not search_results:
+            return {
+                'response': "দুঃখিত, এই প্রশ্নের জন্য কোনো প্রাসঙ্গিক তথ্য পাওয়া যায়নি।",
+                'sources': [],
+                'confidence': 0.0
+            }
+        
+        # Skip headings and images, keep whole sentences from the best chunk
+        lines = [
+            line.strip() for line in search_results[0]['content'].splitlines()
+            if line.strip() and not line.lstrip().startswith(('#', '!['))
+        ]
+        sentences = [s.strip() for s in re.split(r'(?<=[।?!.])\s+', " ".join(lines)) if s.strip()]
+        
+        answer = ""
+        for sentence in sentences:
+            if answer and len(answer) + len(sentence) + 1 > max_chars:
+                break
+            answer = f"{answer} {sentence}".strip()
+        if not answer:
+            answer = search_results[0]['content'][:max_chars]
+        
+        sources = []
+        for result in search_results[:3]:
+            sources.append(source_info(result))
+        
+        return {
+            'response': answer,
+            'sources': sources,
+            # Extracted text is less reliable than a generated answer
+            'confidence': min(max(search_results[0].get('score', 0.0), 0.0), 1.0) * 0.5,
+            'total_sources': len(search_results)
+        }
+    
+    def generate_multi_context_response(self, query: str, contexts: List[str],
+                                        priority: Priority = Priority.INTERACTIVE) -> str:
         """
         Generate response using multiple contexts
         
         Args:
             query (str): User's question
             contexts (List[str]): Multiple context texts
+            priority (Priority): Scheduling priority of the call
             
         Returns:
             str: Generated response
@@ -234,8 +368,10 @@ class GenerationService:
 উত্তর বাংলায় দাও এবং বিভিন্ন প্রসঙ্গের তথ্য একসাথে করে সম্পূর্ণ উত্তর দাও।"""
         
         try:
-            response = self.model.generate_content(multi_context_prompt)
+            response = self._generate_content(multi_context_prompt, priority=priority)
             return response.text
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Error generating multi-context response: {str(e)}")
             return "একাধিক প্রসঙ্গ ব্যবহার করে উত্তর তৈরি করতে সমস্যা হয়েছে।"
@@ -0,0 +1,364 @@
+"""
+Concept Glossary for Physics RAG System with Weaviate
+Bengali/English term pairs mined from the book, mapped to the chunks that define them
+"""
+
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GLOSSARY_FORMAT_VERSION = 1
+
+# "বল (Force)": an English parenthetical, and the one to three Bengali words right before it
+ENGLISH_TERM = re.compile(r"\(([A-Za-z][A-Za-z0-9 '\-]{1,48})\)")
+BENGALI_BEFORE = re.compile(r"((?:[\u0980-\u09FF]+\s+){0,2}[\u0980-\u09FF]+)\s*$")
+HEADING = re.compile(r"^#{1,4}\s*(.+?)\s*$")
+HEADING_NUMBER = re.compile(r"^(\d+(?:\.\d+)+)\s+")
+# "দ্বিতীয় অধ্যায় গতি", "অধ্যায় ৪: কাজ" and list markers such as "(e)"
+HEADING_PREFIX = re.compile(unicodedata.normalize('NFC', r"^(?:\S*\s*অধ্যায়\s*[\d]*\s*:?\s*|\([^()]{1,3}\)\s*)"))
+ENGLISH_SUFFIX = re.compile(r"\(([^()]*[A-Za-z][^()]*)\)\s*$")
+# "দূরত্ব ও সরণ (Distance and Displacement)" also defines each (one- or two-word) part
+BENGALI_PARTS = re.compile(unicodedata.normalize('NFC', r",\s*|\s+(?:ও|এবং)\s+"))
+ENGLISH_PARTS = re.compile(r",\s*(?:and\s+)?|\s+and\s+", re.I)
+
+# Words that end up in front of an inline term ("তাকে বলে বিস্তার (Amplitude)")
+LEADING_WORDS = frozenset(unicodedata.normalize('NFC', word) for word in (
+    "বা এবং ও যে যা তার তাকে তাদের বলে নাম এই এটা এটি সেই একটি একে যদি তখন এখানে সালে "
+    "হয় হয়ে হলো দিয়ে কারণে মাঝে সাথে মধ্যে থেকে প্রতি অংশকে কিছু"
+).split())
+
+# Question wording around a concept ("বল কাকে বলে?", "what is force")
+QUESTION_SUFFIX = re.compile(unicodedata.normalize('NFC',
+    r"\s+(?:কী|কি|কাকে বলে|বলতে কী বোঝ\S*|ব্যাখ্যা কর\S*|সম্পর্কে আলোচনা কর\S*|এর সংজ্ঞা দাও|সংজ্ঞা দাও)$"))
+QUESTION_PREFIX = re.compile(r"^(?:what is|what are|what's|define|explain)\s+(?:the\s+|an?\s+)?")
+# Case endings dropped for near-exact matches ("বলের" -> "বল", "forces" -> "force")
+WORD_ENDINGS = tuple(unicodedata.normalize('NFC', ending) for ending in ("ের", "এর", "র", "কে", "টি", "টা", "es", "s"))
+
+BENGALI_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+
+# Chunks kept per concept, and the shortest key matched with a one-character typo
+MAX_DEFINING_CHUNKS = 5
+MIN_FUZZY_CHARS = 4
+
+
+def term_key(text: str) -> str:
+    """Lookup key of a term: Unicode NFC, lower case, ASCII digits, punctuation removed, single spaces"""
+    text = unicodedata.normalize('NFC', text).lower().translate(BENGALI_DIGITS)
+    return ' '.join(re.sub(r"[^\w\u0980-\u09FF]+", ' ', text).replace('_', ' ').split())
+
+
+def glossary_term(concept: Dict) -> str:
+    """Display form of a concept, e.g. 'বল (Force)'"""
+    if concept['bengali'] and concept['english']:
+        return f"{concept['bengali']} ({concept['english']})"
+    return concept['bengali'] or concept['english']
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion or substitution"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def clean_heading(raw: str) -> Tuple[str, str]:
+    """Section number and title text of a heading line ('' if it is not a heading)"""
+    match = HEADING.match(raw.strip())
+    if not match:
+        return '', ''
+    title = match.group(1).replace('<br>', ' ')
+    title = re.sub(r"\\section\*\{(.*?)\}", r"\1", title)
+    number = HEADING_NUMBER.match(title)
+    if number:
+        title = title[number.end():]
+    title = HEADING_PREFIX.sub('', unicodedata.normalize('NFC', title))
+    return (number.group(1) if number else ''), ' '.join(title.split())
+
+
+def _strip_leading_words(bengali: str) -> str:
+    words = bengali.split()
+    while words and words[0] in LEADING_WORDS:
+        words.pop(0)
+    return ' '.join(words)
+
+
+def _term_pairs(text: str) -> List[Tuple[str, str]]:
+    """Every "<Bengali words> (<English>)" in text, leading filler words removed"""
+    pairs = []
+    for match in ENGLISH_TERM.finditer(text):
+        bengali = BENGALI_BEFORE.search(text, max(0, match.start() - 120), match.start())
+        if bengali:
+            pairs.append((_strip_leading_words(bengali.group(1)), match.group(1).strip()))
+    return pairs
+
+
+def _heading_pairs(number: str, title: str) -> List[Tuple[str, str]]:
+    """(Bengali, English) terms a heading defines"""
+    pairs = _term_pairs(title)
+    if len(pairs) > 1:
+        # "স্কেইল (Scale) বা রুলার (Ruler)" defines each term
+        return pairs
+    
+    english = ''
+    match = ENGLISH_SUFFIX.search(title)
+    if match:
+        english = match.group(1).strip()
+        title = title[:match.start()]
+    elif not number:
+        return []  # Unnumbered Bengali-only headings are exercise and page furniture
+    # A trailing Bengali parenthetical is a description ("ব্যালান (ভর মাপার যন্ত্র)")
+    bengali = ' '.join(re.sub(r"\([^()]*\)\s*$", '', title).split()).strip(' :')
+    if not re.search(r"[\u0980-\u09FF]", bengali):
+        bengali = ''
+    if not (bengali or english):
+        return []
+    
+    pairs = [(bengali, english)]
+    bengali_parts, english_parts = BENGALI_PARTS.split(bengali), ENGLISH_PARTS.split(english)
+    if (bengali and english and 1 < len(bengali_parts) == len(english_parts)
+            and all(len(part.split()) <= 2 for part in bengali_parts + english_parts)):
+        pairs.extend(zip(bengali_parts, english_parts))
+    return pairs
+
+
+def _inline_pairs(line: str) -> List[Tuple[str, str]]:
+    """(Bengali, English) terms introduced in running text"""
+    # Skip symbols and labels such as "(PX)" or "(kg)"
+    return [(bengali, english) for bengali, english in _term_pairs(line)
+            if bengali and len(english) >= 3 and any(c.islower() for c in english)]
+
+
+def mine_glossary(chunks: Iterable[Tuple[int, str]]) -> List[Dict]:
+    """
+    Mine the concept glossary from chunks in reading order
+    
+    A heading such as "## 3.2 বল (Force)" defines its terms in the chunk
+    that holds it; an inline "ত্বরণ (Acceleration)" in running text
+    mentions them. Terms are grouped by their English name, and a
+    Bengali-only section title joins the concept whose Bengali name it
+    shares. A concept's chunks are its defining chunks in reading order,
+    then the chunks mentioning it most often.
+    
+    Args:
+        chunks (Iterable[Tuple[int, str]]): (doc_id, text) pairs
+    
+    Returns:
+        List[Dict]: Concepts with bengali, aliases, english, doc_ids, headings, mentions
+            and frequency (occurrences of the names in the book)
+    """
+    concepts: Dict[str, Dict] = {}
+    
+    def add(bengali: str, english: str, doc_id: int, heading: bool) -> None:
+        key = term_key(english) or term_key(bengali)
+        if not key:
+            return
+        concept = concepts.setdefault(key, {
+            'english': english, 'bengali': Counter(), 'defining': [], 'mentions': Counter()
+        })
+        if bengali:
+            concept['bengali'][' '.join(unicodedata.normalize('NFC', bengali).split())] += 3 if heading else 1
+        if heading:
+            concept['english'] = english or concept['english']
+            if doc_id not in concept['defining']:
+                concept['defining'].append(doc_id)
+        else:
+            concept['mentions'][doc_id] += 1
+    
+    texts = []
+    for doc_id, text in chunks:
+        texts.append(text)
+        for line in text.splitlines():
+            if '(' not in line and not line.startswith('#'):
+                continue
+            number, title = clean_heading(line)
+            if title:
+                for bengali, english in _heading_pairs(number, title):
+                    add(bengali, english, doc_id, heading=True)
+            else:
+                for bengali, english in _inline_pairs(line):
+                    add(bengali, english, doc_id, heading=False)
+    
+    # Fold Bengali-only concepts into the English-named concept with the same Bengali term
+    by_bengali = {term_key(b): key for key, c in concepts.items() if c['english'] for b in c['bengali']}
+    for key in [k for k, c in concepts.items() if not c['english']]:
+        target = by_bengali.get(key)
+        if target is not None:
+            concept, merged = concepts.pop(key), concepts[target]
+            merged['bengali'].update(concept['bengali'])
+            merged['defining'].extend(d for d in concept['defining'] if d not in merged['defining'])
+            merged['mentions'].update(concept['mentions'])
+    
+    # How often each concept's names occur in the book, for ranking suggestions
+    corpus = unicodedata.normalize('NFC', '\n'.join(texts)).lower()
+    
+    records = []
+    for concept in concepts.values():
+        defining = sorted(concept['defining'])
+        mentioned = [d for d, _ in sorted(concept['mentions'].items(), key=lambda item: (-item[1], item[0]))
+                     if d not in defining]
+        names = [name for name, _ in concept['bengali'].most_common()]
+        records.append({
+            'bengali': names[0] if names else '',
+            'aliases': names[1:],
+            'english': concept['english'],
+            'doc_ids': (defining + mentioned)[:MAX_DEFINING_CHUNKS],
+            'headings': len(defining),
+            'mentions': sum(concept['mentions'].values()),
+            'frequency': sum(corpus.count(name.lower()) for name in {names[0] if names else '', concept['english']} if name)
+        })
+    records.sort(key=lambda r: (r['doc_ids'][0] if r['doc_ids'] else -1, r['english'], r['bengali']))
+    return records
+
+
+def write_glossary(path: str, concepts: List[Dict], chunks_content_hash: str = '') -> Path:
+    """
+    Write a glossary file, atomically replacing any file at path
+    
+    Args:
+        path (str): Target JSON file
+        concepts (List[Dict]): Output of mine_glossary
+        chunks_content_hash (str): Content hash of the chunk store the concepts point into
+    
+    Returns:
+        Path: The glossary file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(staging, 'w', encoding='utf-8') as f:
+        json.dump({
+            'format_version': GLOSSARY_FORMAT_VERSION,
+            'chunks_content_hash': chunks_content_hash,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'concepts': concepts
+        }, f, ensure_ascii=False, indent=1)
+    os.replace(staging, path)
+    logger.info(f"Wrote glossary {path} with {len(concepts)} concepts")
+    return path
+
+
+class Glossary:
+    """
+    In-memory concept index
+    
+    Every Bengali name, alias and English name is a key of a hash table.
+    Near-exact lookups also try the concept without question wording and
+    case endings, then keys one edit away, found through a table of
+    single-character deletions (as in SymSpell) rather than a scan.
+    """
+    
+    def __init__(self, concepts: List[Dict], chunks_content_hash: str = ''):
+        """
+        Index concepts
+        
+        Args:
+            concepts (List[Dict]): Output of mine_glossary
+            chunks_content_hash (str): Content hash of the chunk store the concepts point into
+        """
+        self.concepts = concepts
+        self.chunks_content_hash = chunks_content_hash
+        self._terms: Dict[str, List[int]] = {}
+        self._deletions: Dict[str, List[str]] = {}
+        
+        for index, concept in enumerate(concepts):
+            for name in [concept['bengali'], *concept['aliases'], concept['english']]:
+                key = term_key(name)
+                if not key:
+                    continue
+                if key not in self._terms:
+                    self._terms[key] = []
+                    if len(key) >= MIN_FUZZY_CHARS:
+                        for i in range(len(key)):
+                            self._deletions.setdefault(key[:i] + key[i + 1:], []).append(key)
+                if index not in self._terms[key]:
+                    self._terms[key].append(index)
+    
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """True if path holds a glossary (an empty path disables it)"""
+        return bool(path) and Path(path).is_file()
+    
+    @classmethod
+    def load(cls, path: str) -> "Glossary":
+        """Read a file written by write_glossary"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format_version') != GLOSSARY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported glossary format: {data.get('format_version')}")
+        return cls(data['concepts'], data.get('chunks_content_hash', ''))
+    
+    def __len__(self) -> int:
+        return len(self.concepts)
+    
+    def _best(self, indices: Iterable[int]) -> int:
+        """Index of the concept most likely meant: defined by a heading, then most mentioned"""
+        return max(indices, key=lambda i: (self.concepts[i]['headings'] > 0, self.concepts[i]['mentions'], -i))
+    
+    def _forms(self, key: str) -> List[str]:
+        """The key without question wording, then without a case ending"""
+        stripped = QUESTION_PREFIX.sub('', QUESTION_SUFFIX.sub('', key))
+        forms = [stripped] if stripped and stripped != key else []
+        for form in [key, stripped]:
+            for ending in WORD_ENDINGS:
+                if form.endswith(ending) and len(form) - len(ending) >= 2:
+                    forms.append(form[:-len(ending)])
+        return list(dict.fromkeys(forms))
+    
+    def lookup(self, text: str) -> Optional[Dict]:
+        """
+        Resolve a concept name to a glossary concept
+        
+        Args:
+            text (str): Concept as the user typed it (Bengali or English)
+        
+        Returns:
+            Optional[Dict]: 'concept', 'match' ('exact' or 'near') and the matched
+                'term' key, or None on a miss
+        """
+        key = term_key(text)
+        if not key:
+            return None
+        if key in self._terms:
+            return {'concept': self.concepts[self._best(self._terms[key])], 'match': 'exact', 'term': key}
+        
+        forms = [key] + self._forms(key)
+        for form in forms[1:]:
+            if form in self._terms:
+                return {'concept': self.concepts[self._best(self._terms[form])], 'match': 'near', 'term': form}
+        
+        for form in forms:
+            if len(form) < MIN_FUZZY_CHARS:
+                continue
+            candidates = list(self._deletions.get(form, []))
+            for i in range(len(form)):
+                deletion = form[:i] + form[i + 1:]
+                if deletion in self._terms:
+                    candidates.append(deletion)
+                candidates.extend(self._deletions.get(deletion, []))
+            matches = [c for c in dict.fromkeys(candidates) if len(c) >= MIN_FUZZY_CHARS and _within_one_edit(form, c)]
+            if matches:
+                best = self._best(i for term in matches for i in self._terms[term])
+                term = next(t for t in matches if best in self._terms[t])
+                return {'concept': self.concepts[best], 'match': 'near', 'term': term}
+        return None
+    
+    def get_stats(self) -> Dict:
+        """Glossary statistics"""
+        return {
+            'concepts': len(self.concepts),
+            'terms': len(self._terms),
+            'bilingual': sum(1 for c in self.concepts if c['bengali'] and c['english'])
+        }
@@ -0,0 +1,221 @@
+"""
+Index Snapshots for Physics RAG System with Weaviate
+Export a collection with its vectors and restore it without re-embedding
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .chunk_store import ChunkStore, describe_chunks, write_chunk_store
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+class SnapshotMismatch(ValueError):
+    """A snapshot that cannot serve the current configuration"""
+
+
+def _manifest_hash(manifest: Dict) -> str:
+    """Hash of every manifest field except the hash itself"""
+    body = {k: v for k, v in manifest.items() if k not in ('manifest_hash', 'created_at')}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def write_snapshot(path: str, doc_ids: Sequence[int], texts: Sequence[str], vectors: np.ndarray,
+                   embedding_model: str, collection_name: str, source: str = '') -> Path:
+    """
+    Write an index snapshot, atomically replacing any snapshot at path
+    
+    The directory holds the chunks in chunk store format (chunks/), the
+    float32 vector matrix (vectors.npy, one row per chunk) and
+    snapshot.json describing how the vectors were made.
+    
+    Args:
+        path (str): Target directory
+        doc_ids (Sequence[int]): doc_id per object
+        texts (Sequence[str]): Text per object
+        vectors (np.ndarray): Vector per object
+        embedding_model (str): Model that produced the vectors
+        collection_name (str): Collection the objects came from
+        source (str): Description of where the objects came from
+    
+    Returns:
+        Path: The snapshot directory
+    """
+    path = Path(path)
+    vectors = np.ascontiguousarray(vectors, dtype='<f4')
+    if vectors.ndim != 2 or len(vectors) != len(texts) or len(texts) != len(doc_ids):
+        raise ValueError("Expected one text, doc_id and vector row per object")
+    
+    # Chunk metadata is derived in reading order, so sort by doc_id first
+    order = sorted(range(len(doc_ids)), key=lambda i: doc_ids[i])
+    doc_ids = [int(doc_ids[i]) for i in order]
+    texts = [texts[i] for i in order]
+    vectors = vectors[order]
+    
+    staging = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    
+    write_chunk_store(staging / 'chunks', texts, doc_ids=doc_ids,
+                      metadata=describe_chunks(texts), source=source)
+    np.save(staging / 'vectors.npy', vectors, allow_pickle=False)
+    with open(staging / 'chunks' / 'manifest.json', 'r', encoding='utf-8') as f:
+        chunk_manifest = json.load(f)
+    
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'collection': collection_name,
+        'embedding_model': embedding_model,
+        'dimension': int(vectors.shape[1]),
+        'count': len(texts),
+        'chunks_content_hash': chunk_manifest['content_hash'],
+        'vectors_sha256': hashlib.sha256(vectors.tobytes()).hexdigest(),
+        'source': source,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    manifest['manifest_hash'] = _manifest_hash(manifest)
+    with open(staging / 'snapshot.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    
+    retired = path.with_name(f".{path.name}.old-{os.getpid()}")
+    if path.exists():
+        os.replace(path, retired)
+    os.replace(staging, path)
+    shutil.rmtree(retired, ignore_errors=True)
+    
+    logger.info(f"Wrote snapshot {path}: {len(texts)} objects, dimension {vectors.shape[1]}, {embedding_model}")
+    return path
+
+
+class IndexSnapshot:
+    """Read-only view of a snapshot directory (chunks and vectors are memory-mapped)"""
+    
+    def __init__(self, path: str):
+        """
+        Open a snapshot
+        
+        Args:
+            path (str): Directory written by write_snapshot
+        """
+        self.path = Path(path)
+        with open(self.path / 'snapshot.json', 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotMismatch(f"Unsupported snapshot format: {self.manifest.get('format_version')}")
+        if _manifest_hash(self.manifest) != self.manifest.get('manifest_hash'):
+            raise SnapshotMismatch(f"Snapshot manifest {self.path / 'snapshot.json'} was modified")
+        
+        self.chunks = ChunkStore(self.path / 'chunks')
+        self.vectors = np.load(self.path / 'vectors.npy', mmap_mode='r', allow_pickle=False)
+        if self.vectors.shape != (self.manifest['count'], self.manifest['dimension']):
+            raise SnapshotMismatch(f"vectors.npy has shape {self.vectors.shape}, manifest says "
+                                   f"({self.manifest['count']}, {self.manifest['dimension']})")
+    
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """True if path holds a snapshot (an empty path disables snapshots)"""
+        return bool(path) and (Path(path) / 'snapshot.json').exists()
+    
+    @property
+    def embedding_model(self) -> str:
+        return self.manifest['embedding_model']
+    
+    @property
+    def dimension(self) -> int:
+        return self.manifest['dimension']
+    
+    def __len__(self) -> int:
+        return self.manifest['count']
+    
+    def verify(self) -> None:
+        """Check the chunk and vector contents against the manifest (reads everything)"""
+        if self.chunks.manifest['content_hash'] != self.manifest['chunks_content_hash']:
+            raise SnapshotMismatch("Snapshot chunks do not match the manifest")
+        if hashlib.sha256(np.ascontiguousarray(self.vectors).tobytes()).hexdigest() != self.manifest['vectors_sha256']:
+            raise SnapshotMismatch("Snapshot vectors do not match the manifest")
+    
+    def check_compatible(self, embedding_model: str, chunk_store: Optional[ChunkStore] = None) -> None:
+        """
+        Refuse snapshots that would serve stale or incompatible vectors
+        
+        Args:
+            embedding_model (str): Model queries will be embedded with
+            chunk_store (Optional[ChunkStore]): Current chunks; the snapshot must hold the same ones
+        """
+        if self.embedding_model != embedding_model:
+            raise SnapshotMismatch(f"Snapshot vectors come from {self.embedding_model}, "
+                                   f"queries use {embedding_model}")
+        if chunk_store is not None:
+            if chunk_store.manifest['content_hash'] != self.chunks.manifest['content_hash']:
+                raise SnapshotMismatch("Snapshot chunks differ from the chunk store")
+    
+    def restore(self, search_service, reset: bool = True) -> int:
+        """
+        Load the snapshot into a collection with bulk batch inserts
+        
+        Works with Weaviate and with the local backend; no embedding calls
+        are made.
+        
+        Args:
+            search_service (WeaviateSearchService): Target collection
+            reset (bool): Empty the collection first
+        
+        Returns:
+            int: Objects restored
+        """
+        start = time.perf_counter()
+        if reset:
+            search_service.reset_collection()
+        doc_ids = [int(d) for d in self.chunks.doc_ids]
+        search_service.insert_documents(self.chunks.texts(), self.vectors, doc_ids=doc_ids)
+        logger.info(f"Restored {len(doc_ids)} objects from {self.path} into "
+                    f"{search_service.collection_name} in {time.perf_counter() - start:.2f}s")
+        return len(doc_ids)
+    
+    def get_stats(self) -> Dict:
+        """Snapshot statistics"""
+        return {
+            'path': str(self.path),
+            'count': len(self),
+            'dimension': self.dimension,
+            'embedding_model': self.embedding_model,
+            'collection': self.manifest['collection'],
+            'manifest_hash': self.manifest['manifest_hash'],
+            'created_at': self.manifest['created_at']
+        }
+    
+    def close(self) -> None:
+        """Release the memory maps"""
+        self.vectors = None
+        self.chunks.close()
+
+
+def export_snapshot(search_service, path: str, embedding_model: str) -> Path:
+    """
+    Export a collection, vectors included, to a snapshot directory
+    
+    Args:
+        search_service (WeaviateSearchService): Source collection
+        path (str): Target directory
+        embedding_model (str): Model that produced the collection's vectors
+    
+    Returns:
+        Path: The snapshot directory
+    """
+    doc_ids, texts, vectors = search_service.export_documents()
+    if not texts:
+        raise ValueError(f"Collection {search_service.collection_name} is empty")
+    return write_snapshot(path, doc_ids, texts, np.asarray(vectors, dtype=np.float32),
+                          embedding_model, search_service.collection_name,
+                          source=f"{search_service.weaviate_url}/{search_service.collection_name}")
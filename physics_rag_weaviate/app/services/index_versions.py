@@ -0,0 +1,282 @@
+"""
+Index Versions for Physics RAG System with Weaviate
+Versioned collections (PhysicsChunk_v{n}) behind a Weaviate alias or a pointer file
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-worker serving only, nothing to coordinate
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def versioned_name(alias: str, version: int) -> str:
+    """Collection name of an index version, e.g. PhysicsChunk_v3 (version 0 is the bare alias)"""
+    return alias if version == 0 else f"{alias}_v{version}"
+
+
+def parse_version(alias: str, collection_name: str) -> Optional[int]:
+    """Version number of a versioned collection name, None for other collections"""
+    match = re.fullmatch(rf"{re.escape(alias)}_v(\d+)", collection_name)
+    return int(match.group(1)) if match else None
+
+
+def list_versions(client, alias: str) -> List[int]:
+    """Versions of the alias that exist as collections, ascending"""
+    collections = client.collections.list_all()
+    names = collections.keys() if isinstance(collections, dict) else collections
+    versions = (parse_version(alias, str(name)) for name in names)
+    return sorted(v for v in versions if v is not None)
+
+
+def default_state(alias: str) -> Dict:
+    """Pointer state before any swap: the alias itself is the live collection (version 0)"""
+    return {'alias': alias, 'collection': alias, 'version': 0, 'history': []}
+
+
+class AliasPointer:
+    """
+    Which collection serves an alias, stored as a Weaviate collection alias
+    
+    The alias lives in the Weaviate cluster, so every worker on every host
+    sees a swap made anywhere (by any API replica or by tools/reindex.py)
+    on its next refresh. Needs Weaviate 1.32 or later (see IndexPointer for
+    older servers). Without an alias, a collection named like the alias is
+    the live collection (version 0), which is how collections built before
+    versioning keep working. An alias cannot share its name with a
+    collection, so before the first swap that collection is copied to
+    {alias}_v0 and replaced by an alias to the copy (migrate_unversioned);
+    swap itself never deletes a collection.
+    """
+    
+    def __init__(self, connection, alias: str):
+        """
+        Initialize the pointer
+        
+        Args:
+            connection (WeaviateConnection): Shared Weaviate connection
+            alias (str): Name clients use for the index, e.g. PhysicsChunk
+        """
+        self.connection = connection
+        self.alias = alias
+    
+    def collection_name(self, version: int) -> str:
+        """Collection holding a version (every version is a versioned collection, even 0)"""
+        return f"{self.alias}_v{version}"
+    
+    def unversioned(self) -> bool:
+        """Whether a pre-versioning collection still holds the alias's name (a Weaviate request)"""
+        def check(client) -> bool:
+            return client.alias.get(alias_name=self.alias) is None and client.collections.exists(self.alias)
+        
+        return self.connection.run(check)
+    
+    def migrate_unversioned(self, copy: Callable[[str, str], int]) -> Optional[Dict]:
+        """
+        Move a pre-versioning collection behind the alias, as version 0
+        
+        The collection is copied to {alias}_v0 first and only deleted once
+        the copy holds all of its objects; the alias is created right after,
+        so queries by the alias name miss at most the moment in between.
+        
+        Args:
+            copy (Callable): copy(source, target) copying a collection into a new one, returning the count
+        
+        Returns:
+            Optional[Dict]: The new pointer state, None if there was nothing to migrate
+        
+        Raises:
+            RuntimeError: If the copy is incomplete (it is dropped; the unversioned collection stays live)
+        """
+        if not self.unversioned():
+            return None
+        target = self.collection_name(0)
+        
+        def count(client, name: str) -> int:
+            return client.collections.get(name).aggregate.over_all(total_count=True).total_count
+        
+        expected = self.connection.run(lambda client: count(client, self.alias))
+        if not expected:
+            # Nothing to keep (e.g. created empty by a first connect): the next swap creates the alias
+            self.connection.run(lambda client: client.collections.delete(self.alias))
+            return None
+        
+        logger.info(f"Copying unversioned collection {self.alias} ({expected} objects) to {target}")
+        try:
+            copy(self.alias, target)
+            copied = self.connection.run(lambda client: count(client, target))
+            if copied < expected:
+                raise RuntimeError(f"{target} holds {copied} of {expected} objects of {self.alias}")
+        except Exception:
+            self.connection.run(lambda client: client.collections.delete(target))
+            raise
+        
+        def replace(client) -> None:
+            client.collections.delete(self.alias)
+            client.alias.create(alias_name=self.alias, target_collection=target)
+        
+        self.connection.run(replace)
+        logger.info(f"Index alias {self.alias} -> {target} (migrated from the unversioned collection)")
+        return {'alias': self.alias, 'collection': target, 'version': 0,
+                'swapped_at': time.time(), 'reason': 'migration', 'history': []}
+    
+    def read(self) -> Dict:
+        """Current pointer state (a Weaviate request)"""
+        target = self.connection.run(lambda client: client.alias.get(alias_name=self.alias))
+        if target is None:
+            return default_state(self.alias)
+        version = parse_version(self.alias, target.collection)
+        return {'alias': self.alias, 'collection': target.collection,
+                'version': version or 0, 'history': []}
+    
+    def swap(self, version: int, reason: str = '') -> Dict:
+        """
+        Point the alias at a version
+        
+        Args:
+            version (int): Version to serve
+            reason (str): Logged with the swap, e.g. "reindex" or "rollback"
+        
+        Returns:
+            Dict: The new pointer state
+        
+        Raises:
+            RuntimeError: If an unversioned collection still holds the alias's name
+        """
+        collection = self.collection_name(version)
+        
+        def point(client) -> None:
+            if client.alias.get(alias_name=self.alias) is not None:
+                client.alias.update(alias_name=self.alias, new_target_collection=collection)
+                return
+            if client.collections.exists(self.alias):
+                raise RuntimeError(f"Unversioned collection {self.alias} has not been migrated "
+                                   f"(migrate_unversioned) and is never deleted by a swap")
+            client.alias.create(alias_name=self.alias, target_collection=collection)
+        
+        self.connection.run(point)
+        logger.info(f"Index alias {self.alias} -> {collection} ({reason})")
+        return {'alias': self.alias, 'collection': collection, 'version': version,
+                'swapped_at': time.time(), 'reason': reason, 'history': []}
+
+
+class IndexPointer:
+    """
+    Which collection serves an alias, stored as a small JSON file
+    
+    For Weaviate servers without collection aliases (INDEX_POINTER=file).
+    Every worker on this host reads the same file, so a swap made by one
+    process (or by tools/reindex.py) reaches all of them on their next
+    refresh; replicas on other hosts need the file on shared storage.
+    Writes replace the file atomically; readers never see a partial
+    pointer. Without a pointer file the alias itself is the live
+    collection (version 0), which is how collections built before
+    versioning keep working.
+    """
+    
+    def __init__(self, path: str, alias: str):
+        """
+        Initialize the pointer
+        
+        Args:
+            path (str): Pointer file
+            alias (str): Name clients use for the index, e.g. PhysicsChunk
+        """
+        self.path = Path(path)
+        self.alias = alias
+        self._lock = threading.Lock()
+    
+    def collection_name(self, version: int) -> str:
+        """Collection holding a version (version 0 is the alias itself)"""
+        return versioned_name(self.alias, version)
+    
+    def read(self) -> Dict:
+        """Current pointer state"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('alias') == self.alias:
+                return state
+        except (OSError, ValueError):
+            pass
+        return default_state(self.alias)
+    
+    def swap(self, version: int, reason: str = '') -> Dict:
+        """
+        Point the alias at a version
+        
+        Args:
+            version (int): Version to serve
+            reason (str): Recorded in the history, e.g. "reindex" or "rollback"
+        
+        Returns:
+            Dict: The new pointer state
+        """
+        with self._lock:
+            state = self.read()
+            history = state.get('history', [])
+            if state['version'] != version:
+                history = history + [{'version': state['version'], 'retired_at': time.time()}]
+            new_state = {
+                'alias': self.alias,
+                'collection': versioned_name(self.alias, version),
+                'version': version,
+                'swapped_at': time.time(),
+                'reason': reason,
+                'history': history[-20:]
+            }
+            
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            staging = self.path.with_name(f".{self.path.name}.tmp-{os.getpid()}")
+            with open(staging, 'w', encoding='utf-8') as f:
+                json.dump(new_state, f, indent=2)
+            os.replace(staging, self.path)
+        
+        logger.info(f"Index alias {self.alias} -> {new_state['collection']} ({reason})")
+        return new_state
+
+
+class BuildLock:
+    """
+    Host-wide lock around building an index, shared through a lock file
+    
+    With several workers, the first request on each of them finds the
+    collection empty; the lock makes one worker populate it while the
+    others wait and then find it filled. The wait runs in a thread so the
+    waiting worker keeps serving other requests.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Initialize the lock
+        
+        Args:
+            path (str): Lock file, created if missing
+        """
+        self.path = Path(path)
+        self._file = None
+    
+    async def __aenter__(self) -> "BuildLock":
+        if fcntl is None:
+            return self
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        await asyncio.to_thread(fcntl.flock, self._file.fileno(), fcntl.LOCK_EX)
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,198 @@
+"""
+k-NN Graph for Physics RAG System with Weaviate
+Precomputed nearest neighbours of every chunk, for "more like this" lookups
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GRAPH_FORMAT_VERSION = 1
+
+
+def nearest_neighbours(vectors: np.ndarray, k: int, block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact cosine k-nearest neighbours of every row, excluding the row itself
+    
+    Rows are compared a block at a time (one matrix product per block), so
+    memory stays at block_size x n similarities however large the corpus.
+    
+    Args:
+        vectors (np.ndarray): One vector per row
+        k (int): Neighbours per row (capped at n - 1)
+        block_size (int): Rows compared per matrix product
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Neighbour row indices (int32) and their
+            cosine similarities (float32), both n x k, best first
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    count = len(matrix)
+    k = min(k, count - 1)
+    if k <= 0:
+        return np.zeros((count, 0), dtype=np.int32), np.zeros((count, 0), dtype=np.float32)
+    
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms > 0, norms, 1.0)
+    
+    indices = np.empty((count, k), dtype=np.int32)
+    scores = np.empty((count, k), dtype=np.float32)
+    for start in range(0, count, block_size):
+        end = min(start + block_size, count)
+        similarity = matrix[start:end] @ matrix.T
+        similarity[np.arange(end - start), np.arange(start, end)] = -np.inf  # Not its own neighbour
+        
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        indices[start:end] = np.take_along_axis(top, order, axis=1)
+        scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
+
+
+def write_knn_graph(path: str, doc_ids: Sequence[int], vectors: np.ndarray, k: int,
+                    chunks_content_hash: str = '', embedding_model: str = '',
+                    block_size: int = 1024) -> Path:
+    """
+    Build the graph and write it, atomically replacing any graph at path
+    
+    The directory holds doc_ids.npy (one per row), neighbours.npy (n x k
+    neighbour doc_ids, int32), scores.npy (n x k similarities, float16) and
+    graph.json.
+    
+    Args:
+        path (str): Target directory
+        doc_ids (Sequence[int]): doc_id per vector
+        vectors (np.ndarray): One vector per chunk
+        k (int): Neighbours kept per chunk
+        chunks_content_hash (str): Content hash of the chunks the vectors embed
+        embedding_model (str): Model that produced the vectors
+        block_size (int): Rows compared per matrix product
+    
+    Returns:
+        Path: The graph directory
+    """
+    path = Path(path)
+    doc_ids = np.asarray(doc_ids, dtype='<i4')
+    if len(doc_ids) != len(vectors):
+        raise ValueError("Expected one doc_id per vector")
+    
+    start = time.perf_counter()
+    rows, scores = nearest_neighbours(vectors, k, block_size)
+    build_seconds = time.perf_counter() - start
+    
+    staging = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    
+    np.save(staging / 'doc_ids.npy', doc_ids, allow_pickle=False)
+    np.save(staging / 'neighbours.npy', doc_ids[rows].astype('<i4'), allow_pickle=False)
+    np.save(staging / 'scores.npy', scores.astype('<f2'), allow_pickle=False)
+    manifest = {
+        'format_version': GRAPH_FORMAT_VERSION,
+        'count': int(len(doc_ids)),
+        'k': int(rows.shape[1]),
+        'chunks_content_hash': chunks_content_hash,
+        'embedding_model': embedding_model,
+        'build_seconds': round(build_seconds, 3),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    with open(staging / 'graph.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    
+    retired = path.with_name(f".{path.name}.old-{os.getpid()}")
+    if path.exists():
+        os.replace(path, retired)
+    os.replace(staging, path)
+    shutil.rmtree(retired, ignore_errors=True)
+    
+    logger.info(f"Wrote k-NN graph {path}: {len(doc_ids)} chunks, k={rows.shape[1]}, built in {build_seconds:.2f}s")
+    return path
+
+
+class KnnGraph:
+    """
+    Read-only view of a graph directory
+    
+    The arrays are memory-mapped like the chunk store, so every worker
+    shares one copy. neighbours() is an O(k) row read.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open a graph
+        
+        Args:
+            path (str): Directory written by write_knn_graph
+        """
+        self.path = Path(path)
+        with open(self.path / 'graph.json', 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != GRAPH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported k-NN graph format: {self.manifest.get('format_version')}")
+        
+        self.doc_ids = np.load(self.path / 'doc_ids.npy', mmap_mode='r', allow_pickle=False)
+        self.neighbour_ids = np.load(self.path / 'neighbours.npy', mmap_mode='r', allow_pickle=False)
+        self.scores = np.load(self.path / 'scores.npy', mmap_mode='r', allow_pickle=False)
+        
+        # Dense doc_id -> row table, as in the chunk store
+        count = len(self.doc_ids)
+        self._rows = np.full(int(self.doc_ids.max()) + 1 if count else 0, -1, dtype=np.int32)
+        self._rows[self.doc_ids] = np.arange(count, dtype=np.int32)
+        
+        logger.info(f"Opened k-NN graph {self.path} with {count} chunks (k={self.k})")
+    
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """True if path holds a graph (an empty path disables the graph)"""
+        return bool(path) and (Path(path) / 'graph.json').exists()
+    
+    @property
+    def k(self) -> int:
+        return self.manifest['k']
+    
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+    
+    def __contains__(self, doc_id: int) -> bool:
+        return 0 <= doc_id < len(self._rows) and self._rows[doc_id] >= 0
+    
+    def neighbours(self, doc_id: int, limit: Optional[int] = None) -> Optional[List[Tuple[int, float]]]:
+        """
+        Nearest chunks of a chunk, best first
+        
+        Args:
+            doc_id (int): Chunk to look up
+            limit (Optional[int]): Neighbours wanted (at most k)
+        
+        Returns:
+            Optional[List[Tuple[int, float]]]: (doc_id, cosine similarity) pairs,
+                or None if the chunk is not in the graph
+        """
+        if doc_id not in self:
+            return None
+        row = int(self._rows[doc_id])
+        end = self.k if limit is None else min(limit, self.k)
+        return [(int(d), float(s)) for d, s in zip(self.neighbour_ids[row, :end], self.scores[row, :end])]
+    
+    def get_stats(self) -> Dict:
+        """Graph statistics"""
+        return {
+            'path': str(self.path),
+            'chunks': len(self),
+            'k': self.k,
+            'embedding_model': self.manifest.get('embedding_model'),
+            'created_at': self.manifest.get('created_at')
+        }
+    
+    def close(self) -> None:
+        """Release the memory maps"""
+        self.doc_ids = self.neighbour_ids = self.scores = None
@@ -0,0 +1,589 @@
+"""
+Local Backend for Physics RAG System with Weaviate
+In-memory stand-in for the subset of the Weaviate v4 client used by the services
+"""
+
+import math
+import re
+import threading
+import uuid as uuid_lib
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Weaviate's default "word" tokenization, extended with the Bengali block so
+# vowel signs and virama stay inside their word
+TOKEN_PATTERN = re.compile(r"[\w\u0980-\u09FF]+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass
+class LocalMetadata:
+    """Query metadata, mirroring weaviate's MetadataReturn fields we read"""
+    score: Optional[float] = None
+    distance: Optional[float] = None
+
+
+@dataclass
+class LocalObject:
+    """A stored object as returned by queries"""
+    uuid: str
+    properties: Dict[str, Any]
+    metadata: LocalMetadata = field(default_factory=LocalMetadata)
+    vector: Dict[str, List[float]] = field(default_factory=dict)
+
+
+@dataclass
+class LocalQueryReturn:
+    """Query result container"""
+    objects: List[LocalObject]
+    
+    def project(self, return_properties: Optional[List[str]]) -> 'LocalQueryReturn':
+        """Keep only the requested properties, as Weaviate does (None keeps all)"""
+        if return_properties is not None:
+            for obj in self.objects:
+                obj.properties = {k: v for k, v in obj.properties.items() if k in return_properties}
+        return self
+
+
+@dataclass
+class LocalAggregateReturn:
+    """Aggregate result container"""
+    total_count: int
+
+
+def _operator_name(operator: Any) -> str:
+    return getattr(operator, 'value', operator)
+
+
+def matches_filter(filters: Any, object_id: str, properties: Dict[str, Any]) -> bool:
+    """
+    Evaluate a weaviate.classes.query.Filter expression against one object
+    
+    Supports And/Or/Not combinations and the comparison, Like and Contains
+    operators on properties and on the object id.
+    
+    Args:
+        filters (Any): Filter built with weaviate.classes.query.Filter
+        object_id (str): Object UUID
+        properties (Dict[str, Any]): Object properties
+    
+    Returns:
+        bool: True if the object passes the filter
+    """
+    if filters is None:
+        return True
+    
+    operator = _operator_name(filters.operator)
+    if operator == 'And':
+        return all(matches_filter(f, object_id, properties) for f in filters.filters)
+    if operator == 'Or':
+        return any(matches_filter(f, object_id, properties) for f in filters.filters)
+    if operator == 'Not':
+        return not matches_filter(filters.filters[0], object_id, properties)
+    
+    target = filters.target
+    value = filters.value
+    actual = object_id if target == '_id' else properties.get(target)
+    if target == '_id':
+        value = [str(v) for v in value] if isinstance(value, list) else str(value)
+    
+    if operator == 'IsNull':
+        return (actual is None) == bool(value)
+    if actual is None:
+        return operator in ('NotEqual', 'ContainsNone')
+    if operator == 'Equal':
+        return actual == value
+    if operator == 'NotEqual':
+        return actual != value
+    if operator == 'LessThan':
+        return actual < value
+    if operator == 'LessThanEqual':
+        return actual <= value
+    if operator == 'GreaterThan':
+        return actual > value
+    if operator == 'GreaterThanEqual':
+        return actual >= value
+    if operator == 'Like':
+        pattern = re.escape(str(value)).replace(r'\*', '.*').replace(r'\?', '.')
+        return re.fullmatch(pattern, str(actual)) is not None
+    
+    actual_values = set(actual) if isinstance(actual, (list, tuple, set)) else {actual}
+    if operator == 'ContainsAny':
+        return bool(actual_values & set(value))
+    if operator == 'ContainsAll':
+        return set(value) <= actual_values
+    if operator == 'ContainsNone':
+        return not actual_values & set(value)
+    
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+class _LocalBatch:
+    """Batch context returned by collection.batch.dynamic()"""
+    
+    def __init__(self, collection: 'LocalCollection'):
+        self._collection = collection
+        self.failed_objects: List[Dict] = []
+    
+    @property
+    def number_errors(self) -> int:
+        return len(self.failed_objects)
+    
+    def add_object(self, properties: Dict[str, Any], vector: Any = None,
+                   uuid: Optional[Any] = None, **kwargs) -> str:
+        try:
+            return self._collection.data.insert(properties, vector=vector, uuid=uuid)
+        except Exception as e:
+            self.failed_objects.append({'properties': properties, 'error': str(e)})
+            return str(uuid) if uuid else ''
+
+
+class _LocalBatchFactory:
+    def __init__(self, collection: 'LocalCollection'):
+        self._collection = collection
+    
+    @contextmanager
+    def dynamic(self) -> Iterator[_LocalBatch]:
+        yield _LocalBatch(self._collection)
+    
+    fixed_size = dynamic
+    rate_limit = dynamic
+
+
+class _LocalData:
+    """collection.data namespace"""
+    
+    def __init__(self, collection: 'LocalCollection'):
+        self._collection = collection
+    
+    def insert(self, properties: Dict[str, Any], vector: Any = None,
+               uuid: Optional[Any] = None, **kwargs) -> str:
+        return self._collection._put(properties, vector, uuid)
+    
+    def insert_many(self, objects: List[Any]) -> List[str]:
+        ids = []
+        for obj in objects:
+            if isinstance(obj, dict):
+                ids.append(self.insert(obj))
+            else:
+                ids.append(self.insert(obj.properties, vector=obj.vector, uuid=obj.uuid))
+        return ids
+    
+    def delete_by_id(self, uuid: Any) -> bool:
+        return self._collection._remove([str(uuid)]) > 0
+    
+    def delete_many(self, where: Any, **kwargs) -> int:
+        collection = self._collection
+        with collection._lock:
+            doomed = [oid for oid, props in zip(collection._ids, collection._properties)
+                      if matches_filter(where, oid, props)]
+        return collection._remove(doomed)
+
+
+class _LocalQuery:
+    """collection.query namespace"""
+    
+    def __init__(self, collection: 'LocalCollection'):
+        self._collection = collection
+    
+    def hybrid(self, query: str, vector: Optional[List[float]] = None, alpha: float = 0.75,
+               limit: Optional[int] = None, filters: Any = None,
+               include_vector: bool = False, offset: int = 0,
+               return_properties: Optional[List[str]] = None, **kwargs) -> LocalQueryReturn:
+        return self._collection._hybrid(query, vector, alpha, limit, filters, include_vector,
+                                        offset).project(return_properties)
+    
+    def near_vector(self, near_vector: List[float], limit: Optional[int] = None,
+                    distance: Optional[float] = None, filters: Any = None,
+                    include_vector: bool = False, offset: int = 0,
+                    return_properties: Optional[List[str]] = None, **kwargs) -> LocalQueryReturn:
+        return self._collection._near_vector(near_vector, limit, distance, filters, include_vector,
+                                             offset).project(return_properties)
+    
+    def bm25(self, query: str, limit: Optional[int] = None, filters: Any = None,
+             include_vector: bool = False, offset: int = 0,
+             return_properties: Optional[List[str]] = None, **kwargs) -> LocalQueryReturn:
+        return self._collection._bm25(query, limit, filters, include_vector, offset).project(return_properties)
+    
+    def fetch_objects(self, limit: Optional[int] = None, filters: Any = None,
+                      include_vector: bool = False, offset: int = 0,
+                      return_properties: Optional[List[str]] = None, **kwargs) -> LocalQueryReturn:
+        return self._collection._fetch(limit, filters, include_vector, offset).project(return_properties)
+    
+    def fetch_object_by_id(self, uuid: Any, include_vector: bool = False, **kwargs) -> Optional[LocalObject]:
+        return self._collection._get(str(uuid), include_vector)
+
+
+class _LocalAggregate:
+    def __init__(self, collection: 'LocalCollection'):
+        self._collection = collection
+    
+    def over_all(self, total_count: bool = True, **kwargs) -> LocalAggregateReturn:
+        return LocalAggregateReturn(total_count=len(self._collection))
+
+
+class LocalCollectionConfig:
+    """What collection.config.get returns (only the description is kept)"""
+    
+    def __init__(self, name: str, description: Optional[str]):
+        self.name = name
+        self.description = description
+
+
+class _LocalConfig:
+    """collection.config namespace"""
+    
+    def __init__(self, collection: 'LocalCollection'):
+        self._collection = collection
+        self._description: Optional[str] = None
+    
+    def get(self, **kwargs) -> LocalCollectionConfig:
+        return LocalCollectionConfig(self._collection.name, self._description)
+    
+    def update(self, description: Optional[str] = None, **kwargs) -> None:
+        if description is not None:
+            self._description = description
+
+
+class LocalCollection:
+    """
+    In-memory collection with exact cosine, BM25 and hybrid search
+    
+    Vectors are kept in a dense matrix and the keyword index is rebuilt
+    lazily after writes, so bulk loads pay for indexing once.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._properties: List[Dict[str, Any]] = []
+        self._vectors: List[Optional[np.ndarray]] = []
+        self._dirty = True
+        self._matrix: Optional[np.ndarray] = None
+        self._has_vector = np.zeros(0, dtype=bool)
+        self._postings: Dict[str, tuple] = {}
+        self._doc_lengths = np.zeros(0)
+        
+        self.data = _LocalData(self)
+        self.query = _LocalQuery(self)
+        self.batch = _LocalBatchFactory(self)
+        self.aggregate = _LocalAggregate(self)
+        self.config = _LocalConfig(self)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def iterator(self, include_vector: bool = False, **kwargs) -> Iterator[LocalObject]:
+        """Iterate over all objects in insertion order"""
+        with self._lock:
+            positions = list(range(len(self._ids)))
+        for position in positions:
+            yield self._object(position, include_vector)
+    
+    # Writes
+    
+    def _put(self, properties: Dict[str, Any], vector: Any, object_id: Optional[Any]) -> str:
+        if isinstance(vector, dict):
+            vector = vector.get('default', next(iter(vector.values()), None))
+        array = None if vector is None else np.asarray(vector, dtype=np.float32)
+        object_id = str(object_id) if object_id else str(uuid_lib.uuid4())
+        
+        with self._lock:
+            position = self._positions.get(object_id)
+            if position is None:
+                self._positions[object_id] = len(self._ids)
+                self._ids.append(object_id)
+                self._properties.append(dict(properties))
+                self._vectors.append(array)
+            else:
+                self._properties[position] = dict(properties)
+                self._vectors[position] = array
+            self._dirty = True
+        return object_id
+    
+    def _remove(self, object_ids: List[str]) -> int:
+        with self._lock:
+            doomed = {oid for oid in object_ids if oid in self._positions}
+            if not doomed:
+                return 0
+            keep = [i for i, oid in enumerate(self._ids) if oid not in doomed]
+            self._ids = [self._ids[i] for i in keep]
+            self._properties = [self._properties[i] for i in keep]
+            self._vectors = [self._vectors[i] for i in keep]
+            self._positions = {oid: i for i, oid in enumerate(self._ids)}
+            self._dirty = True
+            return len(doomed)
+    
+    # Index maintenance
+    
+    def _ensure_index(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            
+            count = len(self._ids)
+            dimension = next((v.shape[0] for v in self._vectors if v is not None), 0)
+            matrix = np.zeros((count, dimension), dtype=np.float32)
+            has_vector = np.zeros(count, dtype=bool)
+            for i, vector in enumerate(self._vectors):
+                if vector is not None and vector.shape[0] == dimension:
+                    norm = float(np.linalg.norm(vector))
+                    if norm > 0:
+                        matrix[i] = vector / norm
+                        has_vector[i] = True
+            
+            term_docs: Dict[str, List[int]] = {}
+            term_freqs: Dict[str, List[int]] = {}
+            lengths = np.zeros(count, dtype=np.float32)
+            for i, properties in enumerate(self._properties):
+                text = ' '.join(v for v in properties.values() if isinstance(v, str))
+                counts = Counter(tokenize(text))
+                lengths[i] = sum(counts.values())
+                for term, tf in counts.items():
+                    term_docs.setdefault(term, []).append(i)
+                    term_freqs.setdefault(term, []).append(tf)
+            
+            self._matrix = matrix
+            self._has_vector = has_vector
+            self._doc_lengths = lengths
+            self._postings = {
+                term: (np.asarray(docs, dtype=np.int64), np.asarray(term_freqs[term], dtype=np.float32))
+                for term, docs in term_docs.items()
+            }
+            self._dirty = False
+    
+    def _filter_mask(self, filters: Any) -> np.ndarray:
+        if filters is None:
+            return np.ones(len(self._ids), dtype=bool)
+        return np.fromiter(
+            (matches_filter(filters, oid, props) for oid, props in zip(self._ids, self._properties)),
+            dtype=bool, count=len(self._ids)
+        )
+    
+    def _cosine(self, vector: List[float]) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if self._matrix is None or self._matrix.shape[1] != query.shape[0] or norm == 0:
+            return np.zeros(len(self._ids), dtype=np.float32)
+        similarity = self._matrix @ (query / norm)
+        similarity[~self._has_vector] = -1.0
+        return similarity
+    
+    def _bm25_scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        if not self._ids:
+            return scores
+        
+        average_length = float(self._doc_lengths.mean()) or 1.0
+        count = len(self._ids)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tf = posting
+            idf = math.log(1.0 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_lengths[docs] / average_length)
+            scores[docs] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+    
+    # Queries
+    
+    def _ranked(self, scores: np.ndarray, mask: np.ndarray, limit: Optional[int],
+                offset: int) -> List[int]:
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return []
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        end = None if limit is None else offset + limit
+        return order[offset:end].tolist()
+    
+    def _object(self, position: int, include_vector: bool,
+                metadata: Optional[LocalMetadata] = None) -> LocalObject:
+        vector = self._vectors[position]
+        return LocalObject(
+            uuid=self._ids[position],
+            properties=dict(self._properties[position]),
+            metadata=metadata or LocalMetadata(),
+            vector={'default': vector.tolist()} if include_vector and vector is not None else {}
+        )
+    
+    def _get(self, object_id: str, include_vector: bool) -> Optional[LocalObject]:
+        with self._lock:
+            position = self._positions.get(object_id)
+            return None if position is None else self._object(position, include_vector)
+    
+    def _fetch(self, limit, filters, include_vector, offset) -> LocalQueryReturn:
+        with self._lock:
+            positions = np.flatnonzero(self._filter_mask(filters))
+            end = None if limit is None else offset + limit
+            return LocalQueryReturn([self._object(int(p), include_vector) for p in positions[offset:end]])
+    
+    def _near_vector(self, vector, limit, max_distance, filters, include_vector, offset) -> LocalQueryReturn:
+        with self._lock:
+            self._ensure_index()
+            similarity = self._cosine(vector)
+            mask = self._filter_mask(filters) & self._has_vector
+            if max_distance is not None:
+                mask &= (1.0 - similarity) <= max_distance
+            return LocalQueryReturn([
+                self._object(p, include_vector, LocalMetadata(distance=float(1.0 - similarity[p])))
+                for p in self._ranked(similarity, mask, limit, offset)
+            ])
+    
+    def _bm25(self, query, limit, filters, include_vector, offset) -> LocalQueryReturn:
+        with self._lock:
+            self._ensure_index()
+            scores = self._bm25_scores(query)
+            mask = self._filter_mask(filters) & (scores > 0)
+            return LocalQueryReturn([
+                self._object(p, include_vector, LocalMetadata(score=float(scores[p])))
+                for p in self._ranked(scores, mask, limit, offset)
+            ])
+    
+    def _hybrid(self, query, vector, alpha, limit, filters, include_vector, offset) -> LocalQueryReturn:
+        with self._lock:
+            self._ensure_index()
+            mask = self._filter_mask(filters)
+            
+            # Relative score fusion: min-max normalize each signal, then blend
+            def normalized(scores: np.ndarray) -> np.ndarray:
+                if not mask.any():
+                    return scores
+                low, high = float(scores[mask].min()), float(scores[mask].max())
+                return (scores - low) / (high - low) if high > low else np.zeros_like(scores)
+            
+            keyword = normalized(self._bm25_scores(query))
+            if vector is None:
+                alpha = 0.0
+                semantic = np.zeros_like(keyword)
+            else:
+                semantic = normalized(self._cosine(vector))
+            fused = alpha * semantic + (1.0 - alpha) * keyword
+            
+            return LocalQueryReturn([
+                self._object(p, include_vector, LocalMetadata(score=float(fused[p])))
+                for p in self._ranked(fused, mask, limit, offset)
+            ])
+
+
+class _LocalCollections:
+    """client.collections namespace"""
+    
+    def __init__(self, collection_factory: Callable[[str], LocalCollection] = LocalCollection):
+        self._lock = threading.Lock()
+        self._factory = collection_factory
+        self._collections: Dict[str, LocalCollection] = {}
+    
+    def exists(self, name: str) -> bool:
+        return name in self._collections
+    
+    def create(self, name: str, **kwargs) -> LocalCollection:
+        with self._lock:
+            if name in self._collections:
+                raise ValueError(f"Collection {name} already exists")
+            self._collections[name] = self._factory(name)
+            return self._collections[name]
+    
+    def get(self, name: str) -> LocalCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = self._factory(name)
+            return self._collections[name]
+    
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self._collections.pop(name, None)
+    
+    def list_all(self, **kwargs) -> Dict[str, LocalCollection]:
+        return dict(self._collections)
+
+
+class LocalAlias:
+    """What client.alias.get returns"""
+    
+    def __init__(self, alias: str, collection: str):
+        self.alias = alias
+        self.collection = collection
+
+
+class _LocalAliases:
+    """client.alias namespace"""
+    
+    def __init__(self, collections: _LocalCollections):
+        self._lock = threading.Lock()
+        self._collections = collections
+        self._aliases: Dict[str, str] = {}
+    
+    def list_all(self, collection: Optional[str] = None) -> Dict[str, LocalAlias]:
+        with self._lock:
+            return {alias: LocalAlias(alias, target) for alias, target in self._aliases.items()
+                    if collection is None or target == collection}
+    
+    def get(self, alias_name: str) -> Optional[LocalAlias]:
+        with self._lock:
+            target = self._aliases.get(alias_name)
+            return LocalAlias(alias_name, target) if target is not None else None
+    
+    def create(self, alias_name: str, target_collection: str) -> None:
+        with self._lock:
+            if alias_name in self._aliases or self._collections.exists(alias_name):
+                raise ValueError(f"Alias {alias_name} already exists")
+            if not self._collections.exists(target_collection):
+                raise ValueError(f"Collection {target_collection} does not exist")
+            self._aliases[alias_name] = target_collection
+    
+    def update(self, alias_name: str, new_target_collection: str) -> bool:
+        with self._lock:
+            if alias_name not in self._aliases or not self._collections.exists(new_target_collection):
+                return False
+            self._aliases[alias_name] = new_target_collection
+            return True
+    
+    def delete(self, alias_name: str) -> bool:
+        with self._lock:
+            return self._aliases.pop(alias_name, None) is not None
+
+
+class LocalWeaviateClient:
+    """
+    In-process replacement for weaviate.WeaviateClient
+    
+    Implements the calls made by WeaviateSearchService so the whole
+    pipeline can run without a Weaviate server, e.g. in benchmarks and
+    local development. Search is exact (no HNSW approximation).
+    """
+    
+    def __init__(self, collection_factory: Callable[[str], LocalCollection] = LocalCollection):
+        """
+        Args:
+            collection_factory (Callable): Builds collections, e.g. a LocalCollection
+                subclass that injects latency
+        """
+        self.collections = _LocalCollections(collection_factory)
+        self.alias = _LocalAliases(self.collections)
+        self._connected = True
+    
+    def is_ready(self) -> bool:
+        return self._connected
+    
+    def is_connected(self) -> bool:
+        return self._connected
+    
+    def connect(self) -> None:
+        self._connected = True
+    
+    def close(self) -> None:
+        self._connected = False
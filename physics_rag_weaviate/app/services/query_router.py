@@ -0,0 +1,122 @@
+"""
+Query Router for Physics RAG System with Weaviate
+Picks keyword, vector or hybrid search per query for search_type="auto"
+"""
+
+import logging
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .glossary import Glossary
+
+logger = logging.getLogger(__name__)
+
+# "F = ma", "v=u+at", "E = mc^2", "1/2 mv²": operators and symbols rather than words
+FORMULA_PATTERN = re.compile(r"[=^√×÷∝²³]|\b\w\s*/\s*\w\b|\b[A-Za-z]{1,2}\s*[+*]\s*[A-Za-z]{1,2}\b")
+LATIN_LETTER = re.compile(r"[A-Za-z]")
+BENGALI_LETTER = re.compile(r"[\u0980-\u09FF]")
+
+
+class QueryRouter:
+    """
+    Local classifier choosing the cheapest search likely to answer a query
+    
+    Keyword search needs no embedding call, so it takes formulas, glossary
+    terms and short queries (titles, single terms). English questions go
+    to vector search (BM25 cannot match them against the Bengali text),
+    and other questions to hybrid search. A query whose embedding is
+    already cached always gets hybrid search, which then costs nothing
+    extra. When the first stage looks weak the search escalates to hybrid
+    search: keyword search whose best BM25 score is below
+    min_keyword_score, or vector search whose best similarity is below
+    min_vector_score.
+    """
+    
+    def __init__(self, glossary: Optional[Glossary] = None,
+                 keyword_max_words: int = 3,
+                 min_keyword_score: float = 2.0,
+                 min_vector_score: float = 0.5):
+        """
+        Initialize the router
+        
+        Args:
+            glossary (Optional[Glossary]): Concepts answered well by keyword search
+            keyword_max_words (int): Longest query (in words) sent to keyword search
+            min_keyword_score (float): Best BM25 score below which keyword search escalates
+            min_vector_score (float): Best similarity below which vector search escalates
+        """
+        self.glossary = glossary
+        self.keyword_max_words = keyword_max_words
+        self.min_keyword_score = min_keyword_score
+        self.min_vector_score = min_vector_score
+        
+        self.routes: Counter = Counter()
+        self.escalations: Counter = Counter()
+        self.searches = 0
+        self.embedding_calls = 0
+        self.weaviate_queries = 0
+    
+    def route(self, query: str, cached_embedding: bool = False) -> Dict:
+        """
+        Classify a query
+        
+        Args:
+            query (str): Search query
+            cached_embedding (bool): Whether the query's embedding is already cached
+        
+        Returns:
+            Dict: 'search_type' (keyword, vector or hybrid) and the 'reason' for it
+        """
+        if cached_embedding:
+            return {'search_type': 'hybrid', 'reason': 'cached_embedding'}
+        if FORMULA_PATTERN.search(query):
+            return {'search_type': 'keyword', 'reason': 'formula'}
+        if self.glossary is not None and self.glossary.lookup(query) is not None:
+            return {'search_type': 'keyword', 'reason': 'glossary_term'}
+        if len(query.split()) <= self.keyword_max_words:
+            return {'search_type': 'keyword', 'reason': 'short_query'}
+        if len(LATIN_LETTER.findall(query)) > len(BENGALI_LETTER.findall(query)):
+            return {'search_type': 'vector', 'reason': 'english_query'}
+        return {'search_type': 'hybrid', 'reason': 'question'}
+    
+    def is_weak(self, search_type: str, results: List[Dict]) -> bool:
+        """True if first-stage results should be replaced by a hybrid search"""
+        if search_type == 'hybrid':
+            return False
+        if not results:
+            return True
+        # Merged cross-subject results are normalized; raw_score keeps the shard's own score
+        best = max(float(r.get('raw_score', r['score'])) for r in results)
+        threshold = self.min_keyword_score if search_type == 'keyword' else self.min_vector_score
+        return best < threshold
+    
+    def record(self, decision: Dict, embedding_calls: int, weaviate_queries: int) -> None:
+        """
+        Count a routed search and log its decision
+        
+        Args:
+            decision (Dict): route() output, with 'escalated' and the 'effective' search type
+            embedding_calls (int): Embedding calls the search made (cache hits excluded)
+            weaviate_queries (int): Weaviate queries the search made
+        """
+        self.searches += 1
+        self.routes[f"{decision['search_type']}:{decision['reason']}"] += 1
+        if decision.get('escalated'):
+            self.escalations[decision['search_type']] += 1
+        self.embedding_calls += embedding_calls
+        self.weaviate_queries += weaviate_queries
+        logger.info(f"Routed query to {decision['search_type']} ({decision['reason']})"
+                    f"{' -> ' + decision['effective'] if decision.get('escalated') else ''}; "
+                    f"{embedding_calls} embedding call(s), {weaviate_queries} Weaviate query(ies)")
+    
+    def get_stats(self) -> Dict:
+        """Routing statistics"""
+        searches = max(self.searches, 1)
+        return {
+            'searches': self.searches,
+            'routes': dict(self.routes),
+            'escalations': dict(self.escalations),
+            'embedding_calls_per_search': round(self.embedding_calls / searches, 3),
+            'upstream_calls_per_search': round((self.embedding_calls + self.weaviate_queries) / searches, 3)
+        }
@@ -5,13 +5,29 @@ Combines embedding, search, and generation services
 
 import asyncio
 import logging
-from typing import Dict, List, Optional
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import time
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 from .embedding_service import EmbeddingService
-from .search_service import WeaviateSearchService
+from .search_service import PREVIEW_CHARS, WeaviateSearchService, make_preview, merge_shard_results
+from .weaviate_connection import WeaviateConnection
 from .generation_service import GenerationService
+from .rate_limiter import GeminiScheduler, Priority
+from .cache import TTLCache, make_cache_key
+from .shared_cache import SharedCache
+from .chunk_store import ChunkStore, chunk_hash
+from .corpus import CorpusBuilder
+from .knn_graph import KnnGraph
+from .glossary import Glossary, glossary_term, mine_glossary
+from .suggestions import SuggestionIndex
+from .query_router import QueryRouter
+from .reranker import ChunkVectors, Reranker
+from .index_snapshot import IndexSnapshot, SnapshotMismatch
+from .index_versions import AliasPointer, BuildLock, IndexPointer, default_state, list_versions
+from .deadline import Deadline, DeadlineExceeded
+from .resilience import UpstreamError, get_guard, get_resilience_stats, set_pool_size
 from ..config.settings import Settings
 
 logger = logging.getLogger(__name__)
@@ -20,12 +36,21 @@ logger = logging.getLogger(__name__)
 class WeaviateRAGService:
     """Main RAG service that orchestrates all Weaviate components"""
     
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings,
+                 embedding_client: Optional[Any] = None,
+                 generation_model: Optional[Any] = None,
+                 weaviate_client: Optional[Any] = None):
         """
         Initialize the Weaviate RAG service
         
+        The optional clients replace the Gemini and Weaviate connections,
+        e.g. with the local backend and stand-ins used for benchmarks.
+        
         Args:
             settings (Settings): Application settings
+            embedding_client (Optional[Any]): Object providing embed_content
+            generation_model (Optional[Any]): Object providing generate_content
+            weaviate_client (Optional[Any]): Connected Weaviate-compatible client
         """
         self.settings = settings
         
@@ -36,91 +61,745 @@ class WeaviateRAGService:
         # Initialize services
         logger.info("Initializing Weaviate RAG services...")
         
-        self.embedding_service = EmbeddingService(settings.GOOGLE_API_KEY)
+        # One scheduler for every Gemini call so indexing cannot starve chat traffic
+        self.scheduler = GeminiScheduler(**settings.get_gemini_quota_config())
+        
+        # Request-path Gemini stages get a bounded pool of their own: calls stuck waiting for
+        # quota can then never take the default pool's threads from the keyword-search fallback
+        self.gemini_executor = ThreadPoolExecutor(
+            max_workers=settings.GEMINI_STAGE_WORKERS, thread_name_prefix="gemini-stage"
+        )
+        
+        # Per-dependency circuit breakers; retries and hedging for idempotent calls
+        set_pool_size(settings.UPSTREAM_POOL_SIZE)
+        breaker_config = settings.get_breaker_config()
+        embed_guard = get_guard(
+            "gemini.embed", "gemini", **breaker_config,
+            timeout=settings.GEMINI_EMBED_TIMEOUT,
+            max_attempts=settings.UPSTREAM_MAX_ATTEMPTS,
+            hedge=settings.HEDGE_REQUESTS
+        )
+        generate_guard = get_guard(
+            "gemini.generate", "gemini", **breaker_config,
+            timeout=settings.GEMINI_GENERATE_TIMEOUT,
+            max_attempts=2,  # Generations are slow and expensive; retry once, never hedge
+            hedge=False
+        )
+        weaviate_guard = get_guard(
+            "weaviate.query", "weaviate", **breaker_config,
+            timeout=settings.WEAVIATE_QUERY_TIMEOUT,
+            max_attempts=settings.UPSTREAM_MAX_ATTEMPTS,
+            hedge=settings.HEDGE_REQUESTS
+        )
+        
+        # Second cache tier shared by the worker processes on this host (SHARED_CACHE_PATH)
+        self._shared_caches: List[SharedCache] = []
         
+        self.embedding_service = EmbeddingService(
+            settings.GOOGLE_API_KEY,
+            scheduler=self.scheduler,
+            cache_size=settings.EMBEDDING_CACHE_SIZE,
+            guard=embed_guard,
+            client=embedding_client,
+            cache_backing=self._shared_cache("embeddings")
+        )
+        
+        # One pooled, self-healing Weaviate client shared by every collection (shard)
+        self.weaviate = WeaviateConnection.from_settings(settings, client=weaviate_client)
+        
+        # The alias (WEAVIATE_COLLECTION) resolves to a versioned collection via a Weaviate alias
+        if settings.INDEX_POINTER == "file":
+            self.index_pointer = IndexPointer(settings.INDEX_POINTER_PATH, settings.WEAVIATE_COLLECTION)
+            index_state = self.index_pointer.read()
+        else:
+            # Resolved by start() or initialize_collection(); construction opens no connection
+            self.index_pointer = AliasPointer(self.weaviate, settings.WEAVIATE_COLLECTION)
+            index_state = default_state(settings.WEAVIATE_COLLECTION)
+        self.index_version = index_state['version']
+        self._index_follower: Optional[asyncio.Task] = None
+        self._reindex_lock = asyncio.Lock()
+        self.reindex_status: Dict[str, Any] = {'state': 'idle'}
+        self._reindex_task: Optional[asyncio.Task] = None
         self.search_service = WeaviateSearchService(
             weaviate_url=settings.WEAVIATE_URL,
             weaviate_api_key=settings.WEAVIATE_API_KEY,
-            collection_name=settings.WEAVIATE_COLLECTION,
-            use_local=settings.USE_LOCAL_WEAVIATE
+            collection_name=index_state['collection'],
+            use_local=settings.USE_LOCAL_WEAVIATE,
+            guard=weaviate_guard,
+            connect=False,  # Connected by start(), or by the first query
+            connection=self.weaviate
         )
         
+        # One collection (shard) per subject; the default subject is the versioned index above
+        self.default_subject = settings.DEFAULT_SUBJECT
+        self.shards: Dict[str, WeaviateSearchService] = {self.default_subject: self.search_service}
+        for subject, collection in settings.get_subject_collections().items():
+            if subject not in self.shards:
+                self.shards[subject] = self.search_service.for_collection(collection, connect=False)
+        
         self.generation_service = GenerationService(
             settings.GOOGLE_API_KEY,
-            settings.GENERATION_MODEL
+            settings.GENERATION_MODEL,
+            scheduler=self.scheduler,
+            guard=generate_guard,
+            model=generation_model
+        )
+        
+        # Generated answers, reused when generation would blow a request's budget
+        self.response_cache = TTLCache(
+            max_size=settings.RESPONSE_CACHE_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            backing=self._shared_cache("responses", ttl=settings.RESPONSE_CACHE_TTL)
         )
         
+        # Chunk texts and metadata, memory-mapped and shared with other workers
+        self.chunk_store = ChunkStore(settings.CHUNK_STORE_PATH) if ChunkStore.exists(settings.CHUNK_STORE_PATH) else None
+        if self.chunk_store is None:
+            # The index would have to be chunked from the book: fail now, not on the first /initialize
+            settings.validate_physics_book()
+        # Whether the live collection was built from exactly these chunks (checked by refresh_index)
+        self.index_matches_store = False
+        self.index_content_hash: Optional[str] = None
+        self._checked_collection: Optional[str] = None
+        
+        # Precomputed neighbours of the default subject's chunks, for /similar without embedding calls
+        self.knn_graph = self._open_knn_graph()
+        self.similar_lookups = {'graph': 0, 'stored_vector': 0, 'embedded': 0}
+        
+        # Bengali/English concepts of the default subject, resolving /explain to their defining chunks
+        self.glossary = self._open_glossary()
+        self.concept_lookups = {'exact': 0, 'near': 0, 'search': 0}
+        
+        # Prefix index over chapter/section titles and glossary terms, for /suggest
+        self.suggestions = SuggestionIndex.build(self.chunk_store, self.glossary) if self.chunk_store is not None else None
+        
+        # Chooses keyword, vector or hybrid search for search_type="auto"
+        self.router = QueryRouter(
+            self.glossary,
+            keyword_max_words=settings.ROUTER_KEYWORD_MAX_WORDS,
+            min_keyword_score=settings.ROUTER_MIN_KEYWORD_SCORE,
+            min_vector_score=settings.ROUTER_MIN_VECTOR_SCORE
+        )
+        
+        # Second retrieval stage; chunk vectors come from a matching snapshot, else with the first-stage query
+        self.reranker = Reranker(mmr_lambda=settings.MMR_LAMBDA, budget_ms=settings.RERANK_BUDGET_MS)
+        self._vector_snapshot: Optional[IndexSnapshot] = None
+        self.chunk_vectors = self._open_chunk_vectors() if settings.RERANK_ENABLED else None
+        
         self._initialized = False
+        
+        # Filled in by start(); reported by GET /ready
+        self.startup: Dict[str, Any] = {'state': 'created', 'phases_ms': {}, 'warm_queries': []}
         logger.info("Weaviate RAG services initialized successfully")
     
+    def _open_knn_graph(self) -> Optional[KnnGraph]:
+        """Open KNN_GRAPH_PATH if it was built from the current chunks and embedding model"""
+        path = self.settings.KNN_GRAPH_PATH
+        if not KnnGraph.exists(path):
+            return None
+        graph = KnnGraph(path)
+        manifest = graph.manifest
+        if manifest.get('embedding_model') != self.settings.EMBEDDING_MODEL:
+            reason = f"built with {manifest.get('embedding_model')}"
+        elif self.chunk_store is not None and manifest.get('chunks_content_hash') != self.chunk_store.manifest['content_hash']:
+            reason = "built from other chunks than the chunk store"
+        else:
+            return graph
+        logger.warning(f"Ignoring k-NN graph {path}: {reason}; rebuild it with tools/build_knn_graph.py")
+        graph.close()
+        return None
+    
+    def _open_chunk_vectors(self) -> Optional[ChunkVectors]:
+        """Memory-map the vectors of INDEX_SNAPSHOT_PATH if it holds the chunk store's chunks"""
+        path = self.settings.INDEX_SNAPSHOT_PATH
+        if self.chunk_store is None or not IndexSnapshot.exists(path):
+            return None
+        snapshot = None
+        try:
+            snapshot = IndexSnapshot(path)
+            snapshot.check_compatible(self.settings.EMBEDDING_MODEL, self.chunk_store)
+        except SnapshotMismatch as e:
+            logger.warning(f"Not reranking with the vectors of snapshot {path}: {str(e)}")
+            if snapshot is not None:
+                snapshot.close()
+            return None
+        self._vector_snapshot = snapshot
+        return ChunkVectors(snapshot.chunks.doc_ids, snapshot.vectors)
+    
+    def _open_glossary(self) -> Optional[Glossary]:
+        """Load GLOSSARY_PATH if it matches the chunk store, else mine the glossary from the store"""
+        if self.chunk_store is None:
+            return None
+        content_hash = self.chunk_store.manifest['content_hash']
+        path = self.settings.GLOSSARY_PATH
+        if Glossary.exists(path):
+            glossary = Glossary.load(path)
+            if glossary.chunks_content_hash == content_hash:
+                return glossary
+            logger.warning(f"Ignoring glossary {path}: built from other chunks than the chunk store; "
+                           f"rebuild it with tools/build_chunk_store.py")
+        
+        start = time.perf_counter()
+        glossary = Glossary(mine_glossary(self.chunk_store.iter_chunks()), content_hash)
+        logger.info(f"Mined {len(glossary)} glossary concepts from the chunk store in "
+                    f"{(time.perf_counter() - start) * 1000:.0f}ms")
+        return glossary
+    
+    @property
+    def ready(self) -> bool:
+        """True once start() has connected the clients and finished warming up"""
+        return self.startup['state'] == 'ready'
+    
+    async def start(self, warm_up: bool = True) -> Dict:
+        """
+        Connect every client concurrently, then warm up
+        
+        Construction opens nothing, so the Weaviate connection, the Gemini
+        imports and the subject collections are set up here in parallel
+        threads. The warm-up then marks a populated collection as
+        initialized, pages the chunk store in and sends WARMUP_QUERIES smoke
+        queries end to end, so the first real request finds open connections
+        and warm caches. A failed connection is raised; a failed warm-up
+        query is only logged.
+        
+        Args:
+            warm_up (bool): Run the warm-up phase after connecting
+        
+        Returns:
+            Dict: Startup report (phase timings, warm query latencies)
+        """
+        start = time.perf_counter()
+        phases = self.startup['phases_ms']
+        
+        async def timed(phase: str, function, *args) -> None:
+            phase_start = time.perf_counter()
+            await asyncio.to_thread(function, *args)
+            phases[phase] = round((time.perf_counter() - phase_start) * 1000, 1)
+        
+        def connect_weaviate() -> None:
+            self.refresh_index()
+            for search_service in self.shards.values():
+                search_service.connect()
+        
+        self.startup['state'] = 'connecting'
+        try:
+            await asyncio.gather(
+                timed('weaviate', connect_weaviate),
+                timed('gemini_embedding', self.embedding_service.connect),
+                timed('gemini_generation', self.generation_service.connect)
+            )
+        except Exception as e:
+            self.startup.update(state='failed', error=str(e))
+            raise
+        self.weaviate.start_health_checks()
+        self._index_follower = asyncio.create_task(self._follow_index())
+        
+        if warm_up:
+            self.startup['state'] = 'warming'
+            warm_start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._warm_up(), timeout=self.settings.WARMUP_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Warm-up cut short after {self.settings.WARMUP_TIMEOUT}s")
+            phases['warm_up'] = round((time.perf_counter() - warm_start) * 1000, 1)
+        
+        self.startup.update(state='ready', startup_ms=round((time.perf_counter() - start) * 1000, 1),
+                            ready_at=time.time())
+        logger.info(f"Ready in {self.startup['startup_ms']:.0f}ms ({phases})")
+        return self.startup
+    
+    async def _warm_up(self) -> None:
+        """Preload the index state, chunk pages and caches, and issue warm queries"""
+        stats = await asyncio.to_thread(self.search_service.get_collection_stats)
+        if stats.get('total_documents', 0) > 0:
+            self._initialized = True
+        else:
+            # Building the index belongs to /initialize, not to every worker's startup
+            logger.warning("Collection is empty; skipping warm queries")
+            return
+        
+        if self.chunk_store is not None:
+            await asyncio.to_thread(self.chunk_store.texts)
+        
+        for query in self.settings.INDEX_SMOKE_QUERIES[:self.settings.WARMUP_QUERIES]:
+            query_start = time.perf_counter()
+            try:
+                results = await self.search(query, top_k=self.settings.DEFAULT_TOP_K, priority=Priority.BATCH)
+                outcome = {'results': len(results)}
+            except Exception as e:
+                logger.warning(f"Warm query failed: {str(e)}")
+                outcome = {'error': str(e)}
+            self.startup['warm_queries'].append({
+                'query': query, 'ms': round((time.perf_counter() - query_start) * 1000, 1), **outcome
+            })
+    
+    def record_first_request(self, path: str, elapsed_ms: float) -> None:
+        """Keep the latency of the first request served after startup"""
+        if 'first_request' not in self.startup:
+            self.startup['first_request'] = {'path': path, 'ms': round(elapsed_ms, 1)}
+    
+    def _shared_cache(self, namespace: str, ttl: Optional[float] = None) -> Optional[SharedCache]:
+        """Open a namespace of the shared cache file, None when sharing is disabled"""
+        if not self.settings.SHARED_CACHE_PATH:
+            return None
+        cache = SharedCache(self.settings.SHARED_CACHE_PATH, namespace, ttl=ttl,
+                            max_entries=self.settings.SHARED_CACHE_MAX_ENTRIES)
+        self._shared_caches.append(cache)
+        return cache
+    
+    def new_deadline(self, budget_ms: Optional[int] = None) -> Deadline:
+        """
+        Create a request deadline
+        
+        Args:
+            budget_ms (Optional[int]): Budget in milliseconds (settings default if None)
+            
+        Returns:
+            Deadline: Deadline starting now
+        """
+        if not budget_ms:
+            budget_ms = self.settings.REQUEST_BUDGET_MS
+        return Deadline.from_ms(max(1, min(budget_ms, self.settings.MAX_REQUEST_BUDGET_MS)))
+    
+    async def _embed_query(self, query: str, deadline: Deadline,
+                           priority: Priority = Priority.INTERACTIVE) -> Optional[List[float]]:
+        """
+        Embed a query within the embedding stage budget
+        
+        Returns:
+            Optional[List[float]]: Query embedding, or None to fall back to keyword search
+        """
+        cached = await self.embedding_service.get_cached_query_embedding_async(query)
+        if cached is not None:
+            return cached
+        
+        # Batch callers queue behind interactive traffic, so only cap interactive waits
+        limit = self.settings.EMBEDDING_STAGE_MS / 1000 if priority == Priority.INTERACTIVE else None
+        timeout = deadline.stage_timeout(limit=limit, reserve=self.settings.RETRIEVAL_RESERVE_MS / 1000)
+        
+        try:
+            return await deadline.run(
+                self.embedding_service.get_query_embedding, query,
+                priority=priority, timeout=timeout, executor=self.gemini_executor
+            )
+        except DeadlineExceeded:
+            deadline.mark_degraded("embedding_timeout")
+        except Exception as e:
+            logger.error(f"Query embedding failed, falling back to keyword search: {str(e)}")
+            deadline.mark_degraded("embedding_unavailable")
+        return None
+    
+    async def _answer_within_budget(self, cache_key: str, deadline: Deadline,
+                                    generate, *args, **kwargs) -> Optional[object]:
+        """
+        Run a generation stage if the budget allows, caching good answers
+        
+        Returns:
+            Optional[object]: Generated result, or a cached one if generation
+            was skipped or timed out (None if neither is available)
+        """
+        timeout = deadline.stage_timeout()
+        if timeout >= self.settings.GENERATION_MIN_MS / 1000:
+            try:
+                result = await deadline.run(generate, *args, timeout=timeout,
+                                            executor=self.gemini_executor, **kwargs)
+                text = result['response'] if isinstance(result, dict) else result
+                if self.generation_service.validate_response(text):
+                    await self.response_cache.set_async(cache_key, result)
+                return result
+            except DeadlineExceeded:
+                deadline.mark_degraded("generation_timeout")
+            except UpstreamError as e:
+                logger.error(f"Generation unavailable, answering without Gemini: {str(e)}")
+                deadline.mark_degraded("generation_unavailable")
+        else:
+            deadline.mark_degraded("generation_skipped")
+        
+        cached = await self.response_cache.get_async(cache_key)
+        if cached is not None:
+            deadline.mark_degraded("cached_answer")
+            return dict(cached) if isinstance(cached, dict) else cached
+        
+        return None
+    
     async def initialize_collection(self, force_reset: bool = False) -> bool:
         """
         Initialize the Weaviate collection with physics data
         
+        The index is never emptied in place: an empty index is built as the
+        first version, and force_reset builds the next version beside the
+        live one and swaps to it once validated (see reindex()).
+        
         Args:
-            force_reset (bool): Whether to reset existing collection
+            force_reset (bool): Rebuild even if the live collection has data
             
         Returns:
             bool: True if successful
         """
         try:
             logger.info("Initializing Weaviate collection with physics data...")
+            if not force_reset:
+                # Usually populated already: answer without queueing behind a running build
+                await asyncio.to_thread(self.refresh_index)
+                stats = await asyncio.to_thread(self.search_service.get_collection_stats)
+                if stats.get('total_documents', 0) > 0:
+                    logger.info(f"Collection already contains {stats['total_documents']} documents")
+                    self._initialized = True
+                    return True
             
-            # Reset collection if requested
-            if force_reset:
-                self.search_service.reset_collection()
-            
-            # Check if collection already has data
-            stats = self.search_service.get_collection_stats()
-            if stats.get('total_documents', 0) > 0 and not force_reset:
-                logger.info(f"Collection already contains {stats['total_documents']} documents")
-                self._initialized = True
-                return True
-            
-            # Load physics text and create chunks
-            physics_text_path = Path(self.settings.PHYSICS_TEXT_PATH)
-            if not physics_text_path.exists():
-                self.settings.validate_physics_text()  # This will update the path or raise error
-                physics_text_path = Path(self.settings.PHYSICS_TEXT_PATH)
-            
-            with open(physics_text_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Split into chunks using the same method as notebook
-            chunks = [t.strip() for t in content.split('*****') if t.strip()]
-            logger.info(f"Created {len(chunks)} chunks from physics text")
-            
-            # Generate embeddings for all chunks
-            embeddings = self.embedding_service.get_batch_embeddings(chunks)
-            logger.info(f"Generated {len(embeddings)} embeddings")
-            
-            # Insert into Weaviate
-            success = self.search_service.insert_documents(chunks, embeddings)
-            
-            if success:
-                self._initialized = True
-                logger.info(f"Successfully initialized collection with {len(chunks)} documents")
-                return True
-            else:
-                logger.error("Failed to insert documents into Weaviate")
+            status = await self._build_version(keep_populated=not force_reset)
+            if status['state'] == 'failed':
+                logger.error(f"Error initializing collection: {status.get('error')}")
                 return False
+            logger.info(f"Collection {status['collection']} holds {status['documents']} documents")
+            return True
             
         except Exception as e:
             logger.error(f"Error initializing collection: {str(e)}")
             return False
     
+    def _load_chunks(self) -> Tuple[List[int], List[str]]:
+        """doc_ids and texts from the chunk store, or chunked (and deduplicated) from the book"""
+        if self.chunk_store is not None:
+            chunks = self.chunk_store.texts()
+            logger.info(f"Loaded {len(chunks)} chunks from chunk store {self.chunk_store.path}")
+            return [int(doc_id) for doc_id in self.chunk_store.doc_ids], chunks
+        
+        # Chunk the chapter files as tools/build_chunk_store.py does, without its cache or pool
+        self.settings.validate_physics_book()
+        builder = CorpusBuilder(self.settings.MIN_CHUNK_CHARS, self.settings.DEDUP_SIMILARITY)
+        book = builder.build_book(self.settings.PHYSICS_BOOK_DIR)
+        logger.info(f"Created {len(book['chunks'])} chunks from {self.settings.PHYSICS_BOOK_DIR}")
+        return book['doc_ids'], book['chunks']
+    
+    async def _populate(self, search_service: WeaviateSearchService) -> int:
+        """
+        Fill an empty collection from the snapshot, or by embedding every chunk
+        
+        Returns:
+            int: Documents inserted
+        """
+        # Lets every worker check that the chunk store describes this collection (see _check_index_content)
+        metadata = {
+            'chunks_content_hash': self.chunk_store.manifest['content_hash'] if self.chunk_store is not None else None,
+            'embedding_model': self.embedding_service.model_name
+        }
+        
+        # A matching snapshot restores the index with zero embedding calls
+        if IndexSnapshot.exists(self.settings.INDEX_SNAPSHOT_PATH):
+            restored = await asyncio.to_thread(self._restore_snapshot, search_service)
+            if restored:
+                await asyncio.to_thread(search_service.set_index_metadata, metadata)
+                return restored
+        
+        doc_ids, chunks = self._load_chunks()
+        
+        # Generate embeddings for all chunks at batch priority, off the event loop
+        embeddings = await asyncio.to_thread(
+            self.embedding_service.get_batch_embeddings,
+            chunks,
+            priority=Priority.BATCH,
+            batch_size=self.settings.EMBEDDING_BATCH_SIZE
+        )
+        logger.info(f"Generated {len(embeddings)} embeddings")
+        
+        await asyncio.to_thread(search_service.insert_documents, chunks, embeddings, doc_ids)
+        await asyncio.to_thread(search_service.set_index_metadata, metadata)
+        return len(chunks)
+    
+    def _restore_snapshot(self, search_service: WeaviateSearchService) -> int:
+        """Restore INDEX_SNAPSHOT_PATH into a collection; 0 if the snapshot does not fit"""
+        snapshot = None
+        try:
+            snapshot = IndexSnapshot(self.settings.INDEX_SNAPSHOT_PATH)
+            snapshot.check_compatible(self.embedding_service.model_name, self.chunk_store)
+            return snapshot.restore(search_service)
+        except SnapshotMismatch as e:
+            logger.warning(f"Not restoring snapshot {self.settings.INDEX_SNAPSHOT_PATH}: {str(e)}")
+            return 0
+        finally:
+            if snapshot is not None:
+                snapshot.close()
+    
+    def refresh_index(self) -> None:
+        """
+        Follow the index pointer to the collection it names
+        
+        Moves queries to a collection swapped in by another process and
+        changes the index version that answer cache keys are built from.
+        Reads the pointer (a Weaviate request for the alias), so call it
+        off the event loop.
+        """
+        state = self.index_pointer.read()
+        if state['collection'] != self.search_service.collection_name:
+            self.search_service.use_collection(state['collection'])
+            logger.info(f"Now serving {state['collection']} (index version {state['version']})")
+        self.index_version = state['version']
+        if self._checked_collection != self.search_service.collection_name:
+            self._check_index_content()
+    
+    def _check_index_content(self) -> None:
+        """
+        Compare the live collection's recorded chunks with the chunk store
+        
+        doc_ids and texts in the store only describe the collection if it
+        was built from the same chunks (the content hash recorded by
+        _populate). Otherwise texts, vectors and neighbours come from
+        Weaviate until the index is rebuilt from the store.
+        """
+        collection = self.search_service.collection_name
+        if self.chunk_store is None:
+            self.index_matches_store = False
+            self._checked_collection = collection
+            return
+        try:
+            metadata = self.search_service.get_index_metadata()
+        except Exception as e:
+            # Checked again on the next refresh; meanwhile the store is not trusted
+            logger.warning(f"Could not read the index metadata of {collection}: {str(e)}")
+            self.index_matches_store = False
+            return
+        
+        self._checked_collection = collection
+        self.index_content_hash = metadata.get('chunks_content_hash')
+        self.index_matches_store = self.index_content_hash == self.chunk_store.manifest['content_hash']
+        if not self.index_matches_store and self.search_service.get_collection_stats().get('total_documents', 0):
+            built_from = self.index_content_hash[:12] if self.index_content_hash else 'unrecorded chunks'
+            logger.warning(f"{collection} was built from {built_from}, not chunk store {self.chunk_store.path} "
+                           f"({self.chunk_store.manifest['content_hash'][:12]}); serving chunk texts from "
+                           f"Weaviate until a reindex (tools/reindex.py)")
+    
+    async def _follow_index(self) -> None:
+        """Check the index pointer every INDEX_POINTER_REFRESH seconds, in a thread"""
+        while True:
+            await asyncio.sleep(self.settings.INDEX_POINTER_REFRESH)
+            try:
+                await asyncio.to_thread(self.refresh_index)
+            except Exception as e:
+                logger.warning(f"Could not read the index pointer: {str(e)}")
+    
+    def _validate_index(self, search_service: WeaviateSearchService, expected: int) -> Dict:
+        """
+        Smoke-test a freshly built collection before it goes live
+        
+        Checks the object count, that sampled objects find themselves by
+        vector, and that every smoke query returns results.
+        
+        Returns:
+            Dict: Checks and the list of failures (empty when valid)
+        """
+        failures = []
+        count = search_service.get_collection_stats().get('total_documents', 0)
+        if count != expected:
+            failures.append(f"expected {expected} documents, found {count}")
+        
+        samples = search_service.sample_documents(self.settings.INDEX_SMOKE_SAMPLES)
+        for doc_id, vector in samples:
+            hits = search_service.vector_search(vector, limit=1)
+            if not hits or int(hits[0]['doc_id']) != doc_id:
+                failures.append(f"doc {doc_id} does not find itself by vector")
+        
+        queries = self.settings.INDEX_SMOKE_QUERIES
+        if queries:
+            vectors = self.embedding_service.get_batch_embeddings(queries, priority=Priority.BATCH)
+            for query, vector in zip(queries, vectors):
+                if not search_service.hybrid_search(query, vector, alpha=self.settings.HYBRID_ALPHA, limit=3):
+                    failures.append(f"no results for smoke query {query!r}")
+        
+        return {
+            'documents': count,
+            'self_retrieval_samples': len(samples),
+            'smoke_queries': len(queries),
+            'failures': failures
+        }
+    
+    async def reindex(self) -> Dict:
+        """
+        Build the next index version beside the live one and switch to it
+        
+        The new collection (e.g. PhysicsChunk_v4) is filled at batch
+        priority while the current version keeps serving, validated, and
+        only then made live by swapping the pointer. A failed build is
+        deleted and the live index is untouched. Old versions beyond
+        INDEX_KEEP_VERSIONS are dropped; the rest stay for rollback.
+        
+        Returns:
+            Dict: Final reindex status
+        """
+        if self._reindex_lock.locked():
+            raise RuntimeError(f"Reindex to version {self.reindex_status.get('version')} already running")
+        return await self._build_version()
+    
+    async def _build_version(self, keep_populated: bool = False) -> Dict:
+        """
+        Build, validate and swap to the next index version (see reindex())
+        
+        Weaviate calls run in threads, so the event loop keeps serving
+        from the live version during the build.
+        
+        Args:
+            keep_populated (bool): Build only if the live collection is empty
+        
+        Returns:
+            Dict: Final build status
+        """
+        # The file lock serializes builds started by workers on this host
+        async with self._reindex_lock, BuildLock(f"{self.settings.INDEX_POINTER_PATH}.reindex.lock"):
+            try:
+                await asyncio.to_thread(self._migrate_unversioned)
+            except Exception as e:
+                logger.error(f"Migrating the unversioned index failed, keeping it live: {str(e)}")
+                self.reindex_status = {'state': 'failed', 'error': str(e), 'finished_at': time.time()}
+                return self.reindex_status
+            await asyncio.to_thread(self.refresh_index)
+            if keep_populated:
+                # Another worker may have built the index while this one waited for the lock
+                stats = await asyncio.to_thread(self.search_service.get_collection_stats)
+                if stats.get('total_documents', 0) > 0:
+                    self._initialized = True
+                    return {'state': 'done', 'version': self.index_version,
+                            'collection': self.search_service.collection_name,
+                            'documents': stats['total_documents']}
+            
+            alias = self.settings.WEAVIATE_COLLECTION
+            client = self.search_service.client
+            existing = await asyncio.to_thread(list_versions, client, alias)
+            version = max(existing + [self.index_version]) + 1
+            name = self.index_pointer.collection_name(version)
+            self.reindex_status = {'state': 'building', 'version': version, 'collection': name,
+                                   'started_at': time.time()}
+            logger.info(f"Building index version {name}")
+            
+            try:
+                target = await asyncio.to_thread(self.search_service.for_collection, name)
+                count = await self._populate(target)
+                self.reindex_status['state'] = 'validating'
+                validation = await asyncio.to_thread(self._validate_index, target, count)
+                self.reindex_status['validation'] = validation
+                if validation['failures']:
+                    raise RuntimeError(f"Validation failed: {'; '.join(validation['failures'][:3])}")
+                await asyncio.to_thread(self.index_pointer.swap, version, 'reindex')
+            except Exception as e:
+                logger.error(f"Building {name} failed, keeping the live index: {str(e)}")
+                if await asyncio.to_thread(client.collections.exists, name):
+                    await asyncio.to_thread(client.collections.delete, name)
+                self.reindex_status.update(state='failed', error=str(e), finished_at=time.time())
+                return self.reindex_status
+            
+            await asyncio.to_thread(self.refresh_index)
+            self._initialized = True
+            
+            removed = await asyncio.to_thread(self._prune_versions, version)
+            self.reindex_status.update(state='done', documents=count, removed_versions=removed,
+                                       finished_at=time.time())
+            return self.reindex_status
+    
+    def start_reindex(self) -> asyncio.Task:
+        """Run reindex() in the background of the event loop"""
+        # Keep a reference so the task is not garbage collected mid-build
+        self._reindex_task = asyncio.create_task(self.reindex())
+        return self._reindex_task
+    
+    def _prune_versions(self, live_version: int) -> List[int]:
+        """Delete versioned collections beyond the newest INDEX_KEEP_VERSIONS"""
+        alias = self.settings.WEAVIATE_COLLECTION
+        versions = [v for v in list_versions(self.search_service.client, alias) if v != live_version]
+        keep = max(self.settings.INDEX_KEEP_VERSIONS - 1, 0)
+        stale = versions[:-keep] if keep else versions
+        for version in stale:
+            name = self.index_pointer.collection_name(version)
+            self.search_service.client.collections.delete(name)
+            logger.info(f"Dropped old index version {name}")
+        return stale
+    
+    def _migrate_unversioned(self) -> None:
+        """Copy a pre-versioning collection to version 0 behind the alias (see AliasPointer.migrate_unversioned)"""
+        if not isinstance(self.index_pointer, AliasPointer):
+            return
+        
+        def copy(source: str, target: str) -> int:
+            return self.search_service.for_collection(target).copy_from(source)
+        
+        if self.index_pointer.migrate_unversioned(copy) is not None:
+            self.refresh_index()
+    
+    def rollback_index(self, version: Optional[int] = None) -> Dict:
+        """
+        Point the alias back at an older version (Weaviate calls: run it in a thread)
+        
+        Args:
+            version (Optional[int]): Version to serve (default: the newest one older than the live one)
+            
+        Returns:
+            Dict: The new pointer state
+        """
+        alias = self.settings.WEAVIATE_COLLECTION
+        client = self.search_service.client
+        live = self.index_pointer.read()['version']
+        if version is None:
+            older = [v for v in list_versions(client, alias) if v < live]
+            if not older:
+                raise ValueError("No earlier index version to roll back to")
+            version = older[-1]
+        
+        name = self.index_pointer.collection_name(version)
+        if not client.collections.exists(name):
+            raise ValueError(f"Index version {version} ({name}) no longer exists")
+        
+        new_state = self.index_pointer.swap(version, reason='rollback')
+        self.refresh_index()
+        return new_state
+    
+    def get_index_status(self) -> Dict:
+        """Live index version, available versions and the last reindex (Weaviate calls: run it in a thread)"""
+        state = self.index_pointer.read()
+        alias = self.settings.WEAVIATE_COLLECTION
+        return {
+            'alias': alias,
+            'collection': self.search_service.collection_name,
+            'version': self.index_version,
+            'available_versions': list_versions(self.search_service.client, alias),
+            'history': state.get('history', []),
+            'reindex': self.reindex_status
+        }
+    
     async def search(self, query: str, 
                     search_type: str = "hybrid",
                     top_k: Optional[int] = None,
-                    alpha: Optional[float] = None) -> List[Dict]:
+                    alpha: Optional[float] = None,
+                    priority: Priority = Priority.INTERACTIVE,
+                    deadline: Optional[Deadline] = None,
+                    subject: Optional[str] = None,
+                    include_content: bool = False,
+                    rerank: Optional[bool] = None) -> List[Dict]:
         """
         Perform search using Weaviate
         
+        When the query embedding cannot be produced within the request's
+        budget, hybrid and vector searches fall back to keyword search and
+        the deadline is marked as degraded. Without a subject the query
+        fans out to every subject's collection concurrently.
+        
+        Results carry doc_id, score and a preview; the full chunk text is
+        added as 'content' only with include_content (see hydrate()).
+        
+        With search_type "auto" the query router picks the search type, and
+        a keyword or vector search with weak results is redone as a hybrid
+        search (see QueryRouter).
+        
+        With reranking (RERANK_ENABLED) the query over-fetches candidates,
+        which are reranked locally and diversified with MMR (see Reranker).
+        
         Args:
             query (str): Search query
-            search_type (str): Type of search ("hybrid", "vector", "keyword")
+            search_type (str): Type of search ("hybrid", "vector", "keyword", "auto")
             top_k (Optional[int]): Number of results to return
             alpha (Optional[float]): Alpha for hybrid search (vector vs keyword balance)
+            priority (Priority): Scheduling priority for the embedding call
+            deadline (Optional[Deadline]): Request latency budget (settings default if None)
+            subject (Optional[str]): Only search this subject's collection
+            include_content (bool): Include each result's full text
+            rerank (Optional[bool]): Run the second stage (RERANK_ENABLED if None)
             
         Returns:
             List[Dict]: Search results
@@ -134,42 +813,66 @@ class WeaviateRAGService:
         if alpha is None:
             alpha = self.settings.HYBRID_ALPHA
         
+        if deadline is None:
+            deadline = self.new_deadline()
+        
+        if search_type not in ("auto", "hybrid", "vector", "keyword"):
+            raise ValueError(f"Invalid search_type: {search_type}")
+        shards = self._shards_for(subject)
+        
+        if rerank is None:
+            rerank = self.settings.RERANK_ENABLED
+        fetch_k = self._candidates(top_k) if rerank else top_k
+        
         start_time = time.time()
         
         try:
+            decision = None
+            if search_type == "auto":
+                cached = (await self.embedding_service.get_cached_query_embedding_async(query)) is not None
+                decision = self.router.route(query, cached_embedding=cached)
+                search_type = decision['search_type']
+            
             logger.info(f"Performing {search_type} search for query: {query[:50]}...")
             
-            if search_type == "hybrid":
-                # Get query embedding for hybrid search
-                query_embedding = self.embedding_service.get_query_embedding(query)
-                results = self.search_service.hybrid_search(
-                    query_text=query,
-                    query_vector=query_embedding,
-                    alpha=alpha,
-                    limit=top_k
-                )
-            elif search_type == "vector":
-                # Pure vector search
-                query_embedding = self.embedding_service.get_query_embedding(query)
-                results = self.search_service.vector_search(
-                    query_vector=query_embedding,
-                    limit=top_k
-                )
-            elif search_type == "keyword":
-                # Pure keyword search
-                results = self.search_service.keyword_search(
-                    query_text=query,
-                    limit=top_k
-                )
-            else:
-                raise ValueError(f"Invalid search_type: {search_type}")
+            # Both embedding types need a query vector; without one, degrade to keyword search
+            effective_type = search_type
+            query_embedding = None
+            embedding_calls = 0
+            if search_type in ("hybrid", "vector"):
+                embedding_calls = int((await self.embedding_service.get_cached_query_embedding_async(query)) is None)
+                query_embedding = await self._embed_query(query, deadline, priority)
+                if query_embedding is None:
+                    effective_type = "keyword"
+            
+            results = await self._retrieve(query, effective_type, fetch_k, alpha, query_embedding, deadline, shards,
+                                           include_vector=rerank)
+            
+            if decision is not None:
+                weaviate_queries = len(shards)
+                # A weak first stage (not a degraded one) is redone as a hybrid search
+                if effective_type == search_type and self.router.is_weak(effective_type, results):
+                    if query_embedding is None:
+                        embedding_calls += 1
+                        query_embedding = await self._embed_query(query, deadline, priority)
+                    if query_embedding is not None:
+                        results = await self._retrieve(query, "hybrid", fetch_k, alpha, query_embedding, deadline,
+                                                       shards, include_vector=rerank)
+                        weaviate_queries += len(shards)
+                        effective_type = "hybrid"
+                        decision['escalated'] = True
+                decision['effective'] = effective_type
+                self.router.record(decision, embedding_calls, weaviate_queries)
+            if rerank:
+                results = self._rerank(query, query_embedding, results, top_k)
+            await self._project(results, include_content, deadline)
             
             search_time = time.time() - start_time
             
             # Add timing information
             for result in results:
                 result['search_time'] = search_time
-                result['search_type'] = search_type
+                result['search_type'] = effective_type
             
             logger.info(f"{search_type.title()} search completed in {search_time:.3f}s, returned {len(results)} results")
             return results
@@ -178,18 +881,420 @@ class WeaviateRAGService:
             logger.error(f"Error in {search_type} search: {str(e)}")
             raise
     
+    def _shards_for(self, subject: Optional[str]) -> Dict[str, WeaviateSearchService]:
+        """Collections to query: the subject's own, or all of them"""
+        if subject is None:
+            return self.shards
+        if subject not in self.shards:
+            raise ValueError(f"Unknown subject: {subject} (available: {', '.join(self.shards)})")
+        return {subject: self.shards[subject]}
+    
+    def _text_store(self, subject: Optional[str]) -> Optional[ChunkStore]:
+        """Local source of a subject's chunk texts (the default subject's store, if the index was built from it)"""
+        if subject == self.settings.DEFAULT_SUBJECT and self.index_matches_store:
+            return self.chunk_store
+        return None
+    
+    def _vector_store(self, subject: Optional[str]) -> Optional[ChunkVectors]:
+        """Local source of a subject's chunk vectors (snapshot vectors of the default subject)"""
+        if subject == self.settings.DEFAULT_SUBJECT and self.index_matches_store:
+            return self.chunk_vectors
+        return None
+    
+    def _candidates(self, top_k: int) -> int:
+        """First-stage results fetched for the reranker to choose top_k from"""
+        return max(top_k, min(top_k * self.settings.RERANK_OVERFETCH, self.settings.RERANK_MAX_CANDIDATES))
+    
+    def _rerank(self, query: str, query_embedding: Optional[List[float]],
+                candidates: List[Dict], top_k: int) -> List[Dict]:
+        """
+        Second stage: rerank over-fetched candidates without upstream calls
+        
+        Texts come from the chunk store (or with the first-stage results),
+        vectors from the snapshot (or with the first-stage results).
+        """
+        texts: Dict[int, str] = {}
+        vectors = []
+        for position, result in enumerate(candidates):
+            subject = result.get('subject')
+            vector = result.pop('vector', None)
+            if vector is None and self._vector_store(subject) is not None:
+                vector = self._vector_store(subject).get(result['doc_id'])
+            vectors.append(vector)
+            store = self._text_store(subject)
+            text = result.get('content')
+            if text is None and store is not None:
+                text = store.get(result['doc_id'])
+            if text is not None:
+                texts[position] = text
+        return self.reranker.rerank(query, query_embedding, candidates, texts, vectors, top_k)
+    
+    async def _texts(self, subject: str, doc_ids: Sequence[int], deadline: Deadline) -> Dict[int, str]:
+        """Chunk texts by doc_id: from the subject's chunk store, the rest in one Weaviate query"""
+        store = self._text_store(subject)
+        texts = store.get_many(doc_ids) if store is not None else {}
+        missing = [doc_id for doc_id in doc_ids if doc_id not in texts]
+        if missing:
+            texts.update(await deadline.run(self.shards[subject].fetch_texts, missing))
+        return texts
+    
+    async def hydrate(self, results: List[Dict], deadline: Optional[Deadline] = None) -> List[Dict]:
+        """
+        Add the full chunk text ('content') to results returned without it
+        
+        Texts come from the chunk store where the subject has one; the rest
+        are fetched with one query per subject.
+        
+        Args:
+            results (List[Dict]): Search results, updated in place
+            deadline (Optional[Deadline]): Request latency budget (settings default if None)
+            
+        Returns:
+            List[Dict]: The same results
+        """
+        by_subject: Dict[str, List[Dict]] = {}
+        for result in results:
+            if 'content' not in result:
+                by_subject.setdefault(result.get('subject', self.settings.DEFAULT_SUBJECT), []).append(result)
+        if not by_subject:
+            return results
+        
+        if deadline is None:
+            deadline = self.new_deadline()
+        fetched = await asyncio.gather(*(
+            self._texts(subject, [r['doc_id'] for r in subject_results], deadline)
+            for subject, subject_results in by_subject.items()
+        ))
+        for subject_results, texts in zip(by_subject.values(), fetched):
+            for result in subject_results:
+                result['content'] = texts.get(result['doc_id'], '')
+        return results
+    
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """
+        Complete a partly typed Bengali or English term
+        
+        Answered from the in-memory suggestion index alone (no embedding or
+        Weaviate calls); without a chunk store there is nothing to suggest.
+        
+        Args:
+            prefix (str): What the user has typed so far
+            limit (int): Most suggestions to return
+            
+        Returns:
+            List[Dict]: Suggestions (text, kind, doc_id, section, score), best first
+        """
+        if self.suggestions is None:
+            return []
+        suggestions = self.suggestions.suggest(prefix, limit)
+        if not self.index_matches_store:
+            # The store's doc_ids do not name this collection's chunks
+            suggestions = [dict(suggestion, doc_id=None) for suggestion in suggestions]
+        return suggestions
+    
+    async def get_documents(self, doc_ids: Sequence[int],
+                            subject: Optional[str] = None,
+                            include_neighbours: bool = False,
+                            deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Fetch many chunks by doc_id in one round trip
+        
+        Chunks (and their chapter/section) are read from the chunk store when
+        the subject has one; the rest come from a single Weaviate query. A
+        chunk's neighbours are the previous and next chunk of its chapter;
+        without a chunk store chapters are unknown, so they are simply the
+        adjacent doc_ids (doc_ids follow reading order).
+        
+        Args:
+            doc_ids (Sequence[int]): Chunks to fetch, in the order wanted
+            subject (Optional[str]): Subject the doc_ids belong to (default subject if None)
+            include_neighbours (bool): Also return each chunk's previous and next chunk
+            deadline (Optional[Deadline]): Request latency budget (settings default if None)
+            
+        Returns:
+            Dict: 'documents' found, in request order, and the 'missing' doc_ids
+        """
+        subject = subject or self.settings.DEFAULT_SUBJECT
+        self._shards_for(subject)  # Raises ValueError for an unknown subject
+        if deadline is None:
+            deadline = self.new_deadline()
+        
+        doc_ids = list(dict.fromkeys(int(doc_id) for doc_id in doc_ids))
+        store = self._text_store(subject)
+        neighbours = {}
+        if include_neighbours:
+            for doc_id in doc_ids:
+                if store is not None:
+                    neighbours[doc_id] = store.neighbours(doc_id)
+                else:
+                    neighbours[doc_id] = (doc_id - 1 if doc_id > 0 else None, doc_id + 1)
+        
+        wanted = set(doc_ids) | {n for pair in neighbours.values() for n in pair if n is not None}
+        texts = await self._texts(subject, sorted(wanted), deadline)
+        
+        def chunk(doc_id: Optional[int]) -> Optional[Dict]:
+            if doc_id is None or doc_id not in texts:
+                return None
+            metadata = store.metadata(doc_id) if store is not None else None
+            return {
+                'doc_id': doc_id,
+                'content': texts[doc_id],
+                'chapter': (metadata['chapter'] or None) if metadata else None,
+                'section': (metadata['section'] or None) if metadata else None
+            }
+        
+        documents, missing = [], []
+        for doc_id in doc_ids:
+            document = chunk(doc_id)
+            if document is None:
+                missing.append(doc_id)
+                continue
+            document['subject'] = subject
+            if include_neighbours:
+                previous, following = neighbours[doc_id]
+                document['previous'] = chunk(previous)
+                document['next'] = chunk(following)
+            documents.append(document)
+        
+        return {'documents': documents, 'missing': missing, 'subject': subject}
+    
+    async def _project(self, results: List[Dict], include_content: bool, deadline: Deadline) -> None:
+        """Give every result a preview; keep the full text only when asked for"""
+        for result in results:
+            if 'content' in result:
+                result['preview'] = make_preview(result['content'])
+                continue
+            store = self._text_store(result.get('subject'))
+            head = store.head(result['doc_id'], PREVIEW_CHARS + 1) if store is not None else None
+            if head is not None:
+                result['preview'] = make_preview(head)
+        
+        to_hydrate = [r for r in results if include_content or 'preview' not in r]
+        if to_hydrate:
+            await self.hydrate(to_hydrate, deadline)
+            for result in to_hydrate:
+                result.setdefault('preview', make_preview(result['content']))
+        if not include_content:
+            for result in results:
+                result.pop('content', None)
+    
+    async def _retrieve(self, query: str, search_type: str, top_k: int, alpha: float,
+                        query_embedding: Optional[List[float]], deadline: Deadline,
+                        shards: Optional[Dict[str, WeaviateSearchService]] = None,
+                        include_vector: bool = False) -> List[Dict]:
+        """
+        Run the Weaviate query for an already embedded (or keyword-only) search
+        
+        Several shards are queried concurrently, so a cross-subject search
+        takes as long as the slowest shard; their results are merged into
+        one top-k. A failing shard is skipped and the response marked degraded.
+        Text is requested only from collections without a local chunk store,
+        and vectors (include_vector) only from those without local vectors.
+        """
+        if shards is None:
+            shards = self._shards_for(None)
+        
+        if len(shards) == 1:
+            subject, search_service = next(iter(shards.items()))
+            results = await self._retrieve_shard(search_service, query, search_type, top_k, alpha,
+                                                 query_embedding, deadline,
+                                                 include_text=self._text_store(subject) is None,
+                                                 include_vector=include_vector and self._vector_store(subject) is None)
+            for result in results:
+                result['subject'] = subject
+            return results
+        
+        outcomes = await asyncio.gather(
+            *(self._retrieve_shard(search_service, query, search_type, top_k, alpha, query_embedding, deadline,
+                                   include_text=self._text_store(subject) is None,
+                                   include_vector=include_vector and self._vector_store(subject) is None)
+              for subject, search_service in shards.items()),
+            return_exceptions=True
+        )
+        results_by_shard = {}
+        errors = []
+        for subject, outcome in zip(shards, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Search in subject {subject} failed: {str(outcome)}")
+                deadline.mark_degraded(f"subject_unavailable:{subject}")
+                errors.append(outcome)
+            else:
+                results_by_shard[subject] = outcome
+        if not results_by_shard:
+            raise errors[0]
+        return merge_shard_results(results_by_shard, top_k)
+    
+    async def _retrieve_shard(self, search_service: WeaviateSearchService, query: str, search_type: str,
+                              top_k: int, alpha: float, query_embedding: Optional[List[float]],
+                              deadline: Deadline, include_text: bool = False,
+                              include_vector: bool = False) -> List[Dict]:
+        """Run one collection's query"""
+        # Upstream calls run in worker threads so scheduler waits never block the event loop
+        if search_type == "hybrid":
+            return await deadline.run(
+                search_service.hybrid_search,
+                query_text=query,
+                query_vector=query_embedding,
+                alpha=alpha,
+                limit=top_k,
+                include_text=include_text,
+                include_vector=include_vector
+            )
+        elif search_type == "vector":
+            # Pure vector search
+            return await deadline.run(
+                search_service.vector_search,
+                query_vector=query_embedding,
+                limit=top_k,
+                include_text=include_text,
+                include_vector=include_vector
+            )
+        
+        # Pure keyword search
+        return await deadline.run(
+            search_service.keyword_search,
+            query_text=query,
+            limit=top_k,
+            include_text=include_text,
+            include_vector=include_vector
+        )
+    
+    async def search_batch(self, queries: List[Dict],
+                           priority: Priority = Priority.BATCH,
+                           deadline: Optional[Deadline] = None) -> List[Dict]:
+        """
+        Run many searches with one embedding call and concurrent retrieval
+        
+        All queries that need a vector (and are not cached) are embedded in a
+        single embed_content call; the Weaviate queries then run concurrently.
+        A failing query does not fail the batch.
+        
+        Args:
+            queries (List[Dict]): Items with 'query' and optional 'search_type', 'top_k', 'alpha',
+                'subject', 'include_content'
+            priority (Priority): Scheduling priority for the embedding call
+            deadline (Optional[Deadline]): Latency budget for the whole batch
+            
+        Returns:
+            List[Dict]: One item per query, in order, with 'results' or 'error'
+        """
+        if not self._initialized:
+            await self.initialize_collection()
+        
+        if deadline is None:
+            deadline = self.new_deadline()
+        
+        start_time = time.time()
+        
+        # Step 1: Route "auto" items (no escalation in a batch), then embed every
+        # distinct query that needs a vector in one call
+        decisions: Dict[int, Dict] = {}
+        for index, item in enumerate(queries):
+            if item.get('search_type') == "auto":
+                cached = (await self.embedding_service.get_cached_query_embedding_async(item['query'])) is not None
+                decisions[index] = self.router.route(item['query'], cached_embedding=cached)
+        
+        vectors: Dict[str, List[float]] = {}
+        to_embed: List[str] = []
+        for index, item in enumerate(queries):
+            if (decisions[index]['search_type'] if index in decisions else item.get('search_type', 'hybrid')) in ("hybrid", "vector"):
+                cached = await self.embedding_service.get_cached_query_embedding_async(item['query'])
+                if cached is not None:
+                    vectors[item['query']] = cached
+                elif item['query'] not in to_embed:
+                    to_embed.append(item['query'])
+        
+        # The batch's one embedding call is counted with the first routed item it serves
+        billed = next((index for index in decisions if queries[index]['query'] in to_embed), None)
+        
+        if to_embed:
+            timeout = deadline.stage_timeout(reserve=self.settings.RETRIEVAL_RESERVE_MS / 1000)
+            try:
+                embeddings = await deadline.run(
+                    self.embedding_service.get_batch_embeddings,
+                    to_embed, priority=priority, timeout=timeout, executor=self.gemini_executor
+                )
+                for text, embedding in zip(to_embed, embeddings):
+                    vectors[text] = embedding
+                    await self.embedding_service.cache_query_embedding_async(text, embedding)
+            except Exception as e:
+                logger.error(f"Batch embedding failed, falling back to keyword search: {str(e)}")
+                deadline.mark_degraded(
+                    "embedding_timeout" if isinstance(e, DeadlineExceeded) else "embedding_unavailable"
+                )
+        
+        # Step 2: Run the retrievals concurrently, bounded to spare Weaviate
+        semaphore = asyncio.Semaphore(self.settings.BATCH_SEARCH_CONCURRENCY)
+        
+        async def run_one(index: int, item: Dict) -> Dict:
+            query = item['query']
+            search_type = item.get('search_type') or "hybrid"
+            if index in decisions:
+                search_type = decisions[index]['search_type']
+            top_k = item.get('top_k') or self.settings.DEFAULT_TOP_K
+            alpha = item.get('alpha') if item.get('alpha') is not None else self.settings.HYBRID_ALPHA
+            rerank = self.settings.RERANK_ENABLED
+            
+            effective_type = search_type
+            if search_type in ("hybrid", "vector") and query not in vectors:
+                effective_type = "keyword"
+            
+            try:
+                async with semaphore:
+                    results = await self._retrieve(
+                        query, effective_type, self._candidates(top_k) if rerank else top_k, alpha,
+                        vectors.get(query), deadline, self._shards_for(item.get('subject')),
+                        include_vector=rerank
+                    )
+                if rerank:
+                    results = self._rerank(query, vectors.get(query) if effective_type != "keyword" else None,
+                                           results, top_k)
+                await self._project(results, bool(item.get('include_content')), deadline)
+                for result in results:
+                    result['search_type'] = effective_type
+                if index in decisions:
+                    decisions[index]['effective'] = effective_type
+                    self.router.record(decisions[index], int(index == billed), len(self._shards_for(item.get('subject'))))
+                return {'index': index, 'query': query, 'search_type': search_type,
+                        'results': results, 'total_results': len(results), 'error': None}
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {str(e)}")
+                return {'index': index, 'query': query, 'search_type': search_type,
+                        'results': [], 'total_results': 0, 'error': str(e) or type(e).__name__}
+        
+        items = await asyncio.gather(*(run_one(i, item) for i, item in enumerate(queries)))
+        
+        search_time = time.time() - start_time
+        for item in items:
+            for result in item['results']:
+                result['search_time'] = search_time
+        
+        logger.info(f"Batch search of {len(queries)} queries completed in {search_time:.3f}s "
+                    f"({len(to_embed)} embedded)")
+        return list(items)
+    
     async def chat(self, message: str, 
                   include_sources: bool = True,
                   search_type: str = "hybrid",
-                  top_k: Optional[int] = None) -> Dict:
+                  top_k: Optional[int] = None,
+                  priority: Priority = Priority.INTERACTIVE,
+                  deadline: Optional[Deadline] = None,
+                  subject: Optional[str] = None) -> Dict:
         """
         Perform RAG-based chat using Weaviate
         
+        If generation would exceed the request's budget the answer comes from
+        the response cache or is extracted from the best search result, and
+        the response is flagged as degraded.
+        
         Args:
             message (str): User message/question
             include_sources (bool): Whether to include source information
             search_type (str): Type of search to use
             top_k (Optional[int]): Number of search results to consider
+            priority (Priority): Scheduling priority for the Gemini calls
+            deadline (Optional[Deadline]): Request latency budget (settings default if None)
+            subject (Optional[str]): Only use this subject's collection (all subjects if None)
             
         Returns:
             Dict: Chat response with generated answer and sources
@@ -197,13 +1302,19 @@ class WeaviateRAGService:
         if top_k is None:
             top_k = self.settings.DEFAULT_TOP_K
         
+        if deadline is None:
+            deadline = self.new_deadline()
+        
         start_time = time.time()
+        # Answers depend on the indexed content, so a new index version starts a fresh cache
+        cache_key = make_cache_key("chat", message, include_sources, search_type, top_k, subject, self.index_version)
         
         try:
             logger.info(f"Processing chat message: {message[:50]}...")
             
             # Step 1: Search for relevant context
-            search_results = await self.search(message, search_type=search_type, top_k=top_k)
+            search_results = await self.search(message, search_type=search_type, top_k=top_k,
+                                               priority=priority, deadline=deadline, subject=subject)
             
             if not search_results:
                 return {
@@ -211,49 +1322,100 @@ class WeaviateRAGService:
                     'sources': [],
                     'confidence': 0.0,
                     'total_time': time.time() - start_time,
-                    'search_type': search_type
+                    'search_results_count': 0,
+                    'search_type': search_type,
+                    'message': message,
+                    'degraded': deadline.degraded,
+                    'degraded_reasons': deadline.degraded_reasons
                 }
             
-            # Step 2: Generate response with sources
+            # Step 2: Generate response with sources (only the top result is used as context)
+            await self.hydrate(search_results[:1], deadline)
             if include_sources:
-                result = self.generation_service.generate_with_sources(message, search_results)
+                result = await self._answer_within_budget(
+                    cache_key, deadline,
+                    self.generation_service.generate_with_sources,
+                    message, search_results, priority=priority
+                )
             else:
                 # Use only the top result for context
                 context = search_results[0]['content']
-                response_text = self.generation_service.generate_response(message, context)
-                result = {
+                response_text = await self._answer_within_budget(
+                    cache_key, deadline,
+                    self.generation_service.generate_response,
+                    message, context, priority=priority
+                )
+                result = None if response_text is None else {
                     'response': response_text,
                     'sources': [],
                     'confidence': search_results[0].get('score', 0.0)
                 }
             
+            if result is None:
+                deadline.mark_degraded("extractive_answer")
+                result = self.generation_service.generate_extractive_response(search_results)
+                if not include_sources:
+                    result['sources'] = []
+            
             # Add timing and metadata
             result['total_time'] = time.time() - start_time
             result['search_results_count'] = len(search_results)
             result['search_type'] = search_type
             result['message'] = message
+            result['degraded'] = deadline.degraded
+            result['degraded_reasons'] = deadline.degraded_reasons
             
             logger.info(f"Chat completed in {result['total_time']:.3f}s")
             return result
             
         except Exception as e:
             logger.error(f"Error in chat: {str(e)}")
+            
+            # Upstream brownout: a previous answer beats an error message
+            cached = await self.response_cache.get_async(cache_key)
+            if cached is not None:
+                deadline.mark_degraded("cached_answer")
+                result = dict(cached) if isinstance(cached, dict) else {
+                    'response': cached, 'sources': [], 'confidence': 0.0
+                }
+                result.update({
+                    'total_time': time.time() - start_time,
+                    'search_results_count': len(result.get('sources', [])),
+                    'search_type': search_type,
+                    'message': message,
+                    'degraded': True,
+                    'degraded_reasons': deadline.degraded_reasons
+                })
+                return result
+            
             return {
                 'response': "দুঃখিত, উত্তর তৈরি করতে সমস্যা হয়েছে। অনুগ্রহ করে আবার চেষ্টা করুন।",
                 'sources': [],
                 'confidence': 0.0,
                 'total_time': time.time() - start_time,
+                'search_results_count': 0,
                 'search_type': search_type,
+                'message': message,
+                'degraded': deadline.degraded,
+                'degraded_reasons': deadline.degraded_reasons,
                 'error': str(e)
             }
     
-    async def explain_concept(self, concept: str, top_k: Optional[int] = None) -> Dict:
+    async def explain_concept(self, concept: str, top_k: Optional[int] = None,
+                              deadline: Optional[Deadline] = None,
+                              subject: Optional[str] = None) -> Dict:
         """
         Generate detailed explanation for a physics concept
         
+        A concept found in the glossary (exactly or near-exactly) is
+        explained from its defining chunks without a search; any other
+        concept is looked up with a hybrid search.
+        
         Args:
             concept (str): Physics concept to explain
             top_k (Optional[int]): Number of search results to consider
+            deadline (Optional[Deadline]): Request latency budget (settings default if None)
+            subject (Optional[str]): Only use this subject's collection (all subjects if None)
             
         Returns:
             Dict: Detailed explanation with sources
@@ -261,26 +1423,63 @@ class WeaviateRAGService:
         if top_k is None:
             top_k = 3  # Use fewer results for concept explanation
         
+        if deadline is None:
+            deadline = self.new_deadline()
+        
         try:
             logger.info(f"Generating explanation for concept: {concept}")
             
-            # Search for relevant context using hybrid search
-            search_results = await self.search(concept, search_type="hybrid", top_k=top_k)
+            # A glossary term goes straight to its defining chunks; anything else is searched for
+            match = None
+            if (self.glossary is not None and self.index_matches_store
+                    and subject in (None, self.settings.DEFAULT_SUBJECT)):
+                match = self.glossary.lookup(concept)
+            
+            if match is not None:
+                self.concept_lookups[match['match']] += 1
+                defined = match['concept']
+                logger.info(f"Concept '{concept}' resolved by the glossary ({match['match']}) to {glossary_term(defined)}")
+                score = 1.0 if match['match'] == 'exact' else 0.9
+                search_results = [
+                    {'doc_id': doc_id, 'score': score, 'rank': rank + 1, 'subject': self.settings.DEFAULT_SUBJECT,
+                     'search_type': 'glossary'}
+                    for rank, doc_id in enumerate(defined['doc_ids'][:top_k])
+                ]
+                await self._project(search_results, False, deadline)
+            else:
+                self.concept_lookups['search'] += 1
+                # Search for relevant context using hybrid search
+                search_results = await self.search(concept, search_type="hybrid", top_k=top_k,
+                                                   deadline=deadline, subject=subject)
             
             if not search_results:
                 return {
                     'explanation': f"'{concept}' সম্পর্কে কোনো তথ্য পাওয়া যায়নি।",
-                    'sources': []
+                    'sources': [],
+                    'concept': concept,
+                    'degraded': deadline.degraded,
+                    'degraded_reasons': deadline.degraded_reasons
                 }
             
             # Use multiple contexts for richer explanation
+            await self.hydrate(search_results[:2], deadline)
             contexts = [result['content'] for result in search_results[:2]]
-            explanation = self.generation_service.generate_multi_context_response(concept, contexts)
+            explanation = await self._answer_within_budget(
+                make_cache_key("explain", concept, top_k, subject, self.index_version), deadline,
+                self.generation_service.generate_multi_context_response, concept, contexts
+            )
+            
+            if explanation is None:
+                deadline.mark_degraded("extractive_answer")
+                explanation = self.generation_service.generate_extractive_response(search_results)['response']
             
             return {
                 'explanation': explanation,
                 'sources': search_results[:2],  # Top 2 sources
-                'concept': concept
+                'concept': concept,
+                'matched_term': glossary_term(match['concept']) if match is not None else None,
+                'degraded': deadline.degraded,
+                'degraded_reasons': deadline.degraded_reasons
             }
             
         except Exception as e:
@@ -288,31 +1487,120 @@ class WeaviateRAGService:
             return {
                 'explanation': f"'{concept}' সম্পর্কে ব্যাখ্যা তৈরি করতে সমস্যা হয়েছে।",
                 'sources': [],
+                'concept': concept,
+                'degraded': deadline.degraded,
+                'degraded_reasons': deadline.degraded_reasons,
                 'error': str(e)
             }
     
-    async def get_similar_content(self, text: str, top_k: int = 5) -> List[Dict]:
+    async def _similar_to_chunk(self, doc_id: int, top_k: int, deadline: Deadline,
+                                chunk_subject: str, subject: Optional[str],
+                                include_self: bool = False) -> Optional[List[Dict]]:
+        """
+        Chunks similar to a stored chunk, without embedding anything
+        
+        Answered in O(k) from the k-NN graph when the search stays within the
+        graph's subject, otherwise by a vector search with the chunk's stored
+        vector.
+        
+        Args:
+            doc_id (int): Reference chunk
+            top_k (int): Number of similar chunks to return
+            deadline (Deadline): Request latency budget
+            chunk_subject (str): Subject the reference chunk belongs to
+            subject (Optional[str]): Subject to search (all subjects if None)
+            include_self (bool): Keep the reference chunk as the first result
+            
+        Returns:
+            Optional[List[Dict]]: Results without text, or None if the chunk does not exist
+        """
+        shards = self._shards_for(subject)
+        graph = self.knn_graph if self.index_matches_store else None
+        results = None
+        if (graph is not None and chunk_subject == self.settings.DEFAULT_SUBJECT
+                and list(shards) == [chunk_subject] and top_k <= graph.k):
+            neighbours = graph.neighbours(doc_id, top_k)
+            if neighbours is not None:
+                self.similar_lookups['graph'] += 1
+                results = [
+                    {'doc_id': neighbour, 'score': score, 'subject': chunk_subject, 'search_type': 'knn_graph'}
+                    for neighbour, score in neighbours
+                ]
+                if include_self:
+                    results = [{'doc_id': doc_id, 'score': 1.0, 'subject': chunk_subject,
+                                'search_type': 'knn_graph'}] + results[:top_k - 1]
+        
+        if results is None:
+            vector = await deadline.run(self.shards[chunk_subject].fetch_vector, doc_id)
+            if vector is None:
+                return None
+            self.similar_lookups['stored_vector'] += 1
+            results = await self._retrieve('', "vector", top_k + 1, self.settings.HYBRID_ALPHA, vector,
+                                           deadline, shards)
+            if not include_self:
+                results = [r for r in results if (r['subject'], r['doc_id']) != (chunk_subject, doc_id)]
+            results = results[:top_k]
+        
+        for rank, result in enumerate(results):
+            result['rank'] = rank + 1
+        return results
+    
+    async def get_similar_content(self, text: Optional[str] = None, top_k: int = 5,
+                                  deadline: Optional[Deadline] = None,
+                                  subject: Optional[str] = None,
+                                  include_content: bool = False,
+                                  doc_id: Optional[int] = None) -> List[Dict]:
         """
-        Find content similar to given text using vector search
+        Find content similar to given text or to a stored chunk
+        
+        A doc_id ("more like this chunk") is answered from the k-NN graph or
+        the chunk's stored vector. Text that is exactly a stored chunk (same
+        chunk_hash) is treated the same way, with that chunk as the first
+        result; only other text is embedded for a vector search.
         
         Args:
-            text (str): Reference text
+            text (Optional[str]): Reference text
             top_k (int): Number of similar contents to return
+            deadline (Optional[Deadline]): Request latency budget (settings default if None)
+            subject (Optional[str]): Only use this subject's collection (all subjects if None);
+                with a doc_id, the subject the chunk belongs to (default subject if None)
+            include_content (bool): Include each result's full text, not just a preview
+            doc_id (Optional[int]): Reference chunk, instead of text
             
         Returns:
             List[Dict]: Similar content results
         """
+        if deadline is None:
+            deadline = self.new_deadline()
+        
         try:
-            # Use vector search to find similar content
-            results = await self.search(text, search_type="vector", top_k=top_k)
+            results = None
+            if doc_id is not None:
+                chunk_subject = subject or self.settings.DEFAULT_SUBJECT
+                results = await self._similar_to_chunk(doc_id, top_k, deadline, chunk_subject, chunk_subject) or []
+            elif self.index_matches_store and subject in (None, self.settings.DEFAULT_SUBJECT):
+                matched = self.chunk_store.find_by_hash(chunk_hash(text))
+                if matched is not None:
+                    results = await self._similar_to_chunk(matched, top_k, deadline, self.settings.DEFAULT_SUBJECT,
+                                                           subject, include_self=True)
+            
+            if results is None:
+                # Use vector search to find similar content
+                self.similar_lookups['embedded'] += 1
+                results = await self.search(text, search_type="vector", top_k=top_k, deadline=deadline,
+                                            subject=subject, include_content=include_content, rerank=False)
+            else:
+                await self._project(results, include_content, deadline)
             
             # Format for similarity response
             similar_content = []
             for result in results:
                 similar_content.append({
-                    'content': result['content'],
+                    'content': result.get('content'),
+                    'preview': result['preview'],
                     'similarity_score': result['score'],
-                    'doc_id': result['doc_id']
+                    'doc_id': result['doc_id'],
+                    'subject': result.get('subject')
                 })
             
             return similar_content
@@ -336,6 +1624,7 @@ class WeaviateRAGService:
                 'initialized': self._initialized,
                 'total_documents': weaviate_stats.get('total_documents', 0),
                 'collection_name': weaviate_stats.get('collection_name', ''),
+                'index_version': self.index_version,
                 'weaviate_url': weaviate_stats.get('weaviate_url', ''),
                 'use_local_weaviate': weaviate_stats.get('use_local', False),
                 'models': {
@@ -346,7 +1635,37 @@ class WeaviateRAGService:
                     'default_top_k': self.settings.DEFAULT_TOP_K,
                     'hybrid_alpha': self.settings.HYBRID_ALPHA,
                     'max_response_tokens': self.settings.MAX_RESPONSE_TOKENS
-                }
+                },
+                'scheduler': self.scheduler.get_stats(),
+                'resilience': get_resilience_stats(),
+                'weaviate_connection': self.weaviate.get_stats(),
+                'chunk_store': {
+                    **self.chunk_store.get_stats(),
+                    'matches_index': self.index_matches_store,
+                    'index_content_hash': self.index_content_hash
+                } if self.chunk_store is not None else None,
+                'glossary': {
+                    **(self.glossary.get_stats() if self.glossary is not None else {'concepts': 0}),
+                    'concept_lookups': dict(self.concept_lookups)
+                },
+                'suggestions': self.suggestions.get_stats() if self.suggestions is not None else None,
+                'query_router': self.router.get_stats(),
+                'reranker': {
+                    **self.reranker.get_stats(),
+                    'enabled': self.settings.RERANK_ENABLED,
+                    'chunk_vectors': 'snapshot' if self._vector_store(self.default_subject) is not None else 'first_stage_query'
+                },
+                'knn_graph': {
+                    **(self.knn_graph.get_stats() if self.knn_graph is not None else {'path': None}),
+                    'similar_lookups': dict(self.similar_lookups)
+                },
+                'subjects': {subject: service.collection_name for subject, service in self.shards.items()},
+                'caches': {
+                    'embedding': self.embedding_service.query_cache.get_stats(),
+                    'response': self.response_cache.get_stats()
+                },
+                'worker_pid': os.getpid(),
+                'startup': self.startup
             }
             
         except Exception as e:
@@ -422,11 +1741,25 @@ class WeaviateRAGService:
     def close(self):
         """Close all service connections"""
         try:
-            self.search_service.close()
+            if self._index_follower is not None:
+                self._index_follower.cancel()
+                self._index_follower = None
+            self.weaviate.close()
+            # Abandoned stages finish (or give up on admission) on their own
+            self.gemini_executor.shutdown(wait=False)
+            if self.chunk_store is not None:
+                self.chunk_store.close()
+                self.chunk_store = None
+            if self.knn_graph is not None:
+                self.knn_graph.close()
+                self.knn_graph = None
+            if self._vector_snapshot is not None:
+                self.chunk_vectors = None
+                self._vector_snapshot.close()
+                self._vector_snapshot = None
+            for cache in self._shared_caches:
+                cache.close()
+            self._shared_caches = []
             logger.info("RAG service connections closed")
         except Exception as e:
             logger.error(f"Error closing RAG service: {str(e)}")
-    
-    def __del__(self):
-        """Destructor to ensure connections are closed"""
-        self.close()
@@ -0,0 +1,319 @@
+"""
+Rate Limiter for Physics RAG System with Weaviate
+Priority-aware scheduler shared by all Google Gemini calls
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional
+
+from .deadline import stage_time_left
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling priority for upstream calls (lower value is served first)"""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class TokenBucket:
+    """Continuously refilled token bucket"""
+    
+    def __init__(self, capacity: float, per_minute: float):
+        """
+        Initialize the bucket
+        
+        Args:
+            capacity (float): Maximum number of tokens held
+            per_minute (float): Refill rate in tokens per minute
+        """
+        self.capacity = float(capacity)
+        self.rate = float(per_minute) / 60.0
+        self.level = float(capacity)
+        self._updated = time.monotonic()
+    
+    def refill(self, now: float) -> None:
+        """Add the tokens accrued since the last refill"""
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until `amount` tokens are available above `reserve`"""
+        # A call that cannot fit above the reserve waits for a full bucket and drains it instead
+        needed = min(amount + reserve, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (needed - self.level) / self.rate
+    
+    def consume(self, amount: float) -> None:
+        """Take tokens out of the bucket (may go negative for oversized calls)"""
+        self.level -= amount
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if an exception is a Gemini quota (HTTP 429) error"""
+    if getattr(error, 'code', None) == 429:
+        return True
+    if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    message = str(error)
+    return '429' in message or 'RESOURCE_EXHAUSTED' in message or 'quota' in message.lower()
+
+
+class Admission:
+    """
+    A call's claim on the scheduler's budget, taken again for every attempt
+    
+    Lets a resilience guard wait for quota outside its per-attempt timeout
+    (see UpstreamGuard.call) instead of nesting the scheduler inside it.
+    """
+    
+    def __init__(self, scheduler: "GeminiScheduler", priority: Priority,
+                 requests: int = 1, tokens: int = 1, max_attempts: int = 3):
+        """
+        Initialize the claim
+        
+        Args:
+            scheduler (GeminiScheduler): Scheduler whose budget the call uses
+            priority (Priority): Scheduling class of the caller
+            requests (int): Requests each attempt counts against the RPM budget
+            tokens (int): Estimated tokens each attempt counts against the TPM budget
+            max_attempts (int): Attempts before a 429 is re-raised
+        """
+        self.scheduler = scheduler
+        self.priority = priority
+        self.requests = requests
+        self.tokens = tokens
+        self.max_attempts = max_attempts
+    
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Block until an attempt may be sent upstream (TimeoutError after `timeout`)"""
+        self.scheduler.acquire(self.priority, self.requests, self.tokens, timeout=timeout)
+    
+    def release(self, rate_limited: bool = False) -> None:
+        """Mark an attempt as finished"""
+        self.scheduler.release(rate_limited=rate_limited)
+
+
+class GeminiScheduler:
+    """
+    Central admission control for Gemini requests.
+    
+    Tracks requests-per-minute and tokens-per-minute budgets with token
+    buckets, always serves interactive callers before batch callers, keeps
+    a share of both budgets free for interactive traffic and backs off
+    adaptively when the API answers with 429.
+    """
+    
+    def __init__(self,
+                 requests_per_minute: int,
+                 tokens_per_minute: int,
+                 batch_reserve: float = 0.25,
+                 max_backoff: float = 60.0):
+        """
+        Initialize the scheduler
+        
+        Args:
+            requests_per_minute (int): Request budget per minute
+            tokens_per_minute (int): Token budget per minute
+            batch_reserve (float): Fraction of each budget batch work may not use
+            max_backoff (float): Upper bound for the 429 backoff in seconds
+        """
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute)
+        self.batch_reserve = batch_reserve
+        self.max_backoff = max_backoff
+        
+        self._condition = threading.Condition()
+        self._queues = {priority: deque() for priority in Priority}
+        self._in_flight = 0
+        self._backoff_until = 0.0
+        self._backoff = 0.0
+        self._counters = {
+            'admitted': {priority.name.lower(): 0 for priority in Priority},
+            'rate_limited': 0,
+            'wait_seconds': {priority.name.lower(): 0.0 for priority in Priority},
+        }
+        
+        logger.info(f"GeminiScheduler initialized: {requests_per_minute} RPM, {tokens_per_minute} TPM")
+    
+    @staticmethod
+    def estimate_tokens(*texts: Any) -> int:
+        """
+        Rough token estimate for text sent to Gemini
+        
+        Bengali script tokenizes densely, so this errs on the high side
+        (about one token per three characters).
+        """
+        total = 0
+        for text in texts:
+            if isinstance(text, (list, tuple)):
+                total += sum(len(str(t)) for t in text)
+            elif text:
+                total += len(str(text))
+        return max(1, total // 3)
+    
+    def _wait_time(self, priority: Priority, requests: int, tokens: int, now: float) -> float:
+        """Seconds the head-of-line caller of `priority` still has to wait"""
+        if now < self._backoff_until:
+            return self._backoff_until - now
+        
+        # Strict priority: lower classes wait while higher classes are queued
+        for other in Priority:
+            if other < priority and self._queues[other]:
+                return 0.05
+        
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        
+        request_reserve = token_reserve = 0.0
+        if priority != Priority.INTERACTIVE:
+            request_reserve = self.requests.capacity * self.batch_reserve
+            token_reserve = self.tokens.capacity * self.batch_reserve
+        
+        return max(
+            self.requests.wait_time(requests, request_reserve),
+            self.tokens.wait_time(tokens, token_reserve)
+        )
+    
+    def max_batch(self, priority: Priority = Priority.BATCH) -> int:
+        """Most requests one call of `priority` can count without dipping into the interactive reserve"""
+        reserve = self.batch_reserve if priority != Priority.INTERACTIVE else 0.0
+        return max(1, int(self.requests.capacity * (1.0 - reserve)))
+    
+    def acquire(self, priority: Priority = Priority.INTERACTIVE,
+                requests: int = 1, tokens: int = 1,
+                timeout: Optional[float] = None) -> None:
+        """
+        Block until the call may be sent upstream
+        
+        Args:
+            priority (Priority): Scheduling class of the caller
+            requests (int): Requests the call counts against the RPM budget
+            tokens (int): Estimated tokens the call counts against the TPM budget
+            timeout (Optional[float]): Give up after this many seconds
+        
+        Raises:
+            TimeoutError: If the budget did not free up within `timeout`
+        """
+        ticket = object()
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        
+        with self._condition:
+            queue = self._queues[priority]
+            queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = 0.05 if queue[0] is not ticket else self._wait_time(priority, requests, tokens, now)
+                    if wait <= 0:
+                        break
+                    if deadline is not None and now + wait > deadline:
+                        raise TimeoutError(f"Gemini budget not available within {timeout:.2f}s")
+                    self._condition.wait(min(wait, 1.0))
+                
+                self.requests.consume(requests)
+                self.tokens.consume(tokens)
+                self._in_flight += 1
+                name = priority.name.lower()
+                self._counters['admitted'][name] += 1
+                self._counters['wait_seconds'][name] += time.monotonic() - started
+            finally:
+                queue.remove(ticket)
+                self._condition.notify_all()
+    
+    def release(self, rate_limited: bool = False) -> None:
+        """
+        Mark a call as finished and adapt the backoff
+        
+        Args:
+            rate_limited (bool): Whether the upstream answered with 429
+        """
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            if rate_limited:
+                self._counters['rate_limited'] += 1
+                self._backoff = min(self.max_backoff, max(1.0, self._backoff * 2))
+                # Jitter keeps workers from retrying in lockstep
+                delay = self._backoff * random.uniform(0.8, 1.2)
+                self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+                # The bucket was evidently optimistic; drain it
+                self.requests.level = min(self.requests.level, 0.0)
+                logger.warning(f"Gemini rate limit hit, backing off for {delay:.1f}s")
+            else:
+                self._backoff = self._backoff / 2 if self._backoff > 1.0 else 0.0
+            self._condition.notify_all()
+    
+    def admission(self, priority: Priority = Priority.INTERACTIVE,
+                  requests: int = 1, tokens: int = 1, max_attempts: int = 3) -> Admission:
+        """Budget claim for a call run by a resilience guard instead of call()"""
+        return Admission(self, priority, requests, tokens, max_attempts)
+    
+    def call(self, fn: Callable[..., Any], *args,
+             priority: Priority = Priority.INTERACTIVE,
+             requests: int = 1, tokens: int = 1,
+             max_attempts: int = 3, **kwargs) -> Any:
+        """
+        Run an upstream call within the budget, retrying on 429
+        
+        Args:
+            fn (Callable): Function performing the Gemini request
+            priority (Priority): Scheduling class of the caller
+            requests (int): Requests the call counts against the RPM budget
+            tokens (int): Estimated tokens the call counts against the TPM budget
+            max_attempts (int): Attempts before a 429 is re-raised
+        
+        Returns:
+            Any: Whatever `fn` returns
+        """
+        for attempt in range(1, max_attempts + 1):
+            # Inside a request stage, give up once the stage is abandoned
+            self.acquire(priority, requests, tokens, timeout=stage_time_left())
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                limited = is_rate_limit_error(e)
+                self.release(rate_limited=limited)
+                if limited and attempt < max_attempts:
+                    continue
+                raise
+            self.release()
+            return result
+    
+    def queue_depth(self) -> Dict[str, int]:
+        """Number of callers currently waiting, per priority"""
+        with self._condition:
+            return {priority.name.lower(): len(queue) for priority, queue in self._queues.items()}
+    
+    def get_stats(self) -> Dict:
+        """
+        Get scheduler statistics
+        
+        Returns:
+            Dict: Budgets, queue depth and counters
+        """
+        with self._condition:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                'queue_depth': {priority.name.lower(): len(queue) for priority, queue in self._queues.items()},
+                'in_flight': self._in_flight,
+                'requests_available': round(self.requests.level, 1),
+                'requests_per_minute': self.requests.capacity,
+                'tokens_available': round(self.tokens.level),
+                'tokens_per_minute': self.tokens.capacity,
+                'backoff_remaining': round(max(0.0, self._backoff_until - now), 2),
+                'admitted': dict(self._counters['admitted']),
+                'rate_limited': self._counters['rate_limited'],
+                'wait_seconds': {k: round(v, 3) for k, v in self._counters['wait_seconds'].items()},
+            }
@@ -0,0 +1,186 @@
+"""
+Reranker for Physics RAG System with Weaviate
+Second retrieval stage: local rerank of over-fetched candidates with MMR
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .glossary import term_key
+
+logger = logging.getLogger(__name__)
+
+# Relevance = weighted exact cosine, query-term coverage and first-stage score
+VECTOR_WEIGHT = 0.3
+LEXICAL_WEIGHT = 0.2
+FIRST_STAGE_WEIGHT = 0.5
+# Query words shorter than this ("কী", "is") say nothing about relevance
+MIN_TERM_CHARS = 2
+
+
+class ChunkVectors:
+    """
+    Stored chunk vectors by doc_id, e.g. the memory-mapped rows of an index snapshot
+    
+    Only the rows of a query's candidates are ever read, so the matrix can
+    stay memory-mapped however large the corpus.
+    """
+    
+    def __init__(self, doc_ids: Sequence[int], vectors: np.ndarray):
+        """
+        Index vectors by doc_id
+        
+        Args:
+            doc_ids (Sequence[int]): doc_id per row
+            vectors (np.ndarray): One vector per row
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self.vectors = vectors
+        self._rows = np.full(int(doc_ids.max()) + 1 if len(doc_ids) else 0, -1, dtype=np.int32)
+        self._rows[doc_ids] = np.arange(len(doc_ids), dtype=np.int32)
+    
+    def __len__(self) -> int:
+        return len(self.vectors)
+    
+    def get(self, doc_id: int) -> Optional[np.ndarray]:
+        """Vector of a chunk, or None if it has none"""
+        if not 0 <= doc_id < len(self._rows) or self._rows[doc_id] < 0:
+            return None
+        return np.asarray(self.vectors[self._rows[doc_id]], dtype=np.float32)
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+class Reranker:
+    """
+    Reorders a first-stage candidate list within a strict time budget
+    
+    Each candidate's relevance combines the exact cosine between the query
+    vector and the chunk vector, the share of query terms found in the
+    chunk text and its first-stage score. Maximal Marginal Relevance then
+    picks the results one at a time, trading relevance against similarity
+    to the results already picked, so near-duplicate chunks (e.g. repeated
+    chapter-header stubs) do not fill the top slots. Both stages are matrix
+    operations over the candidates. If the budget runs out, the candidates
+    are returned in the best order computed so far.
+    """
+    
+    def __init__(self, mmr_lambda: float = 0.8, budget_ms: float = 20.0):
+        """
+        Initialize the reranker
+        
+        Args:
+            mmr_lambda (float): Weight of relevance against diversity (1.0 = no diversity)
+            budget_ms (float): Most time a rerank may take
+        """
+        self.mmr_lambda = mmr_lambda
+        self.budget_ms = budget_ms
+        
+        self.reranks = 0
+        self.over_budget = 0
+        self.candidates = 0
+        self.total_ms = 0.0
+    
+    def rerank(self, query: str, query_vector: Optional[Sequence[float]], candidates: List[Dict],
+               texts: Dict[int, str], vectors: List[Optional[np.ndarray]], limit: int) -> List[Dict]:
+        """
+        Pick the best `limit` candidates
+        
+        Args:
+            query (str): Search query
+            query_vector (Optional[Sequence[float]]): Query embedding (None for keyword search)
+            candidates (List[Dict]): First-stage results, best first
+            texts (Dict[int, str]): Candidate text by position in candidates (missing ones are skipped)
+            vectors (List[Optional[np.ndarray]]): Chunk vector per candidate (None if unknown)
+            limit (int): Number of results to return
+        
+        Returns:
+            List[Dict]: The chosen candidates, re-ranked, with 'rerank_score'
+        """
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000
+        self.reranks += 1
+        self.candidates += len(candidates)
+        count = len(candidates)
+        if count <= 1:
+            return self._finish(candidates[:limit], None, start)
+        
+        first_stage = np.array([float(r['score']) for r in candidates], dtype=np.float32)
+        best = float(first_stage.max())
+        relevance = FIRST_STAGE_WEIGHT * (first_stage / best if best > 0 else first_stage)
+        
+        # Lexical feature: share of the query's terms found in the chunk text (stored NFC, so
+        # lower() is enough; a full term_key() of every candidate would eat the budget)
+        terms = [term for term in term_key(query).split() if len(term) >= MIN_TERM_CHARS]
+        if terms:
+            coverage = np.zeros(count, dtype=np.float32)
+            for position, text in texts.items():
+                lowered = text.lower()
+                coverage[position] = sum(term in lowered for term in terms) / len(terms)
+            relevance += LEXICAL_WEIGHT * coverage
+        if time.perf_counter() > deadline:
+            return self._finish(candidates[:limit], None, start, over_budget=True)
+        
+        # Vector features need every candidate's vector; otherwise rerank lexically without MMR
+        similarity = None
+        if all(vector is not None for vector in vectors):
+            matrix = _unit_rows(np.stack(vectors).astype(np.float32, copy=False))
+            if query_vector is not None:
+                query_unit = np.asarray(query_vector, dtype=np.float32)
+                query_unit = query_unit / (np.linalg.norm(query_unit) or 1.0)
+                relevance += VECTOR_WEIGHT * (matrix @ query_unit)
+            similarity = matrix @ matrix.T
+        
+        order = np.argsort(-relevance, kind='stable')
+        if similarity is None or time.perf_counter() > deadline:
+            return self._finish([candidates[i] for i in order[:limit]], relevance[order[:limit]], start,
+                                over_budget=similarity is not None)
+        
+        # MMR: max similarity of every candidate to the picked ones, updated one column per pick
+        chosen = [int(order[0])]
+        available = np.ones(count, dtype=bool)
+        available[chosen[0]] = False
+        closest = similarity[:, chosen[0]].copy()
+        while len(chosen) < min(limit, count):
+            if time.perf_counter() > deadline:
+                # Out of time: fill up by relevance
+                rest = [int(i) for i in order if available[i]]
+                chosen.extend(rest[:limit - len(chosen)])
+                self.over_budget += 1
+                break
+            marginal = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * closest
+            marginal[~available] = -np.inf
+            pick = int(np.argmax(marginal))
+            chosen.append(pick)
+            available[pick] = False
+            np.maximum(closest, similarity[:, pick], out=closest)
+        return self._finish([candidates[i] for i in chosen], relevance[chosen], start)
+    
+    def _finish(self, results: List[Dict], scores: Optional[np.ndarray], start: float,
+                over_budget: bool = False) -> List[Dict]:
+        """Number the picked results and account for the time spent"""
+        for rank, result in enumerate(results):
+            result['rank'] = rank + 1
+            if scores is not None:
+                result['rerank_score'] = round(float(scores[rank]), 4)
+        if over_budget:
+            self.over_budget += 1
+        self.total_ms += (time.perf_counter() - start) * 1000
+        return results
+    
+    def get_stats(self) -> Dict:
+        """Rerank statistics"""
+        return {
+            'reranks': self.reranks,
+            'over_budget': self.over_budget,
+            'avg_candidates': round(self.candidates / self.reranks, 1) if self.reranks else 0.0,
+            'avg_ms': round(self.total_ms / self.reranks, 3) if self.reranks else 0.0,
+            'budget_ms': self.budget_ms,
+            'mmr_lambda': self.mmr_lambda
+        }
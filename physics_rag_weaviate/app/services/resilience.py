@@ -0,0 +1,514 @@
+"""
+Resilience Layer for Physics RAG System with Weaviate
+Timeouts, jittered retries, hedged requests and circuit breakers for upstream calls
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .deadline import DeadlineExceeded, stage_time_left
+from .rate_limiter import Admission, is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(Exception):
+    """Base class for failures of an upstream dependency (Gemini, Weaviate)"""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling the upstream while its circuit breaker is open"""
+
+
+class UpstreamTimeoutError(UpstreamError, TimeoutError):
+    """Raised when an upstream call does not answer within its timeout"""
+
+
+class UpstreamUnavailableError(UpstreamError):
+    """Raised when an upstream call still fails after all retries"""
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Return True for transient failures worth retrying
+    
+    Client errors (bad request, auth, validation) are not retried; network
+    errors, timeouts, 5xx responses and gRPC unavailability are.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    name = type(error).__name__
+    transient = ('Timeout', 'Unavailable', 'DeadlineExceeded', 'InternalServerError',
+                 'ServiceUnavailable', 'Connection', 'ResourceExhausted', 'Aborted')
+    if any(part in name for part in transient):
+        return True
+    message = str(error).lower()
+    return any(part in message for part in ('timed out', 'timeout', 'unavailable', 'connection reset',
+                                           'connection refused', '503', '502', '504'))
+
+
+class CircuitBreaker:
+    """
+    Per-dependency circuit breaker.
+    
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through
+    (half-open) to decide whether to close again.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker
+        
+        Args:
+            name (str): Dependency name used in logs and stats
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds to wait before a half-open trial
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+    
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit when the threshold is hit"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+    
+    def get_stats(self) -> Dict:
+        """Get breaker state"""
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'times_opened': self.times_opened,
+                'rejected_calls': self.rejected,
+                'retry_in': round(retry_in, 2)
+            }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+    
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile `q` (0-1), or None without samples"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+def _admitted(fn: Callable[..., Any], admission: Admission) -> Callable[..., Any]:
+    """Wrap fn so its admission is released when the request itself ends, even after a timeout"""
+    def run(*args, **kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            admission.release(rate_limited=is_rate_limit_error(e))
+            raise
+        admission.release()
+        return result
+    return run
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pool_size = 32
+
+
+def set_pool_size(max_workers: int) -> None:
+    """
+    Size the shared worker pool for timed and hedged upstream calls
+    
+    A running pool is replaced; calls already in it finish there.
+    
+    Args:
+        max_workers (int): Worker threads of the pool
+    """
+    global _executor, _pool_size
+    with _executor_lock:
+        _pool_size = max(1, max_workers)
+        if _executor is not None and _executor._max_workers != _pool_size:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for timed and hedged upstream calls"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_pool_size, thread_name_prefix="upstream")
+        return _executor
+
+
+class UpstreamGuard:
+    """
+    Resilience policy for one kind of upstream call.
+    
+    Wraps calls with a timeout, jittered exponential-backoff retries for
+    idempotent operations, optional hedging (a duplicate request fired once
+    the primary is slower than the observed p95, first answer wins) and a
+    circuit breaker shared by all calls to the same dependency.
+    """
+    
+    def __init__(self,
+                 name: str,
+                 breaker: CircuitBreaker,
+                 timeout: Optional[float] = None,
+                 max_attempts: int = 3,
+                 backoff_base: float = 0.2,
+                 backoff_max: float = 2.0,
+                 hedge: bool = False,
+                 hedge_quantile: float = 0.95,
+                 hedge_min_samples: int = 20,
+                 max_hedge_ratio: float = 0.1):
+        """
+        Initialize the guard
+        
+        Args:
+            name (str): Operation name used in logs and stats
+            breaker (CircuitBreaker): Breaker of the dependency
+            timeout (Optional[float]): Per-attempt timeout in seconds
+            max_attempts (int): Attempts for idempotent calls
+            backoff_base (float): Base delay of the retry backoff
+            backoff_max (float): Cap of the retry backoff
+            hedge (bool): Whether to hedge idempotent calls
+            hedge_quantile (float): Latency quantile after which a hedge is fired
+            hedge_min_samples (int): Samples needed before hedging starts
+            max_hedge_ratio (float): Upper bound of hedges per call, to cap extra load
+        """
+        self.name = name
+        self.breaker = breaker
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.latency = LatencyTracker()
+        
+        self._lock = threading.Lock()
+        self._counters = {
+            'calls': 0,
+            'failures': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'rate_limited': 0,
+            'hedges_fired': 0,
+            'hedge_wins': 0
+        }
+    
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] += 1
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """Delay before firing a hedge, or None if hedging is not possible now"""
+        if len(self.latency) < self.hedge_min_samples:
+            return None
+        with self._lock:
+            if self._counters['hedges_fired'] >= self.max_hedge_ratio * self._counters['calls'] + 1:
+                return None
+        return self.latency.percentile(self.hedge_quantile)
+    
+    def _attempt(self, fn: Callable[..., Any], args: tuple, kwargs: dict, hedge: bool,
+                 admission: Optional[Admission] = None) -> Any:
+        """Run one attempt, possibly hedged, within the per-attempt timeout"""
+        if self.timeout is None and not hedge:
+            return fn(*args, **kwargs)
+        
+        executor = _get_executor()
+        picked_up = threading.Event()
+        
+        def run() -> Any:
+            picked_up.set()
+            return fn(*args, **kwargs)
+        
+        primary = executor.submit(run)
+        # Waiting for a free worker is not upstream latency: the timeout starts once the call runs
+        if not picked_up.wait(stage_time_left()):
+            if primary.cancel() and admission is not None:
+                admission.release()
+            raise DeadlineExceeded(f"{self.name} stage budget spent waiting for a worker")
+        started = time.monotonic()
+        futures: List[Future] = [primary]
+        hedged: Optional[Future] = None
+        
+        delay = self._hedge_delay() if hedge else None
+        if delay is not None and (self.timeout is None or delay < self.timeout):
+            done, _ = wait(futures, timeout=delay)
+            if not done and self._admit_hedge(admission):
+                hedged = executor.submit(fn, *args, **kwargs)
+                futures.append(hedged)
+                self._count('hedges_fired')
+        
+        while futures:
+            remaining = None if self.timeout is None else self.timeout - (time.monotonic() - started)
+            if remaining is not None and remaining <= 0:
+                break
+            done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    if future is hedged:
+                        self._count('hedge_wins')
+                    return future.result()
+                if not futures:
+                    raise future.exception()
+        
+        self._count('timeouts')
+        raise UpstreamTimeoutError(f"{self.name} did not answer within {self.timeout}s")
+    
+    @staticmethod
+    def _admit_hedge(admission: Optional[Admission]) -> bool:
+        """A hedge is a second request: only fire it if the budget has room right now"""
+        if admission is None:
+            return True
+        try:
+            admission.acquire(timeout=0)
+        except TimeoutError:
+            return False
+        return True
+    
+    def call(self, fn: Callable[..., Any], *args,
+             idempotent: bool = True, hedge: Optional[bool] = None,
+             admission: Optional[Admission] = None, **kwargs) -> Any:
+        """
+        Call an upstream function under this guard's policy
+        
+        With an admission, every attempt first waits for the scheduler's
+        budget; that wait is outside the per-attempt timeout, so queueing
+        behind batch work never counts as a timeout or a breaker failure.
+        When called from a Deadline.run stage, the wait is bounded by what
+        is left of the stage.
+        A 429 is an answer, not an outage: it backs the scheduler off and
+        is retried up to the admission's max_attempts, separately from the
+        guard's own retries and without touching the breaker.
+        
+        Args:
+            fn (Callable): Function performing the upstream request
+            idempotent (bool): Whether the call may be retried and hedged
+            hedge (Optional[bool]): Override the guard's hedging setting
+            admission (Optional[Admission]): Rate-limit budget to take before each attempt
+        
+        Returns:
+            Any: Whatever `fn` returns
+        
+        Raises:
+            CircuitOpenError: If the dependency's breaker is open
+            TimeoutError: If the stage's budget ran out while waiting for admission
+            UpstreamUnavailableError: If transient failures persist after all retries
+        """
+        self._count('calls')
+        attempts = self.max_attempts if idempotent else 1
+        hedge = (self.hedge if hedge is None else hedge) and idempotent
+        target = fn if admission is None else _admitted(fn, admission)
+        
+        last_error: Optional[Exception] = None
+        attempt = rate_limited = 0
+        while attempt < attempts:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.breaker.name} circuit is open, failing fast")
+            
+            if attempt > 0 and not rate_limited:
+                self._count('retries')
+                # Full jitter keeps retries from synchronizing across workers
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+            
+            if admission is not None:
+                # Inside a request stage, stop waiting for budget once the stage is abandoned
+                left = stage_time_left()
+                if left is not None and left <= 0:
+                    raise DeadlineExceeded(f"{self.name} stage budget spent before the call was admitted")
+                admission.acquire(timeout=left)
+            started = time.monotonic()
+            try:
+                result = self._attempt(target, args, kwargs, hedge, admission)
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    # The dependency answered; the scheduler (if any) has backed off
+                    self.breaker.record_success()
+                    self._count('rate_limited')
+                    rate_limited += 1
+                    if admission is not None and rate_limited < admission.max_attempts:
+                        continue
+                    raise
+                rate_limited = 0
+                if not is_retryable_error(e):
+                    # The dependency answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+                attempt += 1
+                logger.warning(f"{self.name} attempt {attempt}/{attempts} failed: {str(e)}")
+                continue
+            
+            self.latency.add(time.monotonic() - started)
+            self.breaker.record_success()
+            return result
+        
+        self._count('failures')
+        if isinstance(last_error, UpstreamError):
+            raise last_error
+        raise UpstreamUnavailableError(f"{self.name} failed after {attempts} attempts: {last_error}") from last_error
+    
+    def get_stats(self) -> Dict:
+        """Get call counters, latency percentiles and hedge win-rate"""
+        with self._lock:
+            counters = dict(self._counters)
+        p50 = self.latency.percentile(0.5)
+        p95 = self.latency.percentile(0.95)
+        counters.update({
+            'p50_latency': round(p50, 4) if p50 is not None else None,
+            'p95_latency': round(p95, 4) if p95 is not None else None,
+            'hedge_win_rate': round(counters['hedge_wins'] / counters['hedges_fired'], 3)
+            if counters['hedges_fired'] else 0.0,
+            'breaker': self.breaker.name
+        })
+        return counters
+
+
+# Keyed by name and configuration: a service built with other settings gets its own instances
+_breakers: Dict[Tuple, CircuitBreaker] = {}
+_guards: Dict[Tuple, UpstreamGuard] = {}
+_registry_lock = threading.Lock()
+
+
+def _config_key(name: str, config: Dict) -> Tuple:
+    return (name,) + tuple(sorted(config.items()))
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Get or create the circuit breaker of a dependency with this configuration"""
+    key = _config_key(name, kwargs)
+    with _registry_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(name, **kwargs)
+        return _breakers[key]
+
+
+def get_guard(name: str, dependency: str,
+              failure_threshold: int = 5, reset_timeout: float = 30.0,
+              **kwargs) -> UpstreamGuard:
+    """
+    Get or create the guard for an operation
+    
+    Guards and breakers are shared by every caller passing the same
+    configuration; a different configuration gets instances of its own.
+    
+    Args:
+        name (str): Operation name, e.g. "gemini.embed"
+        dependency (str): Dependency whose breaker the guard shares, e.g. "gemini"
+        failure_threshold (int): Breaker failure threshold
+        reset_timeout (float): Breaker reset timeout
+    
+    Returns:
+        UpstreamGuard: Guard registered under `name` for this configuration
+    """
+    breaker_config = {'failure_threshold': failure_threshold, 'reset_timeout': reset_timeout}
+    breaker = get_breaker(dependency, **breaker_config)
+    key = _config_key(name, dict(kwargs, dependency=dependency, **breaker_config))
+    with _registry_lock:
+        if key not in _guards:
+            _guards[key] = UpstreamGuard(name, breaker, **kwargs)
+        return _guards[key]
+
+
+def _by_name(instances: List) -> Dict:
+    """Instances keyed by name, numbering the ones sharing a name in creation order"""
+    counts: Dict[str, int] = {}
+    for instance in instances:
+        counts[instance.name] = counts.get(instance.name, 0) + 1
+    
+    named, seen = {}, {}
+    for instance in instances:
+        seen[instance.name] = seen.get(instance.name, 0) + 1
+        label = instance.name if counts[instance.name] == 1 else f"{instance.name}#{seen[instance.name]}"
+        named[label] = instance
+    return named
+
+
+def get_resilience_stats() -> Dict:
+    """
+    Get breaker state and guard statistics for tuning
+    
+    Returns:
+        Dict: Breakers and guards keyed by name ("name#2" for a second configuration)
+    """
+    with _registry_lock:
+        breakers = _by_name(list(_breakers.values()))
+        guards = _by_name(list(_guards.values()))
+    return {
+        'breakers': {name: breaker.get_stats() for name, breaker in breakers.items()},
+        'calls': {name: guard.get_stats() for name, guard in guards.items()}
+    }
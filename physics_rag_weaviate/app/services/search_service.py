@@ -3,14 +3,73 @@ Search Service for Physics RAG System with Weaviate
 Handles Weaviate hybrid search (vector + keyword)
 """
 
-import weaviate
-from weaviate.classes.config import Configure
-from typing import List, Dict, Optional, Any
+import json
+import threading
+from typing import List, Dict, Optional, Any, Sequence, Tuple
 import logging
 from pathlib import Path
 
+from .resilience import UpstreamGuard
+from .weaviate_connection import WeaviateConnection
+
 logger = logging.getLogger(__name__)
 
+PREVIEW_CHARS = 200  # Characters of chunk text shown in a result preview
+
+# Searches return ids and scores; chunk text only when asked for, vectors never
+RESULT_PROPERTIES = ["doc_id"]
+TEXT_PROPERTIES = ["doc_id", "text"]
+
+
+def make_preview(text: str, limit: int = PREVIEW_CHARS) -> str:
+    """First `limit` characters of a text, with an ellipsis if it was cut"""
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def object_vector(obj: Any) -> Optional[List[float]]:
+    """Default vector of a query result object (v4 returns a dict of named vectors)"""
+    vector = obj.vector
+    if isinstance(vector, dict):
+        vector = vector.get('default', next(iter(vector.values()), None))
+    return None if vector is None else list(vector)
+
+
+def merge_shard_results(results_by_shard: Dict[str, List[Dict]], limit: int) -> List[Dict]:
+    """
+    Merge per-shard result lists into one global top-k
+    
+    Scores are divided by the best score over the union of all shards'
+    results, so one scale ranks every candidate (the best is 1.0); the
+    shard's own score is kept as raw_score. Ties go to the better per-shard rank.
+    
+    Args:
+        results_by_shard (Dict[str, List[Dict]]): Formatted results per shard (subject)
+        limit (int): Number of results to return
+        
+    Returns:
+        List[Dict]: Merged results, re-ranked, each tagged with its subject
+    """
+    candidates = [(shard, result) for shard, results in results_by_shard.items() for result in results]
+    if not candidates:
+        return []
+    
+    scores = [float(result['score']) for _, result in candidates]
+    best = max(scores)
+    
+    merged = []
+    for (shard, result), score in zip(candidates, scores):
+        merged.append({
+            **result,
+            'subject': shard,
+            'raw_score': score,
+            'score': score / best if best > 0 else 0.0
+        })
+    merged.sort(key=lambda r: (-r['score'], r['rank']))
+    merged = merged[:limit]
+    for rank, result in enumerate(merged):
+        result['rank'] = rank + 1
+    return merged
+
 
 class WeaviateSearchService:
     """Service for hybrid search using Weaviate"""
@@ -19,60 +78,86 @@ class WeaviateSearchService:
                  weaviate_url: str, 
                  weaviate_api_key: str,
                  collection_name: str = "PhysicsChunk",
-                 use_local: bool = False):
+                 use_local: bool = False,
+                 guard: Optional[UpstreamGuard] = None,
+                 client: Optional[Any] = None,
+                 connect: bool = True,
+                 connection: Optional[WeaviateConnection] = None,
+                 connection_config: Optional[Dict] = None):
         """
         Initialize the Weaviate search service
         
+        With connect=False nothing is opened until the first query or an
+        explicit connect(), so several services can connect concurrently
+        during startup.
+        
         Args:
             weaviate_url (str): Weaviate cluster URL or localhost URL
             weaviate_api_key (str): Weaviate API key (can be empty for localhost)
             collection_name (str): Name of the Weaviate collection
             use_local (bool): Whether to use local Weaviate instance
+            guard (Optional[UpstreamGuard]): Timeout/retry/hedging policy for queries
+            client (Optional[Any]): Already connected client (e.g. the in-memory local backend)
+            connect (bool): Connect and open the collection now rather than on first use
+            connection (Optional[WeaviateConnection]): Shared connection; stays open when this service closes
+            connection_config (Optional[Dict]): Pool, port and keep-alive options for a connection of its own
         """
         self.weaviate_url = weaviate_url
         self.weaviate_api_key = weaviate_api_key
         self.collection_name = collection_name
         self.use_local = use_local
+        self.guard = guard
         
-        # Initialize Weaviate client
-        self.client = self._connect_to_weaviate()
+        # The connection is closed by whoever created it
+        self._owns_connection = connection is None
+        self.connection = connection or WeaviateConnection(
+            weaviate_url, weaviate_api_key, use_local, client=client, **(connection_config or {})
+        )
+        self._collection = None
+        self._collection_generation = -1
+        self._collection_ready = False
+        self._connect_lock = threading.RLock()
         
-        # Get or create collection
-        self.collection = self._setup_collection()
+        if connect:
+            self.connect()
         
         logger.info(f"WeaviateSearchService initialized with collection: {collection_name}")
     
-    def _connect_to_weaviate(self) -> weaviate.WeaviateClient:
-        """Connect to Weaviate instance"""
-        try:
-            if self.use_local:
-                # Connect to local Weaviate instance
-                host = self.weaviate_url.replace('http://', '').replace('https://', '')
-                if ':' in host:
-                    host = host.split(':')[0]  # Remove port from URL if present
-                client = weaviate.connect_to_local(
-                    host=host,
-                    port=8080,
-                    grpc_port=50051
-                )
-                logger.info(f"Connected to local Weaviate at {self.weaviate_url}")
+    @property
+    def client(self) -> Any:
+        """Weaviate client, connected on first use"""
+        return self.connection.client
+    
+    @property
+    def collection(self) -> Any:
+        """Collection handle on the current client, created on first use if missing"""
+        if self._collection is None or self._collection_generation != self.connection.generation:
+            self.connect()
+        return self._collection
+    
+    @property
+    def connected(self) -> bool:
+        return self._collection is not None
+    
+    def connect(self) -> None:
+        """Connect and get or create the collection (after a reconnect, just a new handle)"""
+        with self._connect_lock:
+            client = self.connection.client
+            generation = self.connection.generation
+            if self._collection is not None and self._collection_generation == generation:
+                return
+            if self._collection_ready:
+                self._collection = client.collections.get(self.collection_name)
             else:
-                # Connect to Weaviate Cloud
-                client = weaviate.connect_to_weaviate_cloud(
-                    cluster_url=self.weaviate_url,
-                    auth_credentials=weaviate.auth.AuthApiKey(self.weaviate_api_key)
-                )
-                logger.info(f"Connected to Weaviate Cloud at {self.weaviate_url}")
-            
-            return client
-            
-        except Exception as e:
-            logger.error(f"Failed to connect to Weaviate: {str(e)}")
-            raise
+                self._collection = self._setup_collection()
+                self._collection_ready = True
+            self._collection_generation = generation
     
     def _setup_collection(self) -> Any:
         """Setup or get existing collection"""
         try:
+            from weaviate.classes.config import Configure, DataType, Property
+            
             # Check if collection exists
             if self.client.collections.exists(self.collection_name):
                 logger.info(f"Using existing collection: {self.collection_name}")
@@ -84,6 +169,11 @@ class WeaviateSearchService:
                 self.collection_name,
                 vector_config=Configure.VectorIndex.hnsw(),
                 # Note: Using newer API, no vectorizer_config needed since we provide vectors
+                properties=[
+                    Property(name="text", data_type=DataType.TEXT),
+                    # Filterable index for fetch-by-id (fetch_texts)
+                    Property(name="doc_id", data_type=DataType.INT, index_filterable=True)
+                ]
             )
             
             return self.client.collections.get(self.collection_name)
@@ -92,13 +182,51 @@ class WeaviateSearchService:
             logger.error(f"Failed to setup collection: {str(e)}")
             raise
     
-    def insert_documents(self, documents: List[str], embeddings: List[List[float]]) -> bool:
+    def use_collection(self, collection_name: str) -> None:
+        """Serve queries from another existing collection, e.g. a new index version"""
+        with self._connect_lock:
+            collection = self.client.collections.get(collection_name)
+            # One reference assignment: in-flight queries finish on the old collection
+            self._collection = collection
+            self._collection_generation = self.connection.generation
+            self._collection_ready = True
+            self.collection_name = collection_name
+    
+    def for_collection(self, collection_name: str, connect: bool = True) -> 'WeaviateSearchService':
+        """Service for another collection on the same connection (created if missing)"""
+        return WeaviateSearchService(
+            self.weaviate_url,
+            self.weaviate_api_key,
+            collection_name=collection_name,
+            use_local=self.use_local,
+            guard=self.guard,
+            connect=connect,
+            connection=self.connection
+        )
+    
+    def _run_query(self, method_name: str, **kwargs) -> Any:
+        """
+        Run a read-only collection query through the guard, when one is configured
+        
+        The query method is looked up on every attempt, so a retry after a
+        reconnect runs on the new client.
+        """
+        def attempt(**query_kwargs):
+            return self.connection.run(lambda client: getattr(self.collection.query, method_name)(**query_kwargs))
+        
+        if self.guard is None:
+            return attempt(**kwargs)
+        return self.guard.call(attempt, idempotent=True, **kwargs)
+    
+    def insert_documents(self, documents: List[str], embeddings: List[List[float]],
+                         doc_ids: Optional[Sequence[int]] = None) -> bool:
         """
         Insert documents with embeddings into Weaviate
         
         Args:
             documents (List[str]): List of document texts
             embeddings (List[List[float]]): List of embedding vectors
+            doc_ids (Optional[Sequence[int]]): doc_id per document (default: position)
             
         Returns:
             bool: True if successful
@@ -106,11 +234,14 @@ class WeaviateSearchService:
         try:
             logger.info(f"Inserting {len(documents)} documents into Weaviate")
             
+            if doc_ids is None:
+                doc_ids = range(len(documents))
+            
             # Insert documents with embeddings
             with self.collection.batch.dynamic() as batch:
-                for i, (doc, emb) in enumerate(zip(documents, embeddings)):
+                for doc_id, doc, emb in zip(doc_ids, documents, embeddings):
                     batch.add_object(
-                        properties={"text": doc, "doc_id": i},
+                        properties={"text": doc, "doc_id": int(doc_id)},
                         vector=emb
                     )
             
@@ -121,11 +252,35 @@ class WeaviateSearchService:
             logger.error(f"Error inserting documents: {str(e)}")
             raise
     
+    def copy_from(self, source_name: str) -> int:
+        """
+        Copy every object of another collection (properties, vector, uuid) into this one
+        
+        Args:
+            source_name (str): Collection to copy; it is left untouched
+            
+        Returns:
+            int: Objects copied
+        """
+        source = self.client.collections.get(source_name)
+        copied = 0
+        with self.collection.batch.dynamic() as batch:
+            for obj in source.iterator(include_vector=True):
+                vector = obj.vector.get('default') if isinstance(obj.vector, dict) else obj.vector
+                batch.add_object(properties=obj.properties, vector=vector, uuid=obj.uuid)
+                copied += 1
+        if batch.number_errors:
+            raise RuntimeError(f"Copying {source_name} into {self.collection_name} failed for "
+                               f"{batch.number_errors} objects")
+        return copied
+    
     def hybrid_search(self, 
                      query_text: str, 
                      query_vector: List[float], 
                      alpha: float = 0.5,
-                     limit: int = 5) -> List[Dict]:
+                     limit: int = 5,
+                     include_text: bool = False,
+                     include_vector: bool = False) -> List[Dict]:
         """
         Perform hybrid search (vector + keyword) using Weaviate
         
@@ -134,19 +289,25 @@ class WeaviateSearchService:
             query_vector (List[float]): Query embedding vector
             alpha (float): Balance between vector (1.0) and keyword (0.0) search
             limit (int): Number of results to return
+            include_text (bool): Also return each chunk's text as 'content'
+            include_vector (bool): Also return each chunk's stored vector as 'vector'
             
         Returns:
-            List[Dict]: Search results with content and metadata
+            List[Dict]: doc_id, score and rank of each result
         """
         try:
             logger.info(f"Performing hybrid search for: {query_text[:50]}...")
             
             # Perform hybrid search
-            results = self.collection.query.hybrid(
+            results = self._run_query(
+                "hybrid",
                 query=query_text,
                 vector=query_vector,
                 alpha=alpha,  # 0.5 balances vector and keyword search
-                limit=limit
+                limit=limit,
+                return_properties=TEXT_PROPERTIES if include_text else RESULT_PROPERTIES,
+                include_vector=include_vector,
+                return_metadata=["score"]
             )
             
             # Format results
@@ -168,12 +329,15 @@ class WeaviateSearchService:
                     score = max(0.1, 1.0 - (rank * 0.1))
                 
                 result = {
-                    'content': obj.properties.get('text', ''),
                     'doc_id': obj.properties.get('doc_id', rank),
                     'score': score,
                     'rank': rank + 1,
                     'search_type': 'hybrid'
                 }
+                if include_text:
+                    result['content'] = obj.properties.get('text', '')
+                if include_vector:
+                    result['vector'] = object_vector(obj)
                 formatted_results.append(result)
             
             logger.info(f"Hybrid search returned {len(formatted_results)} results")
@@ -185,23 +349,31 @@ class WeaviateSearchService:
     
     def vector_search(self, 
                      query_vector: List[float], 
-                     limit: int = 5) -> List[Dict]:
+                     limit: int = 5,
+                     include_text: bool = False,
+                     include_vector: bool = False) -> List[Dict]:
         """
         Perform pure vector search using Weaviate
         
         Args:
             query_vector (List[float]): Query embedding vector
             limit (int): Number of results to return
+            include_text (bool): Also return each chunk's text as 'content'
+            include_vector (bool): Also return each chunk's stored vector as 'vector'
             
         Returns:
-            List[Dict]: Search results with content and metadata
+            List[Dict]: doc_id, score and rank of each result
         """
         try:
             logger.info("Performing vector search...")
             
-            results = self.collection.query.near_vector(
+            results = self._run_query(
+                "near_vector",
                 near_vector=query_vector,
-                limit=limit
+                limit=limit,
+                return_properties=TEXT_PROPERTIES if include_text else RESULT_PROPERTIES,
+                include_vector=include_vector,
+                return_metadata=["distance"]
             )
             
             # Format results
@@ -219,12 +391,15 @@ class WeaviateSearchService:
                     score = max(0.1, 1.0 - (rank * 0.1))
                 
                 result = {
-                    'content': obj.properties.get('text', ''),
                     'doc_id': obj.properties.get('doc_id', rank),
                     'score': score,
                     'rank': rank + 1,
                     'search_type': 'vector'
                 }
+                if include_text:
+                    result['content'] = obj.properties.get('text', '')
+                if include_vector:
+                    result['vector'] = object_vector(obj)
                 formatted_results.append(result)
             
             logger.info(f"Vector search returned {len(formatted_results)} results")
@@ -236,23 +411,31 @@ class WeaviateSearchService:
     
     def keyword_search(self, 
                       query_text: str, 
-                      limit: int = 5) -> List[Dict]:
+                      limit: int = 5,
+                      include_text: bool = False,
+                      include_vector: bool = False) -> List[Dict]:
         """
         Perform keyword search using Weaviate BM25
         
         Args:
             query_text (str): Search query text
             limit (int): Number of results to return
+            include_text (bool): Also return each chunk's text as 'content'
+            include_vector (bool): Also return each chunk's stored vector as 'vector'
             
         Returns:
-            List[Dict]: Search results with content and metadata
+            List[Dict]: doc_id, score and rank of each result
         """
         try:
             logger.info(f"Performing keyword search for: {query_text[:50]}...")
             
-            results = self.collection.query.bm25(
+            results = self._run_query(
+                "bm25",
                 query=query_text,
-                limit=limit
+                limit=limit,
+                return_properties=TEXT_PROPERTIES if include_text else RESULT_PROPERTIES,
+                include_vector=include_vector,
+                return_metadata=["score"]
             )
             
             # Format results
@@ -269,12 +452,15 @@ class WeaviateSearchService:
                     score = max(0.1, 1.0 - (rank * 0.1))
                 
                 result = {
-                    'content': obj.properties.get('text', ''),
                     'doc_id': obj.properties.get('doc_id', rank),
                     'score': score,
                     'rank': rank + 1,
                     'search_type': 'keyword'
                 }
+                if include_text:
+                    result['content'] = obj.properties.get('text', '')
+                if include_vector:
+                    result['vector'] = object_vector(obj)
                 formatted_results.append(result)
             
             logger.info(f"Keyword search returned {len(formatted_results)} results")
@@ -284,6 +470,50 @@ class WeaviateSearchService:
             logger.error(f"Error in keyword search: {str(e)}")
             raise
     
+    def fetch_texts(self, doc_ids: Sequence[int]) -> Dict[int, str]:
+        """
+        Texts of many documents in one query, e.g. to hydrate search results
+        
+        Args:
+            doc_ids (Sequence[int]): Document IDs
+            
+        Returns:
+            Dict[int, str]: Text by doc_id, for the documents found
+        """
+        doc_ids = sorted({int(doc_id) for doc_id in doc_ids})
+        if not doc_ids:
+            return {}
+        from weaviate.classes.query import Filter
+        
+        results = self._run_query(
+            "fetch_objects",
+            filters=Filter.by_property("doc_id").contains_any(doc_ids),
+            limit=len(doc_ids),
+            return_properties=TEXT_PROPERTIES
+        )
+        return {int(obj.properties['doc_id']): obj.properties.get('text', '') for obj in results.objects}
+    
+    def fetch_vector(self, doc_id: int) -> Optional[List[float]]:
+        """
+        Stored vector of a document, so it can be searched with again without re-embedding
+        
+        Args:
+            doc_id (int): Document ID
+            
+        Returns:
+            Optional[List[float]]: The vector, or None if the document does not exist
+        """
+        from weaviate.classes.query import Filter
+        
+        results = self._run_query(
+            "fetch_objects",
+            filters=Filter.by_property("doc_id").equal(int(doc_id)),
+            limit=1,
+            include_vector=True,
+            return_properties=RESULT_PROPERTIES
+        )
+        return object_vector(results.objects[0]) if results.objects else None
+    
     def get_document_by_id(self, doc_id: int) -> Optional[str]:
         """
         Get document content by ID
@@ -295,20 +525,76 @@ class WeaviateSearchService:
             Optional[str]: Document content or None if not found
         """
         try:
-            results = self.collection.query.fetch_objects(
-                where={"path": ["doc_id"], "operator": "Equal", "valueInt": doc_id},
-                limit=1
-            )
-            
-            if results.objects:
-                return results.objects[0].properties.get('text', '')
-            
-            return None
+            return self.fetch_texts([doc_id]).get(int(doc_id))
             
         except Exception as e:
             logger.error(f"Error getting document by ID: {str(e)}")
             return None
     
+    def export_documents(self) -> Tuple[List[int], List[str], List[List[float]]]:
+        """
+        Read every object with its vector, e.g. for an index snapshot
+        
+        Returns:
+            Tuple[List[int], List[str], List[List[float]]]: doc_ids, texts and vectors
+        """
+        doc_ids, texts, vectors = [], [], []
+        for obj in self.collection.iterator(include_vector=True):
+            vector = object_vector(obj)
+            if vector is None:
+                continue  # Nothing to restore without re-embedding
+            doc_ids.append(int(obj.properties.get('doc_id', len(doc_ids))))
+            texts.append(obj.properties.get('text', ''))
+            vectors.append(vector)
+        logger.info(f"Exported {len(texts)} documents from {self.collection_name}")
+        return doc_ids, texts, vectors
+    
+    def sample_documents(self, limit: int) -> List[Tuple[int, List[float]]]:
+        """
+        A few (doc_id, vector) pairs, for smoke-testing an index
+        
+        Args:
+            limit (int): Number of objects to sample
+            
+        Returns:
+            List[Tuple[int, List[float]]]: doc_id and vector of each sampled object
+        """
+        if limit <= 0:
+            return []
+        results = self.connection.run(
+            lambda client: self.collection.query.fetch_objects(limit=limit, include_vector=True)
+        )
+        samples = []
+        for obj in results.objects:
+            vector = object_vector(obj)
+            if vector is not None:
+                samples.append((int(obj.properties.get('doc_id', -1)), vector))
+        return samples
+    
+    def set_index_metadata(self, metadata: Dict) -> None:
+        """
+        Record what the collection was built from (as JSON in its description)
+        
+        Args:
+            metadata (Dict): e.g. the chunk store's content hash and the embedding model
+        """
+        description = json.dumps(metadata, sort_keys=True)
+        self.connection.run(lambda client: self.collection.config.update(description=description))
+    
+    def get_index_metadata(self) -> Dict:
+        """
+        What set_index_metadata recorded
+        
+        Returns:
+            Dict: The metadata, empty for collections built without it
+        """
+        config = self.connection.run(lambda client: self.collection.config.get())
+        try:
+            metadata = json.loads(config.description or '')
+        except ValueError:
+            return {}
+        return metadata if isinstance(metadata, dict) else {}
+    
     def get_collection_stats(self) -> Dict:
         """
         Get statistics about the collection
@@ -318,7 +604,7 @@ class WeaviateSearchService:
         """
         try:
             # Get collection info
-            aggregate_result = self.collection.aggregate.over_all()
+            aggregate_result = self.connection.run(lambda client: self.collection.aggregate.over_all())
             
             stats = {
                 'total_documents': aggregate_result.total_count if hasattr(aggregate_result, 'total_count') else 0,
@@ -352,7 +638,10 @@ class WeaviateSearchService:
                 self.client.collections.delete(self.collection_name)
             
             # Recreate collection
-            self.collection = self._setup_collection()
+            with self._connect_lock:
+                self._collection = self._setup_collection()
+                self._collection_generation = self.connection.generation
+                self._collection_ready = True
             
             logger.info(f"Collection {self.collection_name} reset successfully")
             return True
@@ -362,14 +651,6 @@ class WeaviateSearchService:
             return False
     
     def close(self):
-        """Close the Weaviate client connection"""
-        try:
-            if self.client:
-                self.client.close()
-                logger.info("Weaviate client connection closed")
-        except Exception as e:
-            logger.error(f"Error closing Weaviate client: {str(e)}")
-    
-    def __del__(self):
-        """Destructor to ensure client is closed"""
-        self.close()
+        """Close the Weaviate connection if this service opened it"""
+        if self._owns_connection:
+            self.connection.close()
@@ -0,0 +1,180 @@
+"""
+Shared Cache for Physics RAG System with Weaviate
+File-backed cache tier shared by the worker processes on one host
+"""
+
+import json
+import logging
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Value encodings: float vectors are stored as float32, everything else as JSON
+_VECTOR = b'V'
+_JSON = b'J'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a cache value (embeddings become packed float32)"""
+    if isinstance(value, list) and value and all(isinstance(v, float) for v in value):
+        return _VECTOR + struct.pack(f'<{len(value)}f', *value)
+    return _JSON + json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def decode_value(blob: bytes) -> Any:
+    """Inverse of encode_value"""
+    blob = bytes(blob)
+    if blob[:1] == _VECTOR:
+        return list(struct.unpack(f'<{(len(blob) - 1) // 4}f', blob[1:]))
+    return json.loads(blob[1:].decode('utf-8'))
+
+
+class SharedCache:
+    """
+    One namespace of a SQLite cache file used by every worker on the host
+    
+    The per-process TTLCache stays the first tier; this one lets a worker
+    reuse an embedding or answer another worker already paid for, without
+    each process keeping its own copy. The file runs in WAL mode so readers
+    never block the writer. Any database error counts as a miss: the cache
+    must never fail a request. Calls block on SQLite (up to busy_timeout
+    when another worker is writing); from the event loop use
+    TTLCache.get_async/set_async, which run them in a worker thread.
+    """
+    
+    PRUNE_EVERY = 256  # Writes between expiry/size sweeps
+    
+    def __init__(self, path: str, namespace: str, ttl: Optional[float] = None,
+                 max_entries: int = 50000, busy_timeout: float = 0.1):
+        """
+        Open (or create) the cache file
+        
+        Args:
+            path (str): SQLite file, created if missing
+            namespace (str): Keeps e.g. embeddings and answers apart in one file
+            ttl (Optional[float]): Seconds an entry stays valid (forever if None)
+            max_entries (int): Entries kept in this namespace before the oldest are dropped
+            busy_timeout (float): Seconds to wait for another worker's write lock before missing
+        """
+        self.path = Path(path)
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=busy_timeout, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+    
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if missing, expired or unreadable"""
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+    
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get a value with the time.time() it was stored at, or None if missing, expired or unreadable"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, stored_at FROM entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+            if row is None or self._expired(row[1]):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return decode_value(row[0]), row[1]
+        except (sqlite3.Error, ValueError, struct.error) as e:
+            self.errors += 1
+            logger.warning(f"Shared cache read failed ({self.namespace}): {str(e)}")
+            return None
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store a value for every worker"""
+        try:
+            blob = encode_value(value)
+        except (TypeError, ValueError):
+            return  # Not shareable; the in-process tier still has it
+        
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, blob, time.time())
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Shared cache write failed ({self.namespace}): {str(e)}")
+    
+    def _prune(self) -> None:
+        """Drop expired entries and the oldest ones beyond max_entries"""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM entries WHERE namespace = ? AND stored_at < ?",
+                               (self.namespace, time.time() - self.ttl))
+        self._conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND key IN ("
+            "SELECT key FROM entries WHERE namespace = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_entries)
+        )
+    
+    def clear(self) -> None:
+        """Drop this namespace for every worker"""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache clear failed ({self.namespace}): {str(e)}")
+    
+    def __len__(self) -> int:
+        try:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?",
+                                          (self.namespace,)).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            'path': str(self.path),
+            'size': len(self),
+            'max_size': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
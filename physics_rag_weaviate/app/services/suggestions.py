@@ -0,0 +1,169 @@
+"""
+Query Suggestions for Physics RAG System with Weaviate
+Prefix completion over chapter titles, section titles and glossary terms
+"""
+
+import bisect
+import heapq
+import logging
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .chunk_store import ChunkStore
+from .glossary import ENGLISH_SUFFIX, Glossary, clean_heading, glossary_term, term_key
+
+logger = logging.getLogger(__name__)
+
+# "## অধ্যায় 2: গতি" (\d also matches Bengali digits and int() accepts them)
+CHAPTER_TITLE = re.compile(unicodedata.normalize('NFC', r"^#+\s*অধ্যায়\s*(\d+)\s*:\s*(.+?)\s*$"))
+
+# A match inside an entry ("গতি" in "সরল স্পন্দন গতি") ranks below a match at its start
+INNER_MATCH_WEIGHT = 0.5
+# Largest key after every key that starts with a prefix
+PREFIX_END = '\U0010FFFF'
+
+
+class SuggestionIndex:
+    """
+    Sorted-array prefix index for autocompletion
+    
+    Every entry (a glossary concept, a numbered section or a chapter) is
+    reachable by its Bengali and English names, its section number and
+    each later word of a name. The keys are normalized like glossary keys
+    (NFC, lower case, no punctuation) and kept in one sorted list, so the
+    keys starting with a prefix are a contiguous run found by two binary
+    searches. Entries are ranked by how often their terms occur in the
+    book, plus the chunks they span.
+    """
+    
+    def __init__(self, entries: List[Dict]):
+        """
+        Index entries
+        
+        Args:
+            entries (List[Dict]): Suggestions with text, kind, doc_id, section,
+                weight and their lookup names
+        """
+        self.entries = entries
+        pairs = set()
+        for index, entry in enumerate(entries):
+            for name in entry['names']:
+                key = term_key(name)
+                if not key:
+                    continue
+                pairs.add((key, index, True))
+                if not entry['section'] or name != entry['section']:
+                    words = key.split()
+                    for start in range(1, len(words)):
+                        pairs.add((' '.join(words[start:]), index, False))
+        ordered = sorted(pairs)
+        self._keys = [key for key, _, _ in ordered]
+        self._targets = [(index, initial) for _, index, initial in ordered]
+        self.lookups = 0
+    
+    @classmethod
+    def build(cls, store: ChunkStore, glossary: Optional[Glossary] = None) -> "SuggestionIndex":
+        """
+        Collect suggestions from the chunk store's headings and the glossary
+        
+        Args:
+            store (ChunkStore): Chunks with chapter and section metadata
+            glossary (Optional[Glossary]): Concepts to suggest
+        
+        Returns:
+            SuggestionIndex: The index
+        """
+        chapter_chunks, section_chunks = Counter(), Counter()
+        entries: List[Dict] = []
+        by_title: Dict[str, Dict] = {}
+        chapters = set()
+        
+        for doc_id, text in store.iter_chunks():
+            metadata = store.metadata(doc_id)
+            chapter_chunks[metadata['chapter']] += 1
+            section_chunks[metadata['section']] += 1
+            for line in text.splitlines():
+                if not line.startswith('#'):
+                    continue
+                chapter = CHAPTER_TITLE.match(unicodedata.normalize('NFC', line))
+                if chapter and int(chapter.group(1)) not in chapters:
+                    number = int(chapter.group(1))
+                    chapters.add(number)
+                    title = ' '.join(chapter.group(2).split())
+                    entries.append({'text': f"অধ্যায় {number}: {title}", 'kind': 'chapter', 'doc_id': doc_id,
+                                    'section': None, 'chapter': number, 'names': [title, f"অধ্যায় {number}"]})
+                    continue
+                number, title = clean_heading(line)
+                if number and title and term_key(title) not in by_title:
+                    entry = {'text': f"{number} {title}", 'kind': 'section', 'doc_id': doc_id,
+                             'section': number, 'names': [title, number]}
+                    by_title[term_key(title)] = entry
+                    by_title.setdefault(term_key(ENGLISH_SUFFIX.sub('', title)), entry)
+                    entries.append(entry)
+        
+        for entry in entries:
+            if entry['kind'] == 'chapter':
+                entry['weight'] = chapter_chunks[entry['chapter']]
+            else:
+                entry['weight'] = section_chunks[entry['section']]
+            entry.pop('chapter', None)
+        
+        # A concept titling a section (same name, or same Bengali name) boosts that section instead of repeating it
+        for concept in (glossary.concepts if glossary is not None else []):
+            # Aliases mined from running text can carry stray words; suggest the main names only
+            names = [name for name in [concept['bengali'], concept['english']] if name]
+            term = glossary_term(concept)
+            weight = 1 + concept.get('frequency', 0)
+            section = by_title.get(term_key(term)) or by_title.get(term_key(concept['bengali']))
+            if section is not None:
+                section['weight'] += weight
+                section['names'].extend(names)
+                continue
+            entries.append({'text': term, 'kind': 'concept', 'doc_id': concept['doc_ids'][0] if concept['doc_ids'] else None,
+                            'section': None, 'weight': weight, 'names': names})
+        return cls(entries)
+    
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """
+        Best entries with a name (or a later word of one) starting with prefix
+        
+        Args:
+            prefix (str): What the user has typed so far
+            limit (int): Most suggestions to return
+        
+        Returns:
+            List[Dict]: text, kind, doc_id, section and score, best first
+        """
+        self.lookups += 1
+        key = term_key(prefix)
+        if not key:
+            return []
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_right(self._keys, key + PREFIX_END, lo=start)
+        
+        scores: Dict[int, float] = {}
+        for index, initial in self._targets[start:end]:
+            score = self.entries[index]['weight'] * (1.0 if initial else INNER_MATCH_WEIGHT)
+            if score > scores.get(index, 0.0):
+                scores[index] = score
+        
+        best = heapq.nsmallest(limit, scores.items(),
+                               key=lambda item: (-item[1], len(self.entries[item[0]]['text']), item[0]))
+        return [{
+            'text': self.entries[index]['text'],
+            'kind': self.entries[index]['kind'],
+            'doc_id': self.entries[index]['doc_id'],
+            'section': self.entries[index]['section'],
+            'score': score
+        } for index, score in best]
+    
+    def get_stats(self) -> Dict:
+        """Index statistics"""
+        return {
+            'entries': len(self.entries),
+            'keys': len(self._keys),
+            'kinds': dict(Counter(entry['kind'] for entry in self.entries)),
+            'lookups': self.lookups
+        }
@@ -0,0 +1,203 @@
+"""
+Traffic Recorder for Physics RAG System with Weaviate
+Opt-in capture of anonymized API requests to rotating NDJSON files for replay
+"""
+
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Endpoints whose requests are worth replaying
+CAPTURED_PATHS = frozenset({"/search", "/search/batch", "/chat", "/explain", "/similar"})
+
+# Personal data students might type into a question. Digits cover Latin and Bengali numerals.
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+LONG_NUMBER_PATTERN = re.compile(r"\+?[\d\u09E6-\u09EF][\d\u09E6-\u09EF\s-]{5,}[\d\u09E6-\u09EF]")
+
+
+def process_capture_path(path: str, pid: Optional[int] = None) -> Path:
+    """
+    The capture file of one process: traffic.ndjson becomes traffic.<pid>.ndjson
+    
+    Every uvicorn worker writes and rotates a file of its own; rotating
+    one file from several processes loses or interleaves records.
+    """
+    path = Path(path)
+    return path.with_name(f"{path.stem}.{pid or os.getpid()}{path.suffix}")
+
+
+def anonymize_text(text: str) -> str:
+    """Replace e-mail addresses, URLs and phone/ID-like numbers with placeholders"""
+    text = EMAIL_PATTERN.sub("<email>", text)
+    text = URL_PATTERN.sub("<url>", text)
+    return LONG_NUMBER_PATTERN.sub("<number>", text)
+
+
+def anonymize_payload(payload: Any) -> Any:
+    """Anonymize every string in a decoded JSON payload"""
+    if isinstance(payload, str):
+        return anonymize_text(payload)
+    if isinstance(payload, dict):
+        return {key: anonymize_payload(value) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [anonymize_payload(value) for value in payload]
+    return payload
+
+
+class TrafficRecorder:
+    """
+    Writes one NDJSON line per captured request
+    
+    Lines are handed to a background thread through a queue, so capture
+    never blocks the event loop on disk I/O. Each process writes its own
+    file (see process_capture_path). Client addresses are reduced
+    to a salted hash that changes on every restart: enough to see repeated
+    questions within a session, not enough to identify anyone.
+    """
+    
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024,
+                 backups: int = 10, sample_rate: float = 1.0):
+        """
+        Initialize the recorder
+        
+        Args:
+            path (str): NDJSON base path; this process writes <stem>.<pid><suffix>,
+                and rotated copies get .1, .2, ... suffixes
+            max_bytes (int): Size at which the file is rotated
+            backups (int): Rotated files kept
+            sample_rate (float): Fraction of requests captured
+        """
+        self.path = process_capture_path(path)
+        self.sample_rate = sample_rate
+        self._salt = os.urandom(16)
+        self.recorded = 0
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+        
+        logger.info(f"Traffic capture enabled: {self.path} (sample rate {sample_rate})")
+    
+    def should_record(self) -> bool:
+        """Apply the sample rate"""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+    
+    def client_token(self, address: Optional[str]) -> Optional[str]:
+        """Salted, per-process hash of a client address"""
+        if not address:
+            return None
+        return hashlib.sha256(self._salt + address.encode('utf-8')).hexdigest()[:12]
+    
+    def record(self, method: str, path: str, body: bytes, status: Optional[int],
+               latency_ms: float, timestamp: float, client: Optional[str] = None,
+               budget_ms: Optional[str] = None) -> None:
+        """
+        Queue one anonymized request record
+        
+        Args:
+            method (str): HTTP method
+            path (str): Request path
+            body (bytes): Raw request body (JSON)
+            status (Optional[int]): Response status code
+            latency_ms (float): Server-side latency
+            timestamp (float): Arrival time (Unix seconds)
+            client (Optional[str]): Client address, hashed before writing
+            budget_ms (Optional[str]): X-Request-Budget-Ms header, if sent
+        """
+        try:
+            payload = anonymize_payload(json.loads(body)) if body else None
+        except ValueError:
+            payload = None  # Not JSON: nothing useful to replay
+        
+        entry = {
+            'ts': round(timestamp, 3),
+            'method': method,
+            'path': path,
+            'status': status,
+            'latency_ms': round(latency_ms, 1),
+            'client': self.client_token(client),
+            'budget_ms': int(budget_ms) if budget_ms and budget_ms.isdigit() else None,
+            'body': payload
+        }
+        line = logging.makeLogRecord({'msg': json.dumps(entry, ensure_ascii=False), 'levelno': logging.INFO})
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            return  # Dropping a sample beats slowing down a request
+        self.recorded += 1
+    
+    def close(self) -> None:
+        """Flush queued records and close the file"""
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware feeding captured requests to a TrafficRecorder
+    
+    Wraps receive/send instead of reading the body up front, so the
+    request stream reaches the endpoint untouched.
+    """
+    
+    def __init__(self, app, recorder: TrafficRecorder, paths: Iterable[str] = CAPTURED_PATHS):
+        self.app = app
+        self.recorder = recorder
+        self.paths = frozenset(paths)
+    
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http' or scope['method'] != 'POST'
+                or scope['path'] not in self.paths or not self.recorder.should_record()):
+            await self.app(scope, receive, send)
+            return
+        
+        chunks = []
+        response = {}
+        timestamp = time.time()
+        start = time.perf_counter()
+        
+        async def capture_receive():
+            message = await receive()
+            if message['type'] == 'http.request':
+                chunks.append(message.get('body', b''))
+            return message
+        
+        async def capture_send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            await send(message)
+        
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            headers = {key.decode('latin-1'): value.decode('latin-1') for key, value in scope['headers']}
+            forwarded = headers.get('x-forwarded-for', '').split(',')[0].strip()
+            client = forwarded or (scope.get('client') or (None,))[0]
+            self.recorder.record(
+                method=scope['method'],
+                path=scope['path'],
+                body=b''.join(chunks),
+                status=response.get('status'),
+                latency_ms=(time.perf_counter() - start) * 1000,
+                timestamp=timestamp,
+                client=client,
+                budget_ms=headers.get('x-request-budget-ms')
+            )
@@ -0,0 +1,327 @@
+"""
+Weaviate Connection Manager for Physics RAG System with Weaviate
+One pooled client per process with keep-alive, health pings and reconnects
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def is_connection_error(error: Exception) -> bool:
+    """
+    Return True for failures of the connection itself (worth a reconnect)
+    
+    A closed client, a refused or reset socket and an unavailable gRPC
+    channel qualify; query errors (bad filter, missing collection) and
+    timeouts of a slow but healthy server do not.
+    """
+    if isinstance(error, (ConnectionError, BrokenPipeError)):
+        return True
+    name = type(error).__name__
+    if any(part in name for part in ('ConnectionError', 'ConnectError', 'ClosedClient', 'GRPCUnavailable',
+                                     'StartUpError', 'RemoteProtocolError')):
+        return True
+    message = str(error).lower()
+    return any(part in message for part in ('statuscode.unavailable', 'connection refused', 'connection reset',
+                                           'socket closed', 'broken pipe', 'failed to connect',
+                                           'client is closed', 'not connected'))
+
+
+class WeaviateConnection:
+    """
+    The process's Weaviate client, shared by every search service
+    
+    The client keeps a pool of keep-alive HTTP connections and one gRPC
+    channel with keep-alive pings, so steady-state queries never pay for
+    connection setup (all v4 queries run over gRPC). A background thread
+    checks liveness every `health_interval` seconds. When a ping or a query
+    finds the connection dead, the client is rebuilt with jittered
+    exponential backoff, and run() retries the query once on the new
+    client. Concurrent failures of one client trigger a single reconnect
+    (single flight): the thread that saw the failure first rebuilds the
+    client without holding any lock, and the others fail fast instead of
+    queueing behind its backoff.
+    An injected client (e.g. the in-memory local backend) is used as is and
+    never reconnected.
+    """
+    
+    def __init__(self,
+                 weaviate_url: str,
+                 weaviate_api_key: str = "",
+                 use_local: bool = False,
+                 http_port: int = 8080,
+                 grpc_port: int = 50051,
+                 pool_connections: int = 20,
+                 pool_maxsize: int = 100,
+                 keepalive_seconds: float = 30.0,
+                 init_timeout: float = 5.0,
+                 query_timeout: float = 30.0,
+                 insert_timeout: float = 90.0,
+                 health_interval: float = 10.0,
+                 max_backoff: float = 30.0,
+                 client: Optional[Any] = None):
+        """
+        Initialize the connection (nothing is opened until first use)
+        
+        Args:
+            weaviate_url (str): Cluster URL, or the local server's URL
+            weaviate_api_key (str): API key (can be empty for a local server)
+            use_local (bool): Connect to a self-hosted server instead of Weaviate Cloud
+            http_port (int): REST port of a local server when the URL has none
+            grpc_port (int): gRPC port of a local server
+            pool_connections (int): Keep-alive HTTP connections kept open
+            pool_maxsize (int): Most HTTP connections open at once
+            keepalive_seconds (float): gRPC keep-alive ping interval
+            init_timeout (float): Seconds allowed for connecting
+            query_timeout (float): Client-side query timeout (UpstreamGuard applies the tighter one)
+            insert_timeout (float): Client-side batch insert timeout
+            health_interval (float): Seconds between background liveness checks (0 disables them)
+            max_backoff (float): Longest wait between reconnect attempts
+            client (Optional[Any]): Already connected client; used as is
+        """
+        self.weaviate_url = weaviate_url
+        self.weaviate_api_key = weaviate_api_key
+        self.use_local = use_local
+        self.http_port = http_port
+        self.grpc_port = grpc_port
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_seconds = keepalive_seconds
+        self.init_timeout = init_timeout
+        self.query_timeout = query_timeout
+        self.insert_timeout = insert_timeout
+        self.health_interval = health_interval
+        self.max_backoff = max_backoff
+        
+        self._client = client
+        self.reconnectable = client is None
+        self.generation = 0 if client is None else 1  # Bumped by every (re)connect
+        self._lock = threading.Lock()  # Guards the client swap; never held while connecting
+        self._connect_lock = threading.Lock()  # First connect only
+        self._reconnecting = False
+        self._stop = threading.Event()
+        self._pinger: Optional[threading.Thread] = None
+        
+        self.healthy = client is not None
+        self.reconnects = 0
+        self.failed_attempts = 0  # Consecutive failed connects, drives the backoff
+        self.failed_pings = 0
+        self.last_ping: Optional[float] = None
+        self.last_error: Optional[str] = None
+    
+    @classmethod
+    def from_settings(cls, settings, client: Optional[Any] = None) -> "WeaviateConnection":
+        """Connection configured from application settings"""
+        return cls(settings.WEAVIATE_URL, settings.WEAVIATE_API_KEY, settings.USE_LOCAL_WEAVIATE,
+                   client=client, **settings.get_weaviate_connection_config())
+    
+    @property
+    def client(self) -> Any:
+        """Connected client, connecting on first use"""
+        if self._client is None:
+            self.connect()
+        return self._client
+    
+    def connect(self) -> None:
+        """Open the client if it is not open yet"""
+        with self._connect_lock:
+            if self._client is None:
+                self._install(self._open())
+    
+    def _additional_config(self) -> Any:
+        from weaviate.config import AdditionalConfig, ConnectionConfig, GrpcConfig, Timeout
+        
+        keepalive_ms = int(self.keepalive_seconds * 1000)
+        return AdditionalConfig(
+            connection=ConnectionConfig(
+                session_pool_connections=self.pool_connections,
+                session_pool_maxsize=self.pool_maxsize
+            ),
+            timeout=Timeout(init=self.init_timeout, query=self.query_timeout, insert=self.insert_timeout),
+            grpc_config=GrpcConfig(channel_options=[
+                ("grpc.keepalive_time_ms", keepalive_ms),
+                ("grpc.keepalive_timeout_ms", min(keepalive_ms, 10000)),
+                ("grpc.keepalive_permit_without_calls", 1),
+                ("grpc.http2.max_pings_without_data", 0)
+            ])
+        )
+    
+    def _open(self) -> Any:
+        """Build and connect a new client"""
+        import weaviate  # Heavy import, kept off the module import path
+        
+        try:
+            if self.use_local:
+                # The URL's port wins over WEAVIATE_HTTP_PORT; gRPC always uses WEAVIATE_GRPC_PORT
+                parsed = urlparse(self.weaviate_url if '://' in self.weaviate_url else f"http://{self.weaviate_url}")
+                secure = parsed.scheme == 'https'
+                host = parsed.hostname or 'localhost'
+                client = weaviate.connect_to_custom(
+                    http_host=host,
+                    http_port=parsed.port or self.http_port,
+                    http_secure=secure,
+                    grpc_host=host,
+                    grpc_port=self.grpc_port,
+                    grpc_secure=secure,
+                    additional_config=self._additional_config()
+                )
+                logger.info(f"Connected to local Weaviate at {host}:{parsed.port or self.http_port} "
+                            f"(gRPC {self.grpc_port})")
+            else:
+                client = weaviate.connect_to_weaviate_cloud(
+                    cluster_url=self.weaviate_url,
+                    auth_credentials=weaviate.auth.AuthApiKey(self.weaviate_api_key),
+                    additional_config=self._additional_config()
+                )
+                logger.info(f"Connected to Weaviate Cloud at {self.weaviate_url}")
+        except Exception as e:
+            self.failed_attempts += 1
+            self.healthy = False
+            self.last_error = str(e)
+            logger.error(f"Failed to connect to Weaviate: {str(e)}")
+            raise
+        return client
+    
+    def _install(self, client: Any) -> Any:
+        """Make a freshly opened client current; returns the one it replaces"""
+        with self._lock:
+            old, self._client = self._client, client
+            self.generation += 1
+            self.failed_attempts = 0
+            self.healthy = True
+        return old
+    
+    def _backoff(self) -> float:
+        """Jittered exponential delay before the next connect attempt"""
+        if self.failed_attempts == 0:
+            return 0.0
+        return min(self.max_backoff, 0.5 * 2 ** (self.failed_attempts - 1)) * random.uniform(0.5, 1.0)
+    
+    def reconnect(self, failed_generation: int, reason: str = '') -> None:
+        """
+        Replace the client that failed
+        
+        Returns at once if another thread is already replacing it; the
+        current client stays in place until the new one is connected.
+        
+        Args:
+            failed_generation (int): Generation of the client that failed; if it
+                has been replaced already, the new client is kept
+            reason (str): Logged with the reconnect
+        """
+        if not self.reconnectable:
+            return
+        with self._lock:
+            if self.generation != failed_generation or self._reconnecting:
+                return  # Already replaced, or being replaced by another thread
+            self._reconnecting = True
+            self.healthy = False
+        
+        try:
+            logger.warning(f"Reconnecting to Weaviate: {reason or 'connection lost'}")
+            delay = self._backoff()
+            if delay and self._stop.wait(delay):
+                return  # Closing
+            client = self._open()
+            if self._stop.is_set():
+                client.close()
+                return
+            old = self._install(client)
+            self.reconnects += 1
+        finally:
+            with self._lock:
+                self._reconnecting = False
+        
+        if old is not None:
+            try:
+                old.close()
+            except Exception:
+                pass
+    
+    def run(self, fn: Callable[[Any], Any]) -> Any:
+        """
+        Call fn(client), reconnecting and retrying once if the connection failed
+        
+        Args:
+            fn (Callable[[Any], Any]): Work to do with the client
+        
+        Returns:
+            Any: What fn returns
+        """
+        generation = self.generation
+        try:
+            return fn(self.client)
+        except Exception as e:
+            if not self.reconnectable or not is_connection_error(e):
+                raise
+            self.last_error = str(e)
+            self.reconnect(generation, reason=str(e))
+            return fn(self.client)
+    
+    # Background health checks
+    
+    def start_health_checks(self) -> None:
+        """Ping the server every health_interval seconds, reconnecting when it stops answering"""
+        if not self.reconnectable or self.health_interval <= 0 or self._pinger is not None:
+            return
+        self._stop.clear()
+        self._pinger = threading.Thread(target=self._ping_loop, name="weaviate-health", daemon=True)
+        self._pinger.start()
+    
+    def _ping_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            generation = self.generation
+            try:
+                live = self._client is not None and self._client.is_live()
+            except Exception as e:
+                live = False
+                self.last_error = str(e)
+            self.last_ping = time.time()
+            
+            if live:
+                self.healthy = True
+                continue
+            
+            self.failed_pings += 1
+            self.healthy = False
+            try:
+                self.reconnect(generation, reason="health check failed")
+            except Exception as e:
+                logger.error(f"Weaviate reconnect failed (attempt {self.failed_attempts}): {str(e)}")
+    
+    def get_stats(self) -> Dict:
+        """Connection statistics"""
+        return {
+            'healthy': self.healthy,
+            'reconnecting': self._reconnecting,
+            'generation': self.generation,
+            'reconnects': self.reconnects,
+            'failed_attempts': self.failed_attempts,
+            'failed_pings': self.failed_pings,
+            'last_ping': self.last_ping,
+            'last_error': self.last_error,
+            'health_checks': self._pinger is not None,
+            'pool': {'connections': self.pool_connections, 'maxsize': self.pool_maxsize},
+            'grpc_port': self.grpc_port if self.use_local else None
+        }
+    
+    def close(self) -> None:
+        """Stop health checks and close the client (an injected client stays open)"""
+        self._stop.set()
+        if self._pinger is not None:
+            self._pinger.join(timeout=1.0)
+            self._pinger = None
+        with self._lock:
+            if self._client is not None and self.reconnectable:
+                try:
+                    self._client.close()
+                    logger.info("Weaviate client connection closed")
+                except Exception as e:
+                    logger.error(f"Error closing Weaviate client: {str(e)}")
+                self._client = None
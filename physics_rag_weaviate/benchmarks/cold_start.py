@@ -0,0 +1,123 @@
+"""
+Cold start benchmark for the Physics RAG API
+
+Measures what an autoscaled worker pays before and right after it starts
+taking traffic:
+
+- import time of app.main in fresh interpreters (heavy SDKs are lazy)
+- service start (concurrent client setup, optional warm-up) on the stand-ins
+- latency of the first request, with and without warm-up
+
+Usage:
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --imports 10 --endpoint /chat -o cold_start.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import app.main as api
+from benchmarks.stand_ins import add_stand_in_arguments, build_service_from_args
+from benchmarks.workload import Workload
+
+logger = logging.getLogger("cold_start")
+
+IMPORT_PROBE = "import time; t = time.perf_counter(); import app.main; print((time.perf_counter() - t) * 1000)"
+
+
+def measure_imports(runs: int) -> Dict:
+    """Import app.main in `runs` fresh interpreters"""
+    timings: List[float] = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=Path(__file__).parent.parent,
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return {
+        'runs': runs,
+        'median_ms': round(statistics.median(timings), 1),
+        'min_ms': round(min(timings), 1),
+        'max_ms': round(max(timings), 1)
+    }
+
+
+async def measure_start(args: argparse.Namespace, warm_up: bool) -> Dict:
+    """Start a fresh offline service and time its first request"""
+    service = await build_service_from_args(args)
+    service._initialized = False  # As in a new worker: the collection exists, this process has not checked it
+    workload = Workload(args.corpus, seed=args.seed)
+    try:
+        startup = await service.start(warm_up=warm_up)
+        api.rag_service = service
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://cold-start", timeout=120) as client:
+            start = time.perf_counter()
+            response = await client.post(args.endpoint, json=workload.payload(args.endpoint))
+            first_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            await client.post(args.endpoint, json=workload.payload(args.endpoint))
+            second_ms = (time.perf_counter() - start) * 1000
+        return {
+            'warm_up': warm_up,
+            'startup_ms': startup['startup_ms'],
+            'phases_ms': dict(startup['phases_ms']),
+            'first_request_ms': round(first_ms, 1),
+            'first_request_status': response.status_code,
+            'second_request_ms': round(second_ms, 1)
+        }
+    finally:
+        api.rag_service = None
+        service.close()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Measure import time, startup and first-request latency")
+    parser.add_argument("--imports", type=int, default=5, help="Fresh interpreters to time the import in")
+    parser.add_argument("--endpoint", choices=Workload.ENDPOINTS, default="/search")
+    add_stand_in_arguments(parser)
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the measurements and print them as JSON"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    
+    report = {
+        'import': measure_imports(args.imports),
+        'cold': asyncio.run(measure_start(args, warm_up=False)),
+        'warm': asyncio.run(measure_start(args, warm_up=True))
+    }
+    logger.info(
+        f"import {report['import']['median_ms']:.0f}ms; first {args.endpoint} "
+        f"{report['cold']['first_request_ms']:.0f}ms cold vs {report['warm']['first_request_ms']:.0f}ms "
+        f"after a {report['warm']['phases_ms'].get('warm_up', 0):.0f}ms warm-up"
+    )
+    
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
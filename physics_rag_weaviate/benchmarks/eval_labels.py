@@ -0,0 +1,170 @@
+"""
+Labeled Bengali question -> relevant chunk set for retrieval evaluation
+
+Questions are built from the numbered section headings of
+Physics/chapter_*.md (e.g. "4.3.1 গতিশক্তি (Kinetic Energy)"). The chunk
+that opens the section is highly relevant (grade 2), and chunks the
+section runs on into are partially relevant (grade 1). Chunk ids are the
+doc_ids the service assigns when indexing the chapter files: a stub chunk
+merged into the next one at ingestion counts as that chunk.
+
+Usage:
+    python -m benchmarks.eval_labels -o benchmarks/data/retrieval_labels.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.services.chunk_store import split_chunks
+from app.services.corpus import CorpusBuilder, chapter_files
+
+PHYSICS_DIR = Path(__file__).parent.parent.parent / "Physics"
+DEFAULT_LABELS = Path(__file__).parent / "data" / "retrieval_labels.jsonl"
+
+SECTION_HEADING = re.compile(r"^(#{2,4})\s*(\d+(?:\.\d+)+)\s+(.+)$")
+QUESTION_TEMPLATES = ["{} কী?", "{} ব্যাখ্যা করো।", "{} সম্পর্কে আলোচনা করো।"]
+
+# Follow a section into at most this many extra chunks
+MAX_CONTINUATION_CHUNKS = 2
+# Characters a section needs in the chunk where the next section starts to count there
+MIN_TAIL_CHARS = 300
+
+
+def parse_title(raw: str) -> Dict[str, str]:
+    """Split '<Bengali title> <br> (English Title)' into its parts"""
+    raw = raw.replace('<br>', ' ')
+    english = ''
+    match = re.search(r"\(([^()]*[A-Za-z][^()]*)\)\s*$", raw)
+    if match:
+        english = match.group(1).strip()
+        raw = raw[:match.start()]
+    return {'title': ' '.join(raw.split()).strip(' :'), 'english': english}
+
+
+def remap_relevant(relevant: Dict[int, int], doc_id_map: Dict[str, Optional[int]]) -> Dict[int, int]:
+    """Move grades from chunks removed at ingestion to the chunk now holding their text"""
+    remapped: Dict[int, int] = {}
+    for doc_id, grade in relevant.items():
+        target = doc_id_map.get(str(doc_id), doc_id)
+        if target is not None:
+            remapped[target] = max(grade, remapped.get(target, 0))
+    return remapped
+
+
+def build_labels(physics_dir: Path = PHYSICS_DIR, dedup: bool = True) -> List[Dict]:
+    """
+    Build the labeled question set
+    
+    Args:
+        physics_dir (Path): Directory holding chapter_*.md
+        dedup (bool): Label the chunks left after ingestion cleanup (False: the raw split)
+    
+    Returns:
+        List[Dict]: One record per section: id, question, relevant {doc_id: grade}
+    """
+    # Raw chunks of every chapter in order: a chunk's position is its doc_id
+    chapters = chapter_files(physics_dir)
+    corpus = [chunk for path in chapters for chunk in split_chunks(path.read_text(encoding='utf-8'))]
+    doc_id_map: Dict[str, Optional[int]] = {}
+    if dedup:
+        settings = get_settings()
+        builder = CorpusBuilder(settings.MIN_CHUNK_CHARS, settings.DEDUP_SIMILARITY)
+        doc_id_map = builder.build_book(physics_dir)['report']['doc_id_map']
+    positions = {chunk: i for i, chunk in enumerate(corpus)}
+    
+    def locate(piece: str) -> int:
+        if piece in positions:
+            return positions[piece]
+        return next((i for i, chunk in enumerate(corpus) if piece in chunk), -1)
+    
+    # Numbered headings in reading order: (doc_id, offset, depth, number, title info, chapter)
+    headings = []
+    for chapter_path in chapters:
+        chapter = int(re.search(r"\d+", chapter_path.stem).group())
+        for piece in split_chunks(chapter_path.read_text(encoding='utf-8')):
+            doc_id = locate(piece)
+            if doc_id < 0:
+                continue
+            offset = corpus[doc_id].find(piece)
+            for line in piece.splitlines(keepends=True):
+                match = SECTION_HEADING.match(line.strip())
+                if match:
+                    info = parse_title(match.group(3))
+                    if info['title']:
+                        headings.append((doc_id, offset, match.group(2).count('.'), match.group(2), info, chapter))
+                offset += len(line)
+    
+    title_counts: Dict[str, int] = {}
+    for *_, info, _ in headings:
+        title_counts[info['title']] = title_counts.get(info['title'], 0) + 1
+    
+    labels = []
+    for index, (doc_id, _, depth, number, info, chapter) in enumerate(headings):
+        if title_counts[info['title']] > 1:
+            continue  # Ambiguous: the same title heads several sections
+        
+        relevant = {doc_id: 2}
+        # The section ends at the next heading of the same or a higher level
+        end_doc, end_offset = doc_id, 0
+        for next_doc, next_offset, next_depth, *_ in headings[index + 1:]:
+            if next_depth <= depth:
+                end_doc, end_offset = next_doc, next_offset
+                break
+        for continuation in range(doc_id + 1, min(end_doc, doc_id + MAX_CONTINUATION_CHUNKS) + 1):
+            if continuation < end_doc or end_offset >= MIN_TAIL_CHARS:
+                relevant[continuation] = 1
+        relevant = remap_relevant(relevant, doc_id_map)
+        
+        digest = int(hashlib.sha1(number.encode('utf-8')).hexdigest(), 16)
+        template = QUESTION_TEMPLATES[digest % len(QUESTION_TEMPLATES)]
+        labels.append({
+            'id': f"ch{chapter:02d}-{number}",
+            'question': template.format(info['title']),
+            'section': number,
+            'title': info['title'],
+            'english': info['english'],
+            'chapter': chapter,
+            'relevant': {str(k): v for k, v in sorted(relevant.items())}
+        })
+    return labels
+
+
+def load_labels(path: Path = DEFAULT_LABELS) -> List[Dict]:
+    """Read a labels JSONL file, with relevant doc_ids as ints"""
+    labels = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                record['relevant'] = {int(k): v for k, v in record['relevant'].items()}
+                labels.append(record)
+    return labels
+
+
+def main(argv=None) -> int:
+    """Write the labeled set"""
+    parser = argparse.ArgumentParser(description="Build the labeled retrieval evaluation set")
+    parser.add_argument("--physics-dir", type=Path, default=PHYSICS_DIR)
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_LABELS)
+    parser.add_argument("--no-dedup", action="store_true", help="Label the raw chunk split")
+    args = parser.parse_args(argv)
+    
+    labels = build_labels(args.physics_dir, dedup=not args.no_dedup)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for record in labels:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    print(f"Wrote {len(labels)} labeled questions to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
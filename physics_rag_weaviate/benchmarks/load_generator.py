@@ -0,0 +1,264 @@
+"""
+Concurrency-sweep load generator for the Physics RAG API
+
+Runs a weighted mix of /search, /chat, /explain and /similar requests
+(Bengali queries sampled from the book) at stepped concurrency levels,
+either against a running server or in-process on the offline stand-ins.
+Each level runs for a fixed duration or request count. The report gives
+throughput, latency percentiles and error rates per level and endpoint,
+plus the saturation knee, and is saved as JSON for comparison across commits.
+
+Usage:
+    python -m benchmarks.load_generator --base-url http://localhost:8000 -o load.json
+    python -m benchmarks.load_generator --offline --levels 1 8 32 128 --duration 20
+    python -m benchmarks.load_generator --mix /search=6 /chat=3 /similar=1 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.metrics import compare_to_baseline, find_saturation_knee, summarize
+from benchmarks.stand_ins import add_stand_in_arguments, build_service_from_args
+from benchmarks.workload import Workload
+
+logger = logging.getLogger("load_generator")
+
+DEFAULT_MIX = {'/search': 5, '/chat': 3, '/explain': 1, '/similar': 1}
+
+
+def parse_mix(items: Optional[List[str]]) -> Dict[str, float]:
+    """Parse ['/search=5', '/chat=3'] into endpoint weights"""
+    if not items:
+        return dict(DEFAULT_MIX)
+    
+    mix = {}
+    for item in items:
+        endpoint, _, weight = item.partition('=')
+        if endpoint not in Workload.ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+        mix[endpoint] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise ValueError("Mix weights must add up to more than zero")
+    return mix
+
+
+def current_commit() -> Optional[str]:
+    """Short git commit of the working tree, if available"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run_level(client: httpx.AsyncClient, workload: Workload, mix: Dict[str, float],
+                    concurrency: int, duration: Optional[float], requests: Optional[int],
+                    rng: random.Random) -> Dict:
+    """
+    Run one concurrency level
+    
+    Each of the `concurrency` workers sends requests back to back until
+    the duration has elapsed or the request budget is used up.
+    
+    Returns:
+        Dict: Overall and per-endpoint summaries for this level
+    """
+    endpoints = list(mix)
+    weights = [mix[e] for e in endpoints]
+    latencies: Dict[str, List[float]] = {e: [] for e in endpoints}
+    errors: Dict[str, int] = {e: 0 for e in endpoints}
+    status_codes: Dict[str, int] = {}
+    remaining = iter(range(requests)) if requests else None
+    stop_at = time.perf_counter() + duration if duration else None
+    
+    def more() -> bool:
+        if remaining is not None:
+            return next(remaining, None) is not None
+        return time.perf_counter() < stop_at
+    
+    async def worker() -> None:
+        while more():
+            endpoint = rng.choices(endpoints, weights)[0]
+            payload = workload.payload(endpoint)
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload)
+                code = str(response.status_code)
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            elapsed = time.perf_counter() - start
+            
+            status_codes[code] = status_codes.get(code, 0) + 1
+            if code == '200':
+                latencies[endpoint].append(elapsed)
+            else:
+                errors[endpoint] += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    
+    overall = summarize([x for values in latencies.values() for x in values], elapsed, sum(errors.values()))
+    overall['concurrency'] = concurrency
+    overall['duration_s'] = elapsed
+    overall['status_codes'] = status_codes
+    overall['endpoints'] = {
+        endpoint: summarize(latencies[endpoint], elapsed, errors[endpoint])
+        for endpoint in endpoints
+        if latencies[endpoint] or errors[endpoint]
+    }
+    return overall
+
+
+async def run_sweep(args: argparse.Namespace) -> Dict:
+    """
+    Run every concurrency level in increasing order
+    
+    Returns:
+        Dict: Run metadata, per-level results and the saturation knee
+    """
+    mix = parse_mix(args.mix)
+    workload = Workload(args.corpus, seed=args.seed)
+    rng = random.Random(args.seed)
+    levels = sorted(set(args.levels))
+    
+    service = None
+    if args.offline:
+        import app.main as api
+        service = await build_service_from_args(args)
+        api.rag_service = service
+        transport = httpx.ASGITransport(app=api.app)
+        base_url = "http://offline"
+    else:
+        transport = None
+        base_url = args.base_url
+    
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    results: List[Dict] = []
+    try:
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits,
+                                     timeout=args.request_timeout) as client:
+            for concurrency in levels:
+                if args.warmup:
+                    await run_level(client, workload, mix, min(concurrency, args.warmup),
+                                    None, args.warmup, rng)
+                level = await run_level(client, workload, mix, concurrency,
+                                        args.duration, args.requests, rng)
+                results.append(level)
+                logger.info(
+                    f"c={concurrency}: {level['throughput_rps']:.1f} req/s, "
+                    f"p50 {level.get('p50_ms', 0):.0f}ms, p95 {level.get('p95_ms', 0):.0f}ms, "
+                    f"p99 {level.get('p99_ms', 0):.0f}ms, errors {level['error_rate']:.1%}"
+                )
+                if level['error_rate'] > args.abort_error_rate:
+                    logger.warning(f"Stopping sweep: error rate {level['error_rate']:.1%} at c={concurrency}")
+                    break
+    finally:
+        if service is not None:
+            import app.main as api
+            api.rag_service = None
+            service.close()
+    
+    return {
+        'commit': current_commit(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'target': 'offline' if args.offline else base_url,
+        'mix': mix,
+        'duration_per_level_s': args.duration,
+        'requests_per_level': args.requests,
+        'seed': args.seed,
+        'levels': results,
+        'knee': find_saturation_knee(results, args.knee_gain)
+    }
+
+
+def flatten_levels(report: Dict) -> Dict[str, Dict]:
+    """Key level/endpoint summaries as 'c=<level> <endpoint>' for baseline comparison"""
+    flat = {}
+    for level in report['levels']:
+        prefix = f"c={level['concurrency']}"
+        flat[f"{prefix} all"] = level
+        for endpoint, stats in level['endpoints'].items():
+            flat[f"{prefix} {endpoint}"] = stats
+    return flat
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Concurrency sweep against the Physics RAG API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://localhost:8000", help="API to load")
+    target.add_argument("--offline", action="store_true", help="Run in-process on the Gemini/Weaviate stand-ins")
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 8, 32, 128], help="Concurrency levels")
+    parser.add_argument("--mix", nargs="+", metavar="ENDPOINT=WEIGHT",
+                        help="Endpoint weights (default: /search=5 /chat=3 /explain=1 /similar=1)")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--duration", type=float, help="Seconds per level (default 30)")
+    limit.add_argument("--requests", type=int, help="Requests per level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each level")
+    parser.add_argument("--request-timeout", type=float, default=120.0, help="Client timeout in seconds")
+    parser.add_argument("--knee-gain", type=float, default=0.10,
+                        help="Throughput gain below which the next level counts as saturated")
+    parser.add_argument("--abort-error-rate", type=float, default=0.5,
+                        help="Stop the sweep when a level's error rate exceeds this")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier sweep to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    add_stand_in_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.duration is None and args.requests is None:
+        args.duration = 30.0
+    return args
+
+
+def main(argv=None) -> int:
+    """Run the sweep; exit non-zero on regression against the baseline"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    
+    report = asyncio.run(run_sweep(args))
+    knee = report['knee']
+    if knee['saturated']:
+        logger.info(f"Saturation knee at c={knee['concurrency']} ({knee['throughput_rps']:.1f} req/s)")
+    else:
+        logger.info("No saturation knee: throughput kept scaling across all levels")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['baseline'] = {'path': args.baseline, 'commit': baseline.get('commit')}
+        report['regressions'] = compare_to_baseline(
+            flatten_levels(report), flatten_levels(baseline), args.tolerance
+        )
+    
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+    print(output)
+    
+    for regression in report.get('regressions', []):
+        logger.error(f"Regression: {regression}")
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Latency statistics and baseline comparison for benchmark runs
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict:
+    """
+    Summarize one endpoint's latencies
+    
+    Args:
+        latencies (List[float]): Per-request latencies in seconds (successes only)
+        elapsed (float): Wall-clock duration of the run in seconds
+        errors (int): Number of failed requests
+    
+    Returns:
+        Dict: Count, error rate, throughput and latency percentiles in milliseconds
+    """
+    count = len(latencies) + errors
+    summary = {
+        'requests': count,
+        'errors': errors,
+        'error_rate': errors / count if count else 0.0,
+        'throughput_rps': len(latencies) / elapsed if elapsed > 0 else 0.0,
+    }
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        summary['mean_ms'] = float(values.mean())
+        for p in PERCENTILES:
+            summary[f'p{p}_ms'] = float(np.percentile(values, p))
+        summary['max_ms'] = float(values.max())
+    return summary
+
+
+def compare_to_baseline(current: Dict[str, Dict], baseline: Dict[str, Dict],
+                        tolerance: float = 0.10) -> List[str]:
+    """
+    List regressions of the current run against a baseline run
+    
+    A regression is a p50/p95/p99 latency more than `tolerance` slower,
+    throughput more than `tolerance` lower, or a higher error rate.
+    
+    Args:
+        current (Dict[str, Dict]): Per-endpoint summaries of this run
+        baseline (Dict[str, Dict]): Per-endpoint summaries of the baseline run
+        tolerance (float): Allowed relative slowdown
+    
+    Returns:
+        List[str]: Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for endpoint, stats in current.items():
+        base = baseline.get(endpoint)
+        if not base:
+            continue
+        
+        for p in PERCENTILES:
+            key = f'p{p}_ms'
+            if key in stats and base.get(key) and stats[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{endpoint} {key}: {base[key]:.1f} -> {stats[key]:.1f} "
+                    f"(+{(stats[key] / base[key] - 1) * 100:.0f}%)"
+                )
+        
+        if base.get('throughput_rps') and stats['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint} throughput_rps: {base['throughput_rps']:.1f} -> {stats['throughput_rps']:.1f}"
+            )
+        if stats['error_rate'] > base.get('error_rate', 0.0) + 1e-9:
+            regressions.append(
+                f"{endpoint} error_rate: {base.get('error_rate', 0.0):.3f} -> {stats['error_rate']:.3f}"
+            )
+    return regressions
+
+
+def find_saturation_knee(levels: List[Dict], min_gain: float = 0.10) -> Dict:
+    """
+    Locate where added concurrency stops buying throughput
+    
+    The knee is the last concurrency level before the first step whose
+    throughput gain, relative to the previous level, falls below `min_gain`.
+    
+    Args:
+        levels (List[Dict]): Per-level summaries with 'concurrency', 'throughput_rps'
+            and 'p95_ms', in increasing concurrency order
+        min_gain (float): Smallest relative throughput gain still counted as scaling
+    
+    Returns:
+        Dict: Knee concurrency and the throughput/latency there, or
+            saturated=False if throughput kept scaling across every level
+    """
+    for previous, current in zip(levels, levels[1:]):
+        base = previous['throughput_rps']
+        gain = (current['throughput_rps'] - base) / base if base > 0 else 0.0
+        if gain < min_gain:
+            return {
+                'saturated': True,
+                'concurrency': previous['concurrency'],
+                'throughput_rps': base,
+                'p95_ms': previous.get('p95_ms'),
+                'next_level_gain': gain,
+                'next_level_p95_ms': current.get('p95_ms')
+            }
+    
+    last = levels[-1] if levels else {}
+    return {
+        'saturated': False,
+        'concurrency': last.get('concurrency'),
+        'throughput_rps': last.get('throughput_rps'),
+        'p95_ms': last.get('p95_ms')
+    }
+
+
+def recall_at_k(ranked: List[int], relevant: Dict[int, int], k: int) -> float:
+    """Fraction of relevant doc_ids found in the top k"""
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & set(relevant)) / len(relevant)
+
+
+def reciprocal_rank(ranked: List[int], relevant: Dict[int, int], k: int) -> float:
+    """1/rank of the first relevant doc_id in the top k (0 if none)"""
+    for rank, doc_id in enumerate(ranked[:k], start=1):
+        if doc_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: List[int], relevant: Dict[int, int], k: int) -> float:
+    """Normalized discounted cumulative gain with graded relevance (gain 2^grade - 1)"""
+    gains = [(2 ** relevant.get(doc_id, 0) - 1) for doc_id in ranked[:k]]
+    ideal = sorted((2 ** grade - 1 for grade in relevant.values()), reverse=True)[:k]
+    idcg = sum(g / np.log2(i + 2) for i, g in enumerate(ideal))
+    if idcg == 0:
+        return 0.0
+    return float(sum(g / np.log2(i + 2) for i, g in enumerate(gains)) / idcg)
+
+
+def pareto_frontier(points: List[Dict], quality_key: str, cost_key: str) -> List[Dict]:
+    """
+    Points not dominated on (higher quality, lower cost)
+    
+    Args:
+        points (List[Dict]): Candidate configurations
+        quality_key (str): Metric to maximize
+        cost_key (str): Metric to minimize
+    
+    Returns:
+        List[Dict]: Frontier, cheapest first
+    """
+    frontier = []
+    best_quality = float('-inf')
+    for point in sorted(points, key=lambda p: (p[cost_key], -p[quality_key])):
+        if point[quality_key] > best_quality:
+            frontier.append(point)
+            best_quality = point[quality_key]
+    return frontier
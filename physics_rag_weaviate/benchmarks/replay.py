@@ -0,0 +1,283 @@
+"""
+Time-scaled replay of captured API traffic
+
+Re-issues requests recorded by the traffic recorder (TRAFFIC_CAPTURE_ENABLED)
+against a running server or the in-process stand-ins. Inter-arrival gaps
+are kept and divided by --speed, so bursts around class times and repeated
+questions arrive as they did in production. Reports latency per endpoint,
+how far dispatch fell behind schedule, and regressions against a baseline.
+
+Usage:
+    python -m benchmarks.replay logs/traffic.ndjson --base-url http://localhost:8000 -o replay.json
+    python -m benchmarks.replay logs/traffic.ndjson --offline --with-cache --speed 10 --baseline replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.metrics import compare_to_baseline, summarize
+from benchmarks.stand_ins import add_stand_in_arguments, build_service_from_args
+
+logger = logging.getLogger("replay")
+
+
+def capture_files(path: Path) -> List[Path]:
+    """
+    The capture files of every worker process and their rotated copies, oldest first
+    
+    Workers write <stem>.<pid><suffix> next to the configured path; a file
+    at the path itself (older captures) is read as well.
+    """
+    bases = sorted(path.parent.glob(f"{path.stem}.*{path.suffix}"))
+    if path not in bases:
+        bases.append(path)
+    
+    files = []
+    for base in bases:
+        rotated = sorted(
+            (p for p in base.parent.glob(f"{base.name}.*") if p.suffix[1:].isdigit()),
+            key=lambda p: int(p.suffix[1:]),
+            reverse=True
+        )
+        files.extend(rotated + ([base] if base.exists() else []))
+    return files
+
+
+def load_traffic(paths: List[str], start: Optional[float] = None,
+                 end: Optional[float] = None) -> List[Dict]:
+    """
+    Read captured requests, ordered by arrival time
+    
+    Args:
+        paths (List[str]): Capture paths (per-worker files and rotated copies are picked up automatically)
+        start (float): Skip requests before this Unix time
+        end (float): Skip requests after this Unix time
+    
+    Returns:
+        List[Dict]: Replayable records
+    """
+    records = []
+    for path in paths:
+        for capture in capture_files(Path(path)):
+            with open(capture, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn line from a crash during rotation
+                    if record.get('body') is None:
+                        continue
+                    if (start and record['ts'] < start) or (end and record['ts'] > end):
+                        continue
+                    records.append(record)
+    records.sort(key=lambda r: r['ts'])
+    return records
+
+
+def describe_traffic(records: List[Dict]) -> Dict:
+    """Shape of the captured traffic: mix, span, repeats and recorded latency"""
+    if not records:
+        return {'requests': 0}
+    
+    payloads = [json.dumps(r['body'], sort_keys=True, ensure_ascii=False) for r in records]
+    by_endpoint: Dict[str, List[float]] = {}
+    for record in records:
+        by_endpoint.setdefault(record['path'], []).append(record.get('latency_ms') or 0.0)
+    
+    span = records[-1]['ts'] - records[0]['ts']
+    return {
+        'requests': len(records),
+        'span_s': span,
+        'mean_rps': len(records) / span if span > 0 else None,
+        'repeat_ratio': 1 - len(set(payloads)) / len(payloads),
+        'clients': len({r['client'] for r in records if r.get('client')}),
+        'recorded': {
+            endpoint: {
+                'requests': len(values),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95))
+            }
+            for endpoint, values in by_endpoint.items()
+        }
+    }
+
+
+async def replay(client: httpx.AsyncClient, records: List[Dict], speed: float,
+                 max_in_flight: int) -> Dict:
+    """
+    Re-issue records on their original schedule, compressed by `speed`
+    
+    Requests are sent open-loop: a slow response does not delay the next
+    arrival, only --max-in-flight bounds the backlog.
+    
+    Returns:
+        Dict: Per-endpoint summaries, status codes and dispatch lag
+    """
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    status_codes: Dict[str, int] = {}
+    lags: List[float] = []
+    slots = asyncio.Semaphore(max_in_flight)
+    
+    async def send(record: Dict) -> None:
+        endpoint = record['path']
+        headers = {'X-Request-Budget-Ms': str(record['budget_ms'])} if record.get('budget_ms') else {}
+        start = time.perf_counter()
+        try:
+            response = await client.request(record.get('method', 'POST'), endpoint,
+                                            json=record['body'], headers=headers)
+            code = str(response.status_code)
+        except httpx.HTTPError as e:
+            code = type(e).__name__
+        elapsed = time.perf_counter() - start
+        slots.release()
+        
+        status_codes[code] = status_codes.get(code, 0) + 1
+        if code == '200':
+            latencies.setdefault(endpoint, []).append(elapsed)
+        else:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+    
+    origin = records[0]['ts']
+    started = time.perf_counter()
+    tasks = []
+    for record in records:
+        due = started + (record['ts'] - origin) / speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        lags.append(max(0.0, time.perf_counter() - due))
+        tasks.append(asyncio.create_task(send(record)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    
+    endpoints = set(latencies) | set(errors)
+    lag_ms = np.asarray(lags) * 1000
+    return {
+        'duration_s': elapsed,
+        'status_codes': status_codes,
+        'dispatch_lag_ms': {
+            'p50': float(np.percentile(lag_ms, 50)),
+            'p95': float(np.percentile(lag_ms, 95)),
+            'max': float(lag_ms.max())
+        },
+        'endpoints': {
+            endpoint: summarize(latencies.get(endpoint, []), elapsed, errors.get(endpoint, 0))
+            for endpoint in sorted(endpoints)
+        }
+    }
+
+
+async def run_replay(args: argparse.Namespace) -> Dict:
+    """Load the capture, set up the target and replay it"""
+    records = load_traffic(args.captures, args.start, args.end)
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        raise SystemExit("No replayable requests found")
+    traffic = describe_traffic(records)
+    logger.info(
+        f"Replaying {len(records)} requests spanning {traffic['span_s']:.0f}s at {args.speed}x "
+        f"({traffic['repeat_ratio']:.0%} repeats)"
+    )
+    
+    service = None
+    if args.offline:
+        import app.main as api
+        service = await build_service_from_args(args)
+        api.rag_service = service
+        transport, base_url = httpx.ASGITransport(app=api.app), "http://offline"
+    else:
+        transport, base_url = None, args.base_url
+    
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits,
+                                     timeout=args.request_timeout) as client:
+            result = await replay(client, records, args.speed, args.max_in_flight)
+    finally:
+        if service is not None:
+            import app.main as api
+            api.rag_service = None
+            service.close()
+    
+    return {
+        'target': 'offline' if args.offline else base_url,
+        'speed': args.speed,
+        'traffic': traffic,
+        **result
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Replay captured API traffic")
+    parser.add_argument("captures", nargs="+", help="Capture files written by the traffic recorder")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://localhost:8000", help="API to replay against")
+    target.add_argument("--offline", action="store_true", help="Replay in-process on the Gemini/Weaviate stand-ins")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression (1 = real time)")
+    parser.add_argument("--start", type=float, help="Only requests at or after this Unix time")
+    parser.add_argument("--end", type=float, help="Only requests at or before this Unix time")
+    parser.add_argument("--limit", type=int, help="Replay at most this many requests")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Cap on outstanding requests")
+    parser.add_argument("--request-timeout", type=float, default=120.0, help="Client timeout in seconds")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier replay to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    add_stand_in_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    return args
+
+
+def main(argv=None) -> int:
+    """Run the replay; exit non-zero on regression against the baseline"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    
+    report = asyncio.run(run_replay(args))
+    for endpoint, stats in report['endpoints'].items():
+        logger.info(
+            f"{endpoint}: {stats['requests']} requests, p50 {stats.get('p50_ms', 0):.0f}ms, "
+            f"p95 {stats.get('p95_ms', 0):.0f}ms, p99 {stats.get('p99_ms', 0):.0f}ms, errors {stats['error_rate']:.1%}"
+        )
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['baseline'] = args.baseline
+        # Throughput just mirrors the replayed arrival rate, so compare latency and errors only
+        reference = {k: {**v, 'throughput_rps': None} for k, v in baseline['endpoints'].items()}
+        report['regressions'] = compare_to_baseline(report['endpoints'], reference, args.tolerance)
+    
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+    print(output)
+    
+    for regression in report.get('regressions', []):
+        logger.error(f"Regression: {regression}")
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
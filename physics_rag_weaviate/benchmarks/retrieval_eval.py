@@ -0,0 +1,291 @@
+"""
+Retrieval quality vs. latency evaluation for the Physics RAG System
+
+Sweeps backend, embedder, embedding dimension, search type, hybrid alpha
+and top_k over the labeled Bengali question set (benchmarks/eval_labels.py).
+For every configuration it measures recall@k, MRR and nDCG@k together with
+query latency (embedding + search), then reports the Pareto frontier and
+the cheapest configuration meeting the given quality targets.
+
+Usage:
+    python -m benchmarks.retrieval_eval -o retrieval.json
+    python -m benchmarks.retrieval_eval --embedders gemini --dimensions 768 1536 3072 \\
+        --backends local weaviate --target recall=0.8 --target ndcg=0.6
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.services.corpus import CorpusBuilder
+from app.services.embedding_service import EmbeddingService
+from app.services.local_backend import LocalWeaviateClient
+from app.services.rate_limiter import GeminiScheduler, Priority
+from app.services.search_service import WeaviateSearchService
+from benchmarks.eval_labels import DEFAULT_LABELS, build_labels, load_labels
+from benchmarks.metrics import ndcg_at_k, pareto_frontier, recall_at_k, reciprocal_rank
+from benchmarks.stand_ins import DEFAULT_CORPUS, FakeGeminiEmbeddings
+
+logger = logging.getLogger("retrieval_eval")
+
+QUALITY_METRICS = ('recall', 'mrr', 'ndcg')
+
+
+class GeminiDimensionClient:
+    """embed_content provider that requests a reduced output dimensionality"""
+    
+    def __init__(self, api_key: str, dimension: int):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.dimension = dimension
+    
+    def embed_content(self, model: str, content, **kwargs) -> Dict:
+        return self._genai.embed_content(
+            model=model, content=content, output_dimensionality=self.dimension, **kwargs
+        )
+
+
+def make_embedding_service(embedder: str, dimension: int) -> EmbeddingService:
+    """EmbeddingService backed by the hashed stand-in or by Gemini at the given dimension"""
+    settings = get_settings()
+    if embedder == 'hashed':
+        return EmbeddingService(settings.GOOGLE_API_KEY, client=FakeGeminiEmbeddings(dimension))
+    
+    # Respect the configured Gemini quota while embedding the corpus
+    scheduler = GeminiScheduler(**settings.get_gemini_quota_config())
+    return EmbeddingService(settings.GOOGLE_API_KEY, scheduler=scheduler,
+                            client=GeminiDimensionClient(settings.GOOGLE_API_KEY, dimension))
+
+
+def build_index(backend: str, embedding_service: EmbeddingService, corpus: List[str],
+                doc_ids: List[int], collection_name: str) -> WeaviateSearchService:
+    """Index the corpus into a fresh evaluation collection"""
+    settings = get_settings()
+    if backend == 'local':
+        search = WeaviateSearchService(settings.WEAVIATE_URL, "", collection_name=collection_name,
+                                       use_local=True, client=LocalWeaviateClient())
+    else:
+        search = WeaviateSearchService(settings.WEAVIATE_URL, settings.WEAVIATE_API_KEY,
+                                       collection_name=collection_name,
+                                       use_local=settings.USE_LOCAL_WEAVIATE,
+                                       connection_config=settings.get_weaviate_connection_config())
+        search.reset_collection()
+    
+    embeddings = embedding_service.get_batch_embeddings(corpus, priority=Priority.BATCH)
+    search.insert_documents(corpus, embeddings, doc_ids)
+    return search
+
+
+def embed_questions(embedding_service: EmbeddingService,
+                    labels: List[Dict]) -> Tuple[List[List[float]], List[float]]:
+    """Embed every question one at a time, as the API does, timing each call"""
+    vectors, latencies = [], []
+    for label in labels:
+        start = time.perf_counter()
+        vectors.append(embedding_service.get_query_embedding(label['question']))
+        latencies.append(time.perf_counter() - start)
+    return vectors, latencies
+
+
+def evaluate(search: WeaviateSearchService, labels: List[Dict], vectors: List[List[float]],
+             embed_latencies: List[float], search_type: str, alpha: Optional[float],
+             top_k: int) -> Dict:
+    """
+    Run every labeled question through one search configuration
+    
+    Returns:
+        Dict: Mean quality metrics at top_k and latency percentiles in milliseconds
+    """
+    recalls, reciprocal_ranks, ndcgs, totals, searches = [], [], [], [], []
+    for label, vector, embed_latency in zip(labels, vectors, embed_latencies):
+        start = time.perf_counter()
+        if search_type == 'hybrid':
+            results = search.hybrid_search(label['question'], vector, alpha=alpha, limit=top_k)
+        elif search_type == 'vector':
+            results = search.vector_search(vector, limit=top_k)
+        else:
+            results = search.keyword_search(label['question'], limit=top_k)
+        elapsed = time.perf_counter() - start
+        
+        ranked = [int(r['doc_id']) for r in results]
+        recalls.append(recall_at_k(ranked, label['relevant'], top_k))
+        reciprocal_ranks.append(reciprocal_rank(ranked, label['relevant'], top_k))
+        ndcgs.append(ndcg_at_k(ranked, label['relevant'], top_k))
+        searches.append(elapsed)
+        totals.append(elapsed + (embed_latency if search_type != 'keyword' else 0.0))
+    
+    totals_ms = np.asarray(totals) * 1000
+    return {
+        'recall': float(np.mean(recalls)),
+        'mrr': float(np.mean(reciprocal_ranks)),
+        'ndcg': float(np.mean(ndcgs)),
+        'latency_p50_ms': float(np.percentile(totals_ms, 50)),
+        'latency_p95_ms': float(np.percentile(totals_ms, 95)),
+        'search_p50_ms': float(np.percentile(np.asarray(searches) * 1000, 50))
+    }
+
+
+def parse_targets(items: List[str]) -> Dict[str, float]:
+    """Parse ['recall=0.8'] into {'recall': 0.8}"""
+    targets = {}
+    for item in items:
+        metric, _, value = item.partition('=')
+        if metric not in QUALITY_METRICS or not value:
+            raise ValueError(f"Invalid target {item!r}; use one of {QUALITY_METRICS} as metric=value")
+        targets[metric] = float(value)
+    return targets
+
+
+def run_sweep(args: argparse.Namespace) -> Dict:
+    """
+    Evaluate every configuration in the sweep
+    
+    Returns:
+        Dict: All results, the Pareto frontier and the recommendation
+    """
+    labels_path = Path(args.labels)
+    labels = load_labels(labels_path) if labels_path.exists() else build_labels()
+    if args.limit:
+        labels = labels[:args.limit]
+    # Index what the service indexes: the chunks left after ingestion cleanup
+    settings = get_settings()
+    book = CorpusBuilder(settings.MIN_CHUNK_CHARS, settings.DEDUP_SIMILARITY).build_book(args.corpus)
+    corpus, doc_ids = book['chunks'], book['doc_ids']
+    logger.info(f"Evaluating {len(labels)} questions against {len(corpus)} chunks")
+    
+    results: List[Dict] = []
+    for backend in args.backends:
+        keyword_done = False
+        for embedder in args.embedders:
+            for dimension in args.dimensions:
+                name = f"{args.collection_prefix}_{embedder}_{dimension}"
+                logger.info(f"Indexing {backend}/{embedder}/{dimension} into {name}")
+                embedding_service = make_embedding_service(embedder, dimension)
+                search = build_index(backend, embedding_service, corpus, doc_ids, name)
+                try:
+                    vectors, embed_latencies = embed_questions(embedding_service, labels)
+                    
+                    configs = []
+                    for search_type in args.search_types:
+                        if search_type == 'keyword':
+                            # Independent of the embedder: evaluate once per backend
+                            if not keyword_done:
+                                configs.append(('keyword', None))
+                                keyword_done = True
+                        elif search_type == 'vector':
+                            configs.append(('vector', None))
+                        else:
+                            configs.extend(('hybrid', alpha) for alpha in args.alphas)
+                    
+                    for search_type, alpha in configs:
+                        for top_k in args.top_k:
+                            result = {
+                                'backend': backend,
+                                'embedder': None if search_type == 'keyword' else embedder,
+                                'dimension': None if search_type == 'keyword' else dimension,
+                                'search_type': search_type,
+                                'alpha': alpha,
+                                'top_k': top_k,
+                                **evaluate(search, labels, vectors, embed_latencies, search_type, alpha, top_k)
+                            }
+                            results.append(result)
+                            logger.info(
+                                f"{backend} {search_type} alpha={alpha} k={top_k} dim={result['dimension']}: "
+                                f"recall {result['recall']:.3f}, MRR {result['mrr']:.3f}, "
+                                f"nDCG {result['ndcg']:.3f}, p95 {result['latency_p95_ms']:.1f}ms"
+                            )
+                finally:
+                    if backend == 'weaviate' and not args.keep_collections:
+                        search.client.collections.delete(name)
+                    search.close()
+    
+    frontier = pareto_frontier(results, args.objective, args.cost)
+    targets = parse_targets(args.target)
+    meeting = [r for r in results if all(r[m] >= v for m, v in targets.items())]
+    recommendation = min(meeting, key=lambda r: r[args.cost]) if meeting and targets else None
+    
+    return {
+        'questions': len(labels),
+        'chunks': len(corpus),
+        'objective': args.objective,
+        'cost': args.cost,
+        'targets': targets,
+        'results': results,
+        'pareto_frontier': frontier,
+        'recommendation': recommendation
+    }
+
+
+def describe(result: Dict) -> str:
+    """One-line description of a configuration"""
+    parts = [result['backend'], result['search_type']]
+    if result['alpha'] is not None:
+        parts.append(f"alpha={result['alpha']}")
+    if result['dimension'] is not None:
+        parts.append(f"{result['embedder']}@{result['dimension']}")
+    parts.append(f"k={result['top_k']}")
+    return ' '.join(parts)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Retrieval quality vs. latency sweep")
+    parser.add_argument("--labels", default=str(DEFAULT_LABELS), help="Labeled questions JSONL")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="Book (directory of chapter_*.md) indexed for the evaluation")
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N questions")
+    parser.add_argument("--backends", nargs="+", choices=["local", "weaviate"], default=["local"])
+    parser.add_argument("--embedders", nargs="+", choices=["hashed", "gemini"], default=["hashed"],
+                        help="'hashed' is the offline stand-in; 'gemini' needs GOOGLE_API_KEY")
+    parser.add_argument("--dimensions", nargs="+", type=int, default=[256, 768])
+    parser.add_argument("--search-types", nargs="+", choices=["hybrid", "vector", "keyword"],
+                        default=["hybrid", "vector", "keyword"])
+    parser.add_argument("--alphas", nargs="+", type=float, default=[0.0, 0.25, 0.5, 0.75, 1.0])
+    parser.add_argument("--top-k", nargs="+", type=int, default=[3, 5, 10])
+    parser.add_argument("--objective", choices=QUALITY_METRICS, default="ndcg", help="Quality axis of the frontier")
+    parser.add_argument("--cost", choices=["latency_p50_ms", "latency_p95_ms"], default="latency_p95_ms")
+    parser.add_argument("--target", action="append", default=[], metavar="METRIC=VALUE",
+                        help="Quality target for the recommendation (repeatable)")
+    parser.add_argument("--collection-prefix", default="PhysicsChunkEval",
+                        help="Evaluation collections are created under this prefix")
+    parser.add_argument("--keep-collections", action="store_true", help="Keep Weaviate evaluation collections")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the sweep and print the frontier"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logging.getLogger("app").setLevel(logging.WARNING)
+    
+    report = run_sweep(args)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    
+    print(f"\nPareto frontier ({args.objective} vs {args.cost}):")
+    for point in report['pareto_frontier']:
+        print(f"  {point[args.objective]:.3f} @ {point[args.cost]:7.1f}ms  {describe(point)}")
+    if report['targets']:
+        if report['recommendation']:
+            print(f"\nCheapest configuration meeting {report['targets']}: {describe(report['recommendation'])}")
+        else:
+            print(f"\nNo configuration meets {report['targets']}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Offline end-to-end benchmark for the Physics RAG API
+
+Drives /search, /chat, /explain and /similar through the real FastAPI app
+(routing, validation, deadlines, scheduler, retries, caches) while Gemini
+and Weaviate are replaced by deterministic stand-ins with configurable
+latency. Reports throughput and p50/p95/p99 per endpoint as JSON, and can
+fail the run when it regresses against a saved baseline.
+
+Usage:
+    python -m benchmarks.run_benchmark -o bench.json
+    python -m benchmarks.run_benchmark --baseline bench.json --tolerance 0.15
+    python -m benchmarks.run_benchmark --endpoints /search /chat --concurrency 32 \\
+        --generate-latency lognormal:900:4000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import app.main as api
+from benchmarks.metrics import compare_to_baseline, summarize
+from benchmarks.stand_ins import add_stand_in_arguments, build_service_from_args
+from benchmarks.workload import Workload
+
+logger = logging.getLogger("benchmark")
+
+
+async def run_endpoint(client: httpx.AsyncClient, workload: Workload, endpoint: str,
+                       requests: int, concurrency: int) -> Dict:
+    """
+    Send `requests` requests to one endpoint with `concurrency` in flight
+    
+    Returns:
+        Dict: Latency summary plus the number of degraded responses
+    """
+    latencies: List[float] = []
+    errors = 0
+    degraded = 0
+    remaining = iter(range(requests))
+    
+    async def worker() -> None:
+        nonlocal errors, degraded
+        for _ in remaining:
+            payload = workload.payload(endpoint)
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload)
+            except Exception as e:
+                logger.debug(f"{endpoint} request failed: {e}")
+                errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+            
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            if response.json().get('degraded'):
+                degraded += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize(latencies, time.perf_counter() - start, errors)
+    summary['degraded'] = degraded
+    return summary
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    """
+    Build the offline service, warm up, then benchmark each endpoint in turn
+    
+    Returns:
+        Dict: Run configuration and per-endpoint results
+    """
+    setup_start = time.perf_counter()
+    service = await build_service_from_args(args)
+    setup_seconds = time.perf_counter() - setup_start
+    logger.info(f"Offline service ready in {setup_seconds:.1f}s")
+    
+    workload = Workload(args.corpus, seed=args.seed)
+    api.rag_service = service
+    results: Dict[str, Dict] = {}
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                     timeout=args.request_timeout) as client:
+            for endpoint in args.endpoints:
+                if args.warmup:
+                    await run_endpoint(client, workload, endpoint, args.warmup, min(args.warmup, args.concurrency))
+                results[endpoint] = await run_endpoint(client, workload, endpoint, args.requests, args.concurrency)
+                stats = results[endpoint]
+                logger.info(
+                    f"{endpoint}: {stats['throughput_rps']:.1f} req/s, "
+                    f"p50 {stats.get('p50_ms', 0):.0f}ms, p95 {stats.get('p95_ms', 0):.0f}ms, "
+                    f"p99 {stats.get('p99_ms', 0):.0f}ms, {stats['errors']} errors"
+                )
+    finally:
+        api.rag_service = None
+        service.close()
+    
+    return {
+        'config': {
+            'requests_per_endpoint': args.requests,
+            'concurrency': args.concurrency,
+            'embed_latency': args.embed_latency,
+            'generate_latency': args.generate_latency,
+            'weaviate_latency': args.weaviate_latency,
+            'dimension': args.dimension,
+            'error_rate': args.error_rate,
+            'with_cache': args.with_cache,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'setup_seconds': setup_seconds
+        },
+        'endpoints': results
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with Gemini/Weaviate stand-ins")
+    parser.add_argument("--endpoints", nargs="+", choices=Workload.ENDPOINTS, default=list(Workload.ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight per endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint")
+    parser.add_argument("--request-timeout", type=float, default=120.0, help="Client timeout in seconds")
+    add_stand_in_arguments(parser)
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the benchmark; exit non-zero on regression against the baseline"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    # Per-request service logging would dominate the measurement
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    
+    report = asyncio.run(run_benchmark(args))
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['baseline'] = args.baseline
+        report['regressions'] = compare_to_baseline(report['endpoints'], baseline['endpoints'], args.tolerance)
+    
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+    print(output)
+    
+    for regression in report.get('regressions', []):
+        logger.error(f"Regression: {regression}")
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Deterministic stand-ins for Gemini and Weaviate
+
+Embeddings are feature-hashed bags of words (so related texts really are
+close in vector space), answers are extracted from the prompt, and every
+call sleeps for a latency drawn from a seeded distribution. Nothing leaves
+the process, so runs are repeatable and cost nothing.
+"""
+
+import argparse
+import hashlib
+import math
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import Settings
+from app.services.local_backend import LocalCollection, LocalWeaviateClient, tokenize
+from app.services.rag_service import WeaviateRAGService
+
+# z-score of the 99th percentile of a standard normal distribution
+Z_P99 = 2.3263
+
+
+class LatencyModel:
+    """
+    Seeded latency distribution
+    
+    Specs (milliseconds):
+        none                  - no delay
+        fixed:<ms>            - constant delay
+        uniform:<low>:<high>  - uniform between low and high
+        lognormal:<p50>:<p99> - long-tailed, like real network calls
+    """
+    
+    def __init__(self, spec: str = "none", seed: int = 0):
+        self.spec = spec
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        
+        expected = {'none': 0, 'fixed': 1, 'uniform': 2, 'lognormal': 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        if self.kind == 'lognormal':
+            median, p99 = self.params
+            self._mu = math.log(max(median, 1e-3))
+            self._sigma = math.log(max(p99, median) / max(median, 1e-3)) / Z_P99
+    
+    def sample(self) -> float:
+        """Draw one delay in seconds"""
+        with self._lock:
+            if self.kind == 'none':
+                return 0.0
+            if self.kind == 'fixed':
+                return self.params[0] / 1000
+            if self.kind == 'uniform':
+                return self._random.uniform(*self.params) / 1000
+            return self._random.lognormvariate(self._mu, self._sigma) / 1000
+    
+    def sleep(self) -> None:
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class StandInUnavailable(Exception):
+    """Injected transient failure (treated as a 503 by the resilience layer)"""
+    code = 503
+
+
+def _hashed_features(tokens: List[str], dimension: int) -> np.ndarray:
+    vector = np.zeros(dimension, dtype=np.float32)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        value = int.from_bytes(digest, 'little')
+        vector[value % dimension] += 1.0 if (value >> 63) & 1 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+def hashed_embedding(text: str, dimension: int = 768) -> List[float]:
+    """
+    Deterministic embedding from signed feature hashing of words and word pairs
+    
+    Args:
+        text (str): Text to embed
+        dimension (int): Vector size
+    
+    Returns:
+        List[float]: Unit-length vector (all zeros for text without words)
+    """
+    return _hashed_features(tokenize(text), dimension).tolist()
+
+
+class FakeGeminiEmbeddings:
+    """Drop-in for google.generativeai's embed_content"""
+    
+    def __init__(self, dimension: int = 768, latency: Optional[LatencyModel] = None,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.dimension = dimension
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+    
+    def embed_content(self, model: str, content: Union[str, List[str]], **kwargs) -> Dict:
+        self.calls += 1
+        self.latency.sleep()
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise StandInUnavailable("503 stand-in embedding failure")
+        
+        if isinstance(content, list):
+            return {'embedding': [hashed_embedding(text, self.dimension) for text in content]}
+        return {'embedding': hashed_embedding(content, self.dimension)}
+
+
+class FakeResponse:
+    """Minimal GenerateContentResponse"""
+    
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel that answers from the prompt's context"""
+    
+    CONTEXT_PATTERN = re.compile(r"প্রসঙ্গ:\s*(.*?)(?:\n\s*\n|$)", re.S)
+    
+    def __init__(self, latency: Optional[LatencyModel] = None, error_rate: float = 0.0,
+                 answer_chars: int = 400, seed: int = 0):
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.answer_chars = answer_chars
+        self._random = random.Random(seed)
+        self.calls = 0
+    
+    def generate_content(self, prompt: str, generation_config=None, **kwargs) -> FakeResponse:
+        self.calls += 1
+        self.latency.sleep()
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise StandInUnavailable("503 stand-in generation failure")
+        
+        match = self.CONTEXT_PATTERN.search(prompt)
+        context = match.group(1) if match else prompt
+        return FakeResponse(f"উত্তর: {context[:self.answer_chars].strip()}")
+
+
+class SlowLocalCollection(LocalCollection):
+    """Local collection that delays every query like a remote Weaviate"""
+    
+    latency: LatencyModel = LatencyModel()
+    
+    def _hybrid(self, *args):
+        self.latency.sleep()
+        return super()._hybrid(*args)
+    
+    def _near_vector(self, *args):
+        self.latency.sleep()
+        return super()._near_vector(*args)
+    
+    def _bm25(self, *args):
+        self.latency.sleep()
+        return super()._bm25(*args)
+    
+    def _fetch(self, *args):
+        self.latency.sleep()
+        return super()._fetch(*args)
+
+
+def make_weaviate_client(latency: Optional[LatencyModel] = None) -> LocalWeaviateClient:
+    """Local backend whose queries sleep according to the given latency model"""
+    collection_class = type('DelayedCollection', (SlowLocalCollection,),
+                            {'latency': latency or LatencyModel()})
+    return LocalWeaviateClient(collection_factory=collection_class)
+
+
+async def build_offline_service(settings: Settings,
+                                embed_latency: str = "none",
+                                generate_latency: str = "none",
+                                weaviate_latency: str = "none",
+                                dimension: int = 768,
+                                error_rate: float = 0.0,
+                                seed: int = 0) -> WeaviateRAGService:
+    """
+    Build a fully initialized RAG service on the stand-ins
+    
+    Ingestion runs through the real initialize_collection path, so the
+    collection holds the same chunks as production.
+    
+    Args:
+        settings (Settings): Application settings
+        embed_latency (str): Latency spec for embedding calls
+        generate_latency (str): Latency spec for generation calls
+        weaviate_latency (str): Latency spec for collection queries
+        dimension (int): Embedding dimension
+        error_rate (float): Fraction of Gemini calls that fail transiently
+        seed (int): Seed for latencies and injected failures
+    
+    Returns:
+        WeaviateRAGService: Service with the corpus loaded
+    """
+    embeddings = FakeGeminiEmbeddings(dimension, LatencyModel(embed_latency, seed),
+                                      error_rate=error_rate, seed=seed + 1)
+    model = FakeGenerativeModel(LatencyModel(generate_latency, seed + 2),
+                                error_rate=error_rate, seed=seed + 3)
+    client = make_weaviate_client(LatencyModel(weaviate_latency, seed + 4))
+    
+    service = WeaviateRAGService(
+        settings,
+        embedding_client=embeddings,
+        generation_model=model,
+        weaviate_client=client
+    )
+    
+    # Load the corpus without simulated latency or failures
+    latency, embeddings.latency = embeddings.latency, LatencyModel()
+    embeddings.error_rate = 0.0
+    try:
+        await service.initialize_collection()
+    finally:
+        embeddings.latency = latency
+        embeddings.error_rate = error_rate
+        embeddings.calls = 0
+    return service
+
+
+DEFAULT_CORPUS = Path(__file__).parent.parent.parent / "Physics"
+
+
+def add_stand_in_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the stand-in options shared by the benchmark tools"""
+    group = parser.add_argument_group("stand-ins")
+    group.add_argument("--embed-latency", default="lognormal:60:250", help="Embedding latency spec (ms)")
+    group.add_argument("--generate-latency", default="lognormal:700:2500", help="Generation latency spec (ms)")
+    group.add_argument("--weaviate-latency", default="lognormal:15:60", help="Weaviate query latency spec (ms)")
+    group.add_argument("--dimension", type=int, default=768, help="Stand-in embedding dimension")
+    group.add_argument("--error-rate", type=float, default=0.0, help="Fraction of Gemini calls that fail")
+    group.add_argument("--with-cache", action="store_true", help="Keep embedding/response caches enabled")
+    group.add_argument("--rpm", type=int, help="Override GEMINI_REQUESTS_PER_MINUTE")
+    group.add_argument("--tpm", type=int, help="Override GEMINI_TOKENS_PER_MINUTE")
+    group.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Book (directory of chapter_*.md) to index and sample queries from")
+    group.add_argument("--seed", type=int, default=0)
+
+
+def stand_in_settings(args: argparse.Namespace) -> Settings:
+    """Settings for an offline run, without touching the global settings object"""
+    overrides = {'PHYSICS_BOOK_DIR': str(args.corpus), 'GOOGLE_API_KEY': 'offline-benchmark'}
+    if Path(args.corpus).resolve() != DEFAULT_CORPUS.resolve():
+        overrides['CHUNK_STORE_PATH'] = ''  # The store holds the default book; chunk the given corpus instead
+    if not args.with_cache:
+        overrides.update(EMBEDDING_CACHE_SIZE=0, RESPONSE_CACHE_SIZE=0, SHARED_CACHE_PATH='')
+    if args.rpm:
+        overrides['GEMINI_REQUESTS_PER_MINUTE'] = args.rpm
+    if args.tpm:
+        overrides['GEMINI_TOKENS_PER_MINUTE'] = args.tpm
+    # Quota and breaker configs are read from the class, so subclass rather than assign
+    return type('BenchmarkSettings', (Settings,), overrides)()
+
+
+async def build_service_from_args(args: argparse.Namespace) -> WeaviateRAGService:
+    """build_offline_service configured from add_stand_in_arguments options"""
+    return await build_offline_service(
+        stand_in_settings(args),
+        embed_latency=args.embed_latency,
+        generate_latency=args.generate_latency,
+        weaviate_latency=args.weaviate_latency,
+        dimension=args.dimension,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
@@ -0,0 +1,83 @@
+"""
+Bengali benchmark workloads drawn from the physics book
+
+Section headings become search/chat questions and concepts to explain;
+paragraphs become reference texts for /similar. The same seed always
+yields the same requests.
+"""
+
+import random
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app.services.corpus import chapter_files
+
+BENGALI = re.compile(r"[\u0980-\u09FF]")
+HEADING_NOISE = re.compile(r"[#*_`>\d\u09E6-\u09EF.:)(\-\u2013]+")
+
+QUESTION_TEMPLATES = ["{} কী?", "{} ব্যাখ্যা করো", "{} সম্পর্কে লেখো", "{}"]
+SEARCH_TYPES = ["hybrid", "vector", "keyword"]
+
+
+def load_book_material(path: Path) -> Tuple[List[str], List[str]]:
+    """
+    Extract Bengali headings and paragraphs from the book
+    
+    Args:
+        path (Path): Book directory (chapter_*.md)
+    
+    Returns:
+        Tuple[List[str], List[str]]: Unique headings and paragraphs
+    """
+    headings: List[str] = []
+    paragraphs: List[str] = []
+    seen = set()
+    
+    text = '\n\n'.join(chapter.read_text(encoding='utf-8') for chapter in chapter_files(path))
+    for block in text.split('\n\n'):
+        block = block.strip()
+        if not block or not BENGALI.search(block):
+            continue
+        if block.startswith('#'):
+            heading = HEADING_NOISE.sub(' ', block.splitlines()[0]).strip()
+            heading = ' '.join(heading.split())
+            if 2 <= len(heading) <= 80 and '$' not in heading and heading not in seen:
+                seen.add(heading)
+                headings.append(heading)
+        elif len(block) >= 80 and not block.startswith(('![', '|')):
+            paragraphs.append(block[:600])
+    
+    return headings, paragraphs
+
+
+class Workload:
+    """Seeded generator of request payloads for each endpoint"""
+    
+    ENDPOINTS = ('/search', '/chat', '/explain', '/similar')
+    
+    def __init__(self, book_path: Path, seed: int = 0):
+        self.headings, self.paragraphs = load_book_material(book_path)
+        if not self.headings or not self.paragraphs:
+            raise ValueError(f"No Bengali headings/paragraphs found in {book_path}")
+        self._random = random.Random(seed)
+    
+    def question(self) -> str:
+        template = self._random.choice(QUESTION_TEMPLATES)
+        return template.format(self._random.choice(self.headings))[:500]
+    
+    def payload(self, endpoint: str) -> Dict:
+        """Next request body for an endpoint"""
+        if endpoint == '/search':
+            return {
+                'query': self.question(),
+                'search_type': self._random.choice(SEARCH_TYPES),
+                'top_k': 5
+            }
+        if endpoint == '/chat':
+            return {'message': self.question(), 'top_k': 5}
+        if endpoint == '/explain':
+            return {'concept': self._random.choice(self.headings)[:100], 'top_k': 3}
+        if endpoint == '/similar':
+            return {'text': self._random.choice(self.paragraphs)[:1000], 'top_k': 5}
+        raise ValueError(f"Unknown endpoint: {endpoint}")
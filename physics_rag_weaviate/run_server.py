@@ -1,7 +1,19 @@
 """
 Run script for the Physics RAG API with Weaviate
+
+Development (default): one process with auto-reload.
+Production: N worker processes behind one socket, e.g.
+
+    python run_server.py --workers 4
+
+Workers share the memory-mapped chunk store through the OS page cache and a
+SQLite cache tier (SHARED_CACHE_PATH, data/shared_cache.sqlite unless set),
+and split the Gemini quota between them. `kill -HUP <pid>` replaces the
+workers one at a time, each new one taking traffic before an old one
+drains (GRACEFUL_SHUTDOWN_SECONDS); SIGTTIN/SIGTTOU add or remove a worker.
 """
 
+import argparse
 import uvicorn
 import sys
 import os
@@ -10,8 +22,25 @@ from pathlib import Path
 # Add the app directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
-def main():
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Run the Physics RAG API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")),
+                        help="Worker processes; any value, even 1, runs without reload (default: development mode)")
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Run the FastAPI server"""
+    args = parse_args(argv)
+    production = args.workers > 0
+    
     print("🚀 Starting Physics RAG API with Weaviate")
     print("=" * 50)
     print("📚 Bengali Physics RAG System")
@@ -19,23 +48,46 @@ def main():
     print("🤖 Google Gemini AI Models")
     print()
     print("🌐 Server will be available at:")
-    print("   - API: http://localhost:8000")
-    print("   - Docs: http://localhost:8000/docs")
-    print("   - Health: http://localhost:8000/health")
+    print(f"   - API: http://localhost:{args.port}")
+    print(f"   - Docs: http://localhost:{args.port}/docs")
+    print(f"   - Health: http://localhost:{args.port}/health")
     print()
-    print("⚠️  Make sure you have:")
-    print("   - Weaviate running on localhost:8080")
-    print("   - Valid Google API key set")
-    print("   - Physics text file available")
+    
+    if not production:
+        print("⚠️  Make sure you have:")
+        print("   - Weaviate running on localhost:8080")
+        print("   - Valid Google API key set")
+        print("   - Physics text file available")
+        print()
+        
+        # Run the server
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level=args.log_level
+        )
+        return
+    
+    # Workers read these when they import the settings
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    os.environ.setdefault("SHARED_CACHE_PATH", str(DATA_DIR / "shared_cache.sqlite"))
+    
+    from app.config.settings import get_settings
+    settings = get_settings()
+    print(f"⚙️  {args.workers} worker(s), pid {os.getpid()} (kill -HUP for a rolling restart)")
+    print(f"   - Shared cache: {settings.SHARED_CACHE_PATH or 'off'}")
+    print(f"   - Gemini quota per worker: {settings.get_gemini_quota_config()['requests_per_minute']} requests/min")
     print()
     
-    # Run the server
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
+        log_level=args.log_level
     )
 
 if __name__ == "__main__":
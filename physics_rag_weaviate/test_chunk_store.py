@@ -0,0 +1,77 @@
+"""
+Unit tests for the memory-mapped chunk store
+"""
+
+import pytest
+
+from app.services.chunk_store import ChunkStore, chunk_hash, split_chunks, write_chunk_store
+
+BOOK = """*****
+## অধ্যায় 1: ভৌত রাশি
+
+## 1.1 পদার্থবিজ্ঞান
+
+পদার্থবিজ্ঞান বিজ্ঞানের একটি মৌলিক শাখা।
+*****
+*****
+ভৌত রাশির মান এবং একক থাকে।
+*****
+## অধ্যায় 2: গতি
+
+## 2.1 বেগ
+
+Velocity is speed in a given direction.
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    chunks = split_chunks(BOOK)
+    write_chunk_store(str(tmp_path / "store"), chunks, doc_ids=[3, 4, 7], source="Physics")
+    store = ChunkStore(str(tmp_path / "store"))
+    yield store
+    store.close()
+
+
+def test_split_drops_empty_chunks():
+    chunks = split_chunks(BOOK)
+    assert len(chunks) == 3
+    assert chunks[1] == "ভৌত রাশির মান এবং একক থাকে।"
+
+
+def test_lookups_by_doc_id(store):
+    assert len(store) == 3 and 4 in store and 5 not in store
+    assert store.get(4) == "ভৌত রাশির মান এবং একক থাকে।"
+    assert store.get(99) is None
+    assert store.get_many([7, 5, 3]).keys() == {7, 3}
+    # head() never splits a Bengali character
+    assert store.head(4, 4) == "ভৌত "
+    assert store.texts() == split_chunks(BOOK)
+
+
+def test_metadata_and_neighbours_follow_chapters(store):
+    # The second chunk has no headings: it continues chapter 1, section 1.1
+    assert store.metadata(4) == {'doc_id': 4, 'chapter': 1, 'section': '1.1',
+                                 'hash': chunk_hash(store.get(4)), 'length': len(store.get(4).encode('utf-8'))}
+    assert store.metadata(7)['chapter'] == 2 and store.metadata(7)['section'] == '2.1'
+    assert store.neighbours(3) == (None, 4)
+    assert store.neighbours(4) == (3, None)
+
+
+def test_find_by_hash_ignores_case_and_spacing(store):
+    assert store.find_by_hash(chunk_hash("  " + store.get(7).upper().replace("\n\n", "\n"))) == 7
+    assert store.find_by_hash(chunk_hash("Velocity is speed in a given direction.")) is None
+
+
+def test_rewrite_replaces_the_store_and_its_content_hash(tmp_path, store):
+    before = store.manifest['content_hash']
+    write_chunk_store(str(tmp_path / "store"), ["নতুন অংশ"], source="Physics")
+    rewritten = ChunkStore(str(tmp_path / "store"))
+    assert rewritten.texts() == ["নতুন অংশ"]
+    assert rewritten.manifest['content_hash'] != before
+    # The open store still reads its own (replaced) files
+    assert store.get(3).startswith("## অধ্যায় 1")
+    rewritten.close()
+    
+    with pytest.raises(ValueError):
+        write_chunk_store(str(tmp_path / "other"), ["a", "b"], doc_ids=[1, 1])
@@ -0,0 +1,63 @@
+"""
+Unit tests for the incremental corpus builder
+"""
+
+from app.services.corpus import CorpusBuilder, chapter_files
+
+BODY = ("পদার্থবিজ্ঞানের ইতিহাস পড়লেই আমরা দেখব, এটি তাত্ত্বিক এবং ব্যবহারিক বিজ্ঞানীদের "
+        "সম্মিলিত প্রচেষ্টায় গড়ে উঠেছে। ল্যাবরেটরিতে গবেষণা করতে হলেই নানা রাশিকে সূক্ষ্মভাবে পরিমাপ করতে হয়।")
+OTHER = ("বল হলো এমন একটি বাহ্যিক কারণ যা কোনো স্থির বস্তুকে গতিশীল করে বা গতিশীল বস্তুর "
+         "বেগের পরিবর্তন ঘটায়। বলের একক নিউটন এবং এটি একটি ভেক্টর রাশি।")
+ACCELERATION = ("সময়ের সাথে বস্তুর বেগের পরিবর্তনের হারকে ত্বরণ বলে। ত্বরণের একক মিটার প্রতি "
+                "বর্গ সেকেন্ড এবং সমত্বরণে চলমান বস্তুর বেগ সময়ের সাথে সুষমভাবে বাড়ে।")
+
+
+def write_chapter(book, number: int, bodies) -> None:
+    heading = f"## অধ্যায় {number}: পরীক্ষা"
+    text = "".join(f"*****\n{heading}\n\n{body}\n\n" for body in bodies)
+    (book / f"chapter_{number:02d}.md").write_text(text, encoding='utf-8')
+
+
+def make_book(tmp_path):
+    book = tmp_path / "Physics"
+    book.mkdir()
+    write_chapter(book, 1, ["## প্রথম অধ্যায়", BODY])
+    write_chapter(book, 2, [OTHER, BODY])  # The second chunk repeats chapter 1
+    write_chapter(book, 10, [ACCELERATION])
+    return book
+
+
+def test_chapters_are_read_in_chapter_order(tmp_path):
+    book = make_book(tmp_path)
+    assert [path.name for path in chapter_files(str(book))] == ["chapter_01.md", "chapter_02.md", "chapter_10.md"]
+
+
+def test_doc_ids_count_raw_chunks_across_chapters(tmp_path):
+    built = CorpusBuilder().build_book(str(make_book(tmp_path)))
+    
+    # Chapter 1: stub 0 merged into 1; chapter 2: 2 kept, 3 repeats 1; chapter 3: 4
+    assert built['doc_ids'] == [1, 2, 4]
+    assert built['report']['doc_id_map'] == {'0': 1, '3': 1}
+    assert [chapter['first_doc_id'] for chapter in built['corpus']['chapters']] == [0, 2, 4]
+
+
+def test_unchanged_chapters_come_from_the_cache(tmp_path):
+    book = make_book(tmp_path)
+    cache = tmp_path / "corpus_cache"
+    first = CorpusBuilder(cache_dir=str(cache)).build_book(str(book))
+    
+    builder = CorpusBuilder(cache_dir=str(cache))
+    assert builder.build_book(str(book)) == first
+    assert builder.get_stats()['rebuilt'] == 0 and builder.get_stats()['cached'] == 3
+    
+    # Editing one chapter rechunks only that chapter
+    write_chapter(book, 2, [OTHER])
+    builder = CorpusBuilder(cache_dir=str(cache))
+    rebuilt = builder.build_book(str(book))
+    assert builder.get_stats()['rebuilt'] == 1
+    assert rebuilt['doc_ids'] == [1, 2, 3]
+    
+    # Other build parameters do not reuse the cached chapters
+    builder = CorpusBuilder(min_chars=10, cache_dir=str(cache))
+    builder.build_book(str(book))
+    assert builder.get_stats()['rebuilt'] == 3
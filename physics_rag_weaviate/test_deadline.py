@@ -0,0 +1,84 @@
+"""
+Unit tests for request deadlines and degradation to keyword search
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.config.settings import Settings
+from app.services.deadline import Deadline, DeadlineExceeded, stage_time_left
+from benchmarks.stand_ins import build_offline_service
+
+CHAPTER = """## অধ্যায় 1: বল
+
+## 1.1 বল (Force)
+
+বল হলো এমন একটি বাহ্যিক কারণ যা কোনো স্থির বস্তুকে গতিশীল করে বা গতিশীল বস্তুর বেগের পরিবর্তন ঘটায়।
+
+## 1.2 ঘর্ষণ (Friction)
+
+দুটি তলের আপেক্ষিক গতির বিরোধিতা করে যে বল তাকে ঘর্ষণ বলে।
+"""
+
+
+def test_stage_timeout_keeps_the_reserve_and_limit():
+    deadline = Deadline.from_ms(1000)
+    assert 0.9 < deadline.stage_timeout() <= 1.0
+    assert deadline.stage_timeout(limit=0.2) == 0.2
+    assert 0.6 < deadline.stage_timeout(reserve=0.3) <= 0.7
+    assert deadline.stage_timeout(reserve=5.0) == 0.0
+    assert not deadline.expired and not deadline.degraded
+    
+    deadline.mark_degraded("embedding_timeout")
+    deadline.mark_degraded("embedding_timeout")
+    assert deadline.degraded_reasons == ["embedding_timeout"]
+    assert Deadline(0.0).expired
+
+
+def test_run_exposes_the_stage_deadline_and_times_out():
+    deadline = Deadline(5.0)
+    
+    async def stages():
+        left = await deadline.run(stage_time_left, timeout=0.5)
+        assert 0.0 < left <= 0.5
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run(time.sleep, 0.5, timeout=0.05)
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run(time.sleep, 0.0, timeout=0.0)
+    
+    asyncio.run(stages())
+    # Outside a stage there is no stage deadline
+    assert stage_time_left() is None
+
+
+def test_slow_embedding_degrades_to_keyword_search(tmp_path):
+    book = tmp_path / "book"
+    book.mkdir()
+    (book / "chapter_01.md").write_text(CHAPTER, encoding="utf-8")
+    data = tmp_path / "data"
+    settings = type('TestSettings', (Settings,), {
+        'PHYSICS_BOOK_DIR': str(book), 'DATA_DIR': data, 'GOOGLE_API_KEY': 'offline-test',
+        'CHUNK_STORE_PATH': '', 'KNN_GRAPH_PATH': '', 'GLOSSARY_PATH': str(data / "glossary.json"),
+        'CORPUS_CACHE_DIR': str(data / "corpus_cache"), 'DEDUP_REPORT_PATH': str(data / "dedup_report.json"),
+        'INDEX_POINTER_PATH': str(data / "index_pointer.json"), 'TRAFFIC_CAPTURE_PATH': '',
+        'EMBEDDING_CACHE_SIZE': 0, 'RESPONSE_CACHE_SIZE': 0, 'SHARED_CACHE_PATH': '',
+        'EMBEDDING_STAGE_MS': 100
+    })()
+    
+    async def search():
+        service = await build_offline_service(settings, embed_latency="fixed:1000")
+        try:
+            deadline = service.new_deadline(3000)
+            start = time.monotonic()
+            results = await service.search("ঘর্ষণ", search_type="hybrid", top_k=2, deadline=deadline)
+            return results, deadline, time.monotonic() - start
+        finally:
+            service.close()
+    
+    results, deadline, elapsed = asyncio.run(search())
+    assert results and all(r['search_type'] == 'keyword' for r in results)
+    assert deadline.degraded_reasons == ["embedding_timeout"]
+    # The search gave up on the embedding at the stage limit instead of waiting for it
+    assert elapsed < 0.8
@@ -0,0 +1,47 @@
+"""
+Unit tests for ingestion deduplication (stub merging and MinHash LSH)
+"""
+
+from app.services.dedup import MinHasher, dedup_chunks, near_duplicates
+
+HEADING = "## অধ্যায় 1: ভৌত রাশি এবং তাদের পরিমাপ"
+BODY = ("পদার্থবিজ্ঞানের ইতিহাস পড়লেই আমরা দেখব, এটি তাত্ত্বিক এবং ব্যবহারিক বিজ্ঞানীদের "
+        "সম্মিলিত প্রচেষ্টায় গড়ে উঠেছে। ল্যাবরেটরিতে গবেষণা করতে হলেই নানা রাশিকে সূক্ষ্মভাবে পরিমাপ করতে হয়।")
+OTHER = ("বল হলো এমন একটি বাহ্যিক কারণ যা কোনো স্থির বস্তুকে গতিশীল করে বা গতিশীল বস্তুর "
+         "বেগের পরিবর্তন ঘটায়। বলের একক নিউটন এবং এটি একটি ভেক্টর রাশি।")
+
+
+def test_minhash_estimates_similarity():
+    hasher = MinHasher()
+    same = hasher.signature(BODY)
+    # Case and spacing do not matter
+    assert (hasher.signature("  " + BODY.upper() + " ") == same).all()
+    assert (hasher.signature(OTHER) == same).mean() < 0.2
+
+
+def test_near_duplicates_point_at_the_first_copy():
+    edited = BODY.replace("সূক্ষ্মভাবে", "সূক্ষ্মভাবে ")
+    duplicates = near_duplicates([BODY, OTHER, edited, BODY], threshold=0.85)
+    assert set(duplicates) == {2, 3}
+    assert duplicates[2][0] == 0 and duplicates[3] == (0, 1.0)
+
+
+def test_stubs_merge_forward_and_duplicates_map_to_the_kept_chunk():
+    chunks = [
+        f"{HEADING}\n\n## প্রথম অধ্যায়",          # 10: stub, merged into 11
+        f"{HEADING}\n\n{BODY}",                     # 11
+        f"{HEADING}\n\n## 1.2 বল",                  # 12: stub, merged into 13, which repeats 11
+        f"{HEADING}\n\n{BODY}",                     # 13: near-duplicate of 11
+        f"{HEADING}\n\n{OTHER}",                    # 14
+        "ছোট",                                      # 15: too short, no heading
+    ]
+    texts, doc_ids, report = dedup_chunks(chunks, doc_ids=range(10, 16), min_chars=80)
+    
+    assert doc_ids == [11, 14]
+    assert texts[0].startswith(HEADING) and "## প্রথম অধ্যায়" in texts[0] and BODY in texts[0]
+    # The chapter heading the stub and its chunk share appears once
+    assert texts[0].count(HEADING) == 1
+    assert report['input_chunks'] == 6 and report['output_chunks'] == 2
+    assert report['doc_id_map'] == {'10': 11, '12': 11, '13': 11, '15': None}
+    reasons = {record['doc_id']: record['reason'] for record in report['dropped']}
+    assert reasons == {13: 'near_duplicate', 15: 'too_short'}
@@ -0,0 +1,55 @@
+"""
+Unit tests for glossary mining and concept lookup
+"""
+
+from app.services.glossary import Glossary, glossary_term, mine_glossary, term_key, write_glossary
+
+CHUNKS = [
+    (0, "## 3.2 বল (Force)\nবল হলো এমন একটি বাহ্যিক কারণ যা বস্তুর গতির পরিবর্তন ঘটায়।"),
+    (1, "বেগের পরিবর্তনের হারকে ত্বরণ (Acceleration) বলে। বল প্রয়োগে ত্বরণ (Acceleration) সৃষ্টি হয়।"),
+    (2, "## 3.4 ত্বরণ (Acceleration)\nএকক সময়ে বেগের পরিবর্তন।"),
+    (3, "## 2.1 দূরত্ব ও সরণ (Distance and Displacement)\nসরণ একটি ভেক্টর রাশি। ভর (kg) একটি স্কেলার।"),
+]
+
+
+def concepts_by_english(concepts):
+    return {c['english']: c for c in concepts}
+
+
+def test_headings_define_and_inline_pairs_mention():
+    concepts = concepts_by_english(mine_glossary(CHUNKS))
+    
+    force = concepts['Force']
+    assert force['bengali'] == 'বল' and force['doc_ids'] == [0] and force['headings'] == 1
+    assert glossary_term(force) == 'বল (Force)'
+    # Defining chunks come first, then the chunks mentioning the concept
+    acceleration = concepts['Acceleration']
+    assert acceleration['doc_ids'] == [2, 1]
+    assert acceleration['headings'] == 1 and acceleration['mentions'] == 2
+    # A compound heading also defines each of its parts
+    assert concepts['Displacement']['bengali'] == 'সরণ'
+    assert concepts['Distance']['doc_ids'] == [3]
+    # Units in parentheses are not terms
+    assert 'kg' not in concepts
+
+
+def test_lookup_handles_question_wording_case_endings_and_typos(tmp_path):
+    path = write_glossary(str(tmp_path / "glossary.json"), mine_glossary(CHUNKS), chunks_content_hash="abc")
+    assert Glossary.exists(str(path)) and not Glossary.exists('')
+    glossary = Glossary.load(str(path))
+    assert glossary.chunks_content_hash == "abc"
+    
+    exact = glossary.lookup("FORCE")
+    assert exact['match'] == 'exact' and exact['concept']['bengali'] == 'বল'
+    assert glossary.lookup("বল কাকে বলে?")['concept']['english'] == 'Force'
+    assert glossary.lookup("what is the acceleration")['term'] == 'acceleration'
+    near = glossary.lookup("বলের")
+    assert near['match'] == 'near' and near['concept']['english'] == 'Force'
+    assert glossary.lookup("acceleraton")['concept']['english'] == 'Acceleration'
+    assert glossary.lookup("momentum") is None
+    assert glossary.lookup("  ") is None
+
+
+def test_term_key_normalizes_digits_case_and_punctuation():
+    assert term_key("  Newton's   ২য় Law! ") == "newton s 2য় law"
+    assert term_key("বল (Force)") == "বল force"
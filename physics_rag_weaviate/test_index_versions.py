@@ -0,0 +1,84 @@
+"""
+Unit tests for index versions behind a Weaviate alias (on the in-process backend)
+"""
+
+import pytest
+
+from app.services.index_versions import AliasPointer, list_versions
+from app.services.local_backend import LocalWeaviateClient
+from app.services.search_service import WeaviateSearchService
+from app.services.weaviate_connection import WeaviateConnection
+
+ALIAS = "PhysicsChunk"
+
+
+def make_connection() -> WeaviateConnection:
+    return WeaviateConnection("http://localhost:8080", client=LocalWeaviateClient(), health_interval=0)
+
+
+def make_service(connection: WeaviateConnection, name: str, texts=()) -> WeaviateSearchService:
+    service = WeaviateSearchService("http://localhost:8080", "", collection_name=name, use_local=True,
+                                    connection=connection)
+    if texts:
+        service.insert_documents(list(texts), [[1.0, float(i)] for i in range(len(texts))])
+    return service
+
+
+def copy(connection: WeaviateConnection):
+    def run(source: str, target: str) -> int:
+        return make_service(connection, target).copy_from(source)
+    return run
+
+
+def count(connection: WeaviateConnection, name: str) -> int:
+    return len(connection.client.collections.get(name))
+
+
+def test_swap_never_deletes_an_unversioned_collection():
+    connection = make_connection()
+    make_service(connection, ALIAS, ["বল", "ভর"])
+    make_service(connection, f"{ALIAS}_v1", ["বল"])
+    pointer = AliasPointer(connection, ALIAS)
+    
+    with pytest.raises(RuntimeError):
+        pointer.swap(1, 'reindex')
+    assert count(connection, ALIAS) == 2
+
+
+def test_unversioned_collection_is_migrated_to_version_zero():
+    connection = make_connection()
+    make_service(connection, ALIAS, ["বল", "ভর", "ত্বরণ"])
+    pointer = AliasPointer(connection, ALIAS)
+    assert pointer.read()['version'] == 0 and pointer.unversioned()
+    
+    state = pointer.migrate_unversioned(copy(connection))
+    
+    assert state['collection'] == f"{ALIAS}_v0"
+    assert count(connection, f"{ALIAS}_v0") == 3
+    assert pointer.read()['collection'] == f"{ALIAS}_v0"
+    assert not pointer.unversioned()
+    assert pointer.migrate_unversioned(copy(connection)) is None
+    
+    # Later versions swap in and out; version 0 stays available for a rollback
+    make_service(connection, f"{ALIAS}_v1", ["বল"])
+    pointer.swap(1, 'reindex')
+    assert pointer.read()['version'] == 1
+    assert list_versions(connection.client, ALIAS) == [0, 1]
+    pointer.swap(0, 'rollback')
+    assert pointer.read()['collection'] == f"{ALIAS}_v0"
+
+
+def test_failed_copy_keeps_the_unversioned_collection():
+    connection = make_connection()
+    make_service(connection, ALIAS, ["বল", "ভর"])
+    pointer = AliasPointer(connection, ALIAS)
+    
+    def partial_copy(source: str, target: str) -> int:
+        make_service(connection, target, ["বল"])
+        return 1
+    
+    with pytest.raises(RuntimeError):
+        pointer.migrate_unversioned(partial_copy)
+    assert count(connection, ALIAS) == 2
+    assert not connection.client.collections.exists(f"{ALIAS}_v0")
+    assert pointer.read()['version'] == 0
@@ -0,0 +1,46 @@
+"""
+Unit tests for the precomputed chunk k-NN graph
+"""
+
+import numpy as np
+
+from app.services.knn_graph import KnnGraph, nearest_neighbours, write_knn_graph
+
+
+def random_vectors(count: int = 50, dimension: int = 16) -> np.ndarray:
+    return np.random.default_rng(7).normal(size=(count, dimension)).astype(np.float32)
+
+
+def brute_force(vectors: np.ndarray, k: int) -> np.ndarray:
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = unit @ unit.T
+    np.fill_diagonal(similarity, -np.inf)
+    return np.argsort(-similarity, axis=1, kind='stable')[:, :k]
+
+
+def test_blocked_search_matches_brute_force():
+    vectors = random_vectors()
+    indices, scores = nearest_neighbours(vectors, k=5, block_size=7)
+    assert (indices == brute_force(vectors, 5)).all()
+    assert (np.diff(scores, axis=1) <= 0).all()  # Best first
+    assert not (indices == np.arange(len(vectors))[:, None]).any()  # Never its own neighbour
+
+
+def test_k_is_capped_by_the_corpus():
+    indices, scores = nearest_neighbours(random_vectors(3), k=10)
+    assert indices.shape == scores.shape == (3, 2)
+
+
+def test_graph_answers_by_doc_id(tmp_path):
+    vectors = random_vectors()
+    doc_ids = np.arange(len(vectors)) * 2 + 100  # Gaps, as after deduplication
+    write_knn_graph(str(tmp_path / "graph"), doc_ids, vectors, k=4, chunks_content_hash="abc")
+    graph = KnnGraph(str(tmp_path / "graph"))
+    
+    expected = brute_force(vectors, 4)
+    neighbours = graph.neighbours(104)
+    assert [doc_id for doc_id, _ in neighbours] == [int(doc_ids[row]) for row in expected[2]]
+    assert len(graph.neighbours(104, limit=2)) == 2
+    assert graph.neighbours(101) is None and 101 not in graph
+    assert graph.manifest['chunks_content_hash'] == "abc" and graph.k == 4
+    graph.close()
@@ -0,0 +1,51 @@
+"""
+Unit tests for the search_type="auto" query router
+"""
+
+from app.services.glossary import Glossary, mine_glossary
+from app.services.query_router import QueryRouter
+
+GLOSSARY = Glossary(mine_glossary([(0, "## 3.2 বল (Force)\nবল একটি ভেক্টর রাশি।")]))
+
+
+def test_route_picks_the_cheapest_likely_search():
+    router = QueryRouter(glossary=GLOSSARY, keyword_max_words=3)
+    
+    def route(query, **kwargs):
+        decision = router.route(query, **kwargs)
+        return decision['search_type'], decision['reason']
+    
+    assert route("F = ma") == ('keyword', 'formula')
+    assert route("বল কাকে বলে?") == ('keyword', 'glossary_term')
+    assert route("নিউটনের গতিসূত্র") == ('keyword', 'short_query')
+    assert route("How does friction depend on the normal reaction force") == ('vector', 'english_query')
+    assert route("ঘর্ষণ বল কীভাবে অভিলম্ব প্রতিক্রিয়ার উপর নির্ভর করে") == ('hybrid', 'question')
+    # A cached embedding makes hybrid search free, whatever the query
+    assert route("F = ma", cached_embedding=True) == ('hybrid', 'cached_embedding')
+
+
+def test_weak_first_stage_results_escalate():
+    router = QueryRouter(min_keyword_score=2.0, min_vector_score=0.5)
+    
+    assert router.is_weak('keyword', [])
+    assert router.is_weak('keyword', [{'score': 1.5}, {'score': 0.4}])
+    assert not router.is_weak('keyword', [{'score': 0.4}, {'score': 3.1}])
+    assert router.is_weak('vector', [{'score': 0.45}])
+    assert not router.is_weak('vector', [{'score': 0.8}])
+    # Merged cross-subject scores are normalized; the shard's raw score decides
+    assert router.is_weak('keyword', [{'score': 1.0, 'raw_score': 1.2}])
+    assert not router.is_weak('hybrid', [])
+
+
+def test_record_counts_routes_escalations_and_upstream_calls():
+    router = QueryRouter()
+    router.record({'search_type': 'keyword', 'reason': 'short_query'}, embedding_calls=0, weaviate_queries=1)
+    router.record({'search_type': 'keyword', 'reason': 'formula', 'escalated': True, 'effective': 'hybrid'},
+                  embedding_calls=1, weaviate_queries=2)
+    
+    stats = router.get_stats()
+    assert stats['searches'] == 2
+    assert stats['routes'] == {'keyword:short_query': 1, 'keyword:formula': 1}
+    assert stats['escalations'] == {'keyword': 1}
+    assert stats['embedding_calls_per_search'] == 0.5
+    assert stats['upstream_calls_per_search'] == 2.0
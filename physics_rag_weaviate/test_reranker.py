@@ -0,0 +1,61 @@
+"""
+Unit tests for the MMR reranker
+"""
+
+import time
+
+import numpy as np
+
+from app.services.reranker import ChunkVectors, Reranker
+
+
+def candidates(scores):
+    return [{'doc_id': i, 'score': score} for i, score in enumerate(scores)]
+
+
+def test_chunk_vectors_are_looked_up_by_doc_id():
+    vectors = ChunkVectors([7, 2], np.array([[1.0, 0.0], [0.0, 1.0]]))
+    assert len(vectors) == 2
+    assert vectors.get(7).tolist() == [1.0, 0.0]
+    assert vectors.get(2).dtype == np.float32
+    assert vectors.get(3) is None and vectors.get(99) is None and vectors.get(-1) is None
+
+
+def test_mmr_demotes_near_duplicates():
+    query = [1.0, 0.0, 0.0]
+    # A repeated header stub (0 and 1), then a different, slightly less relevant chunk
+    vectors = [np.array([1.0, 0.1, 0.0]), np.array([1.0, 0.1, 0.0]), np.array([0.7, 0.0, 0.7])]
+    texts = {0: "বল ও গতি", 1: "বল ও গতি", 2: "বল হলো বাহ্যিক কারণ"}
+    
+    reranker = Reranker(mmr_lambda=0.5, budget_ms=1000)
+    results = reranker.rerank("বল", query, candidates([1.0, 0.99, 0.9]), texts, vectors, limit=3)
+    assert [r['doc_id'] for r in results] == [0, 2, 1]
+    assert [r['rank'] for r in results] == [1, 2, 3]
+    assert all('rerank_score' in r for r in results)
+    
+    # Without diversity (or without every vector) the order is by relevance alone
+    plain = Reranker(mmr_lambda=1.0, budget_ms=1000)
+    assert [r['doc_id'] for r in plain.rerank("বল", query, candidates([1.0, 0.99, 0.9]), texts, vectors, 3)] == [0, 1, 2]
+    partial = plain.rerank("বল", query, candidates([1.0, 0.99, 0.9]), texts, [None] + vectors[1:], 2)
+    assert [r['doc_id'] for r in partial] == [0, 1]
+
+
+def test_rerank_stays_within_its_time_budget():
+    rng = np.random.default_rng(0)
+    count, dimension = 400, 768
+    vectors = list(rng.standard_normal((count, dimension)).astype(np.float32))
+    texts = {i: f"chunk {i} force and motion" for i in range(count)}
+    scores = np.linspace(1.0, 0.1, count).tolist()
+    
+    reranker = Reranker(budget_ms=5.0)
+    start = time.perf_counter()
+    results = reranker.rerank("force motion", vectors[0], candidates(scores), texts, vectors, limit=50)
+    assert (time.perf_counter() - start) * 1000 < 100
+    assert len(results) == 50 and len({r['doc_id'] for r in results}) == 50
+    
+    # A spent budget returns the first-stage order and is counted
+    spent = Reranker(budget_ms=0.0)
+    results = spent.rerank("force motion", vectors[0], candidates(scores), texts, vectors, limit=5)
+    assert [r['doc_id'] for r in results] == [0, 1, 2, 3, 4]
+    assert spent.get_stats()['over_budget'] == 1
+    assert spent.get_stats()['reranks'] == 1
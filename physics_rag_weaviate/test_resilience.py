@@ -0,0 +1,208 @@
+"""
+Unit tests for the Gemini scheduler and the upstream resilience guard
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.deadline import Deadline
+from app.services.rate_limiter import GeminiScheduler, Priority
+from app.services.resilience import (
+    CircuitBreaker, CircuitOpenError, UpstreamGuard, UpstreamTimeoutError, get_guard, get_resilience_stats,
+    set_pool_size
+)
+
+
+class RateLimited(Exception):
+    """Stand-in for a Gemini 429"""
+    code = 429
+
+
+class Upstream:
+    """Callable recording its calls, failing with the queued errors first"""
+    
+    def __init__(self, errors=(), delay: float = 0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            error = self.errors.pop(0) if self.errors else None
+        time.sleep(self.delay)
+        if error is not None:
+            raise error
+        return "ok"
+
+
+def make_guard(timeout: float = 0.5, max_attempts: int = 3) -> UpstreamGuard:
+    breaker = CircuitBreaker("gemini", failure_threshold=2, reset_timeout=30.0)
+    return UpstreamGuard("gemini.embed", breaker, timeout=timeout, max_attempts=max_attempts,
+                         backoff_base=0.0, backoff_max=0.0)
+
+
+def test_scheduler_timeout_when_budget_is_spent():
+    scheduler = GeminiScheduler(requests_per_minute=60, tokens_per_minute=100000, batch_reserve=0.0)
+    scheduler.acquire(requests=60)
+    scheduler.release()
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(requests=1, timeout=0.1)
+
+
+def test_batch_of_full_capacity_is_admitted():
+    scheduler = GeminiScheduler(requests_per_minute=100, tokens_per_minute=10 ** 9)
+    start = time.monotonic()
+    scheduler.acquire(Priority.BATCH, requests=100, timeout=3)
+    assert time.monotonic() - start < 0.5
+    # Batches are sized to leave the interactive reserve alone
+    assert scheduler.max_batch(Priority.BATCH) == 75
+    assert scheduler.max_batch(Priority.INTERACTIVE) == 100
+
+
+def test_scheduler_serves_interactive_before_batch():
+    scheduler = GeminiScheduler(requests_per_minute=600, tokens_per_minute=100000, batch_reserve=0.0)
+    scheduler.acquire(requests=600)  # Budget spent: the next request frees up in 0.1s
+    scheduler.release()
+    order = []
+    
+    def take(priority):
+        scheduler.acquire(priority, requests=1)
+        order.append(priority)
+        scheduler.release()
+    
+    batch = threading.Thread(target=take, args=(Priority.BATCH,))
+    batch.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=take, args=(Priority.INTERACTIVE,))
+    interactive.start()
+    batch.join(5)
+    interactive.join(5)
+    assert order == [Priority.INTERACTIVE, Priority.BATCH]
+
+
+def test_queueing_for_budget_is_not_a_timeout():
+    # 60 RPM: after a 60-text batch the next call waits ~1s for budget, twice the guard timeout
+    scheduler = GeminiScheduler(requests_per_minute=60, tokens_per_minute=100000, batch_reserve=0.0)
+    guard = make_guard(timeout=0.5)
+    upstream = Upstream()
+    
+    for requests in (60, 1):
+        admission = scheduler.admission(Priority.BATCH, requests=requests)
+        assert guard.call(upstream, admission=admission) == "ok"
+    
+    assert upstream.calls == 2
+    assert scheduler.get_stats()['wait_seconds']['batch'] > 0.5
+    assert guard.get_stats()['timeouts'] == 0
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+    # Interactive traffic is still served
+    assert guard.call(upstream, admission=scheduler.admission(Priority.INTERACTIVE)) == "ok"
+
+
+def test_rate_limits_are_retried_by_the_scheduler_only():
+    scheduler = GeminiScheduler(requests_per_minute=6000, tokens_per_minute=100000, max_backoff=0.05)
+    guard = make_guard()
+    upstream = Upstream(errors=[RateLimited("429 RESOURCE_EXHAUSTED")] * 2)
+    
+    assert guard.call(upstream, admission=scheduler.admission(max_attempts=3)) == "ok"
+    
+    assert upstream.calls == 3
+    stats = guard.get_stats()
+    assert stats['rate_limited'] == 2 and stats['retries'] == 0
+    assert guard.breaker.get_stats()['consecutive_failures'] == 0
+    assert scheduler.get_stats()['rate_limited'] == 2
+    assert scheduler.get_stats()['in_flight'] == 0
+
+
+def test_persistent_rate_limit_is_bounded_and_keeps_the_circuit_closed():
+    scheduler = GeminiScheduler(requests_per_minute=6000, tokens_per_minute=100000, max_backoff=0.01)
+    guard = make_guard(max_attempts=3)
+    upstream = Upstream(errors=[RateLimited("429")] * 20)
+    
+    for _ in range(3):
+        with pytest.raises(RateLimited):
+            guard.call(upstream, admission=scheduler.admission(max_attempts=3))
+    
+    # 3 attempts per call, not scheduler attempts x guard attempts
+    assert upstream.calls == 9
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_upstream_still_times_out_and_opens_the_circuit():
+    scheduler = GeminiScheduler(requests_per_minute=6000, tokens_per_minute=100000)
+    guard = make_guard(timeout=0.05, max_attempts=2)
+    upstream = Upstream(delay=0.2)
+    
+    with pytest.raises(UpstreamTimeoutError):
+        guard.call(upstream, admission=scheduler.admission())
+    assert guard.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        guard.call(upstream, admission=scheduler.admission())
+    
+    # Timed-out requests release their budget when they actually finish
+    time.sleep(0.3)
+    assert scheduler.get_stats()['in_flight'] == 0
+
+
+def test_waiting_for_a_worker_is_not_a_timeout():
+    set_pool_size(1)
+    try:
+        guard = make_guard(timeout=0.2)
+        upstream = Upstream(delay=0.15)
+        results = []
+        callers = [threading.Thread(target=lambda: results.append(guard.call(upstream))) for _ in range(2)]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join(5)
+    finally:
+        set_pool_size(32)
+    
+    # The second call queued behind the first for longer than the timeout, but ran within it
+    assert results == ["ok", "ok"]
+    assert guard.get_stats()['timeouts'] == 0
+
+
+def test_abandoned_stage_stops_waiting_for_a_backed_off_scheduler():
+    scheduler = GeminiScheduler(requests_per_minute=6000, tokens_per_minute=100000)
+    for _ in range(4):
+        scheduler.release(rate_limited=True)  # Backing off for several seconds
+    guard = make_guard()
+    upstream = Upstream()
+    pool = ThreadPoolExecutor(max_workers=1)
+    
+    async def embed():
+        deadline = Deadline(0.2)
+        await deadline.run(guard.call, upstream, admission=scheduler.admission(), executor=pool)
+    
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(embed())
+    # The worker gave up with the stage instead of sitting out the backoff, so the pool is free again
+    assert pool.submit(lambda: "free").result(timeout=1) == "free"
+    assert time.monotonic() - start < 1.0
+    assert upstream.calls == 0
+    pool.shutdown()
+
+
+def test_registry_is_keyed_by_configuration():
+    guard = get_guard("test.op", "test-dependency", failure_threshold=3, timeout=1.0, max_attempts=2)
+    assert get_guard("test.op", "test-dependency", failure_threshold=3, timeout=1.0, max_attempts=2) is guard
+    
+    other = get_guard("test.op", "test-dependency", failure_threshold=7, timeout=2.0, max_attempts=1)
+    assert other is not guard
+    assert other.timeout == 2.0 and other.max_attempts == 1
+    assert other.breaker is not guard.breaker
+    assert other.breaker.failure_threshold == 7
+    
+    # Same breaker configuration, other guard settings: the dependency's breaker is shared
+    third = get_guard("test.op", "test-dependency", failure_threshold=3, timeout=5.0)
+    assert third is not guard and third.breaker is guard.breaker
+    
+    calls = get_resilience_stats()['calls']
+    assert {"test.op#1", "test.op#2", "test.op#3"} <= set(calls)
@@ -0,0 +1,52 @@
+"""
+Unit tests for the in-process cache and its shared SQLite tier
+"""
+
+import asyncio
+import time
+
+from app.services.cache import TTLCache
+from app.services.shared_cache import SharedCache
+
+
+def test_values_round_trip_between_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    writer = TTLCache(backing=SharedCache(path, "embeddings"))
+    reader = TTLCache(backing=SharedCache(path, "embeddings"))
+    
+    writer.set("বল", [0.25, -1.5])
+    writer.set("answer", {'response': "বল হলো ভর ও ত্বরণের গুণফল", 'sources': []})
+    
+    assert reader.get("বল") == [0.25, -1.5]
+    assert reader.get("answer")['response'] == "বল হলো ভর ও ত্বরণের গুণফল"
+    assert reader.get_stats()['shared_hits'] == 2
+    # Namespaces stay apart in one file
+    assert SharedCache(path, "responses").get("বল") is None
+
+
+def test_shared_hit_keeps_its_original_expiry(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    writer = TTLCache(ttl=0.5, backing=SharedCache(path, "responses", ttl=0.5))
+    reader = TTLCache(ttl=0.5, backing=SharedCache(path, "responses", ttl=0.5))
+    
+    writer.set("q", "answer")
+    time.sleep(0.3)
+    assert reader.get("q") == "answer"
+    time.sleep(0.3)
+    # The local copy expires with the shared entry instead of living another full TTL
+    assert "q" not in reader
+    assert reader.get("q") is None
+
+
+def test_async_access_reads_and_writes_the_shared_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    writer = TTLCache(backing=SharedCache(path, "embeddings"))
+    reader = TTLCache(backing=SharedCache(path, "embeddings"))
+    
+    async def exchange():
+        await writer.set_async("বল", [1.0, 2.0])
+        return await reader.get_async("বল"), await reader.get_async("ভর")
+    
+    assert asyncio.run(exchange()) == ([1.0, 2.0], None)
+    stats = reader.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
@@ -0,0 +1,83 @@
+"""
+Unit tests for prefix suggestions over chapters, sections and glossary terms
+"""
+
+import unicodedata
+
+import pytest
+
+from app.services.chunk_store import ChunkStore, split_chunks, write_chunk_store
+from app.services.glossary import Glossary, mine_glossary
+from app.services.suggestions import SuggestionIndex
+
+BOOK = """*****
+## অধ্যায় 2: গতি
+
+## 2.1 বেগ (Velocity)
+
+বেগ হলো নির্দিষ্ট দিকে দ্রুতি।
+*****
+*****
+বেগের পরিবর্তনের হার। একে ত্বরণ (Acceleration) বলে।
+*****
+*****
+## 2.2 সরল স্পন্দন গতি
+
+দোলকের গতি একটি পর্যাবৃত্ত গতি।
+"""
+
+
+def entry(text, weight, names, kind='concept', section=None):
+    return {'text': text, 'kind': kind, 'doc_id': 0, 'section': section, 'weight': weight, 'names': names}
+
+
+@pytest.fixture
+def store(tmp_path):
+    chunks = split_chunks(BOOK)
+    write_chunk_store(str(tmp_path / "store"), chunks, source="Physics")
+    store = ChunkStore(str(tmp_path / "store"))
+    yield store
+    store.close()
+
+
+def test_prefix_matches_rank_by_weight_and_initial_match():
+    index = SuggestionIndex([
+        entry("বল (Force)", 3, ["বল", "Force"]),
+        entry("বলের ভ্রামক (Moment)", 5, ["বলের ভ্রামক", "Moment"]),
+        entry("ঘর্ষণ বল (Friction)", 8, ["ঘর্ষণ বল", "Friction"]),
+    ])
+    
+    # The inner match ("বল" in "ঘর্ষণ বল") counts half its weight
+    results = index.suggest("বল")
+    assert [r['text'] for r in results] == ["বলের ভ্রামক (Moment)", "ঘর্ষণ বল (Friction)", "বল (Force)"]
+    assert results[1]['score'] == 4.0
+    assert [r['text'] for r in index.suggest("FOR")] == ["বল (Force)"]
+    assert len(index.suggest("বল", limit=1)) == 1
+    assert index.suggest("?!") == [] and index.suggest("momentum") == []
+    assert index.get_stats()['lookups'] == 5
+
+
+def test_prefix_is_normalized_before_matching():
+    # "য়" stored precomposed and typed as য + nukta still match
+    composed = "\u0985\u09a7\u09cd\u09af\u09be\u09df"
+    decomposed = unicodedata.normalize('NFD', composed)
+    assert decomposed != composed
+    index = SuggestionIndex([entry(f"{composed} 2: গতি", 2, ["গতি", f"{composed} 2"], kind='chapter')])
+    assert [r['text'] for r in index.suggest(decomposed)] == [f"{composed} 2: গতি"]
+    # Bengali digits match ASCII section numbers
+    assert index.suggest(f"{decomposed} ২")[0]['kind'] == 'chapter'
+
+
+def test_build_merges_concepts_into_their_sections(store):
+    glossary = Glossary(mine_glossary(store.iter_chunks()))
+    index = SuggestionIndex.build(store, glossary)
+    kinds = {r['text']: r['kind'] for r in index.entries}
+    
+    assert kinds["অধ্যায় 2: গতি"] == 'chapter'
+    # The Velocity concept titles section 2.1, so it boosts it instead of repeating it
+    assert kinds["2.1 বেগ (Velocity)"] == 'section' and "বেগ (Velocity)" not in kinds
+    assert kinds["ত্বরণ (Acceleration)"] == 'concept'
+    assert index.suggest("veloc")[0]['text'] == "2.1 বেগ (Velocity)"
+    assert index.suggest("2.2")[0]['text'] == "2.2 সরল স্পন্দন গতি"
+    # Chapter and section titles sharing a word both complete it
+    assert {r['kind'] for r in index.suggest("গতি")} == {'chapter', 'section'}
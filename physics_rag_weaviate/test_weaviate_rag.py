@@ -82,7 +82,8 @@ async def test_weaviate_rag_service():
         print(f"Query: {test_query}")
         
         # Test hybrid search
-        search_results = await rag_service.search(test_query, search_type="hybrid", top_k=3)
+        search_results = await rag_service.search(test_query, search_type="hybrid", top_k=3,
+                                                  include_content=True)
         print(f"Found {len(search_results)} hybrid search results")
         
         for i, result in enumerate(search_results, 1):
@@ -90,7 +91,8 @@ async def test_weaviate_rag_service():
             score = result.get('score', 0.0)
             print(f"  Score: {score:.4f}" if score is not None else "  Score: N/A")
             print(f"  Search Type: {result.get('search_type', 'hybrid')}")
-            print(f"  Content preview: {result['content'][:100]}...")
+            print(f"  Content preview: {result['preview'][:100]}...")
+            print(f"  Full content: {len(result['content'])} characters")
         
         # Test chat functionality
         print("\n6️⃣ Testing Chat Functionality...")
@@ -182,7 +184,7 @@ def print_setup_instructions():
     print("   - Google Gemini API key ✅")
     print("   - Weaviate Cloud URL and API key ✅")
     print("\n2. Physics content:")
-    print("   - Physics/combined_physics.md")
+    print("   - Physics/chapter_*.md")
     print("\n3. Dependencies:")
     print("   - All requirements installed ✅")
     print("\n4. Ready to test:")
@@ -0,0 +1,234 @@
+"""
+Offline bulk question answering for the Physics RAG System with Weaviate
+
+Streams questions from a JSONL or CSV file through the same pipeline as
+/chat (in-process, at batch priority so student traffic always wins the
+Gemini quota) and appends one NDJSON result per question. Progress is
+checkpointed, and re-running the same command resumes where it stopped.
+
+Usage:
+    python -m tools.batch_answer questions.jsonl -o answers.ndjson
+    python -m tools.batch_answer exam_bank.csv -o answers.ndjson --concurrency 16
+
+Input rows need a question in `question` (or `message`) and may carry an
+`id`; rows without one are identified by their position in the file.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Set, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.services.rag_service import WeaviateRAGService
+from app.services.rate_limiter import Priority
+
+logger = logging.getLogger("batch_answer")
+
+
+def read_questions(path: Path) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Stream (id, question, row) tuples from a JSONL or CSV file
+    
+    Args:
+        path (Path): Input file
+    
+    Yields:
+        Tuple[str, str, Dict]: Question id, question text and the raw row
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        
+        for position, row in enumerate(rows):
+            question = (row.get('question') or row.get('message') or '').strip()
+            if not question:
+                logger.warning(f"Skipping row {position}: no question")
+                continue
+            yield str(row.get('id') or position), question, row
+
+
+def load_finished(output_path: Path, retry_failed: bool) -> Set[str]:
+    """
+    Collect ids already answered in the output file
+    
+    A line cut short by a crash is removed so the file stays valid NDJSON.
+    
+    Args:
+        output_path (Path): NDJSON results file
+        retry_failed (bool): Treat results with an error as unfinished
+    
+    Returns:
+        Set[str]: Ids that do not need to be processed again
+    """
+    finished: Set[str] = set()
+    if not output_path.exists():
+        return finished
+    
+    valid_bytes = 0
+    with open(output_path, 'rb') as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            if not raw.endswith(b'\n'):
+                break
+            valid_bytes += len(raw)
+            if not (retry_failed and record.get('error')):
+                finished.add(str(record['id']))
+    
+    if valid_bytes < output_path.stat().st_size:
+        logger.warning(f"Truncating partial record at the end of {output_path}")
+        with open(output_path, 'r+b') as f:
+            f.truncate(valid_bytes)
+    
+    return finished
+
+
+def write_checkpoint(path: Path, state: Dict) -> None:
+    """Atomically replace the checkpoint file"""
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def answer_questions(args: argparse.Namespace) -> Dict:
+    """
+    Run the batch job
+    
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    
+    Returns:
+        Dict: Final job statistics
+    """
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+    checkpoint_path = Path(args.checkpoint or f"{args.output}.checkpoint.json")
+    
+    finished = load_finished(output_path, args.retry_failed)
+    if finished:
+        logger.info(f"Resuming: {len(finished)} questions already answered")
+    
+    service = WeaviateRAGService(get_settings())
+    state = {
+        'input': str(input_path),
+        'output': str(output_path),
+        'previously_finished': len(finished),
+        'processed': 0,
+        'succeeded': 0,
+        'failed': 0,
+        'started_at': time.time(),
+        'updated_at': time.time()
+    }
+    
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    output = open(output_path, 'a', encoding='utf-8')
+    
+    def record_result(record: Dict) -> None:
+        # Single event loop thread: writes never interleave
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        output.flush()
+        state['processed'] += 1
+        state['failed' if record.get('error') else 'succeeded'] += 1
+        
+        if state['processed'] % args.checkpoint_every == 0:
+            os.fsync(output.fileno())
+            state['updated_at'] = time.time()
+            write_checkpoint(checkpoint_path, state)
+            rate = state['processed'] / max(1e-6, state['updated_at'] - state['started_at'])
+            logger.info(f"{state['processed']} answered ({state['failed']} failed), {rate:.2f} questions/s")
+    
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            
+            question_id, question, row = item
+            try:
+                result = await service.chat(
+                    question,
+                    include_sources=not args.no_sources,
+                    search_type=args.search_type,
+                    top_k=args.top_k,
+                    priority=Priority.BATCH,
+                    deadline=service.new_deadline(args.budget_ms)
+                )
+                record = {'id': question_id, 'question': question, **result}
+            except Exception as e:
+                record = {'id': question_id, 'question': question, 'error': str(e)}
+            
+            if args.keep_fields:
+                record['input'] = {key: row.get(key) for key in args.keep_fields}
+            record_result(record)
+            queue.task_done()
+    
+    workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+    try:
+        for question_id, question, row in read_questions(input_path):
+            if question_id in finished:
+                continue
+            await queue.put((question_id, question, row))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        output.flush()
+        os.fsync(output.fileno())
+        output.close()
+        state['updated_at'] = time.time()
+        state['scheduler'] = service.scheduler.get_stats()
+        write_checkpoint(checkpoint_path, state)
+        service.close()
+    
+    return state
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Answer a file of questions with the Physics RAG pipeline")
+    parser.add_argument("input", help="Questions file (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", required=True, help="NDJSON results file (appended to)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions processed at once")
+    parser.add_argument("--search-type", choices=["hybrid", "vector", "keyword"], default="hybrid")
+    parser.add_argument("--top-k", type=int, default=None, help="Search results per question")
+    parser.add_argument("--no-sources", action="store_true", help="Omit source information")
+    parser.add_argument("--budget-ms", type=int, default=60000, help="Latency budget per question")
+    parser.add_argument("--checkpoint-every", type=int, default=25, help="Results between checkpoints")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run questions whose result has an error")
+    parser.add_argument("--keep-fields", nargs="*", default=[], help="Input columns copied into each result")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the batch answering job"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    state = asyncio.run(answer_questions(args))
+    elapsed = state['updated_at'] - state['started_at']
+    print(f"Answered {state['processed']} questions in {elapsed:.1f}s "
+          f"({state['succeeded']} succeeded, {state['failed']} failed)")
+    return 0 if state['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
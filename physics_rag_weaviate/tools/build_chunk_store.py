@@ -0,0 +1,180 @@
+"""
+Build the memory-mapped chunk store for the Physics RAG System
+
+Writes data/chunk_store/ (text.bin, .npy metadata columns, manifest.json)
+from the book's chapter files (PHYSICS_BOOK_DIR/chapter_*.md), or converts
+a {doc_id: text} pickle from before the store existed. The service reads chunk texts from the store
+instead of re-chunking the book, and every worker process shares its
+pages through the OS page cache. The concept glossary is mined from the
+new store and written alongside it.
+
+The build is incremental: each chapter is chunked on its own, stub chunks
+(little more than a heading) are merged into the chunk they introduce,
+and the result is cached by the chapter's content hash in
+CORPUS_CACHE_DIR, so only changed chapters are chunked again, in a
+process pool across chapters and books. Near-duplicates are then dropped
+across the whole book. The store manifest records every chapter file and
+hash; when none changed the store is left as it is. Books of other
+subjects (SUBJECT_BOOKS) get a store of their own. The report of what was
+merged and dropped goes to DEDUP_REPORT_PATH.
+
+A rewritten store has a new content hash, and the service only reads
+chunk texts from it once the collection is rebuilt from it: run
+tools/reindex.py afterwards.
+
+Usage:
+    python -m tools.build_chunk_store
+    python -m tools.build_chunk_store --force --workers 4
+    python -m tools.build_chunk_store --from-pickle path/to/old_doc_store.pkl -o data/chunk_store
+"""
+
+import argparse
+import json
+import logging
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.services.chunk_store import ChunkStore, write_chunk_store
+from app.services.corpus import CorpusBuilder
+from app.services.dedup import dedup_chunks
+from app.services.glossary import mine_glossary, write_glossary
+
+logger = logging.getLogger("build_chunk_store")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the memory-mapped chunk store")
+    parser.add_argument("--from-pickle", help="Legacy {doc_id: text} pickle instead of the chapter files")
+    parser.add_argument("-o", "--output", default=settings.CHUNK_STORE_PATH, help="Store directory of the default subject")
+    parser.add_argument("--subject", action="append", help="Only build these subjects' books (repeatable)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes chunking changed chapters")
+    parser.add_argument("--force", action="store_true", help="Rewrite stores even if no chapter changed")
+    parser.add_argument("--no-cache", action="store_true", help="Chunk every chapter again")
+    parser.add_argument("--glossary", default=settings.GLOSSARY_PATH,
+                        help="Concept glossary file (empty to skip it)")
+    parser.add_argument("--no-dedup", action="store_true", help="Store every chunk as split")
+    parser.add_argument("--min-chars", type=int, default=settings.MIN_CHUNK_CHARS,
+                        help="Text besides headings a chunk needs to stand alone")
+    parser.add_argument("--similarity", type=float, default=settings.DEDUP_SIMILARITY,
+                        help="Estimated Jaccard similarity at which a chunk is a near-duplicate")
+    parser.add_argument("--report", default=settings.DEDUP_REPORT_PATH,
+                        help="Where to write the deduplication report (empty to skip it)")
+    args = parser.parse_args(argv)
+    if args.no_dedup:
+        # Nothing is a stub and no similarity exceeds 1
+        args.min_chars, args.similarity = 0, 1.1
+    return args
+
+
+def is_up_to_date(path: str, corpus: dict) -> bool:
+    """True if the store at path was built from exactly these chapter files and settings"""
+    if not ChunkStore.exists(path):
+        return False
+    with open(Path(path) / 'manifest.json', 'r', encoding='utf-8') as f:
+        return json.load(f).get('corpus') == corpus
+
+
+def write_report(path: str, report: dict) -> None:
+    """Write a deduplication report"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"Wrote deduplication report {path}")
+
+
+def describe_source(path: str) -> str:
+    """Where chunks came from, relative to the repository root when inside it"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(get_settings().BASE_DIR.parent.resolve()).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def store_from_pickle(args: argparse.Namespace) -> Path:
+    """Convert a legacy {doc_id: text} pickle, deduplicated like the chapter build"""
+    # Only use this on pickles you created yourself: unpickling can execute arbitrary code
+    with open(args.from_pickle, 'rb') as f:
+        doc_store = pickle.load(f)
+    doc_ids = sorted(doc_store)
+    chunks, doc_ids, report = dedup_chunks([doc_store[doc_id] for doc_id in doc_ids], doc_ids,
+                                           min_chars=args.min_chars, threshold=args.similarity)
+    if args.report:
+        write_report(args.report, report)
+    return write_chunk_store(args.output, chunks, doc_ids=doc_ids, source=describe_source(args.from_pickle))
+
+
+def describe_store(path: Path) -> str:
+    """One-line summary of a store, timing how long it takes to open"""
+    start = time.perf_counter()
+    store = ChunkStore(path)
+    opened_ms = (time.perf_counter() - start) * 1000
+    stats = store.get_stats()
+    chapters = {store.metadata(doc_id)['chapter'] for doc_id, _ in store.iter_chunks()}
+    store.close()
+    return (f"{stats['chunks']} chunks, {stats['text_bytes'] / 1024:.0f} KiB of text, "
+            f"{len(chapters)} chapters, opened in {opened_ms:.1f}ms (content {stats['content_hash'][:12]})")
+
+
+def main(argv=None) -> int:
+    """Build the stores and print their statistics"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    settings = get_settings()
+    
+    if args.from_pickle:
+        stores = {settings.DEFAULT_SUBJECT: store_from_pickle(args)}
+    else:
+        books = settings.get_subject_books()
+        books[settings.DEFAULT_SUBJECT] = (books[settings.DEFAULT_SUBJECT][0], args.output)
+        if args.subject:
+            unknown = set(args.subject) - set(books)
+            if unknown:
+                logger.error(f"No book configured for {', '.join(sorted(unknown))} (see SUBJECT_BOOKS)")
+                return 1
+            books = {subject: book for subject, book in books.items() if subject in args.subject}
+        
+        builder = CorpusBuilder(args.min_chars, args.similarity,
+                                cache_dir=None if args.no_cache else settings.CORPUS_CACHE_DIR,
+                                workers=args.workers)
+        built = builder.build({subject: book_dir for subject, (book_dir, _) in books.items()})
+        
+        stores = {}
+        for subject, book in built.items():
+            book_dir, path = books[subject]
+            if not args.force and is_up_to_date(path, book['corpus']):
+                logger.info(f"{subject}: no chapter changed, keeping {path}")
+                continue
+            stores[subject] = write_chunk_store(path, book['chunks'], doc_ids=book['doc_ids'],
+                                                source=describe_source(book_dir), corpus=book['corpus'])
+            report_path = args.report if subject == settings.DEFAULT_SUBJECT else \
+                str(Path(path).with_name(f"{Path(path).name}_dedup_report.json"))
+            if report_path:
+                write_report(report_path, book['report'])
+        logger.info(f"Chapters: {builder.get_stats()}")
+    
+    default_store = stores.get(settings.DEFAULT_SUBJECT)
+    if default_store is not None and args.glossary:
+        store = ChunkStore(default_store)
+        write_glossary(args.glossary, mine_glossary(store.iter_chunks()), store.manifest['content_hash'])
+        store.close()
+    for subject, path in stores.items():
+        logger.info(f"{subject}: {describe_store(path)}")
+    if stores:
+        logger.info("Reindex (python -m tools.reindex) so the collection is built from the new store")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
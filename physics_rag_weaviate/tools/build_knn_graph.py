@@ -0,0 +1,112 @@
+"""
+Build the chunk k-NN graph for the Physics RAG System
+
+Computes the KNN_GRAPH_K nearest neighbours of every chunk from the stored
+vectors (no embedding calls) and writes them to KNN_GRAPH_PATH. The API then
+answers /similar by doc_id, and for text that is exactly a stored chunk,
+with an O(k) lookup. Vectors come from an index snapshot, or are exported
+from the live collection. Rebuild the graph after the chunks or the
+embedding model change; the service ignores a graph that no longer matches.
+
+Usage:
+    python -m tools.build_knn_graph
+    python -m tools.build_knn_graph --snapshot data/snapshots/PhysicsChunk-v1 -k 20
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.services.chunk_store import ChunkStore, chunk_hash
+from app.services.index_snapshot import IndexSnapshot
+from app.services.index_versions import IndexPointer
+from app.services.knn_graph import write_knn_graph
+from app.services.search_service import WeaviateSearchService
+
+logger = logging.getLogger("build_knn_graph")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Precompute the nearest neighbours of every chunk")
+    parser.add_argument("--snapshot", default=settings.INDEX_SNAPSHOT_PATH,
+                        help="Read vectors from this index snapshot (default: INDEX_SNAPSHOT_PATH, "
+                             "else export them from the live collection)")
+    parser.add_argument("-k", type=int, default=settings.KNN_GRAPH_K, help="Neighbours per chunk")
+    parser.add_argument("--block-size", type=int, default=1024, help="Chunks compared per matrix product")
+    parser.add_argument("-o", "--output", default=settings.KNN_GRAPH_PATH, help="Graph directory")
+    return parser.parse_args(argv)
+
+
+def matches_chunk_store(store: ChunkStore, doc_ids, texts) -> bool:
+    """True if every exported object has the chunk store's text for its doc_id"""
+    if len(doc_ids) != len(store):
+        return False
+    for doc_id, text in zip(doc_ids, texts):
+        metadata = store.metadata(int(doc_id))
+        if metadata is None or metadata['hash'] != chunk_hash(text):
+            return False
+    return True
+
+
+def main(argv=None) -> int:
+    """Build the graph; exit non-zero if there are no vectors"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    settings = get_settings()
+    
+    if IndexSnapshot.exists(args.snapshot):
+        snapshot = IndexSnapshot(args.snapshot)
+        try:
+            write_knn_graph(args.output, snapshot.chunks.doc_ids, np.asarray(snapshot.vectors), args.k,
+                            chunks_content_hash=snapshot.manifest['chunks_content_hash'],
+                            embedding_model=snapshot.embedding_model, block_size=args.block_size)
+        finally:
+            snapshot.close()
+        return 0
+    
+    # The collection the index pointer serves (a PhysicsChunk_v{n} after a reindex)
+    collection = IndexPointer(settings.INDEX_POINTER_PATH, settings.WEAVIATE_COLLECTION).read()['collection']
+    search = WeaviateSearchService(settings.WEAVIATE_URL, settings.WEAVIATE_API_KEY,
+                                   collection_name=collection,
+                                   use_local=settings.USE_LOCAL_WEAVIATE,
+                                   connection_config=settings.get_weaviate_connection_config())
+    try:
+        doc_ids, texts, vectors = search.export_documents()
+    finally:
+        search.close()
+    if not vectors:
+        logger.error(f"No vectors in {collection}; index the corpus first")
+        return 1
+    
+    # Tie the graph to the chunk store, so the service can tell when it is stale
+    content_hash = ''
+    if ChunkStore.exists(settings.CHUNK_STORE_PATH):
+        store = ChunkStore(settings.CHUNK_STORE_PATH)
+        try:
+            if matches_chunk_store(store, doc_ids, texts):
+                content_hash = store.manifest['content_hash']
+            else:
+                logger.warning("The collection holds other chunks than the chunk store; "
+                               "the service will not use this graph while that store is in place")
+        finally:
+            store.close()
+    
+    write_knn_graph(args.output, doc_ids, np.asarray(vectors, dtype=np.float32), args.k,
+                    chunks_content_hash=content_hash, embedding_model=settings.EMBEDDING_MODEL,
+                    block_size=args.block_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Export and restore index snapshots for the Physics RAG System
+
+A snapshot holds every object of a collection (text, doc_id, chapter and
+section metadata) with its vector, the embedding model and dimension, and
+a manifest hash. Restoring one rebuilds the collection with bulk batch
+inserts and no embedding calls, e.g. on a new Weaviate node or after
+reset_collection. Set INDEX_SNAPSHOT_PATH to have /initialize restore it.
+
+Usage:
+    python -m tools.index_snapshot export -o data/snapshots/PhysicsChunk-v1
+    python -m tools.index_snapshot import data/snapshots/PhysicsChunk-v1
+    python -m tools.index_snapshot import data/snapshots/PhysicsChunk-v1 --backend local
+    python -m tools.index_snapshot inspect data/snapshots/PhysicsChunk-v1
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.services.index_snapshot import IndexSnapshot, SnapshotMismatch, export_snapshot
+from app.services.local_backend import LocalWeaviateClient
+from app.services.search_service import WeaviateSearchService
+
+logger = logging.getLogger("index_snapshot")
+
+
+def connect(collection_name: str, backend: str = 'weaviate') -> WeaviateSearchService:
+    """Search service for the configured Weaviate instance or a fresh local backend"""
+    settings = get_settings()
+    if backend == 'local':
+        return WeaviateSearchService(settings.WEAVIATE_URL, "", collection_name=collection_name,
+                                     use_local=True, client=LocalWeaviateClient())
+    return WeaviateSearchService(settings.WEAVIATE_URL, settings.WEAVIATE_API_KEY,
+                                 collection_name=collection_name,
+                                 use_local=settings.USE_LOCAL_WEAVIATE,
+                                 connection_config=settings.get_weaviate_connection_config())
+
+
+def run_export(args: argparse.Namespace) -> int:
+    """Export the collection to a snapshot directory"""
+    settings = get_settings()
+    output = args.output or str(settings.DATA_DIR / "snapshots" /
+                                f"{args.collection}-{time.strftime('%Y%m%d-%H%M%S')}")
+    search = connect(args.collection)
+    try:
+        start = time.perf_counter()
+        path = export_snapshot(search, output, settings.EMBEDDING_MODEL)
+        logger.info(f"Exported {args.collection} to {path} in {time.perf_counter() - start:.1f}s")
+    finally:
+        search.close()
+    return 0
+
+
+def run_import(args: argparse.Namespace) -> int:
+    """Restore a snapshot into Weaviate or the local backend"""
+    settings = get_settings()
+    snapshot = IndexSnapshot(args.snapshot)
+    try:
+        if not args.no_verify:
+            snapshot.verify()
+        if not args.force:
+            snapshot.check_compatible(settings.EMBEDDING_MODEL)
+        
+        collection = args.collection or snapshot.manifest['collection']
+        search = connect(collection, args.backend)
+        try:
+            start = time.perf_counter()
+            restored = snapshot.restore(search)
+            total = search.get_collection_stats().get('total_documents', 0)
+            logger.info(f"Restored {restored} objects into {args.backend}/{collection} "
+                        f"in {time.perf_counter() - start:.2f}s ({total} in collection)")
+        finally:
+            search.close()
+    except SnapshotMismatch as e:
+        logger.error(f"Refusing to restore {args.snapshot}: {str(e)}")
+        return 1
+    finally:
+        snapshot.close()
+    return 0
+
+
+def run_inspect(args: argparse.Namespace) -> int:
+    """Print the manifest and check the contents"""
+    snapshot = IndexSnapshot(args.snapshot)
+    try:
+        stats = snapshot.get_stats()
+        try:
+            snapshot.verify()
+            stats['verified'] = True
+        except SnapshotMismatch as e:
+            stats['verified'] = False
+            stats['error'] = str(e)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0 if stats['verified'] else 1
+    finally:
+        snapshot.close()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Export and restore index snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    export = commands.add_parser("export", help="Export a collection with its vectors")
+    export.add_argument("--collection", default=settings.WEAVIATE_COLLECTION)
+    export.add_argument("-o", "--output", help="Snapshot directory (default: data/snapshots/<collection>-<time>)")
+    export.set_defaults(handler=run_export)
+    
+    restore = commands.add_parser("import", help="Restore a snapshot without re-embedding")
+    restore.add_argument("snapshot", help="Snapshot directory")
+    restore.add_argument("--collection", help="Target collection (default: the exported one)")
+    restore.add_argument("--backend", choices=["weaviate", "local"], default="weaviate",
+                         help="'local' restores into an in-memory backend, e.g. to time or check a snapshot")
+    restore.add_argument("--no-verify", action="store_true", help="Skip the content hash check")
+    restore.add_argument("--force", action="store_true", help="Restore even if the embedding model differs")
+    restore.set_defaults(handler=run_import)
+    
+    inspect = commands.add_parser("inspect", help="Show and verify a snapshot")
+    inspect.add_argument("snapshot", help="Snapshot directory")
+    inspect.set_defaults(handler=run_inspect)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the selected command"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
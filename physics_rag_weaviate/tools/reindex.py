@@ -0,0 +1,73 @@
+"""
+Blue/green reindexing for the Physics RAG System
+
+Builds the next versioned collection (PhysicsChunk_v{n}) next to the live
+one, validates it with smoke queries, then points the WEAVIATE_COLLECTION
+alias at it (or the pointer file with INDEX_POINTER=file). Running API
+workers follow the alias within INDEX_POINTER_REFRESH seconds, so
+queries never hit an empty or half-built collection, and answer caches
+start fresh under the new index version. Earlier versions are kept for
+rollback (INDEX_KEEP_VERSIONS).
+
+Usage:
+    python -m tools.reindex
+    python -m tools.reindex --status
+    python -m tools.reindex --rollback
+    python -m tools.reindex --rollback 3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.settings import get_settings
+from app.services.rag_service import WeaviateRAGService
+
+logger = logging.getLogger("reindex")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description="Rebuild the index as a new version and swap to it")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--status", action="store_true", help="Show the live version and the ones kept")
+    action.add_argument("--rollback", nargs="?", type=int, const=-1, metavar="VERSION",
+                        help="Serve an earlier version (default: the newest one older than the live one)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Reindex, roll back or report; exit non-zero if a build fails validation"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    service = WeaviateRAGService(get_settings())
+    try:
+        service.refresh_index()
+        if args.rollback is not None:
+            try:
+                service.rollback_index(None if args.rollback < 0 else args.rollback)
+            except ValueError as e:
+                logger.error(str(e))
+                return 1
+            result = service.get_index_status()
+        elif args.status:
+            result = service.get_index_status()
+        else:
+            result = asyncio.run(service.reindex())
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 1 if result.get('state') == 'failed' else 0
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())